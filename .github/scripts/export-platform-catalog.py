@@ -3,19 +3,43 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
+import math
 import os
 import re
+import sys
 import argparse
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any
 from urllib.error import HTTPError
 from urllib.parse import urlencode
-from urllib.request import Request, urlopen
-
-import yaml
 
 ROOT = Path(__file__).resolve().parent.parent.parent
+REF_HELPERS_DIR = ROOT / "ci" / "run" / "ref"
+if str(REF_HELPERS_DIR) not in sys.path:
+    sys.path.insert(0, str(REF_HELPERS_DIR))
+
+from api_client import DEFAULT_POOL, get, get_json, github_headers, use_fixtures  # noqa: E402
+from export_journal import ExportJournal, StagedOutputs, default_journal_path  # noqa: E402
+from fetch_pool import DEFAULT_MAX_WORKERS, DEFAULT_PER_HOST, FetchPool, completed_future, url_host  # noqa: E402
+from runner_index import RunnerCapabilityIndex, RunnerRecord  # noqa: E402
+from selection_policy import (  # noqa: E402
+    SelectionPolicy,
+    compile_selection_policy,
+    infer_platform_os,
+    is_moving_target_token,
+    major_sort_key,
+    selection_major_version,
+    selection_section_for_runtime,
+    selection_version_token,
+    version_sort_key,
+)
+from yaml_cache import load_yaml_file  # noqa: E402
+from yaml_compat import safe_dump as yaml_safe_dump  # noqa: E402
+from yaml_stream import CatalogDiff, write_catalog  # noqa: E402
+
 CONTAINER_INTENT = ROOT / "ci" / "deps" / "platform-intent.yaml"
 PLATFORM_CATALOG = ROOT / "ci" / "deps" / "platform-catalog.yaml"
 PLATFORM_RELEASE_OVERRIDES = ROOT / "ci" / "deps" / "platform-release-overrides.yaml"
@@ -25,10 +49,20 @@ DISCOVERED_RELEASES_OUTPUT = ROOT / ".github" / "data" / "platform-releases-disc
 HOST_RUNNERS_DISCOVERED = ROOT / ".github" / "data" / "host-runners-discovered.yml"
 DOCKER_AVAILABILITY_OUTPUT = ROOT / ".github" / "data" / "docker-availability-raw.yml"
 PLATFORM_AVAILABILITY_OUTPUT = ROOT / ".github" / "data" / "platform-availability.yml"
-REGISTRY_BASE = "https://registry-1.docker.io"
-TOKEN_URL = "https://auth.docker.io/token"
-DOCKER_HUB_TAG_API = "https://hub.docker.com/v2/namespaces/{namespace}/repositories/{repository}/tags/{tag}"
-DOCKER_HUB_TAGS_API = "https://hub.docker.com/v2/namespaces/{namespace}/repositories/{repository}/tags?page_size=100&page={page}"
+DOCKER_TAG_WATERMARKS_OUTPUT = ROOT / ".github" / "data" / "docker-tag-watermarks.yml"
+# The endpoints can be pointed at a local stand-in (ci/run/tests/test-export-platform-catalog-fetch.sh).
+REGISTRY_BASE = os.environ.get("XYMON_REGISTRY_BASE", "https://registry-1.docker.io").rstrip("/")
+TOKEN_URL = os.environ.get("XYMON_REGISTRY_TOKEN_URL", "https://auth.docker.io/token")
+DOCKER_HUB_BASE = os.environ.get("XYMON_DOCKER_HUB_URL", "https://hub.docker.com").rstrip("/")
+GITHUB_API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+DOCKER_HUB_TAG_API = DOCKER_HUB_BASE + "/v2/namespaces/{namespace}/repositories/{repository}/tags/{tag}"
+# Incremental scans never see deleted tags; list every tag again after this many days.
+FULL_TAG_SCAN_MAX_DAYS = 14
+# Newest first, so incremental scans can stop at the previous export's watermark.
+DOCKER_HUB_TAGS_API = (
+    DOCKER_HUB_BASE
+    + "/v2/namespaces/{namespace}/repositories/{repository}/tags?page_size=100&page={page}&ordering=last_updated"
+)
 MANIFEST_ACCEPT = ", ".join(
     [
         "application/vnd.oci.image.index.v1+json",
@@ -105,29 +139,24 @@ def relative_to_root(path: Path) -> str:
 def load_yaml(path: Path, context: str) -> dict[str, Any]:
     if not path.exists():
         raise SystemExit(f"Missing {context}: {path}")
-    data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    data = load_yaml_file(path) or {}
     return as_map(data, context)
 
 
 def load_existing_yaml(path: Path) -> dict[str, Any]:
     if not path.exists():
         return {}
-    data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    data = load_yaml_file(path) or {}
     if not isinstance(data, dict):
         return {}
     return data
 
 
 def github_request(path: str) -> dict[str, Any]:
-    url = f"https://api.github.com{path}"
-    headers = {"User-Agent": USER_AGENT, "Accept": "application/vnd.github+json"}
-    token = os.environ.get("GITHUB_TOKEN")
-    if token:
-        headers["Authorization"] = f"token {token}"
+    url = f"{GITHUB_API_URL}{path}"
+    headers = github_headers(os.environ.get("GITHUB_TOKEN", ""), USER_AGENT, scheme="token")
     try:
-        req = Request(url, headers=headers)
-        with urlopen(req) as response:
-            return json.load(response)
+        return get_json(url, headers, cache_scope="github")
     except HTTPError as exc:
         raise SystemExit(f"Failed to fetch {url}: {exc}") from exc
 
@@ -136,44 +165,40 @@ def fetch_latest_release(repo: str) -> dict[str, Any]:
     return github_request(f"/repos/{repo}/releases/latest")
 
 
-def fetch_registry_token(repository: str) -> str:
+def fetch_registry_token(*repositories: str) -> str:
+    """One pull token scoped to every given repository."""
     query = urlencode(
-        {
-            "service": "registry.docker.io",
-            "scope": f"repository:{repository}:pull",
-        }
+        [("service", "registry.docker.io")]
+        + [("scope", f"repository:{repository}:pull") for repository in repositories]
     )
-    with urlopen(f"{TOKEN_URL}?{query}") as response:
-        payload = json.load(response)
+    payload = get_json(f"{TOKEN_URL}?{query}", {"User-Agent": USER_AGENT}, cached=False)
     token = payload.get("token")
     if not isinstance(token, str) or not token:
-        raise SystemExit(f"Unable to obtain registry token for {repository}")
+        raise SystemExit(f"Unable to obtain registry token for {', '.join(repositories)}")
     return token
 
 
 def fetch_manifest_index(repository: str, tag: str, token: str) -> tuple[str, str, str, dict[str, Any]]:
     manifest_url = f"{REGISTRY_BASE}/v2/{repository}/manifests/{tag}"
-    request = Request(
+    response = get(
         manifest_url,
-        headers={
+        {
             "Authorization": f"Bearer {token}",
             "Accept": MANIFEST_ACCEPT,
             "User-Agent": USER_AGENT,
         },
+        cached=True,
+        cache_scope=f"repository:{repository}:pull",
     )
-    with urlopen(request) as response:
-        content_type = response.headers.get("Content-Type", "")
-        digest = response.headers.get("docker-content-digest", "")
-        payload = json.load(response)
-    return manifest_url, content_type, digest, payload
+    content_type = response.headers.get("Content-Type", "")
+    digest = response.headers.get("docker-content-digest", "")
+    return manifest_url, content_type, digest, response.json()
 
 
 def fetch_tag_metadata(repository: str, tag: str) -> tuple[str, str, str, dict[str, Any]]:
     namespace, image = repository.split("/", 1)
     tag_url = DOCKER_HUB_TAG_API.format(namespace=namespace, repository=image, tag=tag)
-    request = Request(tag_url, headers={"User-Agent": USER_AGENT})
-    with urlopen(request) as response:
-        payload = json.load(response)
+    payload = get_json(tag_url, {"User-Agent": USER_AGENT})
     digest = str(payload.get("digest") or "")
     return (
         tag_url,
@@ -183,28 +208,212 @@ def fetch_tag_metadata(repository: str, tag: str) -> tuple[str, str, str, dict[s
     )
 
 
-def fetch_repository_tags(repository: str) -> list[dict[str, Any]]:
+def fetch_tags_page(repository: str, page: int) -> dict[str, Any]:
     namespace, image = repository.split("/", 1)
+    tags_url = DOCKER_HUB_TAGS_API.format(namespace=namespace, repository=image, page=page)
+    return get_json(tags_url, {"User-Agent": USER_AGENT})
+
+
+def append_tags_page(results: list[dict[str, Any]], payload: dict[str, Any]) -> bool:
+    """Add a page's tags to results; False once the listing has ended."""
+    page_results = payload.get("results")
+    if not isinstance(page_results, list) or not page_results:
+        return False
+    for entry in page_results:
+        if isinstance(entry, dict):
+            results.append(entry)
+    return bool(payload.get("next"))
+
+
+def remaining_tag_pages(first_page: dict[str, Any]) -> int:
+    """Pages after the first one, from the listing's count (0 when unknown)."""
+    page_results = first_page.get("results")
+    count = first_page.get("count")
+    if not first_page.get("next") or not isinstance(page_results, list) or not page_results:
+        return 0
+    if not isinstance(count, int) or count <= len(page_results):
+        return 0
+    return math.ceil(count / len(page_results)) - 1
+
+
+def journaled(journal: ExportJournal, kind: str, key: str, func, *args) -> Any:
+    """func(*args), recorded in the journal once it succeeds."""
+    value = func(*args)
+    journal.record(kind, key, value)
+    return value
+
+
+def repository_tag_patterns(
+    docker_platforms: list[tuple[str, str]],
+    selection_policy: SelectionPolicy,
+) -> dict[str, list[re.Pattern] | None]:
+    """Tag patterns per repository (union over its platforms); None keeps every tag."""
+    patterns: dict[str, list[re.Pattern] | None] = {}
+    for platform_os, repository in docker_platforms:
+        platform_patterns = selection_policy.tag_patterns("containers", platform_os)
+        if not platform_patterns:
+            patterns[repository] = None
+        elif patterns.setdefault(repository, []) is not None:
+            patterns[repository].extend(platform_patterns)
+    return patterns
+
+
+def tag_patterns_fingerprint(patterns: list[re.Pattern] | None) -> str:
+    if patterns is None:
+        return "*"
+    joined = "\n".join(sorted({pattern.pattern for pattern in patterns}))
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()[:16]
+
+
+def matching_tags(entries: list[dict[str, Any]], patterns: list[re.Pattern] | None) -> dict[str, dict[str, str]]:
+    """name -> {name, last_updated} for the entries a pattern keeps."""
+    kept: dict[str, dict[str, str]] = {}
+    for entry in entries:
+        name = str(entry.get("name") or "").strip()
+        if not name or (patterns is not None and not any(pattern.match(name) for pattern in patterns)):
+            continue
+        kept[name] = {"name": name, "last_updated": str(entry.get("last_updated") or "")}
+    return kept
+
+
+def newest_update(entries: list[dict[str, Any]], watermark: str = "") -> str:
+    """Latest last_updated among entries (kept or not: the listing orders them all)."""
+    return max([watermark, *(str(entry.get("last_updated") or "") for entry in entries)])
+
+
+def tag_state(
+    patterns: list[re.Pattern] | None, watermark: str, tags: dict[str, dict[str, str]], full_scan_on: str
+) -> dict[str, Any]:
+    return {
+        "patterns": tag_patterns_fingerprint(patterns),
+        "watermark": watermark,
+        "full_scan_on": full_scan_on,
+        "tags": [tags[name] for name in sorted(tags)],
+    }
+
+
+def scan_tags_incremental(
+    repository: str,
+    patterns: list[re.Pattern] | None,
+    previous: dict[str, Any],
+) -> dict[str, Any]:
+    """Newest-first pages until the previous watermark is passed, merged over the previous tags."""
+    watermark = str(previous.get("watermark") or "")
+    newest = watermark
+    tags = {str(tag["name"]): tag for tag in previous.get("tags", [])}
     page = 1
-    results: list[dict[str, Any]] = []
     while True:
-        tags_url = DOCKER_HUB_TAGS_API.format(
-            namespace=namespace, repository=image, page=page
+        payload = fetch_tags_page(repository, page)
+        page_results = [entry for entry in payload.get("results") or [] if isinstance(entry, dict)]
+        tags.update(matching_tags(page_results, patterns))
+        newest = newest_update(page_results, newest)
+        passed = any(
+            str(entry.get("last_updated") or "") and str(entry.get("last_updated")) <= watermark
+            for entry in page_results
         )
-        request = Request(tags_url, headers={"User-Agent": USER_AGENT})
-        with urlopen(request) as response:
-            payload = json.load(response)
-        page_results = payload.get("results")
-        if not isinstance(page_results, list) or not page_results:
-            break
-        for entry in page_results:
-            if isinstance(entry, dict):
-                results.append(entry)
-        next_url = payload.get("next")
-        if not next_url:
-            break
+        if passed or not page_results or not payload.get("next"):
+            return tag_state(patterns, newest, tags, str(previous.get("full_scan_on") or ""))
         page += 1
-    return results
+
+
+def load_tag_watermarks(path: Path) -> dict[str, dict[str, Any]]:
+    data = load_existing_yaml(path)
+    source = data.get("source")
+    # Watermarks only order tags of the listing they were taken from.
+    if not isinstance(source, dict) or source.get("docker_hub") != DOCKER_HUB_BASE:
+        return {}
+    repositories = data.get("repositories")
+    if not isinstance(repositories, dict):
+        return {}
+    return {
+        str(repository): entry
+        for repository, entry in repositories.items()
+        if isinstance(entry, dict) and isinstance(entry.get("tags"), list)
+    }
+
+
+def current_tag_watermarks(watermarks: dict[str, dict[str, Any]], stale_before: str) -> dict[str, dict[str, Any]]:
+    """The watermarks of repositories listed in full on or after stale_before (an ISO date).
+
+    An incremental scan keeps the previous tags, so a tag deleted upstream only
+    disappears with a full listing; dropping stale watermarks bounds how long it lingers.
+    """
+    return {
+        repository: entry
+        for repository, entry in watermarks.items()
+        if str(entry.get("full_scan_on") or "") >= stale_before
+    }
+
+
+def fetch_repository_tags_bulk(
+    repositories: list[str],
+    patterns: dict[str, list[re.Pattern] | None],
+    watermarks: dict[str, dict[str, Any]],
+    pool: FetchPool,
+    journal: ExportJournal,
+    scan_date: str,
+) -> dict[str, dict[str, Any]]:
+    """Tag state (policy-matching tags plus watermark) per repository.
+
+    A repository with a watermark from the previous export under the same tag
+    patterns is scanned incrementally; the others are listed in full, with the
+    pages fetched concurrently, and record scan_date as their last full listing.
+    """
+    states: dict[str, dict[str, Any]] = {}
+    for repository in repositories:
+        journaled_state = journal.get("tags", repository)
+        if journaled_state is not None:
+            states[repository] = journaled_state
+    host = url_host(DOCKER_HUB_BASE)
+    incremental = {
+        repository: pool.submit(
+            host,
+            journaled,
+            journal,
+            "tags",
+            repository,
+            scan_tags_incremental,
+            repository,
+            patterns[repository],
+            watermarks[repository],
+        )
+        for repository in repositories
+        if repository not in states
+        and repository in watermarks
+        and watermarks[repository].get("patterns") == tag_patterns_fingerprint(patterns[repository])
+    }
+    repositories = [
+        repository for repository in repositories if repository not in states and repository not in incremental
+    ]
+    first_pages = dict(zip(repositories, pool.map(host, lambda repo: fetch_tags_page(repo, 1), repositories)))
+    later_pages: dict[str, list] = {}
+    for repository in repositories:
+        first_page = first_pages[repository].result()
+        first_pages[repository] = first_page
+        later_pages[repository] = [
+            pool.submit(host, fetch_tags_page, repository, page)
+            for page in range(2, remaining_tag_pages(first_page) + 2)
+        ]
+
+    for repository in repositories:
+        results: list[dict[str, Any]] = []
+        more = append_tags_page(results, first_pages[repository])
+        page = 1
+        for future in later_pages[repository]:
+            if not more:
+                break
+            more = append_tags_page(results, future.result())
+            page += 1
+        # The count may have been stale; follow "next" for anything it missed.
+        while more:
+            page += 1
+            more = append_tags_page(results, pool.submit(host, fetch_tags_page, repository, page).result())
+        states[repository] = tag_state(
+            patterns[repository], newest_update(results), matching_tags(results, patterns[repository]), scan_date
+        )
+        journal.record("tags", repository, states[repository])
+    states.update((repository, future.result()) for repository, future in incremental.items())
+    return states
 
 
 def normalize_manifest_architecture(platform: Any) -> str | None:
@@ -284,15 +493,6 @@ def optional_alias_of(entry: dict[str, Any], context: str) -> str | None:
     return as_str(raw_value, f"{context}.alias_of")
 
 
-def infer_platform_os(platform_id: str) -> str:
-    platform_id = str(platform_id).strip()
-    if platform_id.startswith("opensuse-tumbleweed"):
-        return "opensuse_tumbleweed"
-    if platform_id.startswith("opensuse-leap-"):
-        return "opensuse_leap"
-    return platform_id.split("-", 1)[0]
-
-
 def load_static_platform_catalog() -> dict[str, dict[str, Any]]:
     data = load_yaml(PLATFORM_CATALOG, f"platform catalog in {PLATFORM_CATALOG}")
     platforms = field_map(data, "platforms", str(PLATFORM_CATALOG))
@@ -328,7 +528,7 @@ def load_bsd_sources() -> dict[str, dict[str, Any]]:
     return normalized
 
 
-def load_selection_policy() -> dict[str, dict[str, set[str]]]:
+def load_selection_policy() -> SelectionPolicy:
     data = load_yaml(CONTAINER_INTENT, f"platform intent in {CONTAINER_INTENT}")
     policy: dict[str, dict[str, set[str]]] = {}
     for section in ("containers", "vms", "hosts"):
@@ -427,89 +627,7 @@ def load_selection_policy() -> dict[str, dict[str, set[str]]]:
             "tag_patterns": tag_patterns,
             "rules": rules,
         }
-    return policy
-
-
-def selection_allows(
-    policy: dict[str, dict[str, set[str]]],
-    section: str,
-    platform_id: str,
-    entry: dict[str, Any] | None = None,
-) -> bool:
-    section_policy = policy.get(section, {})
-    include_ids = section_policy.get("include", set())
-    exclude_ids = section_policy.get("exclude", set())
-    if platform_id in exclude_ids:
-        return False
-    if include_ids and platform_id not in include_ids:
-        return False
-    if entry is None:
-        return True
-    platform_os = str(entry.get("platform_os") or infer_platform_os(platform_id)).strip()
-    rules = section_policy.get("rules", {})
-    rule = rules.get(platform_os, {})
-    if not isinstance(rule, dict) or not rule:
-        return True
-    version_token = selection_version_token(platform_id, entry)
-    if is_moving_target_token(version_token) and not rule.get("include_moving_targets", False):
-        return False
-    keep_versions = rule.get("keep_versions", set())
-    major_versions = rule.get("keep_major_versions", set())
-    if keep_versions or major_versions:
-        version_match = bool(keep_versions) and version_token in keep_versions
-        major = selection_major_version(version_token)
-        major_match = bool(major_versions) and major in major_versions
-        if not version_match and not major_match:
-            return False
-    return True
-
-
-def selection_version_token(platform_id: str, entry: dict[str, Any]) -> str:
-    platform_os = str(entry.get("platform_os") or infer_platform_os(platform_id)).strip()
-    if platform_os == "opensuse_tumbleweed":
-        return "latest"
-    if platform_os == "opensuse_leap" and platform_id.startswith("opensuse-leap-"):
-        return platform_id.removeprefix("opensuse-leap-").replace("_", ".")
-    if "-" in platform_id:
-        return platform_id.split("-", 1)[1].replace("_", ".")
-    return str(entry.get("platform_version") or "").strip()
-
-
-def selection_major_version(version_token: str) -> str:
-    match = re.search(r"\d+(?:\.\d+)?", version_token)
-    if not match:
-        return ""
-    return match.group(0).split(".", 1)[0]
-
-
-def is_moving_target_token(version_token: str) -> bool:
-    token = version_token.strip().lower()
-    return token in {"latest", "rolling", "tumbleweed", "edge", "current"}
-
-
-def selection_section_for_runtime(runtime: str) -> str | None:
-    normalized = str(runtime).strip().lower()
-    if normalized == "docker":
-        return "containers"
-    if normalized == "vm":
-        return "vms"
-    if normalized == "host":
-        return "hosts"
-    return None
-
-
-def tag_allowed(
-    policy: dict[str, dict[str, set[str]]],
-    section: str,
-    platform_os: str,
-    tag: str,
-) -> bool:
-    section_policy = policy.get(section, {})
-    tag_patterns = section_policy.get("tag_patterns", {})
-    patterns = tag_patterns.get(platform_os, [])
-    if not patterns:
-        return True
-    return any(pattern.match(tag) for pattern in patterns)
+    return compile_selection_policy(policy)
 
 
 def derive_platform_id(platform_os: str, tag: str) -> str:
@@ -522,18 +640,33 @@ def derive_platform_id(platform_os: str, tag: str) -> str:
 
 def discover_docker_releases(
     platform_catalog: dict[str, dict[str, Any]],
-    selection_policy: dict[str, dict[str, set[str]]],
-) -> dict[str, dict[str, Any]]:
+    selection_policy: SelectionPolicy,
+    watermarks: dict[str, dict[str, Any]],
+    pool: FetchPool,
+    journal: ExportJournal,
+    scan_date: str,
+) -> tuple[dict[str, dict[str, Any]], dict[str, dict[str, Any]]]:
+    """Discovered docker releases, plus the tag state to persist as the next watermarks."""
+    docker_platforms = [
+        (platform_os, field_str(entry, "repository", f"{PLATFORM_CATALOG}.platforms.{platform_os}"))
+        for platform_os, entry in sorted(platform_catalog.items())
+        if str(entry.get("runtime", "")).lower() == "docker"
+    ]
+    tag_states = fetch_repository_tags_bulk(
+        list(dict.fromkeys(repository for _, repository in docker_platforms)),
+        repository_tag_patterns(docker_platforms, selection_policy),
+        watermarks,
+        pool,
+        journal,
+        scan_date,
+    )
     discovered: dict[str, dict[str, Any]] = {}
-    for platform_os, entry in sorted(platform_catalog.items()):
-        if str(entry.get("runtime", "")).lower() != "docker":
-            continue
-        repository = field_str(entry, "repository", f"{PLATFORM_CATALOG}.platforms.{platform_os}")
-        for raw_tag_entry in fetch_repository_tags(repository):
+    for platform_os, repository in docker_platforms:
+        for raw_tag_entry in tag_states[repository]["tags"]:
             tag = str(raw_tag_entry.get("name") or "").strip()
             if not tag:
                 continue
-            if not tag_allowed(selection_policy, "containers", platform_os, tag):
+            if not selection_policy.tag_allowed("containers", platform_os, tag):
                 continue
             platform_id = derive_platform_id(platform_os, tag)
             record = {
@@ -543,7 +676,7 @@ def discover_docker_releases(
                 "image": f"{repository.split('/', 1)[1] if repository.startswith('library/') else repository}:{tag}",
             }
             discovered[platform_id] = record
-    return discovered
+    return discovered, tag_states
 
 
 def discover_vm_releases(
@@ -618,87 +751,68 @@ def discover_host_releases(
 
 def select_platform_releases(
     platform_releases: dict[str, dict[str, Any]],
-    selection_policy: dict[str, dict[str, set[str]]],
+    selection_policy: SelectionPolicy,
 ) -> dict[str, dict[str, Any]]:
     selected: dict[str, dict[str, Any]] = {}
     for platform_id, entry in sorted(platform_releases.items()):
         section = selection_section_for_runtime(entry.get("runtime", ""))
-        if section and not selection_allows(selection_policy, section, platform_id, entry):
+        if section and not selection_policy.allows(section, platform_id, entry):
             continue
         selected[platform_id] = entry
-    for section, section_policy in selection_policy.items():
-        rules = section_policy.get("rules", {})
-        if not isinstance(rules, dict):
-            continue
-        for platform_os, rule in rules.items():
-            if not isinstance(rule, dict):
-                continue
-            keep_latest_n_stable = rule.get("keep_latest_n_stable")
+    for section, section_policy in selection_policy.sections.items():
+        for platform_os, rule in section_policy.rules.items():
+            keep_latest_n_stable = rule.keep_latest_n_stable
             if keep_latest_n_stable in (None, 0):
                 continue
-            matching = [
-                (platform_id, entry)
-                for platform_id, entry in selected.items()
-                if selection_section_for_runtime(entry.get("runtime", "")) == section
-                and str(entry.get("platform_os") or infer_platform_os(platform_id)).strip() == platform_os
-            ]
             stable = [
-                (platform_id, entry)
-                for platform_id, entry in matching
-                if not is_moving_target_token(selection_version_token(platform_id, entry))
+                (platform_id, version_token)
+                for platform_id, version_token in selected_versions(selected, section, platform_os)
+                if not is_moving_target_token(version_token)
             ]
             stable_sorted = sorted(
                 stable,
-                key=lambda item: (
-                    tuple(int(part) for part in re.findall(r"\d+", selection_version_token(item[0], item[1]))),
-                    item[0],
-                ),
+                key=lambda item: (version_sort_key(item[1]), item[0]),
                 reverse=True,
             )
-            keep_ids = {platform_id for platform_id, _ in stable_sorted[: int(keep_latest_n_stable)]}
-            for platform_id, entry in matching:
-                if (
-                    platform_id not in keep_ids
-                    and not is_moving_target_token(selection_version_token(platform_id, entry))
-                ):
+            keep_ids = {platform_id for platform_id, _ in stable_sorted[:keep_latest_n_stable]}
+            for platform_id, _ in stable:
+                if platform_id not in keep_ids:
                     del selected[platform_id]
-        for platform_os, rule in rules.items():
-            if not isinstance(rule, dict):
-                continue
-            keep_latest_n_major = rule.get("keep_latest_n_major")
+        for platform_os, rule in section_policy.rules.items():
+            keep_latest_n_major = rule.keep_latest_n_major
             if keep_latest_n_major in (None, 0):
                 continue
-            matching = [
-                (platform_id, entry)
-                for platform_id, entry in selected.items()
-                if selection_section_for_runtime(entry.get("runtime", "")) == section
-                and str(entry.get("platform_os") or infer_platform_os(platform_id)).strip() == platform_os
-            ]
             stable = [
-                (platform_id, entry)
-                for platform_id, entry in matching
-                if not is_moving_target_token(selection_version_token(platform_id, entry))
+                (platform_id, selection_major_version(version_token))
+                for platform_id, version_token in selected_versions(selected, section, platform_os)
+                if not is_moving_target_token(version_token)
             ]
-            all_majors = sorted(
-                {selection_major_version(selection_version_token(pid, e)) for pid, e in stable},
-                key=lambda m: tuple(int(p) for p in re.findall(r"\d+", m)) if re.findall(r"\d+", m) else (0,),
-                reverse=True,
-            )
-            keep_majors = set(all_majors[: int(keep_latest_n_major)])
-            for platform_id, entry in matching:
-                version_token = selection_version_token(platform_id, entry)
-                if (
-                    not is_moving_target_token(version_token)
-                    and selection_major_version(version_token) not in keep_majors
-                ):
+            all_majors = sorted({major for _, major in stable}, key=major_sort_key, reverse=True)
+            keep_majors = set(all_majors[:keep_latest_n_major])
+            for platform_id, major in stable:
+                if major not in keep_majors:
                     del selected[platform_id]
     return selected
 
 
+def selected_versions(
+    selected: dict[str, dict[str, Any]],
+    section: str,
+    platform_os: str,
+) -> list[tuple[str, str]]:
+    """(platform_id, version token) of the selected entries of one section and platform_os."""
+    return [
+        (platform_id, selection_version_token(platform_id, entry))
+        for platform_id, entry in selected.items()
+        if selection_section_for_runtime(entry.get("runtime", "")) == section
+        and str(entry.get("platform_os") or infer_platform_os(platform_id)).strip() == platform_os
+    ]
+
+
 def load_docker_platform_entries(
     platform_releases: dict[str, dict[str, Any]],
     platform_catalog: dict[str, dict[str, Any]],
-    _selection_policy: dict[str, dict[str, set[str]]],
+    _selection_policy: SelectionPolicy,
 ) -> list[dict[str, Any]]:
     entries: list[dict[str, Any]] = []
     for platform_id, entry in sorted(platform_releases.items()):
@@ -746,7 +860,7 @@ def load_docker_platform_entries(
 def load_vm_release_entries(
     platform_releases: dict[str, dict[str, Any]],
     _platform_catalog: dict[str, dict[str, Any]],
-    _selection_policy: dict[str, dict[str, set[str]]],
+    _selection_policy: SelectionPolicy,
 ) -> list[dict[str, Any]]:
     selected: list[dict[str, Any]] = []
     release_lookup = platform_releases
@@ -796,7 +910,7 @@ def load_vm_release_entries(
 
 def load_host_release_entries(
     platform_releases: dict[str, dict[str, Any]],
-    _selection_policy: dict[str, dict[str, set[str]]],
+    _selection_policy: SelectionPolicy,
 ) -> dict[str, dict[str, Any]]:
     selected: dict[str, dict[str, Any]] = {}
     for platform_id, entry in sorted(platform_releases.items()):
@@ -842,107 +956,38 @@ def runner_capabilities(runner: dict[str, Any]) -> dict[str, Any]:
     return as_map(capabilities, f"runner {runner['label']}.capabilities")
 
 
-def runner_supports(runner: dict[str, Any], capability_key: str, platform_family: str) -> bool:
-    capabilities = runner_capabilities(runner)
-    values = [str(value) for value in field_list(capabilities, capability_key, "capabilities")]
-    return platform_family in values
-
-
-def runner_container_emulated_arches(runner: dict[str, Any]) -> list[str]:
-    capabilities = runner_capabilities(runner)
-    return optional_field_str_list(
-        capabilities,
-        "container_emulated_arches",
-        "capabilities",
-    )
-
-
-def build_runner_indexes(runners: list[dict[str, Any]]) -> dict[str, dict[str, dict[str, list[str]]]]:
-    indexes: dict[str, dict[str, dict[str, list[str]]]] = {}
-    for runner in runners:
-        arch = normalize_runner_architecture(runner)
-        if not arch:
-            continue
-        capabilities = runner_capabilities(runner)
-        for mode, capability_key in (("direct", "native_platforms"), ("container", "container_platforms")):
-            for platform_family in [str(value) for value in field_list(capabilities, capability_key, "capabilities")]:
-                indexes.setdefault(platform_family, {}).setdefault(mode, {}).setdefault(arch, []).append(
-                    runner["label"]
-                )
-    return indexes
-
-
-def unique_preserving_order(values: list[str]) -> list[str]:
-    seen: set[str] = set()
-    ordered: list[str] = []
-    for value in values:
-        if value in seen:
-            continue
-        seen.add(value)
-        ordered.append(value)
-    return ordered
-
-
-def exact_direct_runner_labels(
+def build_runner_capability_index(
     runners: list[dict[str, Any]],
-    *,
-    platform_family: str,
-    platform_os: str,
-    platform_version: str,
-    arch: str,
-) -> list[str]:
-    labels: list[str] = []
+    host_runner_discovery: dict[str, dict[str, Any]],
+) -> RunnerCapabilityIndex:
+    records = []
     for runner in runners:
-        if normalize_runner_architecture(runner) != arch:
-            continue
-        if field_str(runner, "machine_family", f"runner {runner['label']}") != platform_family:
-            continue
-        if not runner_supports(runner, "native_platforms", platform_family):
-            continue
-        if field_str(runner, "platform_os", f"runner {runner['label']}") != platform_os:
-            continue
-        if field_str(runner, "platform_version", f"runner {runner['label']}") != platform_version:
-            continue
-        labels.append(runner["label"])
-    return labels
-
-
-def build_host_support(
-    arches: list[str],
-    *,
-    runners: list[dict[str, Any]],
-    runner_indexes: dict[str, dict[str, dict[str, list[str]]]],
-    platform_family: str,
-    platform_os: str,
-    platform_version: str,
-) -> dict[str, dict[str, Any]]:
-    family_indexes = runner_indexes.get(platform_family, {})
-    container_index = family_indexes.get("container", {})
-    host_support: dict[str, dict[str, Any]] = {}
-    for arch in arches:
-        direct_labels = exact_direct_runner_labels(
-            runners,
-            platform_family=platform_family,
-            platform_os=platform_os,
-            platform_version=platform_version,
-            arch=arch,
-        )
-        emulated_container_labels = [
-            runner["label"]
-            for runner in runners
-            if field_str(runner, "machine_family", f"runner {runner['label']}")
-            == platform_family
-            and runner_supports(runner, "container_platforms", platform_family)
-            and arch in runner_container_emulated_arches(runner)
-        ]
-        container_labels = unique_preserving_order(
-            list(container_index.get(arch, [])) + emulated_container_labels
+        context = f"runner {runner['label']}"
+        capabilities = runner_capabilities(runner)
+        records.append(
+            RunnerRecord(
+                label=runner["label"],
+                arch=normalize_runner_architecture(runner),
+                machine_family=field_str(runner, "machine_family", context),
+                platform_os=field_str(runner, "platform_os", context),
+                platform_version=field_str(runner, "platform_version", context),
+                native_platforms=tuple(
+                    str(value) for value in field_list(capabilities, "native_platforms", "capabilities")
+                ),
+                container_platforms=tuple(
+                    str(value) for value in field_list(capabilities, "container_platforms", "capabilities")
+                ),
+                container_emulated_arches=tuple(
+                    optional_field_str_list(capabilities, "container_emulated_arches", "capabilities")
+                ),
+            )
         )
-        record: dict[str, Any] = {"direct_runner_labels": direct_labels}
-        if container_labels != direct_labels:
-            record["container_runner_labels"] = container_labels
-        host_support[arch] = record
-    return host_support
+    discovered_capabilities = {
+        label: normalize_host_discovery_capabilities(discovery)
+        for label, discovery in host_runner_discovery.items()
+        if discovery
+    }
+    return RunnerCapabilityIndex(records, discovered_capabilities)
 
 
 def load_host_runners() -> list[dict[str, Any]]:
@@ -969,14 +1014,6 @@ def load_host_runners() -> list[dict[str, Any]]:
     return normalized
 
 
-def render_mapping_yaml(intent_meta: dict[str, Any], platforms: dict[str, Any]) -> str:
-    payload = {
-        "source": intent_meta,
-        "platforms": platforms,
-    }
-    return yaml.safe_dump(payload, sort_keys=False)
-
-
 def build_cached_container_index(existing_catalog: dict[str, Any]) -> dict[str, dict[str, Any]]:
     platforms = existing_catalog.get("platforms")
     if not isinstance(platforms, dict):
@@ -1078,7 +1115,7 @@ def build_platform_availability(
     host_entries: dict[str, dict[str, Any]],
     host_runners: list[dict[str, Any]],
     host_runner_discovery: dict[str, dict[str, Any]],
-    runner_indexes: dict[str, dict[str, dict[str, list[str]]]],
+    runner_index: RunnerCapabilityIndex,
 ) -> dict[str, dict[str, Any]]:
     vm_by_platform_id = {entry["platform_id"]: entry for entry in vm_entries}
     host_runner_lookup = build_host_runner_lookup(host_runners)
@@ -1099,10 +1136,8 @@ def build_platform_availability(
                 "image": docker_entry["image"],
                 "digest": docker_entry["digest"],
                 "discovered_arches": list(docker_entry["discovered_arches"]),
-                "host_support": build_host_support(
-                    list(docker_entry["discovered_arches"]),
-                    runners=host_runners,
-                    runner_indexes=runner_indexes,
+                "host_support": runner_index.host_support(
+                    docker_entry["discovered_arches"],
                     platform_family="linux",
                     platform_os=docker_entry["platform_os"],
                     platform_version=docker_entry["platform_version"],
@@ -1180,9 +1215,7 @@ def build_platform_availability(
             if discovered_runner:
                 raw_discovery = dict(discovered_runner)
                 raw_discovery.pop("capabilities", None)
-                record["capabilities"] = normalize_host_discovery_capabilities(
-                    discovered_runner
-                )
+                record["capabilities"] = runner_index.discovered_capabilities[runner_label]
                 record["discovery"] = raw_discovery
             alias_of = optional_alias_of(
                 host_entry, f"{PLATFORM_RELEASE_OVERRIDES}.platforms.{platform_id}"
@@ -1197,13 +1230,119 @@ def build_platform_availability(
     return availability
 
 
-def export_catalog(*, refresh_container_manifests: bool = False):
+def fetch_container_manifest(repository: str, tag: str, token: str) -> tuple[str, str, str, list[str]]:
+    try:
+        try:
+            manifest_url, content_type, digest, payload = fetch_manifest_index(repository, tag, token)
+        except HTTPError as exc:
+            if exc.code != 401:
+                raise
+            # The shared token may have expired or lack this scope; retry once with a fresh one.
+            manifest_url, content_type, digest, payload = fetch_manifest_index(
+                repository, tag, fetch_registry_token(repository)
+            )
+        return manifest_url, content_type, digest, extract_architectures(payload)
+    except HTTPError as exc:
+        if exc.code != 429:
+            raise
+        manifest_url, content_type, digest, payload = fetch_tag_metadata(repository, tag)
+        return manifest_url, content_type, digest, extract_architectures_from_tag_metadata(payload)
+
+
+def fetch_container_manifests(
+    releases: list[dict[str, Any]],
+    pool: FetchPool,
+    journal: ExportJournal,
+) -> dict[str, tuple[str, str, str, list[str]]]:
+    """Manifest metadata per image, fetched concurrently with one shared registry token."""
+    manifests: dict[str, tuple[str, str, str, list[str]]] = {}
+    by_image: dict[str, dict[str, Any]] = {}
+    for release in releases:
+        journaled_manifest = journal.get("manifest", release["image"])
+        if journaled_manifest is not None:
+            manifests[release["image"]] = tuple(journaled_manifest)
+        else:
+            by_image[release["image"]] = release
+    if not by_image:
+        return manifests
+    repositories = list(dict.fromkeys(release["repository"] for release in by_image.values()))
+    token = fetch_registry_token(*repositories)
+    futures = {
+        image: pool.submit(
+            url_host(REGISTRY_BASE),
+            journaled,
+            journal,
+            "manifest",
+            image,
+            fetch_container_manifest,
+            release["repository"],
+            release["tag"],
+            token,
+        )
+        for image, release in by_image.items()
+    }
+    manifests.update((image, future.result()) for image, future in futures.items())
+    return manifests
+
+
+def export_catalog(
+    *,
+    refresh_container_manifests: bool = False,
+    jobs: int = DEFAULT_MAX_WORKERS,
+    per_host: int = DEFAULT_PER_HOST,
+    journal_path: Path | None = None,
+    resume: bool = False,
+    full_tag_scan: bool = False,
+    full_tag_scan_days: int = FULL_TAG_SCAN_MAX_DAYS,
+) -> list[CatalogDiff]:
+    endpoints = {
+        "registry": REGISTRY_BASE,
+        "token": TOKEN_URL,
+        "docker_hub": DOCKER_HUB_BASE,
+        "github": GITHUB_API_URL,
+    }
+    journal = ExportJournal(journal_path or default_journal_path(), endpoints, resume=resume)
+    try:
+        with FetchPool(jobs, per_host) as pool:
+            diffs = export_catalog_with_pool(
+                pool,
+                journal,
+                refresh_container_manifests=refresh_container_manifests,
+                full_tag_scan=full_tag_scan,
+                full_tag_scan_days=full_tag_scan_days,
+            )
+    except BaseException:
+        journal.close()
+        raise
+    journal.finish()
+    return diffs
+
+
+def export_catalog_with_pool(
+    pool: FetchPool,
+    journal: ExportJournal,
+    *,
+    refresh_container_manifests: bool,
+    full_tag_scan: bool = False,
+    full_tag_scan_days: int = FULL_TAG_SCAN_MAX_DAYS,
+) -> list[CatalogDiff]:
     platform_catalog = load_static_platform_catalog()
     selection_policy = load_selection_policy()
     static_platform_releases = load_platform_releases()
     bsd_sources = load_bsd_sources()
     host_runners = load_host_runners()
-    discovered_docker_releases = discover_docker_releases(platform_catalog, selection_policy)
+    today = datetime.now(timezone.utc).date()
+    watermarks = (
+        {}
+        if full_tag_scan
+        else current_tag_watermarks(
+            load_tag_watermarks(DOCKER_TAG_WATERMARKS_OUTPUT),
+            (today - timedelta(days=full_tag_scan_days)).isoformat(),
+        )
+    )
+    discovered_docker_releases, tag_states = discover_docker_releases(
+        platform_catalog, selection_policy, watermarks, pool, journal, today.isoformat()
+    )
     discovered_vm_releases = discover_vm_releases(platform_catalog, bsd_sources)
     discovered_host_releases = discover_host_releases(platform_catalog, host_runners)
     all_platform_releases = {
@@ -1244,11 +1383,11 @@ def export_catalog(*, refresh_container_manifests: bool = False):
         platform_releases, platform_catalog, selection_policy
     )
     host_entries = load_host_release_entries(platform_releases, selection_policy)
-    runner_indexes = build_runner_indexes(host_runners)
     existing_platform_availability = load_existing_yaml(PLATFORM_AVAILABILITY_OUTPUT)
     host_runner_discovery = build_host_discovery_index(
         load_existing_yaml(HOST_RUNNERS_DISCOVERED)
     )
+    runner_index = build_runner_capability_index(host_runners, host_runner_discovery)
     cached_containers = build_cached_container_index(
         load_existing_yaml(DOCKER_AVAILABILITY_OUTPUT)
     )
@@ -1265,28 +1404,20 @@ def export_catalog(*, refresh_container_manifests: bool = False):
     }
 
     docker_platforms: dict[str, dict[str, Any]] = {}
-    token_by_repository: dict[str, str] = {}
+    fetched_manifests = fetch_container_manifests(
+        [
+            release
+            for release in docker_entries
+            if refresh_container_manifests or release["image"] not in cached_containers
+        ],
+        pool,
+        journal,
+    )
     for release in docker_entries:
         image = release["image"]
-        repository = release["repository"]
         cached_entry = None if refresh_container_manifests else cached_containers.get(image)
         if cached_entry is None:
-            token = token_by_repository.get(repository)
-            if not token:
-                token = fetch_registry_token(repository)
-                token_by_repository[repository] = token
-            try:
-                manifest_url, content_type, digest, payload = fetch_manifest_index(
-                    repository, release["tag"], token
-                )
-                discovered_arches = extract_architectures(payload)
-            except HTTPError as exc:
-                if exc.code != 429:
-                    raise
-                manifest_url, content_type, digest, payload = fetch_tag_metadata(
-                    repository, release["tag"]
-                )
-                discovered_arches = extract_architectures_from_tag_metadata(payload)
+            manifest_url, content_type, digest, discovered_arches = fetched_manifests[image]
         else:
             manifest_url = str(cached_entry.get("manifest_url", ""))
             content_type = str(cached_entry.get("content_type", ""))
@@ -1307,6 +1438,17 @@ def export_catalog(*, refresh_container_manifests: bool = False):
             **({"alias_of": release["alias_of"]} if release.get("alias_of") else {}),
         }
 
+    # Every VM entry of a builder repository shares its latest release.
+    vm_repos = list(dict.fromkeys(entry["repo"] for entry in vm_entries if entry.get("repo")))
+    latest_releases = {}
+    for repo in vm_repos:
+        journaled_release = journal.get("release", repo)
+        if journaled_release is not None:
+            latest_releases[repo] = completed_future(journaled_release)
+        else:
+            latest_releases[repo] = pool.submit(
+                url_host(GITHUB_API_URL), journaled, journal, "release", repo, fetch_latest_release, repo
+            )
     resolved_vm_platforms: list[dict[str, Any]] = []
     for entry in vm_entries:
         platform_id = entry["platform_id"]
@@ -1323,7 +1465,7 @@ def export_catalog(*, refresh_container_manifests: bool = False):
             asset_name = f"{entry['os']}-{entry['version']}-{entry['source_arch']}.qcow2"
             cached_vm_entry = cached_vm_platforms.get(platform_id, {})
             try:
-                release = fetch_latest_release(repo)
+                release = latest_releases[repo].result()
                 assets = release.get("assets", [])
                 asset = next(
                     (a for a in assets if a.get("name") == asset_name), None
@@ -1381,29 +1523,39 @@ def export_catalog(*, refresh_container_manifests: bool = False):
         host_entries,
         host_runners,
         host_runner_discovery,
-        runner_indexes,
+        runner_index,
     )
 
-    DOCKER_AVAILABILITY_OUTPUT.parent.mkdir(parents=True, exist_ok=True)
-    DISCOVERED_RELEASES_OUTPUT.write_text(
-        render_mapping_yaml(
+    catalogs = {
+        DISCOVERED_RELEASES_OUTPUT: (
             {
                 "platform_catalog": relative_to_root(PLATFORM_CATALOG),
                 "platform_intent": relative_to_root(CONTAINER_INTENT),
-        
             },
             platform_releases,
         ),
-        encoding="utf-8",
-    )
-    DOCKER_AVAILABILITY_OUTPUT.write_text(
-        render_mapping_yaml(docker_availability_meta, docker_platforms),
-        encoding="utf-8",
-    )
-    PLATFORM_AVAILABILITY_OUTPUT.write_text(
-        render_mapping_yaml(platform_availability_meta, platform_availability),
-        encoding="utf-8",
-    )
+        DOCKER_AVAILABILITY_OUTPUT: (docker_availability_meta, docker_platforms),
+        PLATFORM_AVAILABILITY_OUTPUT: (platform_availability_meta, platform_availability),
+    }
+    # Stage every output before replacing anything, then swap them all into place.
+    diffs: list[CatalogDiff] = []
+    with StagedOutputs() as staged:
+        for path, (source, platforms) in catalogs.items():
+            with staged.open(path) as handle:
+                diffs.append(
+                    write_catalog(handle, source, platforms, previous=path, label=relative_to_root(path))
+                )
+        with staged.open(DOCKER_TAG_WATERMARKS_OUTPUT) as handle:
+            yaml_safe_dump(
+                {
+                    "source": {"docker_hub": DOCKER_HUB_BASE},
+                    "repositories": {repository: tag_states[repository] for repository in sorted(tag_states)},
+                },
+                handle,
+                sort_keys=False,
+            )
+        staged.commit()
+    return diffs
 
 
 def parse_args() -> argparse.Namespace:
@@ -1413,11 +1565,112 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Refresh cached container manifest metadata from Docker Hub instead of reusing cached entries.",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f"Concurrent registry/API requests overall (default: {DEFAULT_MAX_WORKERS}; 1 = serial).",
+    )
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=DEFAULT_PER_HOST,
+        help=f"Concurrent requests to any single host (default: {DEFAULT_PER_HOST}).",
+    )
+    parser.add_argument(
+        "--full-tag-scan",
+        action="store_true",
+        help=(
+            "List every Docker Hub tag instead of stopping at the watermarks in "
+            f"{relative_to_root(DOCKER_TAG_WATERMARKS_OUTPUT)} (e.g. to drop deleted tags)."
+        ),
+    )
+    parser.add_argument(
+        "--full-tag-scan-days",
+        type=int,
+        default=FULL_TAG_SCAN_MAX_DAYS,
+        metavar="DAYS",
+        help=(
+            "List every tag of a repository whose last full listing is older than this, "
+            f"so deleted tags do not linger (default: {FULL_TAG_SCAN_MAX_DAYS})."
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse the fetches recorded by an interrupted export instead of starting over.",
+    )
+    parser.add_argument(
+        "--journal",
+        type=Path,
+        help=f"Progress journal path (default: {default_journal_path()}).",
+    )
+    parser.add_argument(
+        "--budget-report",
+        type=Path,
+        help="Write the per-host request/rate-limit budget report as JSON to this path.",
+    )
+    parser.add_argument(
+        "--diff-summary",
+        type=Path,
+        help="Write the platform entries added, removed and changed per generated file as JSON to this path.",
+    )
+    fixtures = parser.add_mutually_exclusive_group()
+    fixtures.add_argument(
+        "--record",
+        type=Path,
+        help="Record every HTTP exchange to this gzip-compressed fixture bundle.",
+    )
+    fixtures.add_argument(
+        "--replay",
+        type=Path,
+        help="Answer every HTTP request from this fixture bundle instead of the network.",
+    )
+    parser.add_argument(
+        "--replay-latency",
+        type=float,
+        default=0.0,
+        metavar="MS",
+        help="Artificial latency added to every replayed request, in milliseconds (default: 0).",
+    )
     return parser.parse_args()
 
 
+def write_budget_report(path: Path | None) -> None:
+    limiter = DEFAULT_POOL.limiter
+    if limiter is None:
+        return
+    print(limiter.format_report(), file=sys.stderr)
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"hosts": limiter.report()}, indent=2) + "\n", encoding="utf-8")
+
+
+def write_diff_summary(diffs: list[CatalogDiff], path: Path | None) -> None:
+    for diff in diffs:
+        print(diff.format(), file=sys.stderr)
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"files": [diff.as_dict() for diff in diffs]}, indent=2) + "\n", encoding="utf-8")
+
+
 if __name__ == "__main__":
     args = parse_args()
-    export_catalog(
-        refresh_container_manifests=args.refresh_container_manifests
-    )
+    try:
+        use_fixtures(args.record, args.replay, args.replay_latency / 1000)
+    except (OSError, ValueError) as exc:
+        raise SystemExit(f"cannot use HTTP fixtures: {exc}") from exc
+    try:
+        diffs = export_catalog(
+            refresh_container_manifests=args.refresh_container_manifests,
+            jobs=args.jobs,
+            per_host=args.per_host,
+            journal_path=args.journal,
+            resume=args.resume,
+            full_tag_scan=args.full_tag_scan,
+            full_tag_scan_days=args.full_tag_scan_days,
+        )
+    finally:
+        # Also written when the export fails, to show which host ran out of budget.
+        write_budget_report(args.budget_report)
+    write_diff_summary(diffs, args.diff_summary)
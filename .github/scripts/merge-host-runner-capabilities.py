@@ -8,7 +8,12 @@ import sys
 from pathlib import Path
 from typing import Any
 
-import yaml
+ROOT = Path(__file__).resolve().parent.parent.parent
+REF_HELPERS_DIR = ROOT / "ci" / "run" / "ref"
+if str(REF_HELPERS_DIR) not in sys.path:
+    sys.path.insert(0, str(REF_HELPERS_DIR))
+
+from yaml_compat import safe_dump as yaml_safe_dump  # noqa: E402
 
 
 def normalize_capabilities(payload: dict[str, Any]) -> dict[str, Any]:
@@ -60,7 +65,7 @@ def main() -> None:
         runners[label] = payload
     output_yaml.parent.mkdir(parents=True, exist_ok=True)
     output_yaml.write_text(
-        yaml.safe_dump({"runners": runners}, sort_keys=False),
+        yaml_safe_dump({"runners": runners}, sort_keys=False),
         encoding="utf-8",
     )
 
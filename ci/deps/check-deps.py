@@ -2,18 +2,14 @@
 """Sanity-check packaging deps YAML structure and content."""
 from __future__ import annotations
 
-import copy
+import argparse
+import os
 import re
 import subprocess
 import sys
+import time
 from pathlib import Path
 
-try:
-    import yaml
-except Exception as exc:  # pragma: no cover
-    print(f"Failed to import PyYAML: {exc}")
-    sys.exit(2)
-
 ROOT = Path(__file__).resolve().parents[2]
 DATA_DIR = ROOT / "ci" / "deps" / "data"
 FILES = [
@@ -43,12 +39,13 @@ try:
         extract_lane_include,
     )
     from matrix_common import load_purpose_manifest_common  # type: ignore
+    from yaml_cache import load_yaml_file  # type: ignore
 except Exception as exc:  # pragma: no cover
     print(f"Failed to import lane_utils helpers: {exc}")
     sys.exit(2)
 
 try:
-    from workflow_io import find_package_steps, parse_workflow_yaml  # type: ignore
+    from workflow_io import build_install_step_index, required_flags_for_script  # type: ignore
     from platform_normalization import (  # type: ignore
         candidate_os_keys_for_rule,
         compose_os_key,
@@ -59,7 +56,25 @@ try:
         load_platform_deps_bindings,
         load_platform_releases,
     )
-    from shell_lint import check_shell_scripts  # type: ignore
+    from shell_lint import SHELL_LINT_SCRIPTS, check_shell_scripts  # type: ignore
+    from check_engine import (  # type: ignore
+        CheckRegistry,
+        CheckResult,
+        print_results,
+        print_timing_table,
+        run_captured,
+        run_checks,
+        select_changed_units,
+    )
+    from findings import current_collector, record  # type: ignore
+    from report import build_report, build_sarif, write_json  # type: ignore
+    from topology_index import DepsTopologyIndex  # type: ignore
+    from deps_map import (  # type: ignore
+        DepsMapResolver,
+        check_resolver_parity,
+        load_deps_map_resolver,
+        resolve_with_awk,
+    )
 except Exception as exc:  # pragma: no cover
     print(f"Failed to import checkdeps helpers: {exc}")
     sys.exit(2)
@@ -67,89 +82,147 @@ except Exception as exc:  # pragma: no cover
 
 def load_yaml(path: Path) -> dict:
     try:
-        data = yaml.safe_load(path.read_text())
+        data = load_yaml_file(path)
     except Exception as exc:  # pragma: no cover
-        print(f"Invalid YAML: {path}: {exc}")
+        error(f"Invalid YAML: {path}: {exc}", file=path, indent="")
         sys.exit(2)
     if not isinstance(data, dict):
-        print(f"Unexpected YAML structure (root is not a mapping): {path}")
+        error(f"Unexpected YAML structure (root is not a mapping): {path}", file=path, indent="")
         sys.exit(2)
     return data
 
 
-def require(cond: bool, msg: str) -> None:
+def error(msg: str, *, file: Path | None = None, key_path: str | None = None, indent: str = "   ") -> None:
+    record("error", msg, file=file, key_path=key_path, indent=indent)
+
+
+def note(msg: str, *, file: Path | None = None, key_path: str | None = None, indent: str = "   ") -> None:
+    record("note", msg, file=file, key_path=key_path, indent=indent)
+
+
+def require(cond: object, msg: str, *, file: Path | None = None, key_path: str | None = None) -> bool:
+    """Record msg as an error unless cond holds; callers skip whatever depends on cond."""
     if not cond:
-        print(f"ERROR: {msg}")
-        sys.exit(1)
+        error(msg, file=file, key_path=key_path, indent="")
+    return bool(cond)
+
+
+def errors_recorded() -> int:
+    collector = current_collector()
+    return collector.count("error") if collector is not None else 0
 
 
 def normalize_string_list(value, label: str) -> list[str]:
-    require(isinstance(value, list), f"{label} must be a list")
+    if not require(isinstance(value, list), f"{label} must be a list"):
+        return []
     normalized: list[str] = []
     for entry in value:
-        require(isinstance(entry, str), f"{label} entries must be strings")
+        if not require(isinstance(entry, str), f"{label} entries must be strings"):
+            continue
         item = entry.strip()
-        require(bool(item), f"{label} entries must be non-empty strings")
-        normalized.append(item)
+        if require(bool(item), f"{label} entries must be non-empty strings"):
+            normalized.append(item)
     return normalized
 
 
 def load_topology(topology_file: Path) -> dict:
-    require(topology_file.exists(), f"missing topology file: {topology_file}")
+    if not require(topology_file.exists(), f"missing topology file: {topology_file}"):
+        return {"targets": {}, "build": {}}
     data = load_yaml(topology_file)
-    require("build" not in data, f"{topology_file} uses deprecated 'build' key; strict v2 requires 'targets'")
-    require("bindings" not in data, f"{topology_file} uses deprecated 'bindings' key; strict v2 requires 'targets'")
+    require(
+        "build" not in data,
+        f"{topology_file} uses deprecated 'build' key; strict v2 requires 'targets'",
+        file=topology_file,
+        key_path="build",
+    )
+    require(
+        "bindings" not in data,
+        f"{topology_file} uses deprecated 'bindings' key; strict v2 requires 'targets'",
+        file=topology_file,
+        key_path="bindings",
+    )
     targets = data.get("targets")
-    require(isinstance(targets, dict), f"{topology_file} targets must be a mapping")
+    if not require(
+        isinstance(targets, dict),
+        f"{topology_file} targets must be a mapping",
+        file=topology_file,
+        key_path="targets",
+    ):
+        targets = data["targets"] = {}
     for family, family_entry in targets.items():
-        require(
+        if not require(
             isinstance(family_entry, dict),
             f"{topology_file} targets.{family} must be a mapping",
-        )
+            file=topology_file,
+            key_path=f"targets.{family}",
+        ):
+            continue
         for os_name, os_entry in family_entry.items():
-            require(
+            os_key_path = f"targets.{family}.{os_name}"
+            if not require(
                 isinstance(os_entry, dict),
-                f"{topology_file} targets.{family}.{os_name} must be a mapping",
-            )
+                f"{topology_file} {os_key_path} must be a mapping",
+                file=topology_file,
+                key_path=os_key_path,
+            ):
+                continue
             profile_name = os_entry.get("profile")
             require(
                 isinstance(profile_name, str) and profile_name.strip(),
-                f"{topology_file} targets.{family}.{os_name}.profile must be a non-empty string",
+                f"{topology_file} {os_key_path}.profile must be a non-empty string",
+                file=topology_file,
+                key_path=f"{os_key_path}.profile",
             )
             packagers = os_entry.get("packagers")
-            require(
+            if not require(
                 isinstance(packagers, dict) and bool(packagers),
-                f"{topology_file} targets.{family}.{os_name}.packagers must be a non-empty mapping",
-            )
+                f"{topology_file} {os_key_path}.packagers must be a non-empty mapping",
+                file=topology_file,
+                key_path=f"{os_key_path}.packagers",
+            ):
+                continue
             for pkg_name, pkg_entry in packagers.items():
                 if pkg_entry is None:
                     continue
                 require(
                     isinstance(pkg_entry, dict),
-                    (
-                        f"{topology_file} targets.{family}.{os_name}.packagers."
-                        f"{pkg_name} must be a mapping"
-                    ),
+                    f"{topology_file} {os_key_path}.packagers.{pkg_name} must be a mapping",
+                    file=topology_file,
+                    key_path=f"{os_key_path}.packagers.{pkg_name}",
                 )
-    data["build"] = copy.deepcopy(targets)
+    # Expanded profiles and topology share subtrees read-only; nothing mutates them.
+    data["build"] = targets
     return data
 
 
 def load_shared_version_notes(version_notes_file: Path) -> dict:
-    require(version_notes_file.exists(), f"missing version notes file: {version_notes_file}")
+    if not require(version_notes_file.exists(), f"missing version notes file: {version_notes_file}"):
+        return {}
     data = load_yaml(version_notes_file)
     notes = data.get("version_notes")
-    require(isinstance(notes, dict), f"{version_notes_file} version_notes must be a mapping")
+    if not require(
+        isinstance(notes, dict),
+        f"{version_notes_file} version_notes must be a mapping",
+        file=version_notes_file,
+        key_path="version_notes",
+    ):
+        return {}
     return notes
 
 
 def deep_merge_dict(base: dict, overlay: dict) -> dict:
-    merged = copy.deepcopy(base)
+    """Merge overlay into base without mutating either.
+
+    Only the mappings along overlay keys are copied; untouched subtrees are
+    shared with base and overlay, so callers must treat the result as
+    read-only below the top level (copy a mapping before writing into it).
+    """
+    merged = dict(base)
     for key, value in overlay.items():
         if key in merged and isinstance(merged[key], dict) and isinstance(value, dict):
             merged[key] = deep_merge_dict(merged[key], value)
         else:
-            merged[key] = copy.deepcopy(value)
+            merged[key] = value
     return merged
 
 
@@ -158,7 +231,8 @@ def apply_mandatory_delta(
     delta: dict,
     label: str,
 ) -> list[str]:
-    require(isinstance(delta, dict), f"{label} must be a mapping with add/remove lists")
+    if not require(isinstance(delta, dict), f"{label} must be a mapping with add/remove lists"):
+        return list(base_items)
     unknown = sorted(set(delta.keys()) - {"add", "remove"})
     require(not unknown, f"{label} contains unsupported keys: {', '.join(unknown)}")
     add_items = normalize_string_list(delta.get("add", []), f"{label}.add")
@@ -176,28 +250,37 @@ def merge_profiles_with_overlay_delta(
     overlay_profiles: dict,
     label: str,
 ) -> dict[str, dict]:
-    require(isinstance(base_profiles, dict), f"{label} base profiles must be a mapping")
-    require(isinstance(overlay_profiles, dict), f"{label} overlay profiles must be a mapping")
+    base_ok = require(isinstance(base_profiles, dict), f"{label} base profiles must be a mapping")
+    overlay_ok = require(isinstance(overlay_profiles, dict), f"{label} overlay profiles must be a mapping")
+    if not (base_ok and overlay_ok):
+        return {}
 
     merged_profiles: dict[str, dict] = {}
     for profile_name, base_entry in base_profiles.items():
-        require(
+        name_ok = require(
             isinstance(profile_name, str) and profile_name.strip(),
             f"{label} base profile names must be non-empty strings",
         )
-        require(isinstance(base_entry, dict), f"{label} base profile '{profile_name}' must be a mapping")
-        merged_profiles[profile_name] = copy.deepcopy(base_entry)
+        entry_ok = require(
+            isinstance(base_entry, dict), f"{label} base profile '{profile_name}' must be a mapping"
+        )
+        if name_ok and entry_ok:
+            merged_profiles[profile_name] = base_entry
 
     for profile_name, overlay_entry in overlay_profiles.items():
-        require(
+        name_ok = require(
             isinstance(profile_name, str) and profile_name.strip(),
             f"{label} overlay profile names must be non-empty strings",
         )
-        require(isinstance(overlay_entry, dict), f"{label} overlay profile '{profile_name}' must be a mapping")
-        require(
+        entry_ok = require(
+            isinstance(overlay_entry, dict), f"{label} overlay profile '{profile_name}' must be a mapping"
+        )
+        known = name_ok and require(
             profile_name in merged_profiles,
             f"{label} overlay profile '{profile_name}' is missing from base profiles",
         )
+        if not (entry_ok and known):
+            continue
 
         base_entry = merged_profiles[profile_name]
         merged_entry = deep_merge_dict(base_entry, overlay_entry)
@@ -210,21 +293,20 @@ def merge_profiles_with_overlay_delta(
                 f"{label} overlay profile '{profile_name}'.libs must be a mapping",
             )
         if isinstance(overlay_libs, dict) and "mandatory" in overlay_libs:
-            require(
+            if require(
                 isinstance(base_libs, dict) and "mandatory" in base_libs,
                 f"{label} base profile '{profile_name}' must define libs.mandatory for overlay delta",
-            )
-            base_mandatory = normalize_string_list(
-                base_libs["mandatory"],
-                f"{label} base profile '{profile_name}'.libs.mandatory",
-            )
-            merged_mandatory = apply_mandatory_delta(
-                base_mandatory,
-                overlay_libs["mandatory"],
-                f"{label} overlay profile '{profile_name}'.libs.mandatory",
-            )
-            merged_entry.setdefault("libs", {})
-            merged_entry["libs"]["mandatory"] = merged_mandatory
+            ):
+                base_mandatory = normalize_string_list(
+                    base_libs["mandatory"],
+                    f"{label} base profile '{profile_name}'.libs.mandatory",
+                )
+                merged_mandatory = apply_mandatory_delta(
+                    base_mandatory,
+                    overlay_libs["mandatory"],
+                    f"{label} overlay profile '{profile_name}'.libs.mandatory",
+                )
+                merged_entry["libs"] = {**merged_entry.get("libs", {}), "mandatory": merged_mandatory}
 
         merged_profiles[profile_name] = merged_entry
 
@@ -248,6 +330,59 @@ def load_platform_normalization_rules() -> dict[str, dict]:
     return rules
 
 
+# Shared base/overlay documents, loaded once for all variants so the merged
+# profiles (and the packager entries built from them) are shared objects.
+VARIANT_LAYER_CACHE: dict[Path, dict] = {}
+# (id(profile section), id(topology packager entry)) -> (pinned inputs, merged entry)
+PACKAGER_MERGE_CACHE: dict[tuple[int, int], tuple[tuple, dict]] = {}
+# variant path -> (variant document, topology, version notes, expansion);
+# check_file() and main() expand the same variants.
+EXPANSION_CACHE: dict[Path, tuple[dict, dict, dict, dict]] = {}
+
+
+def load_variant_layer(path: Path) -> dict:
+    key = path.resolve()
+    if key not in VARIANT_LAYER_CACHE:
+        VARIANT_LAYER_CACHE[key] = load_yaml(path)
+    return VARIANT_LAYER_CACHE[key]
+
+
+def merge_packager_entry(
+    profile: dict,
+    topology_pkg_entry: dict,
+    label: str,
+    pkg_label: str,
+) -> dict:
+    key = (id(profile), id(topology_pkg_entry))
+    cached = PACKAGER_MERGE_CACHE.get(key)
+    if cached is not None:
+        return cached[1]
+
+    merged_pkg = dict(topology_pkg_entry)
+    for section in ("libs", "tools"):
+        section_map: dict = {}
+        profile_section = profile.get(section)
+        if profile_section is not None and require(
+            isinstance(profile_section, dict),
+            f"{label}.{section} must be a mapping",
+        ):
+            section_map.update(profile_section)
+
+        pkg_section = merged_pkg.get(section)
+        if pkg_section is not None and require(
+            isinstance(pkg_section, dict),
+            f"{pkg_label}.{section} must be a mapping",
+        ):
+            section_map.update(pkg_section)
+
+        if section_map:
+            merged_pkg[section] = section_map
+
+    # Pin the key objects so their ids stay unique while cached.
+    PACKAGER_MERGE_CACHE[key] = ((profile, topology_pkg_entry), merged_pkg)
+    return merged_pkg
+
+
 def expand_variant_profiles(
     data: dict,
     path: Path,
@@ -255,95 +390,172 @@ def expand_variant_profiles(
     topology_file: Path,
     shared_version_notes: dict,
     version_notes_file: Path,
-) -> dict:
+) -> dict | None:
+    """Expand a variant file against the targets, base profiles and overlay.
+
+    The result shares unchanged subtrees with the topology, the base profiles
+    and other variants' expansions, and is memoized per variant path; treat it
+    as read-only. None when the variant's files are too broken to expand; the
+    errors are recorded.
+    """
+    cached = EXPANSION_CACHE.get(path.resolve())
+    if (
+        cached is not None
+        and cached[1] is topology
+        and cached[2] is shared_version_notes
+        and cached[0] == data
+    ):
+        return cached[3]
+    expanded = _expand_variant_profiles(
+        data, path, topology, topology_file, shared_version_notes, version_notes_file
+    )
+    if expanded is not None:
+        EXPANSION_CACHE[path.resolve()] = (data, topology, shared_version_notes, expanded)
+    return expanded
+
+
+def _expand_variant_profiles(
+    data: dict,
+    path: Path,
+    topology: dict,
+    topology_file: Path,
+    shared_version_notes: dict,
+    version_notes_file: Path,
+) -> dict | None:
     topology_targets = topology.get("targets", {})
-    require(isinstance(topology_targets, dict), f"{topology_file} targets must be a mapping")
+    if not require(isinstance(topology_targets, dict), f"{topology_file} targets must be a mapping"):
+        topology_targets = {}
 
     require(
         "topology" not in data,
         f"{path} uses deprecated key 'topology'; strict v2 requires 'targets_file'",
+        file=path,
+        key_path="topology",
     )
     require(
         "bindings_file" not in data,
         f"{path} uses deprecated key 'bindings_file'; strict v2 uses targets only",
+        file=path,
+        key_path="bindings_file",
     )
     require(
         "profiles" not in data and "runtime" not in data,
         f"{path} must not define inline profiles/runtime in strict v2",
+        file=path,
     )
 
     targets_ref = data.get("targets_file")
-    require(
+    if require(
         isinstance(targets_ref, str) and targets_ref.strip(),
         f"{path} targets_file must be a non-empty string",
-    )
-    require(
-        Path(targets_ref).name == topology_file.name,
-        f"{path} targets_file='{targets_ref}' does not match active targets '{topology_file.name}'",
-    )
+        file=path,
+        key_path="targets_file",
+    ):
+        require(
+            Path(targets_ref).name == topology_file.name,
+            f"{path} targets_file='{targets_ref}' does not match active targets '{topology_file.name}'",
+            file=path,
+            key_path="targets_file",
+        )
 
     require(
         "version_notes_file" not in data,
         f"{path} must not define version_notes_file; strict v2 sources it from base_file",
+        file=path,
+        key_path="version_notes_file",
     )
 
     base_file_ref = data.get("base_file")
     overlay_file_ref = data.get("overlay_file")
     overlay_variant_ref = data.get("overlay_variant")
-    require(
+    base_ok = require(
         isinstance(base_file_ref, str) and base_file_ref.strip(),
         f"{path} base_file must be a non-empty string",
+        file=path,
+        key_path="base_file",
     )
-    require(
+    overlay_ok = require(
         isinstance(overlay_file_ref, str) and overlay_file_ref.strip(),
         f"{path} overlay_file must be a non-empty string",
+        file=path,
+        key_path="overlay_file",
     )
-    require(
+    overlay_variant_ok = require(
         isinstance(overlay_variant_ref, str) and overlay_variant_ref.strip(),
         f"{path} overlay_variant must be a non-empty string",
+        file=path,
+        key_path="overlay_variant",
     )
+    if not (base_ok and overlay_ok and overlay_variant_ok):
+        return None
 
     base_path = path.parent / base_file_ref
     overlay_path = path.parent / overlay_file_ref
-    require(base_path.exists(), f"{path} references missing base_file: {base_path}")
-    require(overlay_path.exists(), f"{path} references missing overlay_file: {overlay_path}")
+    base_exists = require(base_path.exists(), f"{path} references missing base_file: {base_path}", file=path)
+    overlay_exists = require(
+        overlay_path.exists(), f"{path} references missing overlay_file: {overlay_path}", file=path
+    )
+    if not (base_exists and overlay_exists):
+        return None
 
-    base_data = load_yaml(base_path)
-    overlay_data = load_yaml(overlay_path)
+    base_data = load_variant_layer(base_path)
+    overlay_data = load_variant_layer(overlay_path)
 
     base_version_notes = base_data.get("version_notes_file")
-    require(
+    if require(
         isinstance(base_version_notes, str) and base_version_notes.strip(),
         f"{base_path} version_notes_file must be a non-empty string",
-    )
-    require(
-        Path(base_version_notes).name == version_notes_file.name,
-        f"{base_path} version_notes_file='{base_version_notes}' does not match active notes '{version_notes_file.name}'",
-    )
+        file=base_path,
+        key_path="version_notes_file",
+    ):
+        require(
+            Path(base_version_notes).name == version_notes_file.name,
+            f"{base_path} version_notes_file='{base_version_notes}' does not match active notes '{version_notes_file.name}'",
+            file=base_path,
+            key_path="version_notes_file",
+        )
 
     base_profiles = base_data.get("profiles", {})
-    require(isinstance(base_profiles, dict), f"{base_path} profiles must be a mapping")
+    if not require(
+        isinstance(base_profiles, dict),
+        f"{base_path} profiles must be a mapping",
+        file=base_path,
+        key_path="profiles",
+    ):
+        base_profiles = {}
 
     variants_map = overlay_data.get("variants", {})
-    require(isinstance(variants_map, dict), f"{overlay_path} variants must be a mapping")
+    if not require(
+        isinstance(variants_map, dict),
+        f"{overlay_path} variants must be a mapping",
+        file=overlay_path,
+        key_path="variants",
+    ):
+        variants_map = {}
     selected_overlay = variants_map.get(overlay_variant_ref)
     if selected_overlay is None:
         selected_overlay = {}
-    require(
+    if not require(
         isinstance(selected_overlay, dict),
         (
             f"{overlay_path} variants.{overlay_variant_ref} must be a mapping when provided "
             f"(referenced by {path})"
         ),
-    )
+        file=overlay_path,
+        key_path=f"variants.{overlay_variant_ref}",
+    ):
+        selected_overlay = {}
 
     overlay_profiles = selected_overlay.get("profiles", {})
     if overlay_profiles is None:
         overlay_profiles = {}
-    require(
+    if not require(
         isinstance(overlay_profiles, dict),
         f"{overlay_path} variants.{overlay_variant_ref}.profiles must be a mapping",
-    )
+        file=overlay_path,
+        key_path=f"variants.{overlay_variant_ref}.profiles",
+    ):
+        overlay_profiles = {}
 
     profiles = merge_profiles_with_overlay_delta(
         base_profiles,
@@ -352,15 +564,18 @@ def expand_variant_profiles(
     )
 
     for profile_name, profile_entry in profiles.items():
-        require(isinstance(profile_entry, dict), f"{path} profiles.{profile_name} must be a mapping")
+        if not require(isinstance(profile_entry, dict), f"{path} profiles.{profile_name} must be a mapping"):
+            continue
         libs = profile_entry.get("libs")
-        if libs is not None:
-            require(isinstance(libs, dict), f"{path} profiles.{profile_name}.libs must be a mapping")
-            if "mandatory" in libs:
-                normalize_string_list(
-                    libs["mandatory"],
-                    f"{path} profiles.{profile_name}.libs.mandatory",
-                )
+        if (
+            libs is not None
+            and require(isinstance(libs, dict), f"{path} profiles.{profile_name}.libs must be a mapping")
+            and "mandatory" in libs
+        ):
+            normalize_string_list(
+                libs["mandatory"],
+                f"{path} profiles.{profile_name}.libs.mandatory",
+            )
         tools = profile_entry.get("tools")
         if tools is not None:
             require(isinstance(tools, dict), f"{path} profiles.{profile_name}.tools must be a mapping")
@@ -368,90 +583,78 @@ def expand_variant_profiles(
     base_runtime = base_data.get("runtime", {})
     if base_runtime is None:
         base_runtime = {}
-    require(isinstance(base_runtime, dict), f"{base_path} runtime must be a mapping")
-    runtime = copy.deepcopy(base_runtime)
+    if not require(
+        isinstance(base_runtime, dict),
+        f"{base_path} runtime must be a mapping",
+        file=base_path,
+        key_path="runtime",
+    ):
+        base_runtime = {}
+    runtime = dict(base_runtime)
 
     overlay_runtime = selected_overlay.get("runtime")
-    if overlay_runtime is not None:
-        require(
-            isinstance(overlay_runtime, dict),
-            f"{overlay_path} variants.{overlay_variant_ref}.runtime must be a mapping",
-        )
+    if overlay_runtime is not None and require(
+        isinstance(overlay_runtime, dict),
+        f"{overlay_path} variants.{overlay_variant_ref}.runtime must be a mapping",
+        file=overlay_path,
+        key_path=f"variants.{overlay_variant_ref}.runtime",
+    ):
         runtime = deep_merge_dict(runtime, overlay_runtime)
 
     if "libs" not in runtime:
         runtime["libs"] = {}
     if "tools" not in runtime:
         runtime["tools"] = {}
-    require(isinstance(runtime["libs"], dict), f"{path} runtime.libs must be a mapping")
-    require(isinstance(runtime["tools"], dict), f"{path} runtime.tools must be a mapping")
+    for section in ("libs", "tools"):
+        require(
+            isinstance(runtime[section], dict),
+            f"{path} runtime.{section} must be a mapping",
+            file=path,
+            key_path=f"runtime.{section}",
+        )
 
-    expanded = copy.deepcopy(data)
+    expanded = dict(data)
     build_out: dict[str, dict] = {}
+    # load_topology already reported malformed targets entries; skip them here.
     for family, family_entry in topology_targets.items():
-        require(
-            isinstance(family_entry, dict),
-            f"{topology_file} targets.{family} must be a mapping",
-        )
+        if not isinstance(family_entry, dict):
+            continue
         build_out[family] = {}
         for os_name, topology_os_entry in family_entry.items():
-            require(
-                isinstance(topology_os_entry, dict),
-                f"{topology_file} targets.{family}.{os_name} must be a mapping",
-            )
-
+            os_key_path = f"targets.{family}.{os_name}"
+            if not isinstance(topology_os_entry, dict):
+                continue
             topology_packagers = topology_os_entry.get("packagers", {})
-            require(
-                isinstance(topology_packagers, dict) and bool(topology_packagers),
-                f"{topology_file} targets.{family}.{os_name}.packagers must be a non-empty mapping",
-            )
-
             profile_name = topology_os_entry.get("profile")
-            profile: dict = {}
-            require(
-                isinstance(profile_name, str) and profile_name.strip(),
-                f"{topology_file} targets.{family}.{os_name}.profile must be a non-empty string",
-            )
-            require(
+            if not (
+                isinstance(topology_packagers, dict)
+                and topology_packagers
+                and isinstance(profile_name, str)
+                and profile_name.strip()
+            ):
+                continue
+            if not require(
                 profile_name in profiles,
-                f"{topology_file} targets.{family}.{os_name}.profile references unknown profile '{profile_name}'",
-            )
+                f"{topology_file} {os_key_path}.profile references unknown profile '{profile_name}'",
+                file=topology_file,
+                key_path=f"{os_key_path}.profile",
+            ):
+                continue
             profile = profiles[profile_name]
 
             packagers: dict[str, dict] = {}
             for pkg_name, topology_pkg_entry in topology_packagers.items():
                 if topology_pkg_entry is None:
                     topology_pkg_entry = {}
-                require(
-                    isinstance(topology_pkg_entry, dict),
-                    (
-                        f"{topology_file} targets.{family}.{os_name}.packagers."
-                        f"{pkg_name} must be a mapping"
-                    ),
-                )
-
-                merged_pkg = copy.deepcopy(topology_pkg_entry)
-                for section in ("libs", "tools"):
-                    section_map: dict = {}
-                    profile_section = profile.get(section)
-                    if profile_section is not None:
-                        require(
-                            isinstance(profile_section, dict),
-                            f"{path} profiles.{profile_name}.{section} must be a mapping",
-                        )
-                        section_map.update(copy.deepcopy(profile_section))
-
-                    pkg_section = merged_pkg.get(section)
-                    if pkg_section is not None:
-                        require(
-                            isinstance(pkg_section, dict),
-                            f"{path} build.{family}.{os_name}.packagers.{pkg_name}.{section} must be a mapping",
-                        )
-                        section_map.update(copy.deepcopy(pkg_section))
-
-                    if section_map:
-                        merged_pkg[section] = section_map
+                if not isinstance(topology_pkg_entry, dict):
+                    continue
 
+                merged_pkg = merge_packager_entry(
+                    profile,
+                    topology_pkg_entry,
+                    f"{path} profiles.{profile_name}",
+                    f"{path} build.{family}.{os_name}.packagers.{pkg_name}",
+                )
                 packagers[pkg_name] = merged_pkg
 
             build_out[family][os_name] = {
@@ -459,11 +662,9 @@ def expand_variant_profiles(
                 "packagers": packagers,
             }
 
-    resolved_version_notes = copy.deepcopy(shared_version_notes)
-
     expanded["build"] = build_out
     expanded["runtime"] = runtime
-    expanded["version_notes"] = resolved_version_notes
+    expanded["version_notes"] = shared_version_notes
     return expanded
 
 
@@ -482,46 +683,54 @@ def check_file(
         shared_version_notes,
         version_notes_file,
     )
-    require("runtime" in data, f"{path} missing runtime section")
+    if data is None:
+        return
+    require("runtime" in data, f"{path} missing runtime section", file=path)
 
     build = data["build"]
     for family, family_entry in build.items():
-        require(isinstance(family_entry, dict), f"{path} build.{family} must be a mapping")
+        if not require(isinstance(family_entry, dict), f"{path} build.{family} must be a mapping", file=path):
+            continue
         for os_name, os_entry in family_entry.items():
-            require(
+            if not require(
                 isinstance(os_entry, dict),
                 f"{path} build.{family}.{os_name} must be a mapping",
-            )
+                file=path,
+            ):
+                continue
             require(
                 "packagers" in os_entry,
                 f"{path} missing build.{family}.{os_name}.packagers",
+                file=path,
             )
             for pkg_name, pkg in os_entry.get("packagers", {}).items():
-                require(
-                    "libs" in pkg,
-                    f"{path} missing libs for build.{family}.{os_name}.packagers.{pkg_name}",
-                )
-                require(
+                pkg_key_path = f"build.{family}.{os_name}.packagers.{pkg_name}"
+                if not require("libs" in pkg, f"{path} missing libs for {pkg_key_path}", file=path):
+                    continue
+                if not require(
                     isinstance(pkg.get("libs"), dict),
-                    f"{path} build.{family}.{os_name}.packagers.{pkg_name}.libs must be a mapping",
-                )
-                require(
+                    f"{path} {pkg_key_path}.libs must be a mapping",
+                    file=path,
+                ):
+                    continue
+                if require(
                     "mandatory" in pkg["libs"],
-                    f"{path} missing libs.mandatory for build.{family}.{os_name}.packagers.{pkg_name}",
-                )
-                normalize_string_list(
-                    pkg["libs"]["mandatory"],
-                    f"{path} build.{family}.{os_name}.packagers.{pkg_name}.libs.mandatory",
-                )
+                    f"{path} missing libs.mandatory for {pkg_key_path}",
+                    file=path,
+                ):
+                    normalize_string_list(
+                        pkg["libs"]["mandatory"],
+                        f"{path} {pkg_key_path}.libs.mandatory",
+                    )
 
     # Runtime
     runtime = data["runtime"]
-    require("libs" in runtime, f"{path} missing runtime.libs")
-    require("tools" in runtime, f"{path} missing runtime.tools")
+    require("libs" in runtime, f"{path} missing runtime.libs", file=path)
+    require("tools" in runtime, f"{path} missing runtime.tools", file=path)
 
     # Optional metadata
     if "version_notes" in data:
-        require(isinstance(data["version_notes"], dict), f"{path} version_notes must be a mapping")
+        require(isinstance(data["version_notes"], dict), f"{path} version_notes must be a mapping", file=path)
 
 
 def packages_from_yaml_list(
@@ -554,22 +763,19 @@ def packages_from_yaml_list(
     return [line.strip() for line in out.splitlines() if line.strip()]
 
 
-def diff(label: str, expected: list[str], actual: list[str]) -> bool:
+def diff(label: str, expected: list[str], actual: list[str], *, key_path: str | None = None) -> bool:
     exp_set = set(expected)
     act_set = set(actual)
     missing = sorted(exp_set - act_set)
     extra = sorted(act_set - exp_set)
-    ok = True
     print(f"-- {label}")
     print(f"   expected: {', '.join(sorted(exp_set))}")
     print(f"   actual:   {', '.join(sorted(act_set))}")
     if missing:
-        ok = False
-        print(f"   MISSING:  {', '.join(missing)}")
+        error(f"{label} missing: {', '.join(missing)}", key_path=key_path)
     if extra:
-        ok = False
-        print(f"   EXTRA:    {', '.join(extra)}")
-    return ok
+        error(f"{label} extra: {', '.join(extra)}", key_path=key_path)
+    return not missing and not extra
 
 
 def print_diff(label: str, expected: list[str], actual: list[str]) -> None:
@@ -591,29 +797,13 @@ def scan_runtime_tools(tokens: set[str]) -> set[str]:
     return found
 
 
-def gather_build_combinations(data: dict) -> list[tuple[str, str, str]]:
-    combos: list[tuple[str, str, str]] = []
-    for family, family_entry in data.get("build", {}).items():
-        if not isinstance(family_entry, dict):
-            continue
-        for os_name, os_entry in family_entry.items():
-            if not isinstance(os_entry, dict):
-                continue
-            packagers = os_entry.get("packagers", {})
-            if not isinstance(packagers, dict):
-                continue
-            for pkgmgr in packagers:
-                combos.append((family, os_name, pkgmgr))
-    return combos
-
-
-def check_packages_from_yaml_mapping(data: dict, variant: str) -> bool:
-    combos = gather_build_combinations(data)
+def check_packages_from_yaml_mapping(deps_index: DepsTopologyIndex, variant: str) -> bool:
+    combos = deps_index.combinations(variant)
     if not combos:
         return True
     script = ROOT / "ci" / "deps" / "packages-from-yaml.sh"
     if not script.exists():
-        print("   ERROR: packages-from-yaml.sh missing; cannot validate mappings")
+        error("packages-from-yaml.sh missing; cannot validate mappings", file=script)
         return False
     ok = True
     for family, os_name, pkgmgr in combos:
@@ -635,14 +825,15 @@ def check_packages_from_yaml_mapping(data: dict, variant: str) -> bool:
         result = subprocess.run(cmd, capture_output=True, text=True)
         if result.returncode != 0:
             ok = False
-            print(
-                f"   ERROR: packages-from-yaml.sh failed for variant={variant} family={family} "
+            message = (
+                f"packages-from-yaml.sh failed for variant={variant} family={family} "
                 f"os={os_name} pkgmgr={pkgmgr}"
             )
             if result.stdout.strip():
-                print(f"      stdout: {result.stdout.strip()}")
+                message += f"\nstdout: {result.stdout.strip()}"
             if result.stderr.strip():
-                print(f"      stderr: {result.stderr.strip()}")
+                message += f"\nstderr: {result.stderr.strip()}"
+            error(message, file=script)
     return ok
 
 
@@ -650,7 +841,7 @@ def iter_ref_validation_lanes() -> list[tuple[str, Path, str, dict]]:
     lanes: list[tuple[str, Path, str, dict]] = []
 
     if not REF_FAMILIES_MANIFEST.exists():
-        print(f"   ERROR: missing ref families manifest: {REF_FAMILIES_MANIFEST}")
+        error(f"missing ref families manifest: {REF_FAMILIES_MANIFEST}", file=REF_FAMILIES_MANIFEST)
         return lanes
 
     try:
@@ -665,7 +856,7 @@ def iter_ref_validation_lanes() -> list[tuple[str, Path, str, dict]]:
             ),
         )
     except SystemExit as exc:
-        print(f"   ERROR: {exc}")
+        error(f"{exc}", file=REF_FAMILIES_MANIFEST)
         return lanes
 
     for entry in manifest["entries"]:
@@ -674,14 +865,14 @@ def iter_ref_validation_lanes() -> list[tuple[str, Path, str, dict]]:
 
         lane_path = ROOT / lane_file
         if not lane_path.exists():
-            print(f"   ERROR: lane file for family '{family}' does not exist: {lane_path}")
+            error(f"lane file for family '{family}' does not exist: {lane_path}", file=REF_FAMILIES_MANIFEST)
             continue
 
-        lane_doc = yaml.safe_load(lane_path.read_text()) or {}
+        lane_doc = load_yaml_file(lane_path) or {}
         try:
             include = extract_lane_include(lane_doc, lane_path)
         except LaneSpecError as exc:
-            print(f"   ERROR: {exc}")
+            error(f"{exc}", file=lane_path)
             continue
 
         for lane_index, lane in enumerate(include):
@@ -690,7 +881,7 @@ def iter_ref_validation_lanes() -> list[tuple[str, Path, str, dict]]:
             try:
                 lane_variants = expand_lane_variants(lane, lane_path, lane_index)
             except LaneSpecError as exc:
-                print(f"   ERROR: {exc}")
+                error(f"{exc}", file=lane_path)
                 continue
 
             for lane_variant in lane_variants:
@@ -707,15 +898,18 @@ def iter_ref_validation_lanes() -> list[tuple[str, Path, str, dict]]:
 
 
 def check_ref_workflow_deps_coverage(
-    variant_index: dict[str, dict[str, set[str]]],
+    deps_index: DepsTopologyIndex,
     platform_releases: dict[str, dict],
     platform_bindings: dict[str, dict],
 ) -> bool:
     if not platform_releases:
-        print(f"   ERROR: platform releases missing or invalid: {PLATFORM_RELEASES_FILE}")
+        error(f"platform releases missing or invalid: {PLATFORM_RELEASES_FILE}", file=PLATFORM_RELEASES_FILE)
         return False
     if not platform_bindings:
-        print(f"   ERROR: platform deps bindings missing or invalid in {PLATFORM_CATALOG_FILE}")
+        error(
+            f"platform deps bindings missing or invalid in {PLATFORM_CATALOG_FILE}",
+            file=PLATFORM_CATALOG_FILE,
+        )
         return False
 
     ok = True
@@ -725,13 +919,14 @@ def check_ref_workflow_deps_coverage(
     if duplicate_images:
         ok = False
         for image_ref, platform_ids in sorted(duplicate_images.items()):
-            print(
-                f"   ERROR: duplicate runtime=docker image '{image_ref}' in platform releases: "
-                f"{', '.join(sorted(platform_ids))}"
+            error(
+                f"duplicate runtime=docker image '{image_ref}' in platform releases: "
+                f"{', '.join(sorted(platform_ids))}",
+                file=PLATFORM_RELEASES_FILE,
             )
 
     if not lanes:
-        print("   NOTE: no ref-validation lane entries found")
+        note("no ref-validation lane entries found")
         return True
 
     for family, lane_path, variant, lane in lanes:
@@ -743,38 +938,42 @@ def check_ref_workflow_deps_coverage(
             platform_id = image_to_platform.get(req_value, "")
             if not platform_id:
                 ok = False
-                print(
-                    f"   ERROR: {lane_ref} requires docker image '{req_value}' "
-                    "missing from platform releases"
+                error(
+                    f"{lane_ref} requires docker image '{req_value}' "
+                    "missing from platform releases",
+                    file=lane_path,
                 )
                 continue
         elif req_type == "platform_id":
             platform_id = req_value
             if not platform_id:
                 ok = False
-                print(f"   ERROR: {lane_ref} could not derive a platform id")
+                error(f"{lane_ref} could not derive a platform id", file=lane_path)
                 continue
             if platform_id not in platform_releases:
                 ok = False
-                print(
-                    f"   ERROR: {lane_ref} requires platform '{platform_id}' "
-                    "missing from platform releases"
+                error(
+                    f"{lane_ref} requires platform '{platform_id}' "
+                    "missing from platform releases",
+                    file=lane_path,
                 )
                 continue
         else:
             ok = False
-            print(
-                f"   ERROR: {lane_ref} has unknown platform mapping: {(req_type, req_value)} "
-                f"(source: {lane_path})"
+            error(
+                f"{lane_ref} has unknown platform mapping: {(req_type, req_value)} "
+                f"(source: {lane_path})",
+                file=lane_path,
             )
             continue
 
         binding = platform_bindings.get(platform_id)
         if not isinstance(binding, dict):
             ok = False
-            print(
-                f"   ERROR: {lane_ref} maps to platform '{platform_id}' "
-                "without a deps binding"
+            error(
+                f"{lane_ref} maps to platform '{platform_id}' "
+                "without a deps binding",
+                file=lane_path,
             )
             continue
 
@@ -788,26 +987,29 @@ def check_ref_workflow_deps_coverage(
             or not os_name.strip()
         ):
             ok = False
-            print(
-                f"   ERROR: platform '{platform_id}' has invalid deps binding "
-                "(missing non-empty package_family/platform_os)"
+            error(
+                f"platform '{platform_id}' has invalid deps binding "
+                "(missing non-empty package_family/platform_os)",
+                file=PLATFORM_RELEASES_FILE,
+                key_path=f"platforms.{platform_id}",
             )
             continue
 
         os_key = compose_os_key(os_name, version)
-        families = variant_index.get(variant, {})
-        if binding_family not in families:
+        if not deps_index.has_family(variant, binding_family):
             ok = False
-            print(
-                f"   ERROR: {lane_ref} uses variant={variant} family={binding_family} "
-                f"but deps-{variant}.yaml has no family '{binding_family}'"
+            error(
+                f"{lane_ref} uses variant={variant} family={binding_family} "
+                f"but deps-{variant}.yaml has no family '{binding_family}'",
+                file=lane_path,
             )
             continue
-        if os_key not in families[binding_family]:
+        if not deps_index.has_os(variant, binding_family, os_key):
             ok = False
-            print(
-                f"   ERROR: {lane_ref} expects deps key {binding_family}.{os_key} "
-                f"for variant={variant}, but it is missing in deps-{variant}.yaml"
+            error(
+                f"{lane_ref} expects deps key {binding_family}.{os_key} "
+                f"for variant={variant}, but it is missing in deps-{variant}.yaml",
+                file=lane_path,
             )
 
     if ok:
@@ -821,13 +1023,16 @@ def check_platform_catalog_bindings_consistency(
     platform_bindings: dict[str, dict],
 ) -> bool:
     if not platform_catalog:
-        print(f"   ERROR: platform catalog missing or invalid: {PLATFORM_CATALOG_FILE}")
+        error(f"platform catalog missing or invalid: {PLATFORM_CATALOG_FILE}", file=PLATFORM_CATALOG_FILE)
         return False
     if not platform_releases:
-        print(f"   ERROR: platform releases missing or invalid: {PLATFORM_RELEASES_FILE}")
+        error(f"platform releases missing or invalid: {PLATFORM_RELEASES_FILE}", file=PLATFORM_RELEASES_FILE)
         return False
     if not platform_bindings:
-        print(f"   ERROR: platform deps bindings missing or invalid in {PLATFORM_CATALOG_FILE}")
+        error(
+            f"platform deps bindings missing or invalid in {PLATFORM_CATALOG_FILE}",
+            file=PLATFORM_CATALOG_FILE,
+        )
         return False
 
     ok = True
@@ -839,19 +1044,29 @@ def check_platform_catalog_bindings_consistency(
 
     for platform_id in missing_bindings:
         ok = False
-        print(f"   ERROR: platform '{platform_id}' is in catalog but missing deps mapping under 'deps'")
+        error(
+            f"platform '{platform_id}' is in catalog but missing deps mapping under 'deps'",
+            file=PLATFORM_RELEASES_FILE,
+            key_path=f"platforms.{platform_id}",
+        )
     for platform_id in extra_bindings:
         ok = False
-        print(f"   ERROR: platform '{platform_id}' has deps mapping but is missing from catalog")
+        error(
+            f"platform '{platform_id}' has deps mapping but is missing from catalog",
+            file=PLATFORM_RELEASES_FILE,
+            key_path=f"platforms.{platform_id}",
+        )
 
     for platform_id, binding in platform_bindings.items():
         family = binding.get("package_family")
         os_name = binding.get("platform_os")
         if not isinstance(family, str) or not family.strip() or not isinstance(os_name, str) or not os_name.strip():
             ok = False
-            print(
-                f"   ERROR: deps binding for platform '{platform_id}' "
-                "must include non-empty 'package_family' and 'platform_os'"
+            error(
+                f"deps binding for platform '{platform_id}' "
+                "must include non-empty 'package_family' and 'platform_os'",
+                file=PLATFORM_CATALOG_FILE,
+                key_path=f"platforms.{platform_id}.deps",
             )
 
     if ok:
@@ -860,15 +1075,18 @@ def check_platform_catalog_bindings_consistency(
 
 
 def check_docker_platforms_map_to_deps(
-    variant_index: dict[str, dict[str, set[str]]],
+    deps_index: DepsTopologyIndex,
     platform_releases: dict[str, dict],
     platform_bindings: dict[str, dict],
 ) -> bool:
     if not platform_releases:
-        print(f"   ERROR: platform releases missing or invalid: {PLATFORM_RELEASES_FILE}")
+        error(f"platform releases missing or invalid: {PLATFORM_RELEASES_FILE}", file=PLATFORM_RELEASES_FILE)
         return False
     if not platform_bindings:
-        print(f"   ERROR: platform deps bindings missing or invalid in {PLATFORM_CATALOG_FILE}")
+        error(
+            f"platform deps bindings missing or invalid in {PLATFORM_CATALOG_FILE}",
+            file=PLATFORM_CATALOG_FILE,
+        )
         return False
 
     ok = True
@@ -883,13 +1101,21 @@ def check_docker_platforms_map_to_deps(
 
         if not isinstance(image_ref, str) or not image_ref.strip():
             ok = False
-            print(f"   ERROR: platform '{platform_id}' (runtime=docker) missing non-empty 'image' field")
+            error(
+                f"platform '{platform_id}' (runtime=docker) missing non-empty 'image' field",
+                file=PLATFORM_RELEASES_FILE,
+                key_path=f"platforms.{platform_id}",
+            )
             continue
 
         binding = platform_bindings.get(platform_id)
         if not isinstance(binding, dict):
             ok = False
-            print(f"   ERROR: platform '{platform_id}' (runtime=docker) missing deps binding")
+            error(
+                f"platform '{platform_id}' (runtime=docker) missing deps binding",
+                file=PLATFORM_RELEASES_FILE,
+                key_path=f"platforms.{platform_id}",
+            )
             continue
 
         family = binding.get("package_family")
@@ -898,23 +1124,27 @@ def check_docker_platforms_map_to_deps(
 
         if not isinstance(family, str) or not isinstance(os_name, str):
             ok = False
-            print(
-                f"   ERROR: platform '{platform_id}' (runtime=docker) deps binding "
-                "missing 'package_family' or 'platform_os' field"
+            error(
+                f"platform '{platform_id}' (runtime=docker) deps binding "
+                "missing 'package_family' or 'platform_os' field",
+                file=PLATFORM_RELEASES_FILE,
+                key_path=f"platforms.{platform_id}",
             )
             continue
 
         os_key = compose_os_key(os_name, version)
-        for variant, families in variant_index.items():
-            if family not in families or os_key not in families[family]:
+        for variant in deps_index.variants:
+            if not deps_index.has_os(variant, family, os_key):
                 ok = False
-                print(
-                    f"   ERROR: platform '{platform_id}' (runtime=docker) expects deps key {family}.{os_key} "
-                    f"for variant={variant}, but it is missing"
+                error(
+                    f"platform '{platform_id}' (runtime=docker) expects deps key {family}.{os_key} "
+                    f"for variant={variant}, but it is missing",
+                    file=PLATFORM_RELEASES_FILE,
+                    key_path=f"platforms.{platform_id}",
                 )
 
     if not found_docker:
-        print("   ERROR: platform releases have no runtime=docker entries")
+        error("platform releases have no runtime=docker entries", file=PLATFORM_RELEASES_FILE)
         return False
 
     if ok:
@@ -956,7 +1186,7 @@ def map_ref_lane_to_platform_requirement(
 
 def check_ref_workflow_platform_catalog_coverage(platform_releases: dict[str, dict]) -> bool:
     if not platform_releases:
-        print(f"   ERROR: platform releases missing or invalid: {PLATFORM_RELEASES_FILE}")
+        error(f"platform releases missing or invalid: {PLATFORM_RELEASES_FILE}", file=PLATFORM_RELEASES_FILE)
         return False
 
     image_to_platform, duplicate_images = build_docker_image_index(platform_releases)
@@ -966,14 +1196,15 @@ def check_ref_workflow_platform_catalog_coverage(platform_releases: dict[str, di
     if duplicate_images:
         ok = False
         for image_ref, platform_id_set in sorted(duplicate_images.items()):
-            print(
-                f"   ERROR: duplicate runtime=docker image '{image_ref}' in platform releases: "
-                f"{', '.join(sorted(platform_id_set))}"
+            error(
+                f"duplicate runtime=docker image '{image_ref}' in platform releases: "
+                f"{', '.join(sorted(platform_id_set))}",
+                file=PLATFORM_RELEASES_FILE,
             )
 
     lanes = iter_ref_validation_lanes()
     if not lanes:
-        print("   NOTE: no ref-validation lane entries found")
+        note("no ref-validation lane entries found")
         return True
 
     for family, lane_path, _, lane in lanes:
@@ -982,15 +1213,16 @@ def check_ref_workflow_platform_catalog_coverage(platform_releases: dict[str, di
         req_type, req_value = map_ref_lane_to_platform_requirement(family, lane)
         if not req_type:
             ok = False
-            print(f"   ERROR: {lane_ref} could not be mapped to platform requirement")
+            error(f"{lane_ref} could not be mapped to platform requirement", file=lane_path)
             continue
 
         if req_type == "docker_image":
             if req_value not in image_to_platform:
                 ok = False
-                print(
-                    f"   ERROR: {lane_ref} requires docker image '{req_value}' "
-                    "missing from platform releases"
+                error(
+                    f"{lane_ref} requires docker image '{req_value}' "
+                    "missing from platform releases",
+                    file=lane_path,
                 )
             continue
 
@@ -998,29 +1230,32 @@ def check_ref_workflow_platform_catalog_coverage(platform_releases: dict[str, di
             platform_id = req_value
             if not platform_id:
                 ok = False
-                print(f"   ERROR: {lane_ref} could not derive a platform id")
+                error(f"{lane_ref} could not derive a platform id", file=lane_path)
                 continue
             if platform_id not in platform_ids:
                 ok = False
-                print(
-                    f"   ERROR: {lane_ref} requires platform '{platform_id}' "
-                    "missing from platform releases"
+                error(
+                    f"{lane_ref} requires platform '{platform_id}' "
+                    "missing from platform releases",
+                    file=lane_path,
                 )
                 continue
 
             runtime = str(platform_releases[platform_id].get("runtime", "")).strip().lower()
             if platform_id.startswith(("freebsd-", "netbsd-", "openbsd-")) and runtime != "vm":
                 ok = False
-                print(
-                    f"   ERROR: {lane_ref} expects platform '{platform_id}' "
-                    f"to use runtime=vm (found runtime={runtime})"
+                error(
+                    f"{lane_ref} expects platform '{platform_id}' "
+                    f"to use runtime=vm (found runtime={runtime})",
+                    file=lane_path,
                 )
             if platform_id.startswith("macos-"):
                 if runtime != "host":
                     ok = False
-                    print(
-                        f"   ERROR: {lane_ref} expects platform '{platform_id}' "
-                        f"to use runtime=host (found runtime={runtime})"
+                    error(
+                        f"{lane_ref} expects platform '{platform_id}' "
+                        f"to use runtime=host (found runtime={runtime})",
+                        file=lane_path,
                     )
                 lane_runner = lane.get("runner")
                 catalog_runner = platform_releases[platform_id].get("runner")
@@ -1032,16 +1267,18 @@ def check_ref_workflow_platform_catalog_coverage(platform_releases: dict[str, di
                     and lane_runner.strip() != catalog_runner.strip()
                 ):
                     ok = False
-                    print(
-                        f"   ERROR: {lane_ref} runner='{lane_runner}' "
-                        f"does not match catalog runner='{catalog_runner}' for platform '{platform_id}'"
+                    error(
+                        f"{lane_ref} runner='{lane_runner}' "
+                        f"does not match catalog runner='{catalog_runner}' for platform '{platform_id}'",
+                        file=lane_path,
                     )
             continue
 
         ok = False
-        print(
-            f"   ERROR: {lane_ref} has unknown platform mapping: {(req_type, req_value)} "
-            f"(source: {lane_path})"
+        error(
+            f"{lane_ref} has unknown platform mapping: {(req_type, req_value)} "
+            f"(source: {lane_path})",
+            file=lane_path,
         )
 
     if ok:
@@ -1049,30 +1286,16 @@ def check_ref_workflow_platform_catalog_coverage(platform_releases: dict[str, di
     return ok
 
 
-def parse_linux_families(client_data: dict) -> set[str]:
-    families = set(client_data.get("build", {}).keys())
-    return {family for family in families if family in {"debian", "gh-debian", "ubuntu"}}
-
-
-def build_family_os_index(data: dict) -> dict[str, set[str]]:
-    index: dict[str, set[str]] = {}
-    build = data.get("build", {})
-    if not isinstance(build, dict):
-        return index
-    for family, family_entry in build.items():
-        if not isinstance(family_entry, dict):
-            continue
-        index[family] = {os_name for os_name in family_entry.keys() if isinstance(os_name, str)}
-    return index
-
-
-def check_platform_normalization_against_topology(topology: dict, normalization_rules: dict[str, dict]) -> bool:
-    build = topology.get("build", {})
-    if not isinstance(build, dict):
-        print(f"   ERROR: invalid topology build structure in {DEFAULT_TOPOLOGY_FILE}")
-        return False
+def check_platform_normalization_against_topology(
+    deps_index: DepsTopologyIndex,
+    normalization_rules: dict[str, dict],
+) -> bool:
+    build = deps_index.topology
     if not normalization_rules:
-        print(f"   ERROR: platform normalization missing or invalid: {PLATFORM_NORMALIZATION_FILE}")
+        error(
+            f"platform normalization missing or invalid: {PLATFORM_NORMALIZATION_FILE}",
+            file=PLATFORM_NORMALIZATION_FILE,
+        )
         return False
 
     ok = True
@@ -1087,73 +1310,74 @@ def check_platform_normalization_against_topology(topology: dict, normalization_
 
         if not all(isinstance(v, str) and v.strip() for v in (family, os_name, pkgmgr, mode)):
             ok = False
-            print(
-                f"   ERROR: normalization rule '{os_id}' must define non-empty "
-                "family/os/pkgmgr/version_mode"
+            error(
+                f"normalization rule '{os_id}' must define non-empty "
+                "family/os/pkgmgr/version_mode",
+                file=PLATFORM_NORMALIZATION_FILE,
+                key_path=f"normalization.os_ids.{os_id}",
             )
             continue
 
         family_entry = build.get(family, {})
-        if not isinstance(family_entry, dict):
-            ok = False
-            print(
-                f"   ERROR: normalization rule '{os_id}' targets missing topology family '{family}'"
-            )
-            continue
 
         try:
             strict_keys, candidate_keys = candidate_os_keys_for_rule(rule)
         except ValueError as exc:
             ok = False
             if "versions must be a mapping" in str(exc):
-                print(f"   ERROR: normalization rule '{os_id}' versions must be a mapping")
+                error(
+                    f"normalization rule '{os_id}' versions must be a mapping",
+                    file=PLATFORM_NORMALIZATION_FILE,
+                    key_path=f"normalization.os_ids.{os_id}",
+                )
             else:
-                print(f"   ERROR: normalization rule '{os_id}' has {exc}")
+                error(
+                    f"normalization rule '{os_id}' has {exc}",
+                    file=PLATFORM_NORMALIZATION_FILE,
+                    key_path=f"normalization.os_ids.{os_id}",
+                )
             continue
 
         if strict_keys:
             for os_key in sorted(candidate_keys):
-                os_entry = family_entry.get(os_key)
-                if not isinstance(os_entry, dict):
+                if os_key not in family_entry:
                     ok = False
-                    print(
-                        f"   ERROR: normalization rule '{os_id}' maps to missing topology key "
-                        f"{family}.{os_key}"
+                    error(
+                        f"normalization rule '{os_id}' maps to missing topology key "
+                        f"{family}.{os_key}",
+                        file=PLATFORM_NORMALIZATION_FILE,
+                        key_path=f"normalization.os_ids.{os_id}",
                     )
                     continue
-                packagers = os_entry.get("packagers", {})
-                if not isinstance(packagers, dict) or pkgmgr not in packagers:
+                if pkgmgr not in family_entry[os_key]:
                     ok = False
-                    print(
-                        f"   ERROR: normalization rule '{os_id}' maps to topology key "
-                        f"{family}.{os_key} without pkgmgr '{pkgmgr}'"
+                    error(
+                        f"normalization rule '{os_id}' maps to topology key "
+                        f"{family}.{os_key} without pkgmgr '{pkgmgr}'",
+                        file=PLATFORM_NORMALIZATION_FILE,
+                        key_path=f"normalization.os_ids.{os_id}",
                     )
         else:
             matching_keys = [
-                key
-                for key in family_entry.keys()
-                if isinstance(key, str) and (key == os_name or key.startswith(f"{os_name}_"))
+                key for key in family_entry if key == os_name or key.startswith(f"{os_name}_")
             ]
             if not matching_keys:
                 ok = False
-                print(
-                    f"   ERROR: normalization rule '{os_id}' has no matching topology keys "
-                    f"under family '{family}' for os prefix '{os_name}'"
+                error(
+                    f"normalization rule '{os_id}' has no matching topology keys "
+                    f"under family '{family}' for os prefix '{os_name}'",
+                    file=PLATFORM_NORMALIZATION_FILE,
+                    key_path=f"normalization.os_ids.{os_id}",
                 )
                 continue
 
-            pkgmgr_match = False
-            for os_key in matching_keys:
-                os_entry = family_entry.get(os_key, {})
-                packagers = os_entry.get("packagers", {}) if isinstance(os_entry, dict) else {}
-                if isinstance(packagers, dict) and pkgmgr in packagers:
-                    pkgmgr_match = True
-                    break
-            if not pkgmgr_match:
+            if not any(pkgmgr in family_entry[os_key] for os_key in matching_keys):
                 ok = False
-                print(
-                    f"   ERROR: normalization rule '{os_id}' matched topology keys for {family}.{os_name}* "
-                    f"but none expose pkgmgr '{pkgmgr}'"
+                error(
+                    f"normalization rule '{os_id}' matched topology keys for {family}.{os_name}* "
+                    f"but none expose pkgmgr '{pkgmgr}'",
+                    file=PLATFORM_NORMALIZATION_FILE,
+                    key_path=f"normalization.os_ids.{os_id}",
                 )
 
     if ok:
@@ -1165,6 +1389,9 @@ def normalize_container_ref(image: str) -> str:
     return image.strip().lower().split("@", 1)[0]
 
 
+LINUX_FAMILIES = frozenset({"debian", "gh-debian", "ubuntu"})
+
+
 def parse_bsd_pkgmgrs() -> dict[str, str]:
     # Dispatcher defaults in ci/deps/install-bsd-packages.sh.
     return {
@@ -1234,35 +1461,37 @@ def resolve_alias(dep: str, dep_map: dict) -> str:
     return dep
 
 
-def infer_required_flags_from_script(script_path: Path) -> set[str]:
-    """Infer required CLI flags from install script implementation."""
-    text = script_path.read_text(errors="ignore")
-    match = re.search(r"\bci_deps_parse_cli\s+([01])\s+([01])\b", text)
-    if not match:
-        return set()
+MAP_RESOLVE_CACHE: dict[tuple[tuple[str, ...], str, str, str], list[str]] = {}
+MAP_RESOLVER_MODES = ("python", "awk", "parity")
+MAP_RESOLVER_MODE = "python"
+_MAP_RESOLVER: DepsMapResolver | None = None
 
-    require_family = match.group(1) == "1"
-    require_os = match.group(2) == "1"
-    required: set[str] = set()
-    if require_family:
-        required.add("--family")
-    if require_os:
-        required.add("--os")
-    return required
 
+def get_map_resolver() -> DepsMapResolver:
+    global _MAP_RESOLVER
+    if _MAP_RESOLVER is None:
+        _MAP_RESOLVER = load_deps_map_resolver(MAP_FILE, load_yaml)
+    return _MAP_RESOLVER
 
-def extract_flag_values(run_snippet: str, flag: str) -> list[str]:
-    pattern = re.compile(rf"{re.escape(flag)}(?:=|[ \t\r\n]+)([^\s\\]+)")
-    values: list[str] = []
-    for match in pattern.finditer(run_snippet):
-        raw = match.group(1).strip()
-        if len(raw) >= 2 and raw[0] == raw[-1] and raw[0] in {'"', "'"}:
-            raw = raw[1:-1]
-        values.append(raw)
-    return values
 
+def resolve_packages_awk(
+    items: tuple[str, ...],
+    family: str,
+    os_name: str,
+    pkgmgr: str,
+) -> list[str]:
+    if not MAP_RESOLVER_AWK.exists():
+        error(f"map resolver missing: {MAP_RESOLVER_AWK}", file=MAP_RESOLVER_AWK, indent="")
+        sys.exit(2)
 
-MAP_RESOLVE_CACHE: dict[tuple[tuple[str, ...], str, str, str], list[str]] = {}
+    try:
+        return resolve_with_awk(MAP_RESOLVER_AWK, MAP_FILE, list(items), family, os_name, pkgmgr)
+    except subprocess.CalledProcessError as exc:
+        message = f"map resolver failed for family={family} os={os_name} pkgmgr={pkgmgr} using {MAP_FILE}"
+        if exc.stderr and exc.stderr.strip():
+            message += "\n" + exc.stderr.strip()
+        error(message, file=MAP_FILE, indent="")
+        sys.exit(2)
 
 
 def resolve_packages(
@@ -1280,356 +1509,327 @@ def resolve_packages(
     if cached is not None:
         return list(cached)
 
-    if not MAP_RESOLVER_AWK.exists():
-        print(f"ERROR: map resolver missing: {MAP_RESOLVER_AWK}")
-        sys.exit(2)
-
-    result = subprocess.run(
-        [
-            "awk",
-            "-v",
-            f"MAP_FILE={MAP_FILE}",
-            "-v",
-            f"FAMILY={family}",
-            "-v",
-            f"OS={os_name}",
-            "-v",
-            f"PKGMGR={pkgmgr}",
-            "-f",
-            str(MAP_RESOLVER_AWK),
-        ],
-        input="\n".join(normalized) + "\n",
-        text=True,
-        capture_output=True,
-    )
-    if result.returncode != 0:
-        print(
-            "ERROR: map resolver failed for "
-            f"family={family} os={os_name} pkgmgr={pkgmgr} using {MAP_FILE}"
-        )
-        if result.stderr.strip():
-            print(result.stderr.strip())
-        sys.exit(2)
+    if MAP_RESOLVER_MODE == "awk":
+        resolved = resolve_packages_awk(normalized, family, os_name, pkgmgr)
+    else:
+        resolved = get_map_resolver().resolve(list(normalized), family, os_name, pkgmgr)
+        if MAP_RESOLVER_MODE == "parity":
+            expected = resolve_packages_awk(normalized, family, os_name, pkgmgr)
+            require(
+                resolved == expected,
+                (
+                    "map resolver parity mismatch for "
+                    f"family={family} os={os_name} pkgmgr={pkgmgr}: "
+                    f"awk={' '.join(expected)} python={' '.join(resolved)}"
+                ),
+            )
 
-    resolved = [line.strip() for line in result.stdout.splitlines() if line.strip()]
     MAP_RESOLVE_CACHE[key] = resolved
     return list(resolved)
 
 
-def main() -> int:
-    missing = [p for p in FILES if not p.exists()]
-    if missing:
-        print("Missing required files:")
-        for p in missing:
-            print(f"  - {p}")
-        return 2
+def check_map_resolver_parity(deps_index: DepsTopologyIndex) -> bool:
+    if not MAP_RESOLVER_AWK.exists():
+        error(f"map resolver missing: {MAP_RESOLVER_AWK}", file=MAP_RESOLVER_AWK)
+        return False
+    combos = deps_index.combinations("client")
+    mismatches = check_resolver_parity(get_map_resolver(), MAP_RESOLVER_AWK, MAP_FILE, combos)
+    for line in mismatches:
+        error(f"map resolver parity: {line}", file=MAP_FILE)
+    if mismatches:
+        return False
+    print(f"   OK: python map resolver matches resolve-map.awk for {len(combos)} combinations")
+    return True
+
+
+CHECKS = CheckRegistry()
+# Worker count from --jobs; checks that fan out work of their own (shell-lint) honor it.
+CHECK_JOBS: int | None = None
+
+# Repository files behind each shared input, for --changed-since/--changed-files.
+# The variant expansions read every deps-*.yaml (base, overlays, targets, notes).
+DEPS_DATA_FILES = ("ci/deps/data/deps-*.yaml",)
+INPUT_FILES: dict[str, tuple[str, ...]] = {
+    "topology": ("ci/deps/data/deps-targets.yaml",),
+    "normalization_rules": ("ci/deps/platform-normalization.yaml",),
+    "client": DEPS_DATA_FILES,
+    "localclient": DEPS_DATA_FILES,
+    "server": DEPS_DATA_FILES,
+    "dep_map": ("ci/deps/data/deps-map.yaml",),
+    "deps_index": DEPS_DATA_FILES,
+    "platform_catalog": ("ci/deps/platform-catalog.yaml",),
+    "platform_releases": (".github/data/platform-releases-discovered.yml",),
+    "platform_bindings": (
+        "ci/deps/platform-catalog.yaml",
+        ".github/data/platform-releases-discovered.yml",
+        "ci/deps/platform-normalization.yaml",
+    ),
+}
+# Files that define the checks or the graph itself: any change runs everything.
+GRAPH_FILES = (
+    "ci/deps/check-deps.py",
+    "ci/deps/checkdeps/*.py",
+    "ci/run/ref/*.py",
+    "ci/run/check-deps.sh",
+)
+REF_LANE_FILES = ("ci/run/ref/ref-families.yml", "ci/run/ref/lanes/*.yml")
+PACKAGE_SCRIPT_FILES = (
+    "ci/deps/packages-from-yaml.sh",
+    "ci/deps/lib/resolve-map.awk",
+    "ci/deps/data/deps-map.yaml",
+    "ci/deps/install-bsd-packages.sh",
+    "ci/deps/lib/install-bsd-common.sh",
+)
+
+
+@CHECKS.register(
+    "normalization-topology",
+    inputs=("deps_index", "normalization_rules"),
+    title="normalization: topology coverage",
+)
+def check_normalization_topology(
+    deps_index: DepsTopologyIndex, normalization_rules: dict[str, dict]
+) -> bool:
+    return check_platform_normalization_against_topology(deps_index, normalization_rules)
 
-    targets_name: str | None = None
-    base_name: str | None = None
-    overlay_name: str | None = None
-    seen_overlay_variants: set[str] = set()
-    for path in FILES:
-        variant_data = load_yaml(path)
-        variant_name = path.stem.removeprefix("deps-")
-        require(
-            "topology" not in variant_data,
-            f"{path} uses deprecated key 'topology'; strict v2 requires 'targets_file'",
-        )
-        require(
-            "bindings_file" not in variant_data,
-            f"{path} uses deprecated key 'bindings_file'; strict v2 uses targets only",
-        )
-        require(
-            "version_notes_file" not in variant_data,
-            f"{path} must not define version_notes_file; strict v2 sources it from base_file",
-        )
 
-        variant_targets = variant_data.get("targets_file")
-        variant_base = variant_data.get("base_file")
-        variant_overlay = variant_data.get("overlay_file")
-        variant_overlay_variant = variant_data.get("overlay_variant")
-        require(
-            isinstance(variant_targets, str) and variant_targets.strip(),
-            f"{path} targets_file must be a non-empty string when provided",
-        )
-        require(
-            isinstance(variant_base, str) and variant_base.strip(),
-            f"{path} base_file must be a non-empty string",
-        )
-        require(
-            isinstance(variant_overlay, str) and variant_overlay.strip(),
-            f"{path} overlay_file must be a non-empty string",
-        )
-        require(
-            isinstance(variant_overlay_variant, str) and variant_overlay_variant.strip(),
-            f"{path} overlay_variant must be a non-empty string",
-        )
-        require(
-            variant_overlay_variant == variant_name,
-            (
-                f"{path} overlay_variant='{variant_overlay_variant}' must match variant file "
-                f"'{variant_name}'"
-            ),
-        )
-        require(
-            variant_overlay_variant not in seen_overlay_variants,
-            f"duplicate overlay_variant '{variant_overlay_variant}' across variant files",
-        )
-        seen_overlay_variants.add(variant_overlay_variant)
-        if targets_name is None:
-            targets_name = variant_targets
-        else:
-            require(
-                variant_targets == targets_name,
-                f"{path} targets_file '{variant_targets}' does not match '{targets_name}' used by other variants",
-            )
-        if base_name is None:
-            base_name = variant_base
-        else:
-            require(
-                variant_base == base_name,
-                f"{path} base_file '{variant_base}' does not match '{base_name}' used by other variants",
-            )
-        if overlay_name is None:
-            overlay_name = variant_overlay
-        else:
-            require(
-                variant_overlay == overlay_name,
-                f"{path} overlay_file '{variant_overlay}' does not match '{overlay_name}' used by other variants",
-            )
-
-    assert targets_name is not None
-    assert base_name is not None
-    assert overlay_name is not None
-    topology_file = DATA_DIR / targets_name
-    base_file = DATA_DIR / base_name
-    require(base_file.exists(), f"missing base file: {base_file}")
-    base_data = load_yaml(base_file)
-    version_notes_name = base_data.get("version_notes_file")
-    require(
-        isinstance(version_notes_name, str) and version_notes_name.strip(),
-        f"{base_file} version_notes_file must be a non-empty string",
-    )
-    version_notes_file = DATA_DIR / version_notes_name
-
-    topology = load_topology(topology_file)
-    normalization_rules = load_platform_normalization_rules()
-    shared_version_notes = load_shared_version_notes(version_notes_file)
-    for path in FILES:
-        check_file(
-            path,
-            topology,
-            topology_file,
-            shared_version_notes,
-            version_notes_file,
-        )
-
-    print("deps YAML structure OK")
-
-    client = expand_variant_profiles(
-        load_yaml(DATA_DIR / "deps-client.yaml"),
-        DATA_DIR / "deps-client.yaml",
-        topology,
-        topology_file,
-        shared_version_notes,
-        version_notes_file,
-    )
-    localclient = expand_variant_profiles(
-        load_yaml(DATA_DIR / "deps-localclient.yaml"),
-        DATA_DIR / "deps-localclient.yaml",
-        topology,
-        topology_file,
-        shared_version_notes,
-        version_notes_file,
-    )
-    server = expand_variant_profiles(
-        load_yaml(DATA_DIR / "deps-server.yaml"),
-        DATA_DIR / "deps-server.yaml",
-        topology,
-        topology_file,
-        shared_version_notes,
-        version_notes_file,
-    )
-    dep_map = load_deps_map()
-    variant_index = {
-        "client": build_family_os_index(client),
-        "localclient": build_family_os_index(localclient),
-        "server": build_family_os_index(server),
-    }
-    platform_catalog = load_platform_catalog(PLATFORM_CATALOG_FILE, load_yaml, require)
-    platform_releases = load_platform_releases(PLATFORM_RELEASES_FILE, load_yaml, require)
-    platform_bindings = load_platform_deps_bindings(
-        platform_catalog, platform_releases, normalization_rules
-    )
-
-    # --- normalization -> topology coverage ---
+@CHECKS.register(
+    "schema-completeness",
+    inputs=("client", "server", "deps_index"),
+    title="schema: completeness",
+)
+def check_schema_completeness(client: dict, server: dict, deps_index: DepsTopologyIndex) -> bool:
     ok = True
-    print("-- normalization: topology coverage")
-    if not check_platform_normalization_against_topology(topology, normalization_rules):
-        ok = False
-
-    # --- schema completeness ---
-    print("-- schema: completeness")
     for name, data in ("client", client), ("server", server):
-        for family, family_entry in data["build"].items():
-            for os_name, os_entry in family_entry.items():
-                packagers = os_entry.get("packagers", {})
-                for pkg_name, pkg in packagers.items():
-                    if "libs" not in pkg or "tools" not in pkg:
-                        print(f"   ERROR: {name} missing libs/tools for {family}.{os_name}.{pkg_name}")
-                        return 1
-                    if "mandatory" not in pkg["libs"]:
-                        print(f"   ERROR: {name} missing libs.mandatory for {family}.{os_name}.{pkg_name}")
-                        return 1
+        variant_file = DATA_DIR / f"deps-{name}.yaml"
+        variant_ok = True
+        for family, os_name, pkg_name, pkg in deps_index.iter_targets(name):
+            if "libs" not in pkg or "tools" not in pkg:
+                variant_ok = False
+                error(f"{name} missing libs/tools for {family}.{os_name}.{pkg_name}", file=variant_file)
+            elif "mandatory" not in pkg["libs"]:
+                variant_ok = False
+                error(f"{name} missing libs.mandatory for {family}.{os_name}.{pkg_name}", file=variant_file)
         if "libs" not in data.get("runtime", {}) or "tools" not in data.get("runtime", {}):
-            print(f"   ERROR: {name} missing runtime.libs/tools")
-            return 1
-        print(f"   OK: {name} schema")
+            variant_ok = False
+            error(f"{name} missing runtime.libs/tools", file=variant_file)
+        if variant_ok:
+            print(f"   OK: {name} schema")
+        ok &= variant_ok
+    return ok
+
 
-    # --- build: compare against package scripts (all families) ---
-    linux_families = parse_linux_families(client)
-    bsd_pkgmgrs = parse_bsd_pkgmgrs()
+@CHECKS.register(
+    "map-resolver-parity",
+    inputs=("deps_index",),
+    after=("schema-completeness",),
+    title="deps-map: resolver parity",
+    files=("ci/deps/data/deps-map.yaml", "ci/deps/lib/resolve-map.awk"),
+)
+def check_map_resolver_parity_unit(deps_index: DepsTopologyIndex) -> bool:
+    return check_map_resolver_parity(deps_index)
+
+
+@CHECKS.register(
+    "package-scripts",
+    inputs=("deps_index",),
+    after=("schema-completeness",),
+    files=PACKAGE_SCRIPT_FILES,
+)
+def check_package_script_expectations(deps_index: DepsTopologyIndex) -> bool:
+    """Compare resolved packages against packages-from-yaml.sh (all families)."""
+    ok = True
+    linux_families = deps_index.linux_families
     bsd_pkgmgr_keys = parse_bsd_pkgmgr_keys()
     ldap_pkg_name = parse_ldap_pkg_name()
-    for family, family_entry in client["build"].items():
-        for os_name, os_entry in family_entry.items():
-            # Validate BSD package manager keys align with installer expectations.
-            if os_name.lower() in (name.lower() for name in bsd_pkgmgrs.keys()):
-                expected = None
-                for key, val in bsd_pkgmgrs.items():
-                    if key.lower() == os_name.lower():
-                        expected = val
-                        break
-                if expected:
-                    actual_mgrs = set(os_entry.get("packagers", {}).keys())
-                    if expected not in actual_mgrs:
-                        ok = False
-                        print(
-                            f"   ERROR: {os_name} packagers missing expected '{expected}' "
-                            f"(found: {', '.join(sorted(actual_mgrs)) or 'none'})"
-                        )
-            for pkg_name, pkg in os_entry.get("packagers", {}).items():
-                label = f"build {family} {os_name} {pkg_name}"
-                actual_client_raw = pkg["libs"]["mandatory"]
-                actual_server_raw = (
-                    server["build"][family][os_name]["packagers"][pkg_name]["libs"]["mandatory"]
-                    if family in server["build"] and os_name in server["build"][family]
-                    else []
-                )
-                actual_client = resolve_packages(actual_client_raw, family, os_name, pkg_name)
-                actual_server = resolve_packages(actual_server_raw, family, os_name, pkg_name)
-
-                if family in linux_families:
-                    expected_sets = []
-                    for enable_ldap in ("ON", "OFF"):
-                        for enable_snmp in ("ON", "OFF"):
-                            exp_client = packages_from_yaml_list(
-                                "client",
-                                family,
-                                os_name,
-                                pkg_name,
-                                enable_ldap,
-                                enable_snmp,
-                            )
-                            exp_server = packages_from_yaml_list(
-                                "server",
-                                family,
-                                os_name,
-                                pkg_name,
-                                enable_ldap,
-                                enable_snmp,
-                            )
-                            expected_sets.append((enable_ldap, enable_snmp, exp_client, exp_server))
-                    matched_client = next(
-                        (exp for _, _, exp, _ in expected_sets if set(exp) == set(actual_client)),
-                        None,
-                    )
-                    matched_server = next(
-                        (exp for _, _, _, exp in expected_sets if set(exp) == set(actual_server)),
-                        None,
-                    )
-                    print_diff(
-                        f"{label} client (linux)",
-                        matched_client if matched_client is not None else expected_sets[0][2],
-                        actual_client,
-                    )
-                    print_diff(
-                        f"{label} server (linux)",
-                        matched_server if matched_server is not None else expected_sets[0][3],
-                        actual_server,
-                    )
-                    if matched_client is None:
-                        ok &= diff(f"{label} client (linux)", expected_sets[0][2], actual_client)
-                    if matched_server is None:
-                        ok &= diff(f"{label} server (linux)", expected_sets[0][3], actual_server)
-                elif pkg_name in bsd_pkgmgr_keys:
-                    expected_sets = []
-                    bsd_os_key = normalize_bsd_os_key(os_name)
+    for family, os_name, pkgmgrs in deps_index.iter_os("client"):
+        # Validate BSD package manager keys align with installer expectations.
+        expected = deps_index.bsd_pkgmgr(os_name)
+        if expected and expected not in pkgmgrs:
+            ok = False
+            error(
+                f"{os_name} packagers missing expected '{expected}' "
+                f"(found: {', '.join(sorted(pkgmgrs)) or 'none'})"
+            )
+        for pkg_name in pkgmgrs:
+            label = f"build {family} {os_name} {pkg_name}"
+            actual_client_raw = deps_index.mandatory_libs("client", family, os_name, pkg_name)
+            actual_server_raw = (
+                deps_index.mandatory_libs("server", family, os_name, pkg_name)
+                if deps_index.has_os("server", family, os_name)
+                else []
+            )
+            actual_client = resolve_packages(actual_client_raw, family, os_name, pkg_name)
+            actual_server = resolve_packages(actual_server_raw, family, os_name, pkg_name)
+
+            if family in linux_families:
+                expected_sets = []
+                for enable_ldap in ("ON", "OFF"):
                     for enable_snmp in ("ON", "OFF"):
                         exp_client = packages_from_yaml_list(
                             "client",
-                            "bsd",
-                            bsd_os_key,
+                            family,
+                            os_name,
                             pkg_name,
-                            "OFF",
+                            enable_ldap,
                             enable_snmp,
                         )
                         exp_server = packages_from_yaml_list(
                             "server",
-                            "bsd",
-                            bsd_os_key,
+                            family,
+                            os_name,
                             pkg_name,
-                            "ON",
+                            enable_ldap,
                             enable_snmp,
                         )
-                        if ldap_pkg_name and ldap_pkg_name in actual_server:
-                            if ldap_pkg_name not in exp_server:
-                                exp_server = exp_server + [ldap_pkg_name]
-                        expected_sets.append((enable_snmp, exp_client, exp_server))
-                    matched_client = next(
-                        (exp for _, exp, _ in expected_sets if set(exp) == set(actual_client)),
-                        None,
+                        expected_sets.append((enable_ldap, enable_snmp, exp_client, exp_server))
+                matched_client = next(
+                    (exp for _, _, exp, _ in expected_sets if set(exp) == set(actual_client)),
+                    None,
+                )
+                matched_server = next(
+                    (exp for _, _, _, exp in expected_sets if set(exp) == set(actual_server)),
+                    None,
+                )
+                print_diff(
+                    f"{label} client (linux)",
+                    matched_client if matched_client is not None else expected_sets[0][2],
+                    actual_client,
+                )
+                print_diff(
+                    f"{label} server (linux)",
+                    matched_server if matched_server is not None else expected_sets[0][3],
+                    actual_server,
+                )
+                if matched_client is None:
+                    ok &= diff(
+                        f"{label} client (linux)",
+                        expected_sets[0][2],
+                        actual_client,
+                        key_path=f"{family}.{os_name}.packagers.{pkg_name}",
                     )
-                    matched_server = next(
-                        (exp for _, _, exp in expected_sets if set(exp) == set(actual_server)),
-                        None,
+                if matched_server is None:
+                    ok &= diff(
+                        f"{label} server (linux)",
+                        expected_sets[0][3],
+                        actual_server,
+                        key_path=f"{family}.{os_name}.packagers.{pkg_name}",
+                    )
+            elif pkg_name in bsd_pkgmgr_keys:
+                expected_sets = []
+                bsd_os_key = normalize_bsd_os_key(os_name)
+                for enable_snmp in ("ON", "OFF"):
+                    exp_client = packages_from_yaml_list(
+                        "client",
+                        "bsd",
+                        bsd_os_key,
+                        pkg_name,
+                        "OFF",
+                        enable_snmp,
                     )
-                    print_diff(
+                    exp_server = packages_from_yaml_list(
+                        "server",
+                        "bsd",
+                        bsd_os_key,
+                        pkg_name,
+                        "ON",
+                        enable_snmp,
+                    )
+                    if ldap_pkg_name and ldap_pkg_name in actual_server:
+                        if ldap_pkg_name not in exp_server:
+                            exp_server = exp_server + [ldap_pkg_name]
+                    expected_sets.append((enable_snmp, exp_client, exp_server))
+                matched_client = next(
+                    (exp for _, exp, _ in expected_sets if set(exp) == set(actual_client)),
+                    None,
+                )
+                matched_server = next(
+                    (exp for _, _, exp in expected_sets if set(exp) == set(actual_server)),
+                    None,
+                )
+                print_diff(
+                    f"{label} client (bsd)",
+                    matched_client if matched_client is not None else expected_sets[0][1],
+                    actual_client,
+                )
+                print_diff(
+                    f"{label} server (bsd)",
+                    matched_server if matched_server is not None else expected_sets[0][2],
+                    actual_server,
+                )
+                if matched_client is None:
+                    ok &= diff(
                         f"{label} client (bsd)",
-                        matched_client if matched_client is not None else expected_sets[0][1],
+                        expected_sets[0][1],
                         actual_client,
+                        key_path=f"{family}.{os_name}.packagers.{pkg_name}",
                     )
-                    print_diff(
+                if matched_server is None:
+                    ok &= diff(
                         f"{label} server (bsd)",
-                        matched_server if matched_server is not None else expected_sets[0][2],
+                        expected_sets[0][2],
                         actual_server,
+                        key_path=f"{family}.{os_name}.packagers.{pkg_name}",
                     )
-                    if matched_client is None:
-                        ok &= diff(f"{label} client (bsd)", expected_sets[0][1], actual_client)
-                    if matched_server is None:
-                        ok &= diff(f"{label} server (bsd)", expected_sets[0][2], actual_server)
-                else:
-                    print(f"-- NOTE: build: no package-script expectations for {label}")
-
-    # --- parse CMakeLists to validate linked libs (heuristic cross-check) ---
-    print("-- build: CMake linkage checks")
+            else:
+                note(f"build: no package-script expectations for {label}", indent="-- ")
+    return ok
+
+
+def normalize_tool_list(value) -> list[str]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    return []
+
+
+def ensure_dep(deps: set[str], pkgs: list[str], label: str, dep_map: dict) -> None:
+    for dep in sorted(deps):
+        dep_key = resolve_alias(dep, dep_map)
+        map_block = dep_map.get("map", {})
+        if dep_key in map_block:
+            mapped = []
+            for family_entry in map_block[dep_key].values():
+                if not isinstance(family_entry, dict):
+                    continue
+                for os_entry in family_entry.values():
+                    if not isinstance(os_entry, dict):
+                        continue
+                    for pkg_list in os_entry.values():
+                        mapped += list(pkg_list or [])
+            if mapped and not any(normalize_token(pkg) in {normalize_token(p) for p in pkgs} for pkg in mapped):
+                note(f"{label} dependency '{dep}' not found in YAML package names")
+        else:
+            token = normalize_token(dep)
+            if not token:
+                continue
+            if not any(token in normalize_token(pkg) for pkg in pkgs):
+                note(f"{label} dependency '{dep}' not found in YAML package names")
+
+
+@CHECKS.register(
+    "cmake-linkage",
+    inputs=("deps_index", "dep_map"),
+    after=("schema-completeness",),
+    title="build: CMake linkage checks",
+    files=("client/CMakeLists.txt", "xymonnet/CMakeLists.txt"),
+)
+def check_cmake_linkage(deps_index: DepsTopologyIndex, dep_map: dict) -> bool:
+    """Heuristic cross-check of CMake-linked libs against the YAML packages."""
     linux_client = []
     linux_server = []
-    for family, family_entry in client["build"].items():
-        if family not in linux_families:
+    # The first Linux target with a non-empty client package list is representative.
+    for family, os_name, pkgmgrs in deps_index.iter_os("client"):
+        if family not in deps_index.linux_families or not pkgmgrs:
             continue
-        for os_name, os_entry in family_entry.items():
-            for pkg_name, pkg in os_entry.get("packagers", {}).items():
-                linux_client = resolve_packages(pkg["libs"]["mandatory"], family, os_name, pkg_name)
-                linux_server = resolve_packages(
-                    server["build"][family][os_name]["packagers"][pkg_name]["libs"]["mandatory"],
-                    family,
-                    os_name,
-                    pkg_name,
-                )
-                break
-            if linux_client:
-                break
+        pkg_name = pkgmgrs[0]
+        linux_client = resolve_packages(
+            deps_index.mandatory_libs("client", family, os_name, pkg_name), family, os_name, pkg_name
+        )
+        linux_server = resolve_packages(
+            deps_index.mandatory_libs("server", family, os_name, pkg_name), family, os_name, pkg_name
+        )
         if linux_client:
             break
 
@@ -1638,41 +1838,18 @@ def main() -> int:
     client_deps = extract_cmake_deps(client_cmake)
     server_deps = extract_cmake_deps(xymonnet_cmake)
 
-    def ensure_dep(deps: set[str], pkgs: list[str], label: str) -> None:
-        for dep in sorted(deps):
-            dep_key = resolve_alias(dep, dep_map)
-            map_block = dep_map.get("map", {})
-            if dep_key in map_block:
-                mapped = []
-                for family_entry in map_block[dep_key].values():
-                    if not isinstance(family_entry, dict):
-                        continue
-                    for os_entry in family_entry.values():
-                        if not isinstance(os_entry, dict):
-                            continue
-                        for pkg_list in os_entry.values():
-                            mapped += list(pkg_list or [])
-                if mapped and not any(normalize_token(pkg) in {normalize_token(p) for p in pkgs} for pkg in mapped):
-                    print(f"   NOTE: {label} dependency '{dep}' not found in YAML package names")
-            else:
-                token = normalize_token(dep)
-                if not token:
-                    continue
-                if not any(token in normalize_token(pkg) for pkg in pkgs):
-                    print(f"   NOTE: {label} dependency '{dep}' not found in YAML package names")
-
-    ensure_dep(client_deps, linux_client, "client")
-    ensure_dep(server_deps, linux_server, "server")
-
-    # --- runtime tools checks ---
-    print("-- runtime: tools checks")
-    def normalize_tool_list(value) -> list[str]:
-        if value is None:
-            return []
-        if isinstance(value, list):
-            return value
-        return []
+    ensure_dep(client_deps, linux_client, "client", dep_map)
+    ensure_dep(server_deps, linux_server, "server", dep_map)
+    return True
+
 
+@CHECKS.register(
+    "runtime-tools",
+    inputs=("client", "server"),
+    title="runtime: tools checks",
+    files=("*.sh",),
+)
+def check_runtime_tools(client: dict, server: dict) -> bool:
     runtime_tools = set(normalize_tool_list(client["runtime"]["tools"].get("mandatory")))
     runtime_tools |= set(normalize_tool_list(client["runtime"]["tools"].get("optional")))
     runtime_tools |= set(normalize_tool_list(server["runtime"]["tools"].get("mandatory")))
@@ -1682,13 +1859,23 @@ def main() -> int:
 
     missing_in_scripts = sorted(t for t in runtime_tokens if t and t not in used_tokens)
     if missing_in_scripts:
-        print(f"   NOTE: runtime.tools not referenced in scripts: {', '.join(missing_in_scripts)}")
+        note(f"runtime.tools not referenced in scripts: {', '.join(missing_in_scripts)}")
     else:
         print("   OK: runtime tools referenced in scripts")
+    return True
+
 
-    # --- workflow checks ---
-    print("-- workflows: install checks")
-    known_families = set(client.get("build", {}).keys())
+@CHECKS.register(
+    "workflow-install-flags",
+    inputs=("deps_index", "platform_bindings"),
+    title="workflows: install checks",
+    files=(".github/workflows/*.yml", ".github/workflows/*.yaml", "ci/deps/*packages*.sh"),
+)
+def check_workflow_install_flags(
+    deps_index: DepsTopologyIndex, platform_bindings: dict[str, dict]
+) -> bool:
+    ok = True
+    known_families = set(deps_index.families("client"))
     known_os = {
         str(entry.get("platform_os")).strip()
         for entry in platform_bindings.values()
@@ -1696,108 +1883,508 @@ def main() -> int:
         and isinstance(entry.get("platform_os"), str)
         and str(entry.get("platform_os")).strip()
     }
-    required_flags_cache: dict[Path, set[str]] = {}
     workflow_dir = ROOT / ".github" / "workflows"
     workflow_files = sorted(
         set(workflow_dir.glob("*.yml")) | set(workflow_dir.glob("*.yaml"))
     )
-    for wf in workflow_files:
-        data = parse_workflow_yaml(wf)
-        run_snippets = find_package_steps(data)
-        if not run_snippets:
+    for step in build_install_step_index(workflow_files):
+        wf = step.workflow
+        script_path = ROOT / step.script
+        if not script_path.exists():
             continue
-        # Validate required flags from install script implementations.
-        for snippet in run_snippets:
-            match = re.search(r"(ci/deps/[^\\s]+packages[^\\s]+\\.sh)", snippet)
-            if not match:
-                continue
-            script_path = ROOT / match.group(1)
-            if not script_path.exists():
-                continue
-            if script_path not in required_flags_cache:
-                required_flags_cache[script_path] = infer_required_flags_from_script(script_path)
-            required_flags = required_flags_cache[script_path]
+        required_flags = required_flags_for_script(script_path)
 
-            for flag in sorted(required_flags):
-                if flag not in snippet:
+        for flag in sorted(required_flags):
+            if flag not in step.flags:
+                ok = False
+                error(f"{wf} runs {script_path.name} without {flag}", file=wf)
+        if "--family" in required_flags:
+            for family in step.flag_values("--family"):
+                # Skip dynamic interpolation expressions.
+                if "$" in family:
+                    continue
+                if family not in known_families:
                     ok = False
-                    print(f"   ERROR: {wf} runs {script_path.name} without {flag}")
-            if "--family" in required_flags:
-                family_values = extract_flag_values(snippet, "--family")
-                for family in family_values:
-                    # Skip dynamic interpolation expressions.
-                    if "$" in family:
-                        continue
-                    if family not in known_families:
-                        ok = False
-                        print(
-                            f"   ERROR: {wf} runs {script_path.name} with unknown --family '{family}' "
-                            f"(known: {', '.join(sorted(known_families))})"
-                        )
-            if "--os" in required_flags:
-                os_values = extract_flag_values(snippet, "--os")
-                for os_name in os_values:
-                    # Skip dynamic interpolation expressions.
-                    if "$" in os_name:
-                        continue
-                    if os_name not in known_os:
-                        ok = False
-                        print(
-                            f"   ERROR: {wf} runs {script_path.name} with unknown --os '{os_name}' "
-                            "for current platform catalog/releases deps mappings"
-                        )
+                    error(
+                        f"{wf} runs {script_path.name} with unknown --family '{family}' "
+                        f"(known: {', '.join(sorted(known_families))})",
+                        file=wf,
+                    )
+        if "--os" in required_flags:
+            for os_name in step.flag_values("--os"):
+                # Skip dynamic interpolation expressions.
+                if "$" in os_name:
+                    continue
+                if os_name not in known_os:
+                    ok = False
+                    error(
+                        f"{wf} runs {script_path.name} with unknown --os '{os_name}' "
+                        "for current platform catalog/releases deps mappings",
+                        file=wf,
+                    )
+    return ok
 
-    print("-- platforms: catalog deps consistency")
-    if not check_platform_catalog_bindings_consistency(
+
+@CHECKS.register(
+    "catalog-bindings",
+    inputs=("platform_catalog", "platform_releases", "platform_bindings"),
+    title="platforms: catalog deps consistency",
+)
+def check_catalog_bindings(
+    platform_catalog: dict[str, dict],
+    platform_releases: dict[str, dict],
+    platform_bindings: dict[str, dict],
+) -> bool:
+    return check_platform_catalog_bindings_consistency(
         platform_catalog, platform_releases, platform_bindings
-    ):
-        ok = False
+    )
 
-    print("-- workflows: ref-validation deps coverage")
-    if not check_ref_workflow_deps_coverage(
-        variant_index, platform_releases, platform_bindings
-    ):
-        ok = False
 
-    print("-- platforms: catalog coverage for ref-validation lanes")
-    if not check_ref_workflow_platform_catalog_coverage(platform_releases):
-        ok = False
+@CHECKS.register(
+    "ref-workflow-deps",
+    inputs=("deps_index", "platform_releases", "platform_bindings"),
+    title="workflows: ref-validation deps coverage",
+    files=REF_LANE_FILES,
+)
+def check_ref_workflow_deps(
+    deps_index: DepsTopologyIndex,
+    platform_releases: dict[str, dict],
+    platform_bindings: dict[str, dict],
+) -> bool:
+    return check_ref_workflow_deps_coverage(deps_index, platform_releases, platform_bindings)
+
+
+@CHECKS.register(
+    "ref-workflow-catalog",
+    inputs=("platform_releases",),
+    title="platforms: catalog coverage for ref-validation lanes",
+    files=REF_LANE_FILES + ("ci/deps/platform-catalog.yaml",),
+)
+def check_ref_workflow_catalog(platform_releases: dict[str, dict]) -> bool:
+    return check_ref_workflow_platform_catalog_coverage(platform_releases)
+
+
+@CHECKS.register(
+    "docker-deps",
+    inputs=("deps_index", "platform_releases", "platform_bindings"),
+    title="platforms: runtime=docker entries -> deps coverage",
+)
+def check_docker_deps(
+    deps_index: DepsTopologyIndex,
+    platform_releases: dict[str, dict],
+    platform_bindings: dict[str, dict],
+) -> bool:
+    return check_docker_platforms_map_to_deps(deps_index, platform_releases, platform_bindings)
 
-    print("-- platforms: runtime=docker entries -> deps coverage")
-    if not check_docker_platforms_map_to_deps(
-        variant_index, platform_releases, platform_bindings
-    ):
-        ok = False
 
-    # --- packager keys sanity ---
-    print("-- packagers: key sanity")
+@CHECKS.register(
+    "packager-keys",
+    inputs=("deps_index",),
+    title="packagers: key sanity",
+    files=("ci/deps/install-bsd-packages.sh",),
+)
+def check_packager_keys(deps_index: DepsTopologyIndex) -> bool:
+    ok = True
+    bsd_pkgmgr_keys = parse_bsd_pkgmgr_keys()
     bsd_packagers = set()
-    bsd_os_names = {name.lower() for name in bsd_pkgmgrs.keys()}
-    for family_entry in client["build"].values():
-        for os_name, os_entry in family_entry.items():
-            if os_name.lower() in bsd_os_names:
-                bsd_packagers |= set(os_entry.get("packagers", {}).keys())
+    for _, os_name, pkgmgrs in deps_index.iter_os("client"):
+        if deps_index.is_bsd_os(os_name):
+            bsd_packagers |= set(pkgmgrs)
     unknown_bsd = sorted(bsd_packagers - bsd_pkgmgr_keys)
     if unknown_bsd:
         ok = False
-        print(f"   ERROR: BSD packagers not supported by install-bsd-packages.sh: {', '.join(unknown_bsd)}")
+        error(
+            f"BSD packagers not supported by install-bsd-packages.sh: {', '.join(unknown_bsd)}",
+            file=ROOT / "ci" / "deps" / "install-bsd-packages.sh",
+        )
     else:
         print("   OK: BSD packager keys align with install-bsd-packages.sh")
+    return ok
 
-    print("-- packages-from-yaml: validation")
-    yaml_ok = check_packages_from_yaml_mapping(client, "client")
-    yaml_ok &= check_packages_from_yaml_mapping(localclient, "localclient")
-    yaml_ok &= check_packages_from_yaml_mapping(server, "server")
-    if not yaml_ok:
-        ok = False
 
-    print("-- shellcheck: local + CI helpers")
-    if not check_shell_scripts(ROOT):
-        ok = False
+# One unit per variant: each walks every combination through the shell
+# translator, so they are the longest checks and the ones worth overlapping.
+@CHECKS.register(
+    "packages-from-yaml-client",
+    inputs=("deps_index",),
+    title="packages-from-yaml: validation",
+    files=PACKAGE_SCRIPT_FILES,
+)
+def check_packages_from_yaml_client(deps_index: DepsTopologyIndex) -> bool:
+    return check_packages_from_yaml_mapping(deps_index, "client")
+
+
+@CHECKS.register(
+    "packages-from-yaml-localclient", inputs=("deps_index",), files=PACKAGE_SCRIPT_FILES
+)
+def check_packages_from_yaml_localclient(deps_index: DepsTopologyIndex) -> bool:
+    return check_packages_from_yaml_mapping(deps_index, "localclient")
 
-    if not ok:
-        return 1
 
+@CHECKS.register("packages-from-yaml-server", inputs=("deps_index",), files=PACKAGE_SCRIPT_FILES)
+def check_packages_from_yaml_server(deps_index: DepsTopologyIndex) -> bool:
+    return check_packages_from_yaml_mapping(deps_index, "server")
+
+
+@CHECKS.register(
+    "shell-lint", title="shellcheck: local + CI helpers", files=SHELL_LINT_SCRIPTS
+)
+def check_shell_lint() -> bool:
+    return check_shell_scripts(ROOT, jobs=CHECK_JOBS)
+
+
+def list_changed_files(base_ref: str) -> list[str] | None:
+    """Paths changed since base_ref (committed, staged, unstaged, untracked); None if git fails."""
+    commands = (
+        ["git", "diff", "--name-only", base_ref, "--"],
+        ["git", "ls-files", "--others", "--exclude-standard"],
+    )
+    changed: set[str] = set()
+    for cmd in commands:
+        result = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+        if result.returncode != 0:
+            note(f"{' '.join(cmd)} failed: {result.stderr.strip()}", indent="")
+            return None
+        changed.update(line.strip() for line in result.stdout.splitlines() if line.strip())
+    return sorted(changed)
+
+
+def normalize_changed_path(path: str) -> str:
+    candidate = Path(path)
+    if candidate.is_absolute():
+        try:
+            candidate = candidate.resolve().relative_to(ROOT)
+        except ValueError:
+            pass
+    return candidate.as_posix().removeprefix("./")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--map-resolver",
+        choices=MAP_RESOLVER_MODES,
+        default="python",
+        help=(
+            "deps-map.yaml resolver: in-process python (default), the reference "
+            "resolve-map.awk, or parity to run both and fail on any difference"
+        ),
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=0,
+        help="parallel check workers once shared inputs are loaded (default: CPU count; 1 = serial)",
+    )
+    parser.add_argument(
+        "--timing",
+        action="store_true",
+        help="print a per-check timing table after the results",
+    )
+    parser.add_argument(
+        "--report-json",
+        metavar="PATH",
+        help="also write the results (checks, findings, timings) as JSON to PATH",
+    )
+    parser.add_argument(
+        "--report-sarif",
+        metavar="PATH",
+        help="also write the findings as SARIF 2.1.0 to PATH",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        help="write per-check cProfile stats to DIR/<check>.prof (runs the checks serially)",
+    )
+    changed = parser.add_mutually_exclusive_group()
+    changed.add_argument(
+        "--changed-since",
+        metavar="REF",
+        help="only run checks whose input files changed since this git ref",
+    )
+    changed.add_argument(
+        "--changed-files",
+        metavar="PATH",
+        nargs="+",
+        help="only run checks whose input files are among these repository paths",
+    )
+    return parser.parse_args(argv)
+
+
+def load_check_inputs() -> dict:
+    """Validate the deps YAML structure and load the inputs shared by the checks."""
+    missing = [p for p in FILES if not p.exists()]
+    if missing:
+        print("Missing required files:")
+        for p in missing:
+            print(f"  - {p}")
+        sys.exit(2)
+
+    targets_name: str | None = None
+    base_name: str | None = None
+    overlay_name: str | None = None
+    seen_overlay_variants: set[str] = set()
+    # Every structural error is recorded; the step stops once all are reported.
+    for path in FILES:
+        variant_data = load_yaml(path)
+        variant_name = path.stem.removeprefix("deps-")
+        require(
+            "topology" not in variant_data,
+            f"{path} uses deprecated key 'topology'; strict v2 requires 'targets_file'",
+            file=path,
+            key_path="topology",
+        )
+        require(
+            "bindings_file" not in variant_data,
+            f"{path} uses deprecated key 'bindings_file'; strict v2 uses targets only",
+            file=path,
+            key_path="bindings_file",
+        )
+        require(
+            "version_notes_file" not in variant_data,
+            f"{path} must not define version_notes_file; strict v2 sources it from base_file",
+            file=path,
+            key_path="version_notes_file",
+        )
+
+        variant_targets = variant_data.get("targets_file")
+        variant_base = variant_data.get("base_file")
+        variant_overlay = variant_data.get("overlay_file")
+        variant_overlay_variant = variant_data.get("overlay_variant")
+        targets_ok = require(
+            isinstance(variant_targets, str) and variant_targets.strip(),
+            f"{path} targets_file must be a non-empty string when provided",
+            file=path,
+            key_path="targets_file",
+        )
+        base_ok = require(
+            isinstance(variant_base, str) and variant_base.strip(),
+            f"{path} base_file must be a non-empty string",
+            file=path,
+            key_path="base_file",
+        )
+        overlay_ok = require(
+            isinstance(variant_overlay, str) and variant_overlay.strip(),
+            f"{path} overlay_file must be a non-empty string",
+            file=path,
+            key_path="overlay_file",
+        )
+        overlay_variant_ok = require(
+            isinstance(variant_overlay_variant, str) and variant_overlay_variant.strip(),
+            f"{path} overlay_variant must be a non-empty string",
+            file=path,
+            key_path="overlay_variant",
+        )
+        if overlay_variant_ok:
+            require(
+                variant_overlay_variant == variant_name,
+                (
+                    f"{path} overlay_variant='{variant_overlay_variant}' must match variant file "
+                    f"'{variant_name}'"
+                ),
+                file=path,
+                key_path="overlay_variant",
+            )
+            require(
+                variant_overlay_variant not in seen_overlay_variants,
+                f"duplicate overlay_variant '{variant_overlay_variant}' across variant files",
+                file=path,
+                key_path="overlay_variant",
+            )
+            seen_overlay_variants.add(variant_overlay_variant)
+        if targets_ok:
+            if targets_name is None:
+                targets_name = variant_targets
+            else:
+                require(
+                    variant_targets == targets_name,
+                    f"{path} targets_file '{variant_targets}' does not match '{targets_name}' used by other variants",
+                    file=path,
+                    key_path="targets_file",
+                )
+        if base_ok:
+            if base_name is None:
+                base_name = variant_base
+            else:
+                require(
+                    variant_base == base_name,
+                    f"{path} base_file '{variant_base}' does not match '{base_name}' used by other variants",
+                    file=path,
+                    key_path="base_file",
+                )
+        if overlay_ok:
+            if overlay_name is None:
+                overlay_name = variant_overlay
+            else:
+                require(
+                    variant_overlay == overlay_name,
+                    f"{path} overlay_file '{variant_overlay}' does not match '{overlay_name}' used by other variants",
+                    file=path,
+                    key_path="overlay_file",
+                )
+
+    if targets_name is None or base_name is None or overlay_name is None:
+        # Without the shared file names nothing further can be loaded.
+        sys.exit(1)
+    topology_file = DATA_DIR / targets_name
+    base_file = DATA_DIR / base_name
+    if not require(base_file.exists(), f"missing base file: {base_file}"):
+        sys.exit(1)
+    base_data = load_yaml(base_file)
+    version_notes_name = base_data.get("version_notes_file")
+    if not require(
+        isinstance(version_notes_name, str) and version_notes_name.strip(),
+        f"{base_file} version_notes_file must be a non-empty string",
+        file=base_file,
+        key_path="version_notes_file",
+    ):
+        sys.exit(1)
+    version_notes_file = DATA_DIR / version_notes_name
+
+    topology = load_topology(topology_file)
+    normalization_rules = load_platform_normalization_rules()
+    shared_version_notes = load_shared_version_notes(version_notes_file)
+    for path in FILES:
+        check_file(
+            path,
+            topology,
+            topology_file,
+            shared_version_notes,
+            version_notes_file,
+        )
+    platform_catalog = load_platform_catalog(PLATFORM_CATALOG_FILE, load_yaml, require)
+    platform_releases = load_platform_releases(PLATFORM_RELEASES_FILE, load_yaml, require)
+    platform_bindings = load_platform_deps_bindings(
+        platform_catalog,
+        platform_releases,
+        normalization_rules,
+        require,
+        PLATFORM_CATALOG_FILE,
+        PLATFORM_RELEASES_FILE,
+    )
+    # Stop once every structural error of the deps and platform files is reported.
+    if errors_recorded():
+        sys.exit(1)
+
+    print("deps YAML structure OK")
+
+    client = expand_variant_profiles(
+        load_yaml(DATA_DIR / "deps-client.yaml"),
+        DATA_DIR / "deps-client.yaml",
+        topology,
+        topology_file,
+        shared_version_notes,
+        version_notes_file,
+    )
+    localclient = expand_variant_profiles(
+        load_yaml(DATA_DIR / "deps-localclient.yaml"),
+        DATA_DIR / "deps-localclient.yaml",
+        topology,
+        topology_file,
+        shared_version_notes,
+        version_notes_file,
+    )
+    server = expand_variant_profiles(
+        load_yaml(DATA_DIR / "deps-server.yaml"),
+        DATA_DIR / "deps-server.yaml",
+        topology,
+        topology_file,
+        shared_version_notes,
+        version_notes_file,
+    )
+    dep_map = load_deps_map()
+    deps_index = DepsTopologyIndex(
+        {"client": client, "localclient": localclient, "server": server},
+        topology,
+        linux_families=LINUX_FAMILIES,
+        bsd_pkgmgrs=parse_bsd_pkgmgrs(),
+    )
+
+    return {
+        "topology": topology,
+        "normalization_rules": normalization_rules,
+        "client": client,
+        "localclient": localclient,
+        "server": server,
+        "dep_map": dep_map,
+        "deps_index": deps_index,
+        "platform_catalog": platform_catalog,
+        "platform_releases": platform_releases,
+        "platform_bindings": platform_bindings,
+    }
+
+
+def run_selected_checks(
+    args: argparse.Namespace,
+    context: dict,
+    jobs: int,
+    profile_dir: Path | None,
+) -> tuple[list[CheckResult], bool]:
+    """Run the checks the arguments select; the flag is set when the incremental selection matched none."""
+    units = CHECKS.select()
+    if MAP_RESOLVER_MODE != "parity":
+        units = [unit for unit in units if unit.name != "map-resolver-parity"]
+    changed_files = None
+    if args.changed_since:
+        changed_files = list_changed_files(args.changed_since)
+        if changed_files is None:
+            note("cannot list changed files; running all checks", indent="")
+    elif args.changed_files:
+        changed_files = [normalize_changed_path(path) for path in args.changed_files]
+    if changed_files is not None:
+        total = len(units)
+        selection = select_changed_units(units, changed_files, INPUT_FILES, GRAPH_FILES)
+        units = selection.units
+        if selection.full_run_reason:
+            print(f"-- incremental: {selection.full_run_reason}")
+        else:
+            names = ", ".join(unit.name for unit in units) or "none"
+            print(f"-- incremental: {len(units)} of {total} checks selected ({names})")
+        if selection.nothing_selected:
+            return [], True
+    if MAP_RESOLVER_MODE != "awk":
+        # Load deps-map.yaml before fanning out so workers share one index.
+        get_map_resolver()
+
+    results = run_checks(units, context, jobs=jobs, profile_dir=profile_dir)
+    print_results(results)
+    return results, False
+
+
+def main() -> int:
+    global CHECK_JOBS, MAP_RESOLVER_MODE
+    args = parse_args()
+    MAP_RESOLVER_MODE = args.map_resolver
+    profile_dir = Path(args.profile) if args.profile else None
+    # cProfile cannot profile several threads at once; profile serially.
+    jobs = 1 if profile_dir else (args.jobs if args.jobs > 0 else (os.cpu_count() or 1))
+    CHECK_JOBS = jobs
+
+    started = time.perf_counter()
+    structure, context = run_captured("deps-structure", load_check_inputs, profile_dir=profile_dir)
+    sys.stdout.write(structure.output)
+    results = [structure]
+    nothing_selected = False
+    if structure.ok:
+        check_results, nothing_selected = run_selected_checks(args, context, jobs, profile_dir)
+        results.extend(check_results)
+    wall = time.perf_counter() - started
+    if args.timing:
+        print_timing_table(results, wall, jobs)
+    if args.report_json or args.report_sarif:
+        report = build_report(results, ROOT, wall, jobs)
+        if args.report_json:
+            write_json(Path(args.report_json), report)
+        if args.report_sarif:
+            write_json(Path(args.report_sarif), build_sarif(report))
+
+    exit_code = max((result.exit_code for result in results), default=0)
+    if exit_code:
+        return exit_code
+
+    if nothing_selected:
+        print("deps structure OK; no other checks ran (none selected for the changed files)")
+        return 0
     print("deps content + CMake + runtime + workflow checks OK")
     return 0
 
@@ -0,0 +1,318 @@
+"""Check registry and parallel runner used by ci/deps/check-deps.py.
+
+Checks are registered with the shared inputs they read, the repository files
+they read directly and the checks they must follow. Once the shared inputs are
+loaded, independent checks run on a thread pool; each check's output is
+captured and replayed in registration order so the log is identical whatever
+the job count, and the findings it records (findings.py) travel with its
+result. The same declarations drive incremental runs: only checks whose files
+changed are selected.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import contextlib
+import fnmatch
+import io
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from findings import Finding, collecting
+
+
+@dataclass(frozen=True)
+class CheckUnit:
+    name: str
+    func: Callable[..., bool]
+    inputs: tuple[str, ...] = ()
+    after: tuple[str, ...] = ()
+    title: str | None = None
+    files: tuple[str, ...] = ()
+
+
+@dataclass
+class CheckResult:
+    name: str
+    ok: bool
+    output: str
+    elapsed: float
+    exit_code: int = 0
+    skipped_reason: str = ""
+    title: str | None = None
+    findings: list[Finding] = field(default_factory=list)
+
+
+@dataclass
+class ChangeSelection:
+    """The units an incremental run picked for its changed files."""
+
+    units: list[CheckUnit]
+    # Set when the check graph itself changed and every unit was selected.
+    full_run_reason: str = ""
+    nothing_selected: bool = False
+
+
+@dataclass
+class CheckRegistry:
+    units: list[CheckUnit] = field(default_factory=list)
+
+    def register(
+        self,
+        name: str,
+        inputs: tuple[str, ...] = (),
+        after: tuple[str, ...] = (),
+        title: str | None = None,
+        files: tuple[str, ...] = (),
+    ) -> Callable[[Callable[..., bool]], Callable[..., bool]]:
+        def decorator(func: Callable[..., bool]) -> Callable[..., bool]:
+            if any(unit.name == name for unit in self.units):
+                raise ValueError(f"duplicate check name '{name}'")
+            self.units.append(
+                CheckUnit(name, func, tuple(inputs), tuple(after), title, tuple(files))
+            )
+            return func
+
+        return decorator
+
+    def select(self, names: set[str] | None = None) -> list[CheckUnit]:
+        if names is None:
+            return list(self.units)
+        return [unit for unit in self.units if unit.name in names]
+
+
+def unit_file_patterns(unit: CheckUnit, input_files: dict[str, tuple[str, ...]]) -> set[str]:
+    """Repository-relative glob patterns a unit depends on, via inputs or directly."""
+    patterns = set(unit.files)
+    for name in unit.inputs:
+        patterns.update(input_files.get(name, ()))
+    return patterns
+
+
+def matches_any(path: str, patterns) -> bool:
+    # fnmatch's '*' also matches '/', so "ci/*.sh" covers nested scripts too.
+    return any(fnmatch.fnmatchcase(path, pattern) for pattern in patterns)
+
+
+def select_changed_units(
+    units: list[CheckUnit],
+    changed_paths: list[str],
+    input_files: dict[str, tuple[str, ...]],
+    graph_files: tuple[str, ...],
+) -> ChangeSelection:
+    """Pick the units affected by changed_paths, plus the units they must follow.
+
+    Selects every unit when a file that defines the graph itself changed.
+    """
+    graph_changes = sorted(path for path in changed_paths if matches_any(path, graph_files))
+    if graph_changes:
+        reason = f"check definitions changed ({', '.join(graph_changes)}); running all checks"
+        return ChangeSelection(list(units), full_run_reason=reason)
+
+    by_name = {unit.name: unit for unit in units}
+    selected: set[str] = set()
+    for unit in units:
+        patterns = unit_file_patterns(unit, input_files)
+        if any(matches_any(path, patterns) for path in changed_paths):
+            selected.add(unit.name)
+
+    queue = list(selected)
+    while queue:
+        unit = by_name[queue.pop()]
+        for name in unit.after:
+            if name in by_name and name not in selected:
+                selected.add(name)
+                queue.append(name)
+
+    return ChangeSelection([unit for unit in units if unit.name in selected], nothing_selected=not selected)
+
+
+class _ThreadLocalStdout(io.TextIOBase):
+    """Route writes to a per-thread buffer while a check is running."""
+
+    def __init__(self, fallback) -> None:
+        super().__init__()
+        self._fallback = fallback
+        self._local = threading.local()
+
+    def start_capture(self) -> io.StringIO:
+        buffer = io.StringIO()
+        self._local.buffer = buffer
+        return buffer
+
+    def stop_capture(self) -> None:
+        self._local.buffer = None
+
+    def _target(self):
+        return getattr(self._local, "buffer", None) or self._fallback
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def writable(self) -> bool:
+        return True
+
+
+def _exit_code(exc: SystemExit) -> int:
+    if exc.code is None:
+        return 0
+    if isinstance(exc.code, int):
+        return exc.code
+    print(exc.code)
+    return 1
+
+
+def _profiled_call(name: str, func: Callable, args: tuple, profile_dir: Path | None):
+    if profile_dir is None:
+        return func(*args)
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args)
+    finally:
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(profile_dir / f"{name}.prof"))
+
+
+def _run_unit(
+    unit: CheckUnit,
+    context: dict,
+    stdout: _ThreadLocalStdout,
+    profile_dir: Path | None = None,
+) -> CheckResult:
+    buffer = stdout.start_capture()
+    started = time.perf_counter()
+    exit_code = 0
+    with collecting(unit.name) as collector:
+        try:
+            if unit.title:
+                print(f"-- {unit.title}")
+            args = tuple(context[name] for name in unit.inputs)
+            ok = bool(_profiled_call(unit.name, unit.func, args, profile_dir))
+        except SystemExit as exc:
+            # load_yaml() aborts on a file it cannot parse; that only fails
+            # the check that raised.
+            exit_code = _exit_code(exc) or 1
+            ok = False
+        finally:
+            elapsed = time.perf_counter() - started
+            stdout.stop_capture()
+    # A check that recorded an error fails even if it returned True.
+    ok = ok and not collector.count("error")
+    if not ok and exit_code == 0:
+        exit_code = 1
+    return CheckResult(
+        unit.name, ok, buffer.getvalue(), elapsed, exit_code, title=unit.title, findings=collector.findings
+    )
+
+
+def run_captured(
+    name: str,
+    func: Callable[..., Any],
+    *args,
+    profile_dir: Path | None = None,
+) -> tuple[CheckResult, Any]:
+    """Run a non-registered step (e.g. the shared input load) like a check.
+
+    Returns its result and the function's return value (None when it exited).
+    """
+    buffer = io.StringIO()
+    started = time.perf_counter()
+    value = None
+    exit_code = 0
+    try:
+        with contextlib.redirect_stdout(buffer), collecting(name) as collector:
+            try:
+                value = _profiled_call(name, func, args, profile_dir)
+            except SystemExit as exc:
+                exit_code = _exit_code(exc) or 1
+    finally:
+        elapsed = time.perf_counter() - started
+    result = CheckResult(name, exit_code == 0, buffer.getvalue(), elapsed, exit_code, findings=collector.findings)
+    return result, value
+
+
+def run_checks(
+    units: list[CheckUnit],
+    context: dict,
+    jobs: int = 1,
+    profile_dir: Path | None = None,
+) -> list[CheckResult]:
+    """Run units respecting 'after' ordering; results follow registration order.
+
+    With profile_dir, each check's cProfile stats are written to
+    <profile_dir>/<check>.prof.
+    """
+    names = {unit.name for unit in units}
+    for unit in units:
+        missing_inputs = [name for name in unit.inputs if name not in context]
+        if missing_inputs:
+            raise KeyError(f"check '{unit.name}' needs unknown inputs: {', '.join(missing_inputs)}")
+
+    results: dict[str, CheckResult] = {}
+    pending = list(units)
+    stdout = _ThreadLocalStdout(sys.stdout)
+    previous_stdout = sys.stdout
+    sys.stdout = stdout
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            running: dict = {}
+            while pending or running:
+                progressed = True
+                while progressed:
+                    progressed = False
+                    for unit in list(pending):
+                        deps = [name for name in unit.after if name in names]
+                        if any(name not in results for name in deps):
+                            continue
+                        pending.remove(unit)
+                        progressed = True
+                        failed = [name for name in deps if not results[name].ok]
+                        if failed:
+                            results[unit.name] = CheckResult(
+                                unit.name,
+                                False,
+                                "",
+                                0.0,
+                                1,
+                                skipped_reason=f"skipped: depends on failed {', '.join(failed)}",
+                                title=unit.title,
+                            )
+                            continue
+                        running[pool.submit(_run_unit, unit, context, stdout, profile_dir)] = unit
+                if not running:
+                    if pending:
+                        stuck = ", ".join(unit.name for unit in pending)
+                        raise ValueError(f"check ordering cycle among: {stuck}")
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    unit = running.pop(future)
+                    results[unit.name] = future.result()
+    finally:
+        sys.stdout = previous_stdout
+
+    return [results[unit.name] for unit in units]
+
+
+def print_results(results: list[CheckResult]) -> None:
+    for result in results:
+        if result.output:
+            sys.stdout.write(result.output)
+        if result.skipped_reason:
+            print(f"-- {result.name}: {result.skipped_reason}")
+
+
+def print_timing_table(results: list[CheckResult], wall: float, jobs: int) -> None:
+    width = max((len(result.name) for result in results), default=5)
+    print(f"-- timing (jobs={jobs}, wall={wall:.2f}s)")
+    for result in sorted(results, key=lambda item: (-item.elapsed, item.name)):
+        status = "ok" if result.ok else ("skipped" if result.skipped_reason else "FAILED")
+        print(f"   {result.name:<{width}}  {result.elapsed:7.2f}s  {status}")
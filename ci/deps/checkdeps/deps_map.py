@@ -0,0 +1,221 @@
+"""In-process resolver for ci/deps/data/deps-map.yaml.
+
+Mirrors the lookup order of ci/deps/lib/resolve-map.awk so check-deps.py can
+resolve logical dependency IDs without forking awk (and re-parsing the map)
+for every family/os/pkgmgr combination. The awk resolver stays the reference
+implementation used by packages-from-yaml.sh.
+"""
+
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+
+
+def split_package_list(value) -> tuple[str, ...]:
+    # resolve-map.awk joins list items with spaces and re-splits on whitespace,
+    # so an item such as "a b" yields two packages.
+    if not isinstance(value, list):
+        return ()
+    packages: list[str] = []
+    for item in value:
+        if item is None:
+            continue
+        packages.extend(str(item).split())
+    return tuple(packages)
+
+
+class DepsMapResolver:
+    """Indexed view of deps-map.yaml: dep -> family -> os -> pkgmgr -> packages."""
+
+    def __init__(self, data: dict) -> None:
+        self.aliases: dict[str, str] = {}
+        self.templates: dict[str, dict[str, tuple[str, ...]]] = {}
+        self.legacy: dict[str, dict[str, dict[str, dict[str, tuple[str, ...]]]]] = {}
+        self.by_family: dict[str, dict[str, dict[str, dict[str, tuple[str, ...]]]]] = {}
+        self.by_os: dict[str, dict[str, dict[str, tuple[str, ...]]]] = {}
+        self.defaults: dict[str, dict[str, tuple[str, ...]]] = {}
+        self.dep_templates: dict[str, str] = {}
+        self._memo: dict[tuple[str, str, str, str], tuple[str, ...]] = {}
+        self._index(data if isinstance(data, dict) else {})
+
+    @staticmethod
+    def _store(target: dict, keys: tuple[str, ...], value) -> None:
+        packages = split_package_list(value)
+        if not packages:
+            return
+        for key in keys[:-1]:
+            target = target.setdefault(key, {})
+        target[keys[-1]] = packages
+
+    def _index(self, data: dict) -> None:
+        aliases = data.get("aliases")
+        if isinstance(aliases, dict):
+            for alias, target in aliases.items():
+                if isinstance(target, (str, int, float)) and str(target).strip():
+                    self.aliases[str(alias)] = str(target).strip()
+
+        templates = data.get("package_templates")
+        if isinstance(templates, dict):
+            for template, pkgmgrs in templates.items():
+                if not isinstance(pkgmgrs, dict):
+                    continue
+                for pkgmgr, value in pkgmgrs.items():
+                    self._store(self.templates, (str(template), str(pkgmgr)), value)
+
+        dep_map = data.get("map")
+        if not isinstance(dep_map, dict):
+            return
+        for dep, dep_entry in dep_map.items():
+            if not isinstance(dep_entry, dict):
+                continue
+            dep = str(dep)
+            for section, section_entry in dep_entry.items():
+                if not isinstance(section_entry, dict):
+                    continue
+                if section == "defaults":
+                    for pkgmgr, value in section_entry.items():
+                        if pkgmgr == "template" and isinstance(value, str) and value.strip():
+                            self.dep_templates[dep] = value.strip()
+                            continue
+                        self._store(self.defaults, (dep, str(pkgmgr)), value)
+                    continue
+                if section == "overrides" and (
+                    "by_os" in section_entry or "by_family" in section_entry
+                ):
+                    self._index_overrides(dep, section_entry)
+                    continue
+                # Legacy map.<dep>.<family>.<os>.<pkgmgr>: [..]
+                for os_name, os_entry in section_entry.items():
+                    if not isinstance(os_entry, dict):
+                        continue
+                    for pkgmgr, value in os_entry.items():
+                        self._store(
+                            self.legacy,
+                            (dep, str(section), str(os_name), str(pkgmgr)),
+                            value,
+                        )
+
+    def _index_overrides(self, dep: str, overrides: dict) -> None:
+        by_os = overrides.get("by_os")
+        if isinstance(by_os, dict):
+            for os_name, os_entry in by_os.items():
+                if not isinstance(os_entry, dict):
+                    continue
+                for pkgmgr, value in os_entry.items():
+                    self._store(self.by_os, (dep, str(os_name), str(pkgmgr)), value)
+        by_family = overrides.get("by_family")
+        if isinstance(by_family, dict):
+            for family, family_entry in by_family.items():
+                if not isinstance(family_entry, dict):
+                    continue
+                for os_name, os_entry in family_entry.items():
+                    if not isinstance(os_entry, dict):
+                        continue
+                    for pkgmgr, value in os_entry.items():
+                        self._store(
+                            self.by_family,
+                            (dep, str(family), str(os_name), str(pkgmgr)),
+                            value,
+                        )
+
+    def dep_ids(self) -> list[str]:
+        deps = set(self.defaults) | set(self.dep_templates) | set(self.legacy)
+        deps |= set(self.by_os) | set(self.by_family) | set(self.aliases)
+        return sorted(deps)
+
+    def resolve_dep(self, dep: str, family: str, os_name: str, pkgmgr: str) -> tuple[str, ...]:
+        key = (dep, family, os_name, pkgmgr)
+        cached = self._memo.get(key)
+        if cached is not None:
+            return cached
+
+        dep_key = self.aliases.get(dep, dep)
+        packages = (
+            self.legacy.get(dep_key, {}).get(family, {}).get(os_name, {}).get(pkgmgr)
+            or self.by_family.get(dep_key, {}).get(family, {}).get(os_name, {}).get(pkgmgr)
+            or self.by_os.get(dep_key, {}).get(os_name, {}).get(pkgmgr)
+            or self.defaults.get(dep_key, {}).get(pkgmgr)
+        )
+        if packages is None and dep_key in self.dep_templates:
+            packages = self.templates.get(self.dep_templates[dep_key], {}).get(pkgmgr)
+        if packages is None:
+            packages = (dep_key,)
+
+        self._memo[key] = packages
+        return packages
+
+    def resolve(self, items: list[str], family: str, os_name: str, pkgmgr: str) -> list[str]:
+        resolved: list[str] = []
+        for item in items:
+            dep = str(item).strip()
+            if dep:
+                resolved.extend(self.resolve_dep(dep, family, os_name, pkgmgr))
+        return resolved
+
+
+def load_deps_map_resolver(path: Path, load_yaml) -> DepsMapResolver:
+    if not path.exists():
+        return DepsMapResolver({})
+    return DepsMapResolver(load_yaml(path))
+
+
+def resolve_with_awk(
+    awk_script: Path,
+    map_file: Path,
+    items: list[str],
+    family: str,
+    os_name: str,
+    pkgmgr: str,
+) -> list[str]:
+    """Resolve through resolve-map.awk; raises CalledProcessError on failure."""
+    result = subprocess.run(
+        [
+            "awk",
+            "-v",
+            f"MAP_FILE={map_file}",
+            "-v",
+            f"FAMILY={family}",
+            "-v",
+            f"OS={os_name}",
+            "-v",
+            f"PKGMGR={pkgmgr}",
+            "-f",
+            str(awk_script),
+        ],
+        input="\n".join(items) + "\n",
+        text=True,
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(
+            result.returncode, result.args, output=result.stdout, stderr=result.stderr
+        )
+    return [line.strip() for line in result.stdout.splitlines() if line.strip()]
+
+
+def check_resolver_parity(
+    resolver: DepsMapResolver,
+    awk_script: Path,
+    map_file: Path,
+    combos: list[tuple[str, str, str]],
+) -> list[str]:
+    """Compare every known dep ID against the awk resolver; return mismatch lines."""
+    deps = resolver.dep_ids()
+    # An unmapped ID checks the passthrough path as well.
+    probe = deps + ["__UNMAPPED_DEP__"]
+    mismatches: list[str] = []
+    for family, os_name, pkgmgr in combos:
+        # One awk run per combination; only drill down per dep on a mismatch.
+        expected = resolve_with_awk(awk_script, map_file, probe, family, os_name, pkgmgr)
+        if expected == resolver.resolve(probe, family, os_name, pkgmgr):
+            continue
+        for dep in probe:
+            expected = resolve_with_awk(awk_script, map_file, [dep], family, os_name, pkgmgr)
+            actual = resolver.resolve([dep], family, os_name, pkgmgr)
+            if expected != actual:
+                mismatches.append(
+                    f"{dep} family={family} os={os_name} pkgmgr={pkgmgr}: "
+                    f"awk={' '.join(expected) or '-'} python={' '.join(actual) or '-'}"
+                )
+    return mismatches
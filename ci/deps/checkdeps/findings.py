@@ -0,0 +1,88 @@
+"""Findings recorded by the ci/deps/check-deps.py checks.
+
+A check reports each problem through record(), which files a Finding (check,
+severity, message, file, key path) with the collector of the running check and
+prints the log line rendered from it. The engine gives every check its own
+collector, so the human log and the JSON/SARIF reports come from the same
+findings.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import threading
+from dataclasses import dataclass, field
+from typing import Iterator
+
+SEVERITY_LABELS = {"error": "ERROR", "warning": "WARNING", "note": "NOTE"}
+CONTINUATION_INDENT = "   "
+
+
+@dataclass
+class Finding:
+    check: str
+    severity: str
+    message: str
+    file: str | None = None
+    key_path: str | None = None
+
+
+@dataclass
+class FindingCollector:
+    check: str
+    findings: list[Finding] = field(default_factory=list)
+
+    def count(self, severity: str = "error") -> int:
+        return sum(1 for finding in self.findings if finding.severity == severity)
+
+
+_CURRENT = threading.local()
+
+
+@contextlib.contextmanager
+def collecting(check: str) -> Iterator[FindingCollector]:
+    """Collect the findings recorded on this thread for check."""
+    previous = getattr(_CURRENT, "collector", None)
+    collector = FindingCollector(check)
+    _CURRENT.collector = collector
+    try:
+        yield collector
+    finally:
+        _CURRENT.collector = previous
+
+
+def current_collector() -> FindingCollector | None:
+    return getattr(_CURRENT, "collector", None)
+
+
+def render(finding: Finding, indent: str = "   ") -> str:
+    """The log line(s) of a finding; extra message lines are indented below the first."""
+    first, *rest = finding.message.splitlines() or [""]
+    lines = [f"{indent}{SEVERITY_LABELS[finding.severity]}: {first}"]
+    lines.extend(f"{indent}{CONTINUATION_INDENT}{line}" for line in rest)
+    return "\n".join(lines)
+
+
+def record(
+    severity: str,
+    message: str,
+    *,
+    file: object = None,
+    key_path: str | None = None,
+    indent: str = "   ",
+) -> Finding:
+    """File a finding with the running check's collector and print its log line."""
+    if severity not in SEVERITY_LABELS:
+        raise ValueError(f"unknown finding severity '{severity}'")
+    collector = current_collector()
+    finding = Finding(
+        collector.check if collector is not None else "",
+        severity,
+        message,
+        str(file) if file is not None else None,
+        key_path,
+    )
+    if collector is not None:
+        collector.findings.append(finding)
+    print(render(finding, indent))
+    return finding
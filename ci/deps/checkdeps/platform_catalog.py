@@ -32,32 +32,23 @@ def infer_release_version(platform_id: str, entry: dict) -> str | None:
     return None
 
 
-def validate_platform_catalog_fields(platform_os: str, entry: dict) -> None:
+def validate_platform_catalog_fields(platform_os: str, entry: dict, require, path=None) -> bool:
+    location = {"file": path, "key_path": f"platforms.{platform_os}"}
     runtime = str(entry.get("runtime", "")).strip().lower()
-    if runtime not in {"docker", "vm", "host"}:
-        raise SystemExit(
-            f"ERROR: platform catalog entry '{platform_os}' has unsupported runtime '{runtime}'"
-        )
+    if not require(
+        runtime in {"docker", "vm", "host"},
+        f"platform catalog entry '{platform_os}' has unsupported runtime '{runtime}'",
+        **location,
+    ):
+        return False
 
     image = str(entry.get("image", "")).strip()
     runner = str(entry.get("runner", "")).strip()
-
-    if runtime == "docker" and (image or runner):
-        raise SystemExit(
-            f"ERROR: platform catalog entry '{platform_os}' (runtime=docker) must not include image/runner"
-        )
-        return
-
-    if runtime == "vm" and (image or runner):
-        raise SystemExit(
-            f"ERROR: platform catalog entry '{platform_os}' (runtime=vm) must not include image/runner"
-        )
-        return
-
-    if image or runner:
-        raise SystemExit(
-            f"ERROR: platform catalog entry '{platform_os}' (runtime=host) must not include image/runner"
-        )
+    return require(
+        not (image or runner),
+        f"platform catalog entry '{platform_os}' (runtime={runtime}) must not include image/runner",
+        **location,
+    )
 
 
 def load_platform_catalog(path, load_yaml, require) -> dict[str, dict]:
@@ -71,40 +62,52 @@ def load_platform_catalog(path, load_yaml, require) -> dict[str, dict]:
 
     normalized = {}
     for platform_os, raw_entry in platforms.items():
-        require(
+        os_ok = require(
             isinstance(platform_os, str) and platform_os.strip(),
             f"{path} platform os must be a non-empty string",
+            file=path,
         )
-        require(
+        entry_ok = require(
             isinstance(raw_entry, dict),
             f"{path} platforms.{platform_os} must be a mapping",
+            file=path,
+            key_path=f"platforms.{platform_os}",
         )
-        validate_platform_catalog_fields(platform_os, raw_entry)
-        normalized[platform_os] = raw_entry
+        if os_ok and entry_ok:
+            # Entries with invalid fields stay loaded so their releases are not reported too.
+            validate_platform_catalog_fields(platform_os, raw_entry, require, path)
+            normalized[platform_os] = raw_entry
     return normalized
 
 
-def validate_platform_release_fields(platform_id: str, entry: dict) -> None:
+def validate_platform_release_fields(platform_id: str, entry: dict, require, path=None) -> bool:
+    location = {"file": path, "key_path": f"platforms.{platform_id}"}
+    ok = True
     runtime_raw = entry.get("runtime")
     if runtime_raw is not None:
         runtime = str(runtime_raw).strip().lower()
-        if runtime not in {"docker", "vm", "host"}:
-            raise SystemExit(
-                f"ERROR: platform release entry '{platform_id}' has unsupported runtime '{runtime}'"
-            )
+        ok &= require(
+            runtime in {"docker", "vm", "host"},
+            f"platform release entry '{platform_id}' has unsupported runtime '{runtime}'",
+            **location,
+        )
 
     platform_os_raw = entry.get("platform_os")
-    if platform_os_raw is not None and not str(platform_os_raw).strip():
-        raise SystemExit(
-            f"ERROR: platform release entry '{platform_id}' has an empty platform_os"
+    if platform_os_raw is not None:
+        ok &= require(
+            bool(str(platform_os_raw).strip()),
+            f"platform release entry '{platform_id}' has an empty platform_os",
+            **location,
         )
 
     image = str(entry.get("image", "")).strip()
     runner = str(entry.get("runner", "")).strip()
-    if image and runner:
-        raise SystemExit(
-            f"ERROR: platform release entry '{platform_id}' must not define both image and runner"
-        )
+    ok &= require(
+        not (image and runner),
+        f"platform release entry '{platform_id}' must not define both image and runner",
+        **location,
+    )
+    return ok
 
 
 def load_platform_releases(path, load_yaml, require) -> dict[str, dict]:
@@ -118,55 +121,73 @@ def load_platform_releases(path, load_yaml, require) -> dict[str, dict]:
 
     normalized = {}
     for platform_id, raw_entry in platforms.items():
-        require(
+        id_ok = require(
             isinstance(platform_id, str) and platform_id.strip(),
             f"{path} platform id must be a non-empty string",
+            file=path,
         )
-        require(
+        entry_ok = require(
             isinstance(raw_entry, dict),
             f"{path} platforms.{platform_id} must be a mapping",
+            file=path,
+            key_path=f"platforms.{platform_id}",
         )
-        validate_platform_release_fields(platform_id, raw_entry)
-        normalized[platform_id] = raw_entry
+        if id_ok and entry_ok:
+            validate_platform_release_fields(platform_id, raw_entry, require, path)
+            normalized[platform_id] = raw_entry
     return normalized
 
 
 def load_platform_deps_bindings(
     platform_catalog: dict[str, dict],
     platform_releases: dict[str, dict],
-    normalization_rules: dict[str, dict] | None = None,
+    normalization_rules: dict[str, dict] | None,
+    require,
+    catalog_path=None,
+    releases_path=None,
 ) -> dict[str, dict]:
     bindings: dict[str, dict] = {}
     for platform_id, entry in platform_releases.items():
+        release_location = {"file": releases_path, "key_path": f"platforms.{platform_id}"}
         platform_os = str(entry.get("platform_os", "")).strip() or infer_platform_os(platform_id)
         catalog_entry = platform_catalog.get(platform_os)
-        if not isinstance(catalog_entry, dict):
-            raise SystemExit(
-                f"ERROR: platform release entry '{platform_id}' references unknown platform_os '{platform_os}'"
-            )
+        if not require(
+            isinstance(catalog_entry, dict),
+            f"platform release entry '{platform_id}' references unknown platform_os '{platform_os}'",
+            **release_location,
+        ):
+            continue
         deps = catalog_entry.get("deps")
         release_deps = entry.get("deps")
         if release_deps is None:
             release_deps = {}
         if deps is None:
             continue
-        if not isinstance(deps, dict):
-            raise SystemExit(
-                f"ERROR: platform catalog entry '{platform_os}' deps must be a mapping"
-            )
-        if not isinstance(release_deps, dict):
-            raise SystemExit(
-                f"ERROR: platform release entry '{platform_id}' deps must be a mapping"
-            )
+        deps_ok = require(
+            isinstance(deps, dict),
+            f"platform catalog entry '{platform_os}' deps must be a mapping",
+            file=catalog_path,
+            key_path=f"platforms.{platform_os}.deps",
+        )
+        release_deps_ok = require(
+            isinstance(release_deps, dict),
+            f"platform release entry '{platform_id}' deps must be a mapping",
+            file=releases_path,
+            key_path=f"platforms.{platform_id}.deps",
+        )
+        if not (deps_ok and release_deps_ok):
+            continue
         package_family = str(deps.get("package_family", "")).strip()
         key_raw = release_deps.get("key")
         image = str(entry.get("image", "")).strip()
         runner = str(entry.get("runner", "")).strip()
         runtime = str(entry.get("runtime", "")).strip().lower()
-        if not package_family or not platform_os:
-            raise SystemExit(
-                f"ERROR: platform release entry '{platform_id}' must resolve package_family and platform_os"
-            )
+        if not require(
+            bool(package_family and platform_os),
+            f"platform release entry '{platform_id}' must resolve package_family and platform_os",
+            **release_location,
+        ):
+            continue
         if key_raw is None:
             if not image and runtime != "docker":
                 normalized_key = None
@@ -0,0 +1,124 @@
+"""JSON and SARIF reports for ci/deps/check-deps.py.
+
+Each check's result carries the findings it recorded (findings.py); this
+module writes them, with the check statuses and timings, as JSON or SARIF next
+to the human-readable log.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, replace
+from pathlib import Path
+
+from check_engine import CheckResult
+from findings import Finding
+
+REPORT_FORMAT_VERSION = 1
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+TOOL_NAME = "check-deps"
+
+
+def _repo_file(file: str | None, root: Path) -> str | None:
+    """file relative to root, as SARIF wants it; None when it lies outside."""
+    if not file:
+        return None
+    path = Path(file)
+    if path.is_absolute():
+        try:
+            path = path.relative_to(root)
+        except ValueError:
+            return None
+    return path.as_posix()
+
+
+def result_findings(result: CheckResult, root: Path) -> list[Finding]:
+    findings = [replace(finding, file=_repo_file(finding.file, root)) for finding in result.findings]
+    if not result.ok and not result.skipped_reason:
+        if not any(finding.severity == "error" for finding in findings):
+            # A check that failed without recording why (e.g. an unparsable YAML file).
+            lines = [line.strip() for line in result.output.splitlines() if line.strip()]
+            message = lines[-1] if lines else f"check failed (exit {result.exit_code})"
+            findings.append(Finding(result.name, "error", message))
+    return findings
+
+
+def build_report(results: list[CheckResult], root: Path, wall: float, jobs: int) -> dict:
+    checks = []
+    for result in results:
+        checks.append(
+            {
+                "name": result.name,
+                "title": result.title,
+                "status": (
+                    "ok" if result.ok else ("skipped" if result.skipped_reason else "failed")
+                ),
+                "exit_code": result.exit_code,
+                "elapsed_seconds": round(result.elapsed, 6),
+                "skipped_reason": result.skipped_reason or None,
+                "findings": [asdict(finding) for finding in result_findings(result, root)],
+            }
+        )
+    return {
+        "tool": TOOL_NAME,
+        "format_version": REPORT_FORMAT_VERSION,
+        "ok": all(result.ok for result in results),
+        "exit_code": max((result.exit_code for result in results), default=0),
+        "jobs": jobs,
+        "wall_seconds": round(wall, 6),
+        "checks": checks,
+    }
+
+
+def build_sarif(report: dict) -> dict:
+    rules = []
+    sarif_results = []
+    for check in report["checks"]:
+        rules.append(
+            {
+                "id": check["name"],
+                "shortDescription": {"text": check["title"] or check["name"]},
+            }
+        )
+        for finding in check["findings"]:
+            entry: dict = {
+                "ruleId": check["name"],
+                "level": finding["severity"],
+                "message": {"text": finding["message"]},
+            }
+            location: dict = {}
+            if finding["file"]:
+                location["physicalLocation"] = {
+                    "artifactLocation": {"uri": finding["file"], "uriBaseId": "%SRCROOT%"}
+                }
+            if finding["key_path"]:
+                location["logicalLocations"] = [{"fullyQualifiedName": finding["key_path"]}]
+            if location:
+                entry["locations"] = [location]
+            sarif_results.append(entry)
+    return {
+        "$schema": SARIF_SCHEMA,
+        "version": "2.1.0",
+        "runs": [
+            {
+                "tool": {"driver": {"name": TOOL_NAME, "rules": rules}},
+                "results": sarif_results,
+                "properties": {
+                    "wall_seconds": report["wall_seconds"],
+                    "jobs": report["jobs"],
+                    "checks": {
+                        check["name"]: {
+                            "status": check["status"],
+                            "elapsed_seconds": check["elapsed_seconds"],
+                        }
+                        for check in report["checks"]
+                    },
+                },
+            }
+        ],
+    }
+
+
+def write_json(path: Path, document: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(document, indent=2, sort_keys=False) + "\n", encoding="utf-8")
@@ -1,51 +1,186 @@
-"""Shell lint checks used by ci/deps/check-deps.py."""
+"""Shell lint checks used by ci/deps/check-deps.py.
+
+Each script is linted by its own shellcheck process, several at a time, and
+the result is cached under $XDG_CACHE_HOME/xymon-ci/shellcheck keyed on the
+script (plus the files it names in "# shellcheck source=" directives), the
+shellcheck version and the lint options, so unchanged scripts are not
+re-linted.
+
+Environment:
+  XYMON_CI_SHELLCHECK_CACHE_DIR  cache directory (default: $XDG_CACHE_HOME/xymon-ci/shellcheck)
+  XYMON_CI_SHELLCHECK_CACHE=0    disable the cache
+"""
 
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+import re
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from cache_store import atomic_write, configured_dir  # type: ignore
+from findings import record
+
+CACHE_FORMAT = "shellcheck-cache-v1"
+CACHE_DIR_ENV = "XYMON_CI_SHELLCHECK_CACHE_DIR"
+CACHE_ENABLE_ENV = "XYMON_CI_SHELLCHECK_CACHE"
+SHELLCHECK_ARGS = ("--external-sources", "--shell", "bash", "--severity", "warning")
+SOURCE_DIRECTIVE_PATTERN = re.compile(r"#\s*shellcheck\s+source=(\S+)")
+SLOWEST_REPORTED = 3
+
+# Repository-relative scripts (globs allowed) covered by the lint check.
+SHELL_LINT_SCRIPTS = (
+    "cmake-local-setup.sh",
+    "cmake-local-build.sh",
+    "cmake-local-install.sh",
+    "ci/deps/install-default-packages.sh",
+    "ci/deps/install-checkout-tools.sh",
+    "ci/deps/install-macports.sh",
+    "ci/deps/install-packages.sh",
+    "ci/deps/install-bsd-packages.sh",
+    "ci/deps/lib/install-common.sh",
+    "ci/deps/lib/install-bsd-common.sh",
+    "ci/run/ref/resolve-execution-model.sh",
+    "ci/deps/pkgmgr/*.sh",
+)
+
+
+@dataclass
+class LintResult:
+    script: str
+    returncode: int
+    output: str
+    elapsed: float
+    cached: bool = False
+
+
+def cache_dir() -> Path | None:
+    return configured_dir("shellcheck", CACHE_DIR_ENV, CACHE_ENABLE_ENV)
+
+
+def sourced_files(root: Path, script: str, text: str) -> list[Path]:
+    # shellcheck resolves source= paths against the script directory or the cwd.
+    found: list[Path] = []
+    for match in SOURCE_DIRECTIVE_PATTERN.finditer(text):
+        target = match.group(1).strip("\"'")
+        for candidate in ((root / script).parent / target, root / target):
+            if candidate.is_file():
+                found.append(candidate)
+                break
+    return found
+
+
+def cache_key(root: Path, script: str, linter_version: str) -> str:
+    raw = (root / script).read_bytes()
+    digest = hashlib.sha256()
+    digest.update(f"{CACHE_FORMAT}\0{linter_version}\0{' '.join(SHELLCHECK_ARGS)}\0{script}\0".encode())
+    digest.update(raw)
+    for path in sourced_files(root, script, raw.decode("utf-8", errors="ignore")):
+        digest.update(b"\0")
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
 
+def _read_cached(directory: Path, key: str) -> dict | None:
+    try:
+        entry = json.loads((directory / f"{key}.json").read_text())
+    except (OSError, ValueError):
+        return None
+    return entry if isinstance(entry, dict) else None
+
+
+def _write_cached(directory: Path, key: str, entry: dict) -> None:
+    try:
+        atomic_write(directory / f"{key}.json", json.dumps(entry).encode("utf-8"))
+    except OSError:
+        # The cache is an optimization; a read-only or full disk must not fail the lint.
+        pass
+
+
+def lint_script(root: Path, script: str, linter_version: str, directory: Path | None) -> LintResult:
+    key = cache_key(root, script, linter_version)
+    if directory is not None:
+        entry = _read_cached(directory, key)
+        if entry is not None:
+            return LintResult(
+                script,
+                int(entry.get("returncode", 0)),
+                str(entry.get("output", "")),
+                float(entry.get("elapsed", 0.0)),
+                cached=True,
+            )
+
+    started = time.perf_counter()
+    # Relative paths keep the report (and the cached output) checkout-independent.
+    result = subprocess.run(
+        ["shellcheck", *SHELLCHECK_ARGS, script],
+        cwd=root,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+    output = "\n".join(part.rstrip() for part in (result.stdout, result.stderr) if part.strip())
+    # 0 = clean, 1 = findings; anything else is a usage/runtime error worth retrying.
+    if directory is not None and result.returncode in (0, 1):
+        _write_cached(
+            directory,
+            key,
+            {"returncode": result.returncode, "output": output, "elapsed": elapsed},
+        )
+    return LintResult(script, result.returncode, output, elapsed)
+
+
+def print_lint_summary(results: list[LintResult]) -> None:
+    hits = sum(1 for result in results if result.cached)
+    print(f"   lint cache: {hits}/{len(results)} hits ({100 * hits // len(results)}%)")
+    slowest = sorted(results, key=lambda item: (-item.elapsed, item.script))[:SLOWEST_REPORTED]
+    print(
+        "   slowest: "
+        + ", ".join(
+            f"{result.script} {result.elapsed:.2f}s{' (cached)' if result.cached else ''}"
+            for result in slowest
+        )
+    )
 
-def check_shell_scripts(root) -> bool:
-    scripts = [
-        root / "cmake-local-setup.sh",
-        root / "cmake-local-build.sh",
-        root / "cmake-local-install.sh",
-        root / "ci" / "deps" / "install-default-packages.sh",
-        root / "ci" / "deps" / "install-checkout-tools.sh",
-        root / "ci" / "deps" / "install-macports.sh",
-        root / "ci" / "deps" / "install-packages.sh",
-        root / "ci" / "deps" / "install-bsd-packages.sh",
-        root / "ci" / "deps" / "lib" / "install-common.sh",
-        root / "ci" / "deps" / "lib" / "install-bsd-common.sh",
-        root / "ci" / "run" / "ref" / "resolve-execution-model.sh",
-        *sorted((root / "ci" / "deps" / "pkgmgr").glob("*.sh")),
+
+def check_shell_scripts(root, jobs: int | None = None) -> bool:
+    root = Path(root)
+    existing = [
+        path.relative_to(root).as_posix()
+        for pattern in SHELL_LINT_SCRIPTS
+        for path in sorted(root.glob(pattern))
     ]
-    existing = [str(path) for path in scripts if path.exists()]
     if not existing:
-        print("   NOTE: no shell scripts found for linting")
+        record("note", "no shell scripts found for linting")
         return True
 
     try:
-        subprocess.run(
+        version = subprocess.run(
             ["shellcheck", "--version"],
             check=True,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
+            capture_output=True,
+            text=True,
+        ).stdout
     except FileNotFoundError:
-        print("   NOTE: shellcheck not installed; skipping shell lint")
+        record("note", "shellcheck not installed; skipping shell lint")
         return True
 
-    cmd = [
-        "shellcheck",
-        "--external-sources",
-        "--shell",
-        "bash",
-        "--severity",
-        "warning",
-    ] + existing
-    result = subprocess.run(cmd)
-    if result.returncode != 0:
-        print("   ERROR: shellcheck reported issues")
-        return False
-    return True
+    directory = cache_dir()
+    # Each lint is its own shellcheck process; threads only wait on them.
+    workers = max(1, min(len(existing), jobs or os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda script: lint_script(root, script, version, directory), existing))
+
+    for result in results:
+        if result.output:
+            print(result.output)
+    print_lint_summary(results)
+    failed = [result for result in results if result.returncode != 0]
+    for result in failed:
+        record("error", f"shellcheck reported issues in {result.script}", file=result.script)
+    return not failed
@@ -0,0 +1,126 @@
+"""Read-only lookup tables over the expanded deps variants and targets topology.
+
+Built once by ci/deps/check-deps.py after the variant expansion so the
+cross-checks look targets up by (variant, family, os, pkgmgr) instead of each
+walking the nested build trees again.
+"""
+
+from __future__ import annotations
+
+from types import MappingProxyType
+from typing import Iterator, Mapping
+
+TargetKey = tuple[str, str, str, str]
+
+
+def _freeze_os_table(table: dict[str, dict[str, tuple[str, ...]]]) -> Mapping:
+    return MappingProxyType(
+        {family: MappingProxyType(dict(os_table)) for family, os_table in table.items()}
+    )
+
+
+def _index_build(build) -> tuple[dict[str, dict[str, tuple[str, ...]]], dict[tuple[str, str, str], dict]]:
+    os_table: dict[str, dict[str, tuple[str, ...]]] = {}
+    entries: dict[tuple[str, str, str], dict] = {}
+    if not isinstance(build, dict):
+        return os_table, entries
+    for family, family_entry in build.items():
+        if not isinstance(family_entry, dict):
+            continue
+        os_table[family] = {}
+        for os_name, os_entry in family_entry.items():
+            if not isinstance(os_name, str) or not isinstance(os_entry, dict):
+                continue
+            packagers = os_entry.get("packagers", {})
+            if not isinstance(packagers, dict):
+                packagers = {}
+            os_table[family][os_name] = tuple(packagers)
+            for pkgmgr, entry in packagers.items():
+                entries[(family, os_name, pkgmgr)] = entry
+    return os_table, entries
+
+
+class DepsTopologyIndex:
+    """Immutable (variant, family, os, pkgmgr) index; iteration follows file order."""
+
+    __slots__ = (
+        "variants",
+        "linux_families",
+        "topology",
+        "_os_tables",
+        "_targets",
+        "_bsd_pkgmgrs",
+    )
+
+    def __init__(
+        self,
+        variants: Mapping[str, dict],
+        topology: dict,
+        linux_families: frozenset[str] = frozenset(),
+        bsd_pkgmgrs: Mapping[str, str] | None = None,
+    ) -> None:
+        os_tables: dict[str, Mapping] = {}
+        targets: dict[TargetKey, dict] = {}
+        for variant, data in variants.items():
+            os_table, entries = _index_build(data.get("build", {}))
+            os_tables[variant] = _freeze_os_table(os_table)
+            for (family, os_name, pkgmgr), entry in entries.items():
+                targets[(variant, family, os_name, pkgmgr)] = entry
+        topology_os, _ = _index_build(topology.get("build", {}))
+
+        self.variants = tuple(variants)
+        self.linux_families = frozenset(linux_families)
+        # family -> os -> pkgmgrs of deps-targets.yaml, before any variant expansion.
+        self.topology = _freeze_os_table(topology_os)
+        self._os_tables = MappingProxyType(os_tables)
+        self._targets = MappingProxyType(targets)
+        # Case-folded OS name -> package manager the BSD installer dispatches to.
+        self._bsd_pkgmgrs = MappingProxyType(
+            {os_name.casefold(): pkgmgr for os_name, pkgmgr in (bsd_pkgmgrs or {}).items()}
+        )
+
+    def __setattr__(self, name, value) -> None:
+        if hasattr(self, "_bsd_pkgmgrs"):
+            raise AttributeError("DepsTopologyIndex is immutable")
+        object.__setattr__(self, name, value)
+
+    def families(self, variant: str) -> Mapping[str, Mapping[str, tuple[str, ...]]]:
+        """family -> os -> pkgmgrs for a variant (empty when unknown)."""
+        return self._os_tables.get(variant, MappingProxyType({}))
+
+    def has_family(self, variant: str, family: str) -> bool:
+        return family in self.families(variant)
+
+    def has_os(self, variant: str, family: str, os_name: str) -> bool:
+        return os_name in self.families(variant).get(family, {})
+
+    def pkgmgrs(self, variant: str, family: str, os_name: str) -> tuple[str, ...]:
+        return self.families(variant).get(family, {}).get(os_name, ())
+
+    def packager(self, variant: str, family: str, os_name: str, pkgmgr: str) -> dict | None:
+        return self._targets.get((variant, family, os_name, pkgmgr))
+
+    def mandatory_libs(self, variant: str, family: str, os_name: str, pkgmgr: str) -> list[str]:
+        entry = self.packager(variant, family, os_name, pkgmgr)
+        if not isinstance(entry, dict) or not isinstance(entry.get("libs"), dict):
+            return []
+        return entry["libs"].get("mandatory", [])
+
+    def iter_os(self, variant: str) -> Iterator[tuple[str, str, tuple[str, ...]]]:
+        for family, os_table in self.families(variant).items():
+            for os_name, pkgmgrs in os_table.items():
+                yield family, os_name, pkgmgrs
+
+    def iter_targets(self, variant: str) -> Iterator[tuple[str, str, str, dict]]:
+        for family, os_name, pkgmgrs in self.iter_os(variant):
+            for pkgmgr in pkgmgrs:
+                yield family, os_name, pkgmgr, self._targets[(variant, family, os_name, pkgmgr)]
+
+    def combinations(self, variant: str) -> list[tuple[str, str, str]]:
+        return [(family, os_name, pkgmgr) for family, os_name, pkgmgr, _ in self.iter_targets(variant)]
+
+    def is_bsd_os(self, os_name: str) -> bool:
+        return os_name.casefold() in self._bsd_pkgmgrs
+
+    def bsd_pkgmgr(self, os_name: str) -> str | None:
+        return self._bsd_pkgmgrs.get(os_name.casefold())
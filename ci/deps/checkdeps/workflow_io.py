@@ -3,15 +3,39 @@
 from __future__ import annotations
 
 import re
+from dataclasses import dataclass
 from pathlib import Path
 
-import yaml
+from yaml_cache import load_yaml_file  # type: ignore
 
 INSTALLER_RUN_PATTERN = re.compile(r"\bci/deps/install-[A-Za-z0-9-]+packages\.sh\b")
+INSTALLER_SCRIPT_PATTERN = re.compile(r"(ci/deps/\S+packages\S*\.sh)")
+FLAG_PATTERN = re.compile(r"(?<![\w-])(--[A-Za-z][A-Za-z0-9-]*)")
+# A flag followed by its value ("--os debian" or "--os=debian"); a following
+# option is not taken as the value.
+FLAG_VALUE_PATTERN = re.compile(
+    r"(?<![\w-])(--[A-Za-z][A-Za-z0-9-]*)(?:=|[ \t\r\n]+)(?!--)([^\s\\]+)"
+)
+CLI_REQUIREMENT_PATTERN = re.compile(r"\bci_deps_parse_cli\s+([01])\s+([01])\b")
+
+_REQUIRED_FLAGS_CACHE: dict[Path, frozenset[str]] = {}
+
+
+@dataclass(frozen=True)
+class InstallStep:
+    """One workflow run: block invoking a ci/deps installer, tokenized once."""
+
+    workflow: Path
+    script: str
+    flags: frozenset[str]
+    values: dict[str, tuple[str, ...]]
+
+    def flag_values(self, flag: str) -> tuple[str, ...]:
+        return self.values.get(flag, ())
 
 
 def parse_workflow_yaml(path: Path) -> dict:
-    data = yaml.safe_load(path.read_text()) or {}
+    data = load_yaml_file(path) or {}
     if not isinstance(data, dict):
         raise SystemExit(f"Workflow root is not a mapping: {path}")
     return data
@@ -36,3 +60,44 @@ def find_package_steps(workflow: dict) -> list[str]:
             if isinstance(run, str) and INSTALLER_RUN_PATTERN.search(run):
                 found.append(run)
     return found
+
+
+def tokenize_run_flags(run: str) -> tuple[frozenset[str], dict[str, tuple[str, ...]]]:
+    values: dict[str, list[str]] = {}
+    for match in FLAG_VALUE_PATTERN.finditer(run):
+        raw = match.group(2).strip()
+        if len(raw) >= 2 and raw[0] == raw[-1] and raw[0] in {'"', "'"}:
+            raw = raw[1:-1]
+        values.setdefault(match.group(1), []).append(raw)
+    flags = frozenset(FLAG_PATTERN.findall(run))
+    return flags, {flag: tuple(items) for flag, items in values.items()}
+
+
+def build_install_step_index(workflow_files: list[Path]) -> list[InstallStep]:
+    """Parse each workflow once and record its installer invocations."""
+    index: list[InstallStep] = []
+    for path in workflow_files:
+        for run in find_package_steps(parse_workflow_yaml(path)):
+            match = INSTALLER_SCRIPT_PATTERN.search(run)
+            if not match:
+                continue
+            flags, values = tokenize_run_flags(run)
+            index.append(InstallStep(path, match.group(1), flags, values))
+    return index
+
+
+def required_flags_for_script(script_path: Path) -> frozenset[str]:
+    """CLI flags an installer requires, from its ci_deps_parse_cli call (cached per path)."""
+    cached = _REQUIRED_FLAGS_CACHE.get(script_path)
+    if cached is not None:
+        return cached
+    text = script_path.read_text(errors="ignore")
+    match = CLI_REQUIREMENT_PATTERN.search(text)
+    required: set[str] = set()
+    if match:
+        if match.group(1) == "1":
+            required.add("--family")
+        if match.group(2) == "1":
+            required.add("--os")
+    _REQUIRED_FLAGS_CACHE[script_path] = frozenset(required)
+    return _REQUIRED_FLAGS_CACHE[script_path]
@@ -6,9 +6,14 @@ from __future__ import annotations
 import argparse
 import json
 import re
+import sys
 from pathlib import Path
 
-import yaml
+REF_HELPERS_DIR = Path(__file__).resolve().parents[1] / "ref"
+if str(REF_HELPERS_DIR) not in sys.path:
+    sys.path.insert(0, str(REF_HELPERS_DIR))
+
+from yaml_compat import safe_load as yaml_safe_load  # noqa: E402
 
 BUILD_TOOLS = ("cmake", "make")
 ARCH_TO_DOCKER_PLATFORM = (
@@ -53,7 +58,7 @@ def parse_args() -> argparse.Namespace:
 
 
 def load_yaml(path: Path):
-    return yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    return yaml_safe_load(path.read_text(encoding="utf-8")) or {}
 
 
 def render_compose(include: list[dict[str, str]]) -> str:
@@ -6,9 +6,14 @@ from __future__ import annotations
 import argparse
 import json
 import os
+import sys
 from pathlib import Path
 
-import yaml
+REF_HELPERS_DIR = Path(__file__).resolve().parents[1] / "ref"
+if str(REF_HELPERS_DIR) not in sys.path:
+    sys.path.insert(0, str(REF_HELPERS_DIR))
+
+from yaml_compat import safe_load as yaml_safe_load  # noqa: E402
 
 
 def die(message: str) -> None:
@@ -59,7 +64,7 @@ def resolve_release_version(explicit_version: str) -> str:
 def load_packaging_config() -> dict[str, dict]:
     repo_root = Path(__file__).resolve().parents[3]
     data_path = repo_root / "ci/deps/data/packaging.yaml"
-    data = yaml.safe_load(data_path.read_text(encoding="utf-8")) or {}
+    data = yaml_safe_load(data_path.read_text(encoding="utf-8")) or {}
     packaging = data.get("packaging")
     if not isinstance(packaging, dict) or not packaging:
         die(f"Missing or invalid packaging mapping in {data_path}")
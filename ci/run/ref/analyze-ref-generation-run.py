@@ -3,18 +3,24 @@
 from __future__ import annotations
 
 import argparse
-import io
 import json
 import os
 import sys
-import urllib.error
-import urllib.parse
-import urllib.request
 import zipfile
 from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-
-from github_actions_runs import format_resolved_via, load_latest_workflow_run, load_run_from_selector
+from typing import BinaryIO
+
+from api_client import github_api_get
+from artifact_fetch import artifact_jobs, fetch_artifact_payloads
+from fetch_pool import FetchPool
+from github_actions_runs import (
+    format_resolved_via,
+    load_latest_workflow_run,
+    load_recent_workflow_runs,
+    load_run_from_selector,
+)
 from lane_outcome_artifacts import load_lane_outcome_artifacts
 from lane_categories import (
     CATEGORY_LABELS,
@@ -25,8 +31,18 @@ from lane_categories import (
     total_fail_count,
 )
 from lane_registry import build_lane_registry
+from run_history import (
+    HISTORY_DB_ENV,
+    LaneRecord,
+    RunHistory,
+    build_trends,
+    default_history_path,
+    format_trend_markdown,
+    lane_records,
+)
+from run_profile import build_chrome_trace, build_profile, format_profile_markdown
 
-API_VERSION = "2022-11-28"
+API_AGENT = "ref-generation-analysis"
 DEFAULT_WORKFLOW = "pipeline-select-run-lanes.yml"
 CONTROL_JOB_NAMES = frozenset({"build-matrix", "redispatch-selected-ref"})
 CONCLUSION_ORDER = [
@@ -63,6 +79,8 @@ SUPPORTED_ARTIFACT_ARCHES = {
     "s390x",
 }
 DEPENDENCY_ARTIFACT_TOP_N = 20
+# Bump when extract_dependency_report_from_archive changes what it returns.
+DEPENDENCY_REPORT_EXTRACT_VERSION = 1
 
 
 def die(message: str) -> None:
@@ -100,69 +118,8 @@ def load_token(token_env: str) -> str:
     )
 
 
-def build_headers(repo: str, token: str, accept: str = "application/vnd.github+json") -> dict[str, str]:
-    return {
-        "Accept": accept,
-        "Authorization": f"Bearer {token}",
-        "X-GitHub-Api-Version": API_VERSION,
-        "User-Agent": f"{repo}/ref-generation-analysis",
-    }
-
-
 def api_get(repo: str, token: str, path: str, params: dict[str, str] | None = None) -> dict:
-    base_url = os.environ.get("GITHUB_API_URL", "https://api.github.com").rstrip("/")
-    url = f"{base_url}{path}"
-    if params:
-        query = urllib.parse.urlencode({k: v for k, v in params.items() if v not in (None, "")})
-        if query:
-            url = f"{url}?{query}"
-    request = urllib.request.Request(
-        url,
-        headers=build_headers(repo, token),
-    )
-    with urllib.request.urlopen(request) as response:
-        return json.load(response)
-
-
-class NoRedirectHandler(urllib.request.HTTPRedirectHandler):
-    """Prevent automatic redirect following so signed URLs can be fetched without repo auth."""
-
-    def redirect_request(self, req, fp, code, msg, headers, newurl):
-        return None
-
-
-def resolve_artifact_redirect_url(repo: str, token: str, url: str) -> str:
-    request = urllib.request.Request(
-        url,
-        headers=build_headers(repo, token, accept="application/vnd.github+json"),
-    )
-    opener = urllib.request.build_opener(NoRedirectHandler)
-    try:
-        with opener.open(request) as response:
-            location = str(response.headers.get("Location", "")).strip()
-            if location:
-                return location
-            return response.geturl()
-    except urllib.error.HTTPError as exc:
-        if exc.code not in (301, 302, 303, 307, 308):
-            raise
-        location = str(exc.headers.get("Location", "")).strip()
-        if not location:
-            raise ValueError("artifact download redirect missing Location header") from exc
-        return location
-
-
-def download_artifact_archive(repo: str, token: str, archive_url: str) -> bytes:
-    signed_url = resolve_artifact_redirect_url(repo, token, archive_url)
-    request = urllib.request.Request(
-        signed_url,
-        headers={
-            "Accept": "application/octet-stream",
-            "User-Agent": f"{repo}/ref-generation-analysis",
-        },
-    )
-    with urllib.request.urlopen(request) as response:
-        return response.read()
+    return github_api_get(repo, token, path, params, agent=API_AGENT)
 
 
 def load_run(repo: str, token: str, workflow: str, run_selector: str, branch: str, event: str) -> tuple[dict, str]:
@@ -298,8 +255,8 @@ def dependency_artifact_kind_from_report_mode(report_mode: str) -> str:
     raise ValueError(f"unsupported dependency report mode '{report_mode}' (expected generate|compare)")
 
 
-def extract_dependency_report_from_archive(archive_bytes: bytes) -> dict:
-    with zipfile.ZipFile(io.BytesIO(archive_bytes)) as archive:
+def extract_dependency_report_from_archive(archive_file: BinaryIO) -> dict:
+    with zipfile.ZipFile(archive_file) as archive:
         report_members = sorted(
             name
             for name in archive.namelist()
@@ -374,7 +331,9 @@ def empty_dependency_report(status: str, lane_job_count: int, error: str = "") -
     }
 
 
-def build_dependency_report(repo: str, token: str, run_id: int, lane_jobs: list[dict]) -> dict:
+def build_dependency_report(
+    repo: str, token: str, run_id: int, lane_jobs: list[dict], pool: FetchPool | None = None
+) -> dict:
     lane_job_count = len(lane_jobs)
     artifacts = load_artifacts(repo, token, run_id)
     dependency_artifacts = [
@@ -389,24 +348,23 @@ def build_dependency_report(repo: str, token: str, run_id: int, lane_jobs: list[
     direct_counter: Counter[str] = Counter()
     indirect_counter: Counter[str] = Counter()
 
-    for artifact in dependency_artifacts:
+    for result in fetch_artifact_payloads(
+        repo,
+        token,
+        dependency_artifacts,
+        extract_dependency_report_from_archive,
+        kind="deps-report.json",
+        extract_version=DEPENDENCY_REPORT_EXTRACT_VERSION,
+        agent=API_AGENT,
+        pool=pool,
+    ):
+        artifact = result.artifact
         artifact_name = str(artifact.get("name", "")).strip() or "<unnamed>"
         artifact_meta = parse_dependency_artifact_name(artifact_name)
 
-        if artifact.get("expired"):
-            unreadable_artifacts.append({"name": artifact_name, "reason": "artifact expired"})
-            continue
-
-        archive_url = str(artifact.get("archive_download_url", "")).strip()
-        if not archive_url:
-            unreadable_artifacts.append({"name": artifact_name, "reason": "missing archive_download_url"})
-            continue
-
-        try:
-            archive_bytes = download_artifact_archive(repo, token, archive_url)
-            report_payload = extract_dependency_report_from_archive(archive_bytes)
-        except Exception as exc:  # pragma: no cover - best-effort artifact aggregation
-            unreadable_artifacts.append({"name": artifact_name, "reason": str(exc)})
+        report_payload = result.payload
+        if report_payload is None:
+            unreadable_artifacts.append({"name": artifact_name, "reason": result.reason})
             continue
 
         report_mode = str(report_payload.get("mode", "")).strip().lower()
@@ -937,13 +895,84 @@ def parse_args() -> argparse.Namespace:
         "--platform-releases",
         default=".github/data/platform-releases-discovered.yml",
     )
+    parser.add_argument(
+        "--trend-runs",
+        type=int,
+        default=0,
+        help="report trends over the last N completed runs instead of analyzing one run",
+    )
+    parser.add_argument(
+        "--history-db",
+        default="",
+        help=f"run history file for --trend-runs (default: ${HISTORY_DB_ENV} or the user cache)",
+    )
+    parser.add_argument("--profile-output", default="", help="write the lane duration profile as markdown")
+    parser.add_argument("--trace-output", default="", help="write the run timeline as Chrome trace JSON")
     return parser.parse_args()
 
 
+def ingest_run(repo: str, token: str, run: dict, pool: FetchPool) -> list[LaneRecord] | None:
+    """A run's lane records for the history: its jobs plus its dependency reports.
+
+    None when a dependency report could not be read for any reason but expiry:
+    the run is then left out of the history and fetched again next time.
+    """
+    lane_jobs, _control_jobs = classify_jobs(load_jobs(repo, token, int(run["id"])))
+    try:
+        dependency_report = build_dependency_report(repo, token, int(run["id"]), lane_jobs, pool)
+    except Exception:  # pragma: no cover - retried by the next analysis
+        return None
+    if any(entry.get("reason") != "artifact expired" for entry in dependency_report["unreadable_artifacts"]):
+        return None
+    return lane_records(lane_jobs, dependency_report.get("reports", []))
+
+
+def analyze_trends(args: argparse.Namespace) -> None:
+    token = load_token(args.token_env)
+    event = "" if args.event == "all" else args.event
+    runs = load_recent_workflow_runs(api_get, args.repo, token, args.workflow, args.branch, event, args.trend_runs)
+    if not runs:
+        die(f"No completed workflow runs found for {args.workflow}")
+    history_path = Path(args.history_db) if args.history_db else default_history_path()
+    try:
+        history = RunHistory(history_path)
+    except (OSError, ValueError) as exc:
+        die(f"Cannot open run history {history_path}: {exc}")
+    with history:
+        known = history.known_run_ids()
+        missing = [run for run in runs if int(run["id"]) not in known]
+        jobs = artifact_jobs()
+        incomplete = 0
+        # Runs are ingested concurrently; their artifact downloads share one bounded pool.
+        with FetchPool(jobs, jobs) as pool, ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = [(run, executor.submit(ingest_run, args.repo, token, run, pool)) for run in missing]
+            for run, future in futures:
+                records = future.result()
+                if records is None:
+                    incomplete += 1
+                    continue
+                history.record_run(run, records)
+        trends = build_trends(*history.window(int(run["id"]) for run in runs))
+    print(
+        f"run history {history_path}: {len(missing)} of {len(runs)} runs fetched,"
+        f" {incomplete} left out with unreadable dependency reports",
+        file=sys.stderr,
+    )
+    markdown = format_trend_markdown(args.repo, args.workflow, trends)
+    if args.markdown_output:
+        write_text(args.markdown_output, markdown)
+    if args.json_output:
+        write_json(args.json_output, trends)
+    sys.stdout.write(markdown)
+
+
 def main() -> None:
     args = parse_args()
     if not args.repo:
         die("Missing --repo and GITHUB_REPOSITORY is not set")
+    if args.trend_runs > 0:
+        analyze_trends(args)
+        return
 
     fixture_mode = bool(args.run_json or args.jobs_json)
     if fixture_mode and not (args.run_json and args.jobs_json):
@@ -1007,6 +1036,7 @@ def main() -> None:
         "unreadable_artifacts": lane_outcome_report.get("unreadable_artifacts", []),
     }
     markdown = append_dependency_markdown(markdown, dependency_report)
+    report["profile"] = build_profile(run, lane_jobs, control_jobs)
 
     if args.markdown_output:
         write_text(args.markdown_output, markdown)
@@ -1014,6 +1044,10 @@ def main() -> None:
         write_json(args.json_output, report)
     if args.github_output:
         write_github_output(args.github_output, report)
+    if args.profile_output:
+        write_text(args.profile_output, format_profile_markdown(run, report["profile"]))
+    if args.trace_output:
+        write_json(args.trace_output, build_chrome_trace(run, lane_jobs, control_jobs))
 
     sys.stdout.write(markdown)
 
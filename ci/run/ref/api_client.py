@@ -0,0 +1,403 @@
+"""Keep-alive HTTP client shared by the GitHub and container registry scripts.
+
+Requests go through per-host pools of persistent http.client connections, so a
+run making hundreds of API calls pays the TCP/TLS handshake once per host and
+worker instead of once per call. Responses are requested gzip-compressed and
+decoded transparently. JSON GETs also go through the conditional-request cache
+in http_cache.py, and every request is scheduled against its host's rate-limit
+budget by rate_limit.py. Errors are raised as urllib.error.HTTPError so callers
+keep inspecting `exc.code` and `exc.headers` as before. The network can be
+swapped for recorded fixtures (http_replay.py) with `use_fixtures` or the
+XYMON_CI_HTTP_RECORD / XYMON_CI_HTTP_REPLAY variables.
+"""
+
+from __future__ import annotations
+
+import atexit
+import gzip
+import http.client
+import io
+import json
+import os
+import ssl
+import threading
+import urllib.error
+import urllib.parse
+from dataclasses import dataclass
+from email.message import Message
+from pathlib import Path
+from typing import Any, Callable
+
+from http_cache import HttpCache, default_cache
+from http_replay import RECORD_ENV, REPLAY_ENV, REPLAY_LATENCY_ENV, RecordingTransport, ReplayTransport
+from rate_limit import RateLimiter
+
+GITHUB_API_VERSION = "2022-11-28"
+DEFAULT_TIMEOUT = 60.0
+MAX_IDLE_PER_HOST = 8
+MAX_REDIRECTS = 5
+REDIRECT_CODES = frozenset({301, 302, 303, 307, 308})
+# Raised when the server dropped an idle keep-alive connection; worth one retry.
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+HOP_HEADERS = frozenset({"connection", "content-encoding", "content-length", "keep-alive", "transfer-encoding"})
+
+HostKey = tuple[str, str, int]
+
+
+@dataclass
+class Response:
+    url: str
+    status: int
+    reason: str
+    headers: Message
+    body: bytes
+
+    def json(self) -> Any:
+        return json.loads(self.body.decode("utf-8"))
+
+
+def github_api_url() -> str:
+    return os.environ.get("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+
+
+def github_headers(
+    token: str,
+    user_agent: str,
+    accept: str = "application/vnd.github+json",
+    *,
+    scheme: str = "Bearer",
+) -> dict[str, str]:
+    headers = {
+        "Accept": accept,
+        "X-GitHub-Api-Version": GITHUB_API_VERSION,
+        "User-Agent": user_agent,
+    }
+    if token:
+        headers["Authorization"] = f"{scheme} {token}"
+    return headers
+
+
+def with_query(url: str, params: dict[str, str] | None) -> str:
+    if not params:
+        return url
+    query = urllib.parse.urlencode({key: value for key, value in params.items() if value not in (None, "")})
+    return f"{url}?{query}" if query else url
+
+
+def _storable_headers(headers: Message) -> list[tuple[str, str]]:
+    # Bodies are stored decoded, so transfer framing no longer applies.
+    return [(name, value) for name, value in headers.items() if name.lower() not in HOP_HEADERS]
+
+
+def _cached_response(entry: dict[str, Any]) -> Response:
+    headers = Message()
+    for name, value in entry["headers"]:
+        headers[name] = value
+    return Response(entry["url"], entry["status"], entry["reason"], headers, entry["body"])
+
+
+def _decode_body(headers: Message, raw: bytes) -> bytes:
+    if headers.get("Content-Encoding", "").strip().lower() in {"gzip", "x-gzip"}:
+        return gzip.decompress(raw)
+    return raw
+
+
+class ConnectionPool:
+    """Idle keep-alive connections per (scheme, host, port); safe to share across threads."""
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_idle_per_host: int = MAX_IDLE_PER_HOST,
+        limiter: RateLimiter | None = None,
+        transport: Callable[[str, str, dict[str, str]], Response] | None = None,
+    ) -> None:
+        self.timeout = timeout
+        self.limiter = limiter
+        # Replaces the network round trip, e.g. with an http_replay transport.
+        self.transport = transport
+        self.max_idle_per_host = max_idle_per_host
+        self._idle: dict[HostKey, list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self._ssl_context: ssl.SSLContext | None = None
+        self.connections_opened = 0
+
+    def _connect(self, key: HostKey) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        with self._lock:
+            self.connections_opened += 1
+            if scheme == "https" and self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            context = self._ssl_context
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout, context=context)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _checkout(self, key: HostKey) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._connect(key), False
+
+    def _checkin(self, key: HostKey, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def _send(self, method: str, url: str, headers: dict[str, str]) -> Response:
+        if self.transport is not None:
+            return self.transport(method, url, headers)
+        return self.send_network(method, url, headers)
+
+    def send_network(self, method: str, url: str, headers: dict[str, str]) -> Response:
+        """One round trip over a pooled connection: no redirects, retries or cache."""
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in {"http", "https"}:
+            raise ValueError(f"unsupported URL scheme: {url}")
+        key = (scheme, parts.hostname or "", parts.port or (443 if scheme == "https" else 80))
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        request_headers = {"Accept-Encoding": "gzip", **headers}
+
+        while True:
+            conn, reused = self._checkout(key)
+            try:
+                conn.request(method, target, headers=request_headers)
+                response = conn.getresponse()
+                raw = response.read()
+            except STALE_CONNECTION_ERRORS:
+                conn.close()
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            if response.will_close:
+                conn.close()
+            else:
+                self._checkin(key, conn)
+            return Response(
+                url, response.status, response.reason, response.headers, _decode_body(response.headers, raw)
+            )
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str] | None = None,
+        *,
+        follow_redirects: bool = True,
+        cache: HttpCache | None = None,
+        cache_scope: str | None = None,
+    ) -> Response:
+        """Send a request; 4xx/5xx raise HTTPError, 3xx are returned when not followed.
+
+        With a cache, GETs are answered from it while fresh and revalidated
+        with the stored ETag/Last-Modified once stale.
+        """
+        headers = dict(headers or {})
+        if cache is None or method != "GET":
+            return self._request(method, url, headers, follow_redirects)
+
+        key = cache.key(url, headers, cache_scope)
+        entry = cache.load(key)
+        if entry is not None and cache.is_fresh(entry):
+            cache.count("fresh")
+            return _cached_response(entry)
+        if entry is not None:
+            headers.update(cache.validators(entry))
+        response = self._request(method, url, headers, follow_redirects)
+        if response.status == 304 and entry is not None:
+            return _cached_response(cache.refresh(key, entry, _storable_headers(response.headers)))
+        if response.status == 200 and response.url == url:
+            cache.store(key, url, response.status, response.reason, _storable_headers(response.headers), response.body)
+        return response
+
+    def _send_scheduled(self, method: str, url: str, headers: dict[str, str]) -> Response:
+        """_send under the rate limiter: paced by the host budget, throttled answers retried."""
+        if self.limiter is None:
+            return self._send(method, url, headers)
+        host = urllib.parse.urlsplit(url).netloc.lower()
+        attempt = 0
+        while True:
+            self.limiter.acquire(host)
+            response = self._send(method, url, headers)
+            self.limiter.observe(host, response.status, response.headers)
+            if not self.limiter.is_throttled(response.status, response.headers):
+                return response
+            delay = self.limiter.backoff(host, attempt, response.status, response.headers)
+            if delay is None:
+                return response
+            self.limiter.wait(host, delay)
+            attempt += 1
+
+    def _request(self, method: str, url: str, headers: dict[str, str], follow_redirects: bool) -> Response:
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self._send_scheduled(method, url, headers)
+            location = response.headers.get("Location", "").strip()
+            if not (follow_redirects and response.status in REDIRECT_CODES and location):
+                break
+            next_url = urllib.parse.urljoin(url, location)
+            if urllib.parse.urlsplit(next_url).netloc != urllib.parse.urlsplit(url).netloc:
+                # Signed download URLs must not receive the API credentials.
+                headers.pop("Authorization", None)
+            url = next_url
+        else:
+            raise urllib.error.URLError(f"too many redirects fetching {url}")
+        if response.status >= 400:
+            raise urllib.error.HTTPError(
+                url, response.status, response.reason, response.headers, io.BytesIO(response.body)
+            )
+        return response
+
+    def get(
+        self,
+        url: str,
+        headers: dict[str, str] | None = None,
+        *,
+        follow_redirects: bool = True,
+        cache: HttpCache | None = None,
+        cache_scope: str | None = None,
+    ) -> Response:
+        return self.request(
+            "GET", url, headers, follow_redirects=follow_redirects, cache=cache, cache_scope=cache_scope
+        )
+
+    def get_json(
+        self,
+        url: str,
+        headers: dict[str, str] | None = None,
+        *,
+        cache: HttpCache | None = None,
+        cache_scope: str | None = None,
+    ) -> Any:
+        return self.get(url, headers, cache=cache, cache_scope=cache_scope).json()
+
+
+# Process-wide pool and cache: each script talks to a handful of hosts.
+DEFAULT_POOL = ConnectionPool(limiter=RateLimiter.from_env())
+DEFAULT_CACHE = default_cache()
+
+
+def use_fixtures(record: Path | None = None, replay: Path | None = None, latency: float = 0.0) -> None:
+    """Record the default pool's exchanges to a bundle, or answer them from one.
+
+    The conditional-request cache is bypassed either way, so a bundle holds
+    complete responses and a replay does not depend on the local cache. A
+    replay still retries recorded throttled answers but never sleeps, since
+    the recorded budgets and Retry-After values no longer apply.
+    """
+    global DEFAULT_CACHE
+    if record is None and replay is None:
+        return
+    if record is not None and replay is not None:
+        raise ValueError("cannot record and replay HTTP fixtures at the same time")
+    DEFAULT_CACHE = None
+    if replay is not None:
+        if DEFAULT_POOL.limiter is not None:
+            DEFAULT_POOL.limiter = RateLimiter(
+                DEFAULT_POOL.limiter.max_retries, DEFAULT_POOL.limiter.max_wait, sleep=lambda _seconds: None
+            )
+        DEFAULT_POOL.transport = ReplayTransport(replay, latency, response_type=Response)
+        return
+    recorder = RecordingTransport(record, DEFAULT_POOL.send_network)
+    # The gzip trailer is written on close, also when the run fails.
+    atexit.register(recorder.close)
+    DEFAULT_POOL.transport = recorder
+
+
+def fixtures_active() -> bool:
+    """Whether the default pool records or replays fixtures instead of plainly using the network."""
+    return DEFAULT_POOL.transport is not None
+
+
+def _env_path(name: str) -> Path | None:
+    value = os.environ.get(name, "").strip()
+    return Path(value) if value else None
+
+
+def _env_latency() -> float:
+    try:
+        return float(os.environ.get(REPLAY_LATENCY_ENV, "").strip() or 0) / 1000
+    except ValueError:
+        return 0.0
+
+
+use_fixtures(_env_path(RECORD_ENV), _env_path(REPLAY_ENV), _env_latency())
+
+
+def get(
+    url: str,
+    headers: dict[str, str] | None = None,
+    *,
+    follow_redirects: bool = True,
+    cached: bool = False,
+    cache_scope: str | None = None,
+) -> Response:
+    return DEFAULT_POOL.get(
+        url,
+        headers,
+        follow_redirects=follow_redirects,
+        cache=DEFAULT_CACHE if cached else None,
+        cache_scope=cache_scope,
+    )
+
+
+def get_json(
+    url: str,
+    headers: dict[str, str] | None = None,
+    *,
+    cached: bool = True,
+    cache_scope: str | None = None,
+) -> Any:
+    """GET a JSON document; API listings are conditional-request cached by default."""
+    return DEFAULT_POOL.get_json(
+        url, headers, cache=DEFAULT_CACHE if cached else None, cache_scope=cache_scope
+    )
+
+
+def github_api_get(
+    repo: str,
+    token: str,
+    path: str,
+    params: dict[str, str] | None = None,
+    *,
+    agent: str,
+) -> dict:
+    """GET a GitHub REST path; `agent` names the calling tool in the User-Agent."""
+    return get_json(
+        with_query(f"{github_api_url()}{path}", params),
+        github_headers(token, f"{repo}/{agent}"),
+        cache_scope=f"github:{repo}",
+    )
+
+
+def resolve_redirect_url(url: str, headers: dict[str, str]) -> str:
+    response = get(url, headers, follow_redirects=False)
+    if response.status in REDIRECT_CODES:
+        location = response.headers.get("Location", "").strip()
+        if not location:
+            raise ValueError("artifact download redirect missing Location header")
+        return urllib.parse.urljoin(url, location)
+    return response.url
+
@@ -0,0 +1,143 @@
+"""Concurrent workflow artifact downloads for the GitHub run analyzers.
+
+analyze-ref-generation-run.py (dependency reports) and lane_outcome_artifacts.py
+(lane outcomes, also read by reconcile-allow-failure.py) each pull one small
+JSON file out of every matching artifact of a run. The artifacts are fetched on
+a bounded FetchPool: each resolves its signed download URL with one API
+request, then reads its member on the worker through a remote_zip.RemoteFile,
+which only downloads the parts of the zip it needs. Results come back in the
+order of the artifact listing, so reports do not depend on the concurrency.
+Payloads already in the local artifact store (artifact_store.py) are taken
+from it without any request.
+
+Environment:
+  XYMON_CI_ARTIFACT_JOBS  concurrent artifact downloads (default: 8; 1 = serial)
+"""
+
+from __future__ import annotations
+
+import os
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Callable, Iterable
+
+from api_client import fixtures_active
+from artifact_store import ArtifactStore, default_store
+from fetch_pool import FetchPool, url_host
+from github_actions_runs import parse_github_timestamp
+from remote_zip import open_github_artifact
+
+ARTIFACT_JOBS_ENV = "XYMON_CI_ARTIFACT_JOBS"
+DEFAULT_ARTIFACT_JOBS = 8
+
+DEFAULT_STORE = default_store()
+
+
+def artifact_jobs() -> int:
+    try:
+        return max(1, int(os.environ.get(ARTIFACT_JOBS_ENV, "").strip() or DEFAULT_ARTIFACT_JOBS))
+    except ValueError:
+        return DEFAULT_ARTIFACT_JOBS
+
+
+def artifact_store() -> ArtifactStore | None:
+    """The shared payload store; bypassed while HTTP fixtures are recorded or replayed."""
+    return None if fixtures_active() else DEFAULT_STORE
+
+
+def load_artifacts(api_get, repo: str, token: str, run_id: int | str) -> list[dict]:
+    artifacts: list[dict] = []
+    page = 1
+    while True:
+        payload = api_get(
+            repo,
+            token,
+            f"/repos/{repo}/actions/runs/{run_id}/artifacts",
+            params={"per_page": "100", "page": str(page)},
+        )
+        page_artifacts = payload.get("artifacts", [])
+        if not page_artifacts:
+            break
+        artifacts.extend(page_artifacts)
+        if len(page_artifacts) < 100:
+            break
+        page += 1
+    return artifacts
+
+
+def artifact_expired(artifact: dict[str, Any], now: datetime | None = None) -> bool:
+    """Expired per the listing, or past its expires_at."""
+    if artifact.get("expired"):
+        return True
+    deadline = parse_github_timestamp(artifact.get("expires_at"))
+    return deadline is not None and deadline <= (now or datetime.now(timezone.utc))
+
+
+@dataclass
+class ArtifactResult:
+    artifact: dict
+    payload: dict | None = None
+    # Why no payload was read: expired, no download URL, or the download/extract error.
+    reason: str = ""
+
+
+def _download_and_extract(
+    repo: str, token: str, archive_url: str, extract: Callable[[BinaryIO], dict], agent: str
+) -> dict:
+    with open_github_artifact(repo, token, archive_url, agent=agent) as archive:
+        return extract(archive)
+
+
+def fetch_artifact_payloads(
+    repo: str,
+    token: str,
+    artifacts: Iterable[dict[str, Any]],
+    extract: Callable[[BinaryIO], dict],
+    *,
+    kind: str,
+    extract_version: int,
+    agent: str,
+    jobs: int | None = None,
+    pool: FetchPool | None = None,
+) -> list[ArtifactResult]:
+    """extract(seekable archive file) for every artifact, concurrently; results in artifact order.
+
+    kind names what extract reads (e.g. the member file name) and extract_version
+    the revision of extract; both are part of the store key. Downloads run on
+    pool when given, so callers fetching several runs at once share one bound;
+    otherwise on a pool of jobs workers opened for this call.
+    """
+    jobs = jobs or artifact_jobs()
+    store = artifact_store()
+    results: list[ArtifactResult] = []
+    pending = []
+    # The API host only sees one redirect request per artifact; the zips come from signed blob URLs.
+    with nullcontext(pool) if pool is not None else FetchPool(jobs, jobs) as pool:
+        for artifact in artifacts:
+            result = ArtifactResult(artifact)
+            results.append(result)
+            if artifact_expired(artifact):
+                result.reason = "artifact expired"
+                continue
+            archive_url = str(artifact.get("archive_download_url", "")).strip()
+            if not archive_url:
+                result.reason = "missing archive_download_url"
+                continue
+            key = store.payload_key(repo, artifact, kind, extract_version) if store is not None else None
+            if key is not None:
+                result.payload = store.load(key)
+                if isinstance(result.payload, dict):
+                    continue
+                result.payload = None
+            future = pool.submit(url_host(archive_url), _download_and_extract, repo, token, archive_url, extract, agent)
+            pending.append((result, future, key))
+        for result, future, key in pending:
+            try:
+                result.payload = future.result()
+            except Exception as exc:  # pragma: no cover - best effort, reported per artifact
+                result.reason = str(exc)
+                continue
+            if key is not None:
+                store.store(key, result.payload)
+    return results
@@ -0,0 +1,93 @@
+"""Local store of the JSON payloads read out of workflow artifacts.
+
+An artifact's content never changes once it is uploaded, so what the ref run
+tools extract from it (a dependency report, a lane outcome) is stored under a
+key made of the repository, the artifact id, its digest (or updated_at when the
+listing carries no digest) and the kind of payload. Rerunning
+analyze-ref-generation-run.py or reconcile-allow-failure.py against the same
+run then reads every payload from disk, without resolving or downloading a
+single archive. Entries are JSON files written atomically and kept under a size
+bound by evicting the least recently used ones (cache_store.py).
+
+Environment:
+  XYMON_CI_ARTIFACT_CACHE_DIR     store directory (default: $XDG_CACHE_HOME/xymon-ci/artifacts)
+  XYMON_CI_ARTIFACT_CACHE=0       disable the store
+  XYMON_CI_ARTIFACT_CACHE_MAX_MB  size bound before LRU eviction (default: 64)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Any
+
+from cache_store import LruDirectory, configured_dir, env_max_bytes
+
+STORE_FORMAT = "artifact-store-v1"
+STORE_DIR_ENV = "XYMON_CI_ARTIFACT_CACHE_DIR"
+STORE_ENABLE_ENV = "XYMON_CI_ARTIFACT_CACHE"
+STORE_MAX_MB_ENV = "XYMON_CI_ARTIFACT_CACHE_MAX_MB"
+DEFAULT_MAX_MB = 64
+ENTRY_SUFFIX = ".json"
+
+
+def store_dir() -> Path | None:
+    return configured_dir("artifacts", STORE_DIR_ENV, STORE_ENABLE_ENV)
+
+
+def artifact_version(artifact: dict[str, Any]) -> str:
+    """What identifies the artifact's content: its digest, else its last update."""
+    return str(artifact.get("digest") or artifact.get("updated_at") or "").strip()
+
+
+class ArtifactStore:
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_MB << 20) -> None:
+        self.directory = directory
+        self.stats = {"hit": 0, "miss": 0, "stored": 0}
+        self._lock = threading.Lock()
+        self._entries = LruDirectory(directory, ENTRY_SUFFIX, max_bytes)
+
+    def key(self, *parts: object) -> str:
+        raw = "\0".join([STORE_FORMAT, *(str(part) for part in parts)])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def payload_key(self, repo: str, artifact: dict[str, Any], kind: str, extract_version: int) -> str | None:
+        """Key of what `kind` (extractor revision extract_version) reads from artifact; None when it cannot be pinned."""
+        artifact_id = str(artifact.get("id") or "").strip()
+        version = artifact_version(artifact)
+        if not artifact_id or not version:
+            return None
+        return self.key(repo, "artifact", artifact_id, version, kind, extract_version)
+
+    def count(self, outcome: str) -> None:
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def load(self, key: str) -> Any | None:
+        data = self._entries.read(key)
+        try:
+            entry = json.loads(data) if data is not None else None
+        except ValueError:
+            entry = None
+        if not isinstance(entry, dict) or entry.get("format") != STORE_FORMAT:
+            self.count("miss")
+            return None
+        self.count("hit")
+        return entry.get("payload")
+
+    def store(self, key: str, payload: Any) -> None:
+        text = json.dumps({"format": STORE_FORMAT, "payload": payload}, sort_keys=True)
+        if self._entries.write(key, text.encode("utf-8")):
+            self.count("stored")
+
+    def summary(self) -> str:
+        return ", ".join(f"{count} {outcome}" for outcome, count in self.stats.items())
+
+
+def default_store() -> ArtifactStore | None:
+    directory = store_dir()
+    if directory is None:
+        return None
+    return ArtifactStore(directory, max_bytes=env_max_bytes(STORE_MAX_MB_ENV, DEFAULT_MAX_MB))
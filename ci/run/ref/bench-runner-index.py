@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for the runner capability index (runner_index.py).
+
+Builds a synthetic host runner catalog and a synthetic platform catalog, then
+resolves host support for every platform twice: with per-platform scans over
+the runner list and its capability lists, as export-platform-catalog.py used
+to, and with the capability index. Exits non-zero if the two disagree.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from typing import Any
+
+from runner_index import RunnerCapabilityIndex, RunnerRecord, unique_preserving_order
+
+ARCHES = ("amd64", "arm64", "ppc64le", "s390x", "riscv64", "386")
+FAMILIES = ("linux", "macos", "windows")
+LINUX_OSES = ("ubuntu", "debian", "fedora", "alpine", "rockylinux", "oraclelinux")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--platforms", type=int, default=5000, help="synthetic platforms (default: 5000)")
+    parser.add_argument("--runners", type=int, default=48, help="synthetic host runners (default: 48)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes per variant (default: 3)")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+
+def synthetic_runners(count: int, rng: random.Random) -> list[RunnerRecord]:
+    runners = []
+    for position in range(count):
+        family = rng.choice(FAMILIES)
+        arch = rng.choice(ARCHES[:2])
+        platform_os = rng.choice(LINUX_OSES) if family == "linux" else family
+        container = (family,) if family == "linux" or rng.random() < 0.2 else ()
+        emulated = tuple(sorted(rng.sample(ARCHES, rng.randint(0, 3)))) if container else ()
+        runners.append(
+            RunnerRecord(
+                label=f"{platform_os}-{rng.randint(8, 30)}-{arch}-{position}",
+                arch=arch,
+                machine_family=family,
+                platform_os=platform_os,
+                platform_version=str(rng.randint(8, 12)),
+                native_platforms=(family,),
+                container_platforms=container,
+                container_emulated_arches=emulated,
+            )
+        )
+    return runners
+
+
+def synthetic_platforms(count: int, rng: random.Random) -> list[tuple[str, str, str, list[str]]]:
+    """(platform_family, platform_os, platform_version, arches) per platform."""
+    platforms = []
+    for _ in range(count):
+        family = rng.choice(FAMILIES)
+        platform_os = rng.choice(LINUX_OSES) if family == "linux" else family
+        arches = sorted(rng.sample(ARCHES, rng.randint(1, 4)))
+        platforms.append((family, platform_os, str(rng.randint(8, 12)), arches))
+    return platforms
+
+
+def reference_host_support(
+    runners: list[RunnerRecord], family: str, platform_os: str, version: str, arches: list[str]
+) -> dict[str, dict[str, Any]]:
+    """The scans build_host_support ran before the index, over the same records."""
+    container_index: dict[str, list[str]] = {}
+    for runner in runners:
+        if family in runner.container_platforms:
+            container_index.setdefault(runner.arch, []).append(runner.label)
+    host_support: dict[str, dict[str, Any]] = {}
+    for arch in arches:
+        direct_labels = [
+            runner.label
+            for runner in runners
+            if runner.arch == arch
+            and runner.machine_family == family
+            and family in runner.native_platforms
+            and runner.platform_os == platform_os
+            and runner.platform_version == version
+        ]
+        emulated_labels = [
+            runner.label
+            for runner in runners
+            if runner.machine_family == family
+            and family in runner.container_platforms
+            and arch in runner.container_emulated_arches
+        ]
+        container_labels = unique_preserving_order(container_index.get(arch, []) + emulated_labels)
+        record: dict[str, Any] = {"direct_runner_labels": direct_labels}
+        if container_labels != direct_labels:
+            record["container_runner_labels"] = container_labels
+        host_support[arch] = record
+    return host_support
+
+
+def timed(label: str, repeat: int, func) -> list[Any]:
+    best = float("inf")
+    result: list[Any] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    print(f"  {label:<24} {best * 1000:9.1f} ms")
+    return result
+
+
+def main() -> int:
+    args = parse_args()
+    rng = random.Random(args.seed)
+    runners = synthetic_runners(args.runners, rng)
+    platforms = synthetic_platforms(args.platforms, rng)
+    print(f"host support: {len(platforms)} platforms x {len(runners)} runners")
+
+    expected = timed(
+        "per-platform scans",
+        args.repeat,
+        lambda: [reference_host_support(runners, *platform) for platform in platforms],
+    )
+
+    def indexed() -> list[Any]:
+        # Built inside the timed pass: the export builds the index once per run.
+        index = RunnerCapabilityIndex(runners)
+        return [
+            index.host_support(arches, platform_family=family, platform_os=platform_os, platform_version=version)
+            for family, platform_os, version, arches in platforms
+        ]
+
+    actual = timed("capability index", args.repeat, indexed)
+    mismatches = sum(a != b for a, b in zip(expected, actual))
+    if mismatches:
+        print(f"FAIL: host support differs for {mismatches} platforms", file=sys.stderr)
+        return 1
+    print("OK: capability index agrees with the scans on every platform")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for the compiled selection policy (selection_policy.py).
+
+Builds a synthetic Docker Hub tag corpus for the platform_os keys of the
+container selection policy in ci/deps/platform-intent.yaml, plus one synthetic
+platform whose tag patterns use capturing groups and a backreference, then
+evaluates every tag and every derived platform entry twice: with the per-call
+pattern scans the exporter used to run, and with a freshly compiled policy per
+pass. Exits non-zero if the two disagree on any decision.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from selection_policy import compile_selection_policy, infer_platform_os
+from yaml_cache import load_yaml_file
+
+ROOT = Path(__file__).resolve().parents[3]
+PLATFORM_INTENT = ROOT / "ci" / "deps" / "platform-intent.yaml"
+SECTIONS = ("containers", "vms", "hosts")
+TAG_SUFFIXES = ("", "-slim", "-bookworm", "-minimal", "-amd64", "-20240101", "-rc1", ".04", ".1")
+MOVING_TAGS = ("latest", "edge", "rolling", "current", "base", "tumbleweed")
+# Capturing patterns must not be joined into one alternation: joined, the second
+# pattern's \1 would refer to the first pattern's group.
+GROUPED_PLATFORM_OS = "grouped"
+GROUPED_TAG_PATTERNS = (r"(\d+)-slim$", r"(\d+)\.\1$")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tags", type=int, default=50000, help="synthetic corpus size (default: 50000)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed passes per variant (default: 5)")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+
+def load_raw_policy() -> dict[str, dict[str, Any]]:
+    """The selection blocks in the shape export-platform-catalog.py's load_selection_policy builds."""
+    data = load_yaml_file(PLATFORM_INTENT)
+    policy: dict[str, dict[str, Any]] = {}
+    for section in SECTIONS:
+        selection = (data.get(section) or {}).get("selection") or {}
+        policy[section] = {
+            "include": set(selection.get("include_platform_ids") or []),
+            "exclude": set(selection.get("exclude_platform_ids") or []),
+            "tag_patterns": {
+                str(platform_os): [re.compile(str(pattern)) for pattern in patterns or []]
+                for platform_os, patterns in (selection.get("tag_patterns") or {}).items()
+            },
+            "rules": {
+                str(platform_os): {
+                    "keep_versions": set(map(str, rule.get("keep_versions") or [])),
+                    "keep_major_versions": set(map(str, rule.get("keep_major_versions") or [])),
+                    "keep_latest_n_stable": rule.get("keep_latest_n_stable"),
+                    "keep_latest_n_major": rule.get("keep_latest_n_major"),
+                    "include_moving_targets": bool(rule.get("include_moving_targets", False)),
+                }
+                for platform_os, rule in (selection.get("rules") or {}).items()
+            },
+        }
+    policy["containers"]["tag_patterns"][GROUPED_PLATFORM_OS] = [
+        re.compile(pattern) for pattern in GROUPED_TAG_PATTERNS
+    ]
+    return policy
+
+
+def synthetic_corpus(platform_oses: list[str], size: int, seed: int) -> list[tuple[str, str]]:
+    """(platform_os, tag) pairs; Docker Hub listings repeat tags across pages and reruns."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        platform_os = rng.choice(platform_oses)
+        if rng.random() < 0.05:
+            tag = rng.choice(MOVING_TAGS)
+        else:
+            tag = str(rng.randint(1, 40))
+            if rng.random() < 0.5:
+                # Repeating the major (10.10) exercises the backreference pattern.
+                tag += f".{tag if rng.random() < 0.2 else rng.randint(0, 12)}"
+            tag += rng.choice(TAG_SUFFIXES)
+        corpus.append((platform_os, tag))
+    return corpus
+
+
+def derive_platform_id(platform_os: str, tag: str) -> str:
+    if platform_os == "opensuse_tumbleweed" and tag == "latest":
+        return "opensuse-tumbleweed"
+    if platform_os == "opensuse_leap":
+        return f"opensuse-leap-{tag.replace('.', '_')}"
+    return f"{platform_os}-{tag.replace('.', '_')}"
+
+
+def reference_tag_allowed(policy: dict[str, dict[str, Any]], section: str, platform_os: str, tag: str) -> bool:
+    patterns = policy.get(section, {}).get("tag_patterns", {}).get(platform_os, [])
+    if not patterns:
+        return True
+    return any(pattern.match(tag) for pattern in patterns)
+
+
+def reference_allows(policy: dict[str, dict[str, Any]], section: str, platform_id: str, entry: dict[str, Any]) -> bool:
+    section_policy = policy.get(section, {})
+    if platform_id in section_policy.get("exclude", set()):
+        return False
+    include_ids = section_policy.get("include", set())
+    if include_ids and platform_id not in include_ids:
+        return False
+    platform_os = str(entry.get("platform_os") or infer_platform_os(platform_id)).strip()
+    rule = section_policy.get("rules", {}).get(platform_os, {})
+    if not rule:
+        return True
+    if platform_os == "opensuse_tumbleweed":
+        token = "latest"
+    elif platform_os == "opensuse_leap" and platform_id.startswith("opensuse-leap-"):
+        token = platform_id.removeprefix("opensuse-leap-").replace("_", ".")
+    elif "-" in platform_id:
+        token = platform_id.split("-", 1)[1].replace("_", ".")
+    else:
+        token = str(entry.get("platform_version") or "").strip()
+    if token.strip().lower() in {"latest", "rolling", "tumbleweed", "edge", "current"}:
+        if not rule.get("include_moving_targets", False):
+            return False
+    keep_versions = rule.get("keep_versions", set())
+    major_versions = rule.get("keep_major_versions", set())
+    if keep_versions or major_versions:
+        match = re.search(r"\d+(?:\.\d+)?", token)
+        major = match.group(0).split(".", 1)[0] if match else ""
+        if not (keep_versions and token in keep_versions) and not (major_versions and major in major_versions):
+            return False
+    return True
+
+
+def timed(label: str, repeat: int, func) -> list[bool]:
+    best = float("inf")
+    result: list[bool] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    print(f"  {label:<24} {best * 1000:9.1f} ms")
+    return result
+
+
+def main() -> int:
+    args = parse_args()
+    raw_policy = load_raw_policy()
+    started = time.perf_counter()
+    compile_selection_policy(raw_policy)
+    compile_ms = (time.perf_counter() - started) * 1000
+    platform_oses = sorted(raw_policy["containers"]["tag_patterns"]) or ["debian"]
+    corpus = synthetic_corpus(platform_oses, args.tags, args.seed)
+    entries = [
+        (derive_platform_id(platform_os, tag), {"runtime": "docker", "platform_os": platform_os, "platform_version": tag})
+        for platform_os, tag in corpus
+    ]
+    print(
+        f"selection policy: {len(corpus)} tags, {len(set(corpus))} distinct, "
+        f"{len(platform_oses)} platform_os keys, compiled in {compile_ms:.2f} ms"
+    )
+
+    # Each compiled pass starts from a fresh policy, so no pass is served from an earlier one's memos.
+    print("tag_allowed:")
+    expected = timed(
+        "per-call pattern scan",
+        args.repeat,
+        lambda: [reference_tag_allowed(raw_policy, "containers", os_key, tag) for os_key, tag in corpus],
+    )
+    actual = timed(
+        "compiled",
+        args.repeat,
+        lambda: [
+            compiled.tag_allowed("containers", os_key, tag)
+            for compiled in [compile_selection_policy(raw_policy)]
+            for os_key, tag in corpus
+        ],
+    )
+    mismatches = sum(a != b for a, b in zip(expected, actual))
+
+    print("selection_allows:")
+    expected = timed(
+        "per-call evaluation",
+        args.repeat,
+        lambda: [reference_allows(raw_policy, "containers", pid, entry) for pid, entry in entries],
+    )
+    actual = timed(
+        "compiled",
+        args.repeat,
+        lambda: [
+            compiled.allows("containers", pid, entry)
+            for compiled in [compile_selection_policy(raw_policy)]
+            for pid, entry in entries
+        ],
+    )
+    mismatches += sum(a != b for a, b in zip(expected, actual))
+
+    if mismatches:
+        print(f"FAIL: {mismatches} decisions differ between the reference and the compiled policy", file=sys.stderr)
+        return 1
+    print("OK: compiled policy agrees with the reference on every decision")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -6,7 +6,6 @@ import os
 import re
 from pathlib import Path
 
-import yaml
 from execution_model import (
     resolve_install_mode,
     validate_requested_install_mode,
@@ -25,6 +24,7 @@ from matrix_common import (
     require_non_empty_string,
 )
 from runtime_model import load_runtime_model
+from yaml_compat import safe_load as yaml_safe_load
 from platform_availability import (
     load_platform_availability,
     resolve_container_runtime,
@@ -77,7 +77,7 @@ def load_container_runtime_preferences(path: Path):
     if not path.exists():
         die(f"Missing platform intent: {path}")
 
-    data = yaml.safe_load(path.read_text()) or {}
+    data = yaml_safe_load(path.read_text()) or {}
     data = require_mapping(data, f"Platform intent root in {path}")
     containers = require_mapping(data.get("containers"), f"Platform intent containers in {path}")
     runtime_preference = require_mapping(
@@ -209,7 +209,7 @@ def load_platform_releases(path: Path):
     if not path.exists():
         die(f"Missing platform releases: {path}")
 
-    data = yaml.safe_load(path.read_text()) or {}
+    data = yaml_safe_load(path.read_text()) or {}
     platforms = data.get("platforms")
     if not isinstance(platforms, dict) or not platforms:
         die(f"Platform releases has no platforms mapping: {path}")
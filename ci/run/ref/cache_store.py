@@ -0,0 +1,130 @@
+"""On-disk cache plumbing shared by the ci/ Python helpers.
+
+Every cache lives under `cache_root()` ($XDG_CACHE_HOME/xymon-ci), in a
+directory its caller may override or disable through the environment. Entries
+are written atomically (a temporary sibling renamed into place), so a reader
+never sees a partial file. `LruDirectory` keeps a directory of entries under a
+size bound: reading an entry refreshes its mtime, which doubles as the
+last-use time, and once the bound is exceeded the least recently used entries
+are evicted.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+DISABLED_VALUES = {"0", "false", "no", "off"}
+# Evict down to this fraction of the bound so every write does not rescan.
+PRUNE_TARGET = 0.8
+
+
+def cache_root() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME", "").strip() or str(Path.home() / ".cache")
+    return Path(base) / "xymon-ci"
+
+
+def configured_dir(name: str, dir_env: str, enable_env: str | None = None) -> Path | None:
+    """The cache directory `name` under cache_root(), unless dir_env overrides it or enable_env disables it."""
+    if enable_env and os.environ.get(enable_env, "1").strip().lower() in DISABLED_VALUES:
+        return None
+    configured = os.environ.get(dir_env, "").strip()
+    if configured:
+        return Path(configured)
+    return cache_root() / name
+
+
+def env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+def env_max_bytes(name: str, default_mb: float) -> int:
+    return int(env_number(name, default_mb) * (1 << 20))
+
+
+def atomic_write(path: Path, data: bytes) -> int:
+    """Write data to path through a temporary sibling; returns the size written. Raises OSError."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp_name, path)
+    except OSError:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    return len(data)
+
+
+class LruDirectory:
+    """Entries `<key><suffix>` in directory, evicted least recently used first past max_bytes."""
+
+    def __init__(self, directory: Path, suffix: str, max_bytes: int) -> None:
+        self.directory = directory
+        self.suffix = suffix
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: int | None = None
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def read(self, key: str) -> bytes | None:
+        path = self.path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def write(self, key: str, data: bytes) -> bool:
+        try:
+            size = atomic_write(self.path(key), data)
+        except OSError:
+            # The cache is an optimization; a read-only or full disk must not fail the caller.
+            return False
+        self._account(size)
+        return True
+
+    def _account(self, added: int) -> None:
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += added
+            if self._size <= self.max_bytes:
+                return
+            self._size = self._prune()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for path in self.directory.glob(f"*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _prune(self) -> int:
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * PRUNE_TARGET
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+        return total
@@ -5,7 +5,6 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
-import yaml
 from matrix_common import (
     die,
     load_lanes_from_file,
@@ -15,6 +14,7 @@ from matrix_common import (
     validate_dropdown_parity,
 )
 from runtime_model import load_runtime_model
+from yaml_compat import safe_load as yaml_safe_load
 
 
 def parse_args():
@@ -44,7 +44,7 @@ def expected_dropdown_families(manifest_path: Path, runtime_keys: set[str], purp
         )["entries"]
     }
 
-    data = yaml.safe_load(manifest_path.read_text(encoding="utf-8")) or {}
+    data = yaml_safe_load(manifest_path.read_text(encoding="utf-8")) or {}
     data = require_mapping(data, f"Manifest root in {manifest_path}")
     families = data.get("families", [])
     if not isinstance(families, list):
@@ -64,7 +64,7 @@ def expected_dropdown_families(manifest_path: Path, runtime_keys: set[str], purp
 
 
 def validate_family_overlays(manifest_path: Path, runtime_keys: set[str]) -> None:
-    data = yaml.safe_load(manifest_path.read_text(encoding="utf-8")) or {}
+    data = yaml_safe_load(manifest_path.read_text(encoding="utf-8")) or {}
     data = require_mapping(data, f"Manifest root in {manifest_path}")
     families = data.get("families")
     if not isinstance(families, list) or not families:
@@ -0,0 +1,117 @@
+"""Progress journal and atomic output writes for the platform catalog export.
+
+export-platform-catalog.py records every completed fetch (tag listing per
+repository, manifest per image, latest release per VM builder repository) as
+one JSON line as soon as it finishes. If the export dies halfway, `--resume`
+reloads the journal and only fetches what is missing. The journal starts with
+a header naming the endpoints it was fetched from; a journal written against
+different endpoints is not reused. The generated files are written to
+temporary siblings and renamed into place together once all of them are
+complete, so an interrupted export never leaves a half-written file behind.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, TextIO
+
+from cache_store import cache_root
+
+JOURNAL_FORMAT = "export-journal-v2"
+
+
+def default_journal_path() -> Path:
+    return cache_root() / "export-platform-catalog.journal"
+
+
+class ExportJournal:
+    """Append-only record of completed fetches, keyed by (kind, key)."""
+
+    def __init__(self, path: Path, endpoints: dict[str, str], *, resume: bool) -> None:
+        self.path = path
+        self.endpoints = endpoints
+        self.entries: dict[tuple[str, str], Any] = {}
+        self.resumed = False
+        self._lock = threading.Lock()
+        if resume:
+            self._load()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if not self.resumed:
+            header = {"format": JOURNAL_FORMAT, "endpoints": endpoints}
+            path.write_text(json.dumps(header, sort_keys=True) + "\n", encoding="utf-8")
+        self._handle = path.open("a", encoding="utf-8")
+
+    def _load(self) -> None:
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except OSError:
+            return
+        if not lines:
+            return
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            return
+        if header != {"format": JOURNAL_FORMAT, "endpoints": self.endpoints}:
+            return
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by the interruption; everything before it is intact.
+                break
+            self.entries[(record["kind"], record["key"])] = record["value"]
+        self.resumed = True
+
+    def get(self, kind: str, key: str) -> Any | None:
+        with self._lock:
+            return self.entries.get((kind, key))
+
+    def record(self, kind: str, key: str, value: Any) -> None:
+        line = json.dumps({"kind": kind, "key": key, "value": value}, sort_keys=True)
+        with self._lock:
+            self.entries[(kind, key)] = value
+            self._handle.write(line + "\n")
+            self._handle.flush()
+
+    def close(self) -> None:
+        self._handle.close()
+
+    def finish(self) -> None:
+        """The export completed: the journal has nothing left to resume."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+class StagedOutputs:
+    """Output files written to temporary siblings and renamed into place together.
+
+    Nothing is replaced until `commit`; leaving the `with` block without it
+    removes the temporary files and keeps the previous outputs.
+    """
+
+    def __init__(self) -> None:
+        self._staged: list[tuple[str, Path]] = []
+
+    def open(self, path: Path) -> TextIO:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        self._staged.append((tmp_name, path))
+        return os.fdopen(fd, "w", encoding="utf-8")
+
+    def commit(self) -> None:
+        for tmp_name, path in self._staged:
+            os.replace(tmp_name, path)
+        self._staged = []
+
+    def __enter__(self) -> "StagedOutputs":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        for tmp_name, _ in self._staged:
+            Path(tmp_name).unlink(missing_ok=True)
+        self._staged = []
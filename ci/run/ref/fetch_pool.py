@@ -0,0 +1,72 @@
+"""Bounded-concurrency fetch pool shared by the catalog export scripts.
+
+Network fetches run on a thread pool capped at max_workers overall and at
+per_host concurrent requests for any one host, so fanning out over dozens of
+repositories does not hammer a single registry. Callers collect futures in
+submission order, which keeps generated output deterministic.
+"""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterable
+from urllib.parse import urlsplit
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_PER_HOST = 4
+
+
+def url_host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def completed_future(value: Any) -> Future:
+    """A future already holding value, for results known without a fetch."""
+    future: Future = Future()
+    future.set_result(value)
+    return future
+
+
+class FetchPool:
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, per_host: int = DEFAULT_PER_HOST) -> None:
+        self.max_workers = max(1, max_workers)
+        self.per_host = max(1, per_host)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._host_limits: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "FetchPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def _host_limit(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            limit = self._host_limits.get(host)
+            if limit is None:
+                limit = threading.BoundedSemaphore(self.per_host)
+                self._host_limits[host] = limit
+            return limit
+
+    def submit(self, host: str, func: Callable[..., Any], *args, **kwargs) -> Future:
+        """Run func(*args, **kwargs) once a slot for host is free.
+
+        func must not wait on other futures of this pool: a worker blocked on a
+        host slot cannot pick up the work it would be waiting for.
+        """
+        limit = self._host_limit(host)
+
+        def run() -> Any:
+            with limit:
+                return func(*args, **kwargs)
+
+        return self._executor.submit(run)
+
+    def map(self, host: str, func: Callable[[Any], Any], items: Iterable[Any]) -> list[Future]:
+        """Submit func(item) for each item; futures are returned in item order."""
+        return [self.submit(host, func, item) for item in items]
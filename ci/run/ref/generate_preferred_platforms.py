@@ -7,7 +7,8 @@ import dataclasses
 import re
 from pathlib import Path
 
-import yaml
+from yaml_compat import safe_dump as yaml_safe_dump
+from yaml_compat import safe_load as yaml_safe_load
 
 ROOT_DIR = Path(__file__).resolve().parents[3]
 AVAILABILITY_PATH = ROOT_DIR / ".github" / "data" / "platform-availability.yml"
@@ -20,7 +21,7 @@ ARCH_PRIORITY = ["amd64", "x86-64", "x86_64", "arm64", "aarch64", "arm32v7", "ar
 
 
 def load_availability(path: Path) -> dict[str, dict]:
-    data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    data = yaml_safe_load(path.read_text(encoding="utf-8")) or {}
     platforms = data.get("platforms")
     if not isinstance(platforms, dict):
         raise SystemExit(f"platform availability missing 'platforms' mapping: {path}")
@@ -28,7 +29,7 @@ def load_availability(path: Path) -> dict[str, dict]:
 
 
 def load_policy(path: Path) -> dict[str, dict]:
-    data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    data = yaml_safe_load(path.read_text(encoding="utf-8")) or {}
     families = data.get("families")
     if not isinstance(families, dict):
         raise SystemExit(f"preferred platform policy missing 'families' mapping: {path}")
@@ -160,7 +161,7 @@ def excluded_from_primary(candidate: PlatformCandidate, family_cfg: dict) -> boo
 
 
 def load_lane_platform_ids(lane_file: Path) -> list[str]:
-    data = yaml.safe_load(lane_file.read_text()) or {}
+    data = yaml_safe_load(lane_file.read_text()) or {}
     generated = data.get("generated", {})
     platforms = generated.get("platforms", [])
     ids = []
@@ -300,7 +301,7 @@ def dump_output(output_path: Path, results: list[dict]) -> None:
             }
         )
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(yaml.safe_dump(payload, sort_keys=False))
+    output_path.write_text(yaml_safe_dump(payload, sort_keys=False))
 
 
 if __name__ == "__main__":
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import re
 import urllib.parse
+from datetime import datetime, timezone
 from typing import Callable
 
 ApiGet = Callable[[str, str, str, dict[str, str] | None], dict]
@@ -10,6 +11,18 @@ RUN_URL_RE = re.compile(r"/actions/runs/(?P<run_id>\d+)")
 RUN_NUMBER_RE = re.compile(r"#(?P<run_number>\d+)\s*$")
 
 
+def parse_github_timestamp(value: object) -> datetime | None:
+    """An API timestamp such as 2024-01-01T00:00:00Z, as an aware datetime."""
+    text = str(value or "").strip()
+    if not text:
+        return None
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
 def normalize_run_selector(run_selector: str) -> str:
     return " ".join((run_selector or "").strip().split())
 
@@ -121,3 +134,35 @@ def load_latest_workflow_run(
             selector = f"{selector} for event {event}"
         raise ValueError(f"No completed workflow runs found for {selector}")
     return runs[0]
+
+
+def load_recent_workflow_runs(
+    api_get: ApiGet,
+    repo: str,
+    token: str,
+    workflow: str,
+    branch: str,
+    event: str,
+    limit: int,
+) -> list[dict]:
+    """Up to `limit` completed runs matching the filters, newest first."""
+    runs: list[dict] = []
+    page = 1
+    while len(runs) < limit:
+        params = {"per_page": str(min(100, limit)), "page": str(page), "status": "completed"}
+        if branch:
+            params["branch"] = branch
+        if event:
+            params["event"] = event
+        payload = api_get(
+            repo,
+            token,
+            f"/repos/{repo}/actions/workflows/{urllib.parse.quote(workflow, safe='')}/runs",
+            params=params,
+        )
+        workflow_runs = payload.get("workflow_runs", [])
+        runs.extend(workflow_runs)
+        if len(workflow_runs) < min(100, limit):
+            break
+        page += 1
+    return runs[:limit]
@@ -0,0 +1,134 @@
+"""On-disk conditional-request cache for the GitHub and registry API clients.
+
+Successful GET responses that carry an ETag or Last-Modified validator are
+stored under the cache directory, keyed by URL, Accept header and auth scope.
+The scope is named by the caller (a GitHub repository, a registry pull scope),
+because the short-lived tokens CI hands out change on every run; otherwise it
+is a hash of the Authorization header. Tokens are never written. Entries younger
+than the TTL are served without a request; older ones are revalidated with
+If-None-Match / If-Modified-Since under the current credentials, and a 304
+reuses the stored body. GitHub does not count 304 answers against the rate
+limit. Entries are JSON files (the body base64-encoded) kept under a size bound
+by evicting the least recently used ones (cache_store.py).
+
+Environment:
+  XYMON_CI_HTTP_CACHE_DIR     cache directory (default: $XDG_CACHE_HOME/xymon-ci/http)
+  XYMON_CI_HTTP_CACHE=0       disable the cache
+  XYMON_CI_HTTP_CACHE_TTL     seconds an entry is served without revalidation (default: 0)
+  XYMON_CI_HTTP_CACHE_MAX_MB  size bound before LRU eviction (default: 256)
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from cache_store import LruDirectory, configured_dir, env_max_bytes, env_number
+
+CACHE_FORMAT = "http-cache-v2"
+CACHE_DIR_ENV = "XYMON_CI_HTTP_CACHE_DIR"
+CACHE_ENABLE_ENV = "XYMON_CI_HTTP_CACHE"
+CACHE_TTL_ENV = "XYMON_CI_HTTP_CACHE_TTL"
+CACHE_MAX_MB_ENV = "XYMON_CI_HTTP_CACHE_MAX_MB"
+DEFAULT_TTL = 0.0
+DEFAULT_MAX_MB = 256
+ENTRY_SUFFIX = ".json"
+
+
+def cache_dir() -> Path | None:
+    return configured_dir("http", CACHE_DIR_ENV, CACHE_ENABLE_ENV)
+
+
+class HttpCache:
+    def __init__(self, directory: Path, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_MB << 20) -> None:
+        self.directory = directory
+        self.ttl = ttl
+        self.stats = {"fresh": 0, "revalidated": 0, "stored": 0, "uncached": 0}
+        self._lock = threading.Lock()
+        self._entries = LruDirectory(directory, ENTRY_SUFFIX, max_bytes)
+
+    def key(self, url: str, headers: dict[str, str], scope: str | None = None) -> str:
+        """Entry key; scope names what the credentials grant, else the credentials are hashed."""
+        if scope is None:
+            scope = hashlib.sha256(headers.get("Authorization", "").encode()).hexdigest()
+        raw = f"{CACHE_FORMAT}\0{url}\0{headers.get('Accept', '')}\0{scope}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def count(self, outcome: str) -> None:
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def load(self, key: str) -> dict[str, Any] | None:
+        data = self._entries.read(key)
+        if data is None:
+            return None
+        try:
+            entry = json.loads(data)
+            if not isinstance(entry, dict) or entry.get("format") != CACHE_FORMAT:
+                return None
+            headers = [(str(name), str(value)) for name, value in entry["headers"]]
+            body = base64.b64decode(entry["body"], validate=True)
+        except (ValueError, KeyError, TypeError):
+            return None
+        return {**entry, "headers": headers, "body": body}
+
+    def is_fresh(self, entry: dict[str, Any]) -> bool:
+        return time.time() - float(entry.get("stored_at", 0)) < self.ttl
+
+    def validators(self, entry: dict[str, Any]) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        for name, value in entry.get("headers", []):
+            lowered = name.lower()
+            if lowered == "etag":
+                headers["If-None-Match"] = value
+            elif lowered == "last-modified":
+                headers["If-Modified-Since"] = value
+        return headers
+
+    def store(self, key: str, url: str, status: int, reason: str, headers: list[tuple[str, str]], body: bytes) -> None:
+        if not any(name.lower() in {"etag", "last-modified"} for name, _ in headers):
+            self.count("uncached")
+            return
+        entry = {
+            "format": CACHE_FORMAT,
+            "url": url,
+            "status": status,
+            "reason": reason,
+            "headers": headers,
+            "body": body,
+            "stored_at": time.time(),
+        }
+        if self._write(key, entry):
+            self.count("stored")
+
+    def refresh(self, key: str, entry: dict[str, Any], headers: list[tuple[str, str]]) -> dict[str, Any]:
+        """Merge a 304's headers into entry and restart its TTL."""
+        replaced = {name.lower() for name, _ in headers}
+        merged = [(name, value) for name, value in entry["headers"] if name.lower() not in replaced]
+        entry = {**entry, "headers": merged + list(headers), "stored_at": time.time()}
+        self._write(key, entry)
+        self.count("revalidated")
+        return entry
+
+    def _write(self, key: str, entry: dict[str, Any]) -> bool:
+        stored = {**entry, "body": base64.b64encode(entry["body"]).decode("ascii")}
+        return self._entries.write(key, json.dumps(stored, sort_keys=True).encode("utf-8"))
+
+    def summary(self) -> str:
+        return ", ".join(f"{count} {outcome}" for outcome, count in self.stats.items())
+
+
+def default_cache() -> HttpCache | None:
+    directory = cache_dir()
+    if directory is None:
+        return None
+    return HttpCache(
+        directory,
+        ttl=env_number(CACHE_TTL_ENV, DEFAULT_TTL),
+        max_bytes=env_max_bytes(CACHE_MAX_MB_ENV, DEFAULT_MAX_MB),
+    )
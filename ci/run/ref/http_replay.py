@@ -0,0 +1,141 @@
+"""Record/replay transport for the shared API client (api_client.py).
+
+In record mode every request the client sends over the network is written,
+with its response, to a gzip-compressed fixture bundle. In replay mode the
+bundle answers the requests instead of the network, after an optional
+artificial latency, so the exporter and analyzers can be profiled and tested
+on a machine without network access.
+
+Exchanges are matched on method, URL, Accept and Range headers; the request's
+credentials are never recorded, and bearer tokens in token-endpoint answers
+are redacted. Several responses recorded for the same request are replayed in
+order, and the last one keeps answering.
+
+Environment:
+  XYMON_CI_HTTP_RECORD            record every exchange to this bundle
+  XYMON_CI_HTTP_REPLAY            answer requests from this bundle instead of the network
+  XYMON_CI_HTTP_REPLAY_LATENCY_MS delay added to every replayed request (default: 0)
+"""
+
+from __future__ import annotations
+
+import base64
+import gzip
+import json
+import threading
+import time
+import urllib.error
+from collections import deque
+from email.message import Message
+from pathlib import Path
+from typing import Any, Callable
+
+RECORD_ENV = "XYMON_CI_HTTP_RECORD"
+REPLAY_ENV = "XYMON_CI_HTTP_REPLAY"
+REPLAY_LATENCY_ENV = "XYMON_CI_HTTP_REPLAY_LATENCY_MS"
+BUNDLE_FORMAT = "http-fixtures-v1"
+REDACTED_FIELDS = ("token", "access_token")
+
+# (method, url, headers) -> api_client.Response
+Send = Callable[[str, str, dict[str, str]], Any]
+Exchange = tuple[str, str, str, str]
+
+
+def exchange_key(method: str, url: str, headers: dict[str, str]) -> Exchange:
+    return (method.upper(), url, headers.get("Accept", ""), headers.get("Range", ""))
+
+
+def _redact(body: bytes) -> bytes:
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return body
+    if not isinstance(payload, dict) or not any(name in payload for name in REDACTED_FIELDS):
+        return body
+    for name in REDACTED_FIELDS:
+        if name in payload:
+            payload[name] = "redacted"
+    return json.dumps(payload).encode("utf-8")
+
+
+class RecordingTransport:
+    """Sends through `send` and appends each exchange to the bundle."""
+
+    def __init__(self, path: Path, send: Send) -> None:
+        self.path = path
+        self._send = send
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = gzip.open(path, "wt", encoding="utf-8")
+        self._handle.write(json.dumps({"format": BUNDLE_FORMAT}) + "\n")
+        self.recorded = 0
+
+    def __call__(self, method: str, url: str, headers: dict[str, str]) -> Any:
+        response = self._send(method, url, headers)
+        method, url, accept, byte_range = exchange_key(method, url, headers)
+        record = {
+            "method": method,
+            "url": url,
+            "accept": accept,
+            "range": byte_range,
+            "status": response.status,
+            "reason": response.reason,
+            # Bodies are recorded decoded, so transfer framing no longer applies.
+            "headers": [
+                [name, value]
+                for name, value in response.headers.items()
+                if name.lower() not in {"content-encoding", "content-length", "transfer-encoding"}
+            ],
+            "body": base64.b64encode(_redact(response.body)).decode("ascii"),
+        }
+        line = json.dumps(record, sort_keys=True)
+        with self._lock:
+            if not self._handle.closed:
+                self._handle.write(line + "\n")
+                self.recorded += 1
+        return response
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._handle.closed:
+                self._handle.close()
+
+
+class ReplayTransport:
+    """Answers requests from a bundle written by RecordingTransport."""
+
+    def __init__(self, path: Path, latency: float = 0.0, *, response_type: type, sleep=time.sleep) -> None:
+        self.path = path
+        self.latency = latency
+        self._response_type = response_type
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._exchanges: dict[Exchange, deque[dict[str, Any]]] = {}
+        self.replayed = 0
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            header = json.loads(handle.readline() or "{}")
+            if header.get("format") != BUNDLE_FORMAT:
+                raise ValueError(f"{path} is not an HTTP fixture bundle ({BUNDLE_FORMAT})")
+            for line in handle:
+                record = json.loads(line)
+                key = (record["method"], record["url"], record["accept"], record.get("range", ""))
+                self._exchanges.setdefault(key, deque()).append(record)
+
+    def __call__(self, method: str, url: str, headers: dict[str, str]) -> Any:
+        key = exchange_key(method, url, headers)
+        with self._lock:
+            recorded = self._exchanges.get(key)
+            if not recorded:
+                raise urllib.error.URLError(
+                    f"no recorded response for {key[0]} {url} (Accept: {key[2]!r}, Range: {key[3]!r})"
+                )
+            record = recorded.popleft() if len(recorded) > 1 else recorded[0]
+            self.replayed += 1
+        if self.latency > 0:
+            self._sleep(self.latency)
+        response_headers = Message()
+        for name, value in record["headers"]:
+            response_headers[name] = value
+        return self._response_type(
+            url, record["status"], record["reason"], response_headers, base64.b64decode(record["body"])
+        )
@@ -5,7 +5,6 @@ from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
 
-import yaml
 from lane_utils import VARIANT_NAME_SUFFIX, extract_lane_include, expand_lane_variants
 from matrix_common import (
     derive_platform_display_name,
@@ -14,6 +13,7 @@ from matrix_common import (
     require_non_empty_string,
 )
 from runtime_model import load_runtime_model
+from yaml_cache import load_yaml_file
 
 
 @dataclass(frozen=True)
@@ -28,7 +28,7 @@ class LaneRecord:
 
 
 def _load_platform_display_names(platform_catalog_path: Path) -> dict[str, str]:
-    data = yaml.safe_load(platform_catalog_path.read_text(encoding="utf-8")) or {}
+    data = load_yaml_file(platform_catalog_path) or {}
     data = require_mapping(data, f"Platform catalog root in {platform_catalog_path}")
     platforms = require_mapping(data.get("platforms"), "Platform catalog 'platforms'")
 
@@ -153,7 +153,7 @@ def build_lane_registry(
     for family, descriptor in family_descriptors.items():
         lane_file_rel = descriptor["lane_file"]
         lane_file = repo_root / lane_file_rel
-        raw_doc = yaml.safe_load(lane_file.read_text(encoding="utf-8")) or {}
+        raw_doc = load_yaml_file(lane_file) or {}
         include = extract_lane_include(
             raw_doc,
             lane_file,
@@ -2,8 +2,8 @@
 
 from pathlib import Path
 
-import yaml
 from lane_utils import LaneSpecError, expand_lane_variants, extract_lane_include
+from yaml_cache import load_yaml_file
 
 
 def die(message: str) -> None:
@@ -161,7 +161,7 @@ def validate_dropdown_parity(selector_workflow_path: Path, expected_options):
     if not selector_workflow_path.exists():
         die(f"Missing selector workflow: {selector_workflow_path}")
 
-    workflow_data = yaml.safe_load(selector_workflow_path.read_text()) or {}
+    workflow_data = load_yaml_file(selector_workflow_path) or {}
     on_config = workflow_data.get("on", workflow_data.get(True, {}))
     if not isinstance(on_config, dict):
         die(f"Workflow 'on' block is not a mapping: {selector_workflow_path}")
@@ -190,7 +190,7 @@ def load_purpose_manifest_common(
     if not path.exists():
         die(f"Missing families manifest: {path}")
 
-    data = yaml.safe_load(path.read_text()) or {}
+    data = load_yaml_file(path) or {}
     data = require_mapping(data, f"Manifest root in {path}")
 
     purpose = require_non_empty_string(purpose, f"Manifest purpose in {path}")
@@ -395,7 +395,7 @@ def load_lanes_from_file(
         shared_defaults, f"Shared lane defaults for {lane_file}"
     )
 
-    data = yaml.safe_load(lane_file.read_text()) or {}
+    data = load_yaml_file(lane_file) or {}
     lane_defaults = {}
     if isinstance(data, dict):
         lane_defaults = data.get("defaults", {})
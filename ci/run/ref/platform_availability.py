@@ -6,7 +6,7 @@ from typing import Any
 
 from pathlib import Path
 
-import yaml
+from yaml_cache import load_yaml_file
 
 
 def _require_mapping(value, context: str) -> dict:
@@ -34,7 +34,7 @@ def load_platform_availability(path: Path) -> dict[str, dict]:
     if not path.exists():
         raise ValueError(f"Missing platform availability file: {path}")
 
-    data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    data = load_yaml_file(path) or {}
     data = _require_mapping(data, f"platform availability root in {path}")
     raw_platforms = _require_mapping(
         data.get("platforms"), f"platform availability platforms in {path}"
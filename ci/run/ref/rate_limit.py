@@ -0,0 +1,236 @@
+"""Rate-limit aware request scheduling for the GitHub and registry API clients.
+
+Each response's X-RateLimit-* / RateLimit-* headers update a per-host budget.
+Once a host's remaining budget runs low, requests to it are spaced out so that
+the rest of the budget lasts until the reset, and an exhausted budget waits for
+the reset. Throttled answers (429, 503, and 403 with an exhausted budget or a
+Retry-After) are retried after Retry-After or a jittered exponential backoff;
+a wait longer than the cap is not taken, so the caller's own fallback (cached
+entries, tag metadata) still applies. Every host's budget, retries and waits
+are recorded for the run's report.
+
+Environment:
+  XYMON_CI_HTTP_MAX_RETRIES  retries per throttled request (default: 4)
+  XYMON_CI_HTTP_MAX_WAIT     longest single wait in seconds (default: 300)
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from email.message import Message
+from email.utils import parsedate_to_datetime
+
+MAX_RETRIES_ENV = "XYMON_CI_HTTP_MAX_RETRIES"
+MAX_WAIT_ENV = "XYMON_CI_HTTP_MAX_WAIT"
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_MAX_WAIT = 300.0
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+# Pace requests once less than this share of the budget is left.
+LOW_BUDGET_FRACTION = 0.1
+THROTTLE_CODES = frozenset({429, 503})
+
+
+def _header_int(headers: Message, *names: str) -> int | None:
+    for name in names:
+        value = headers.get(name)
+        if value is None:
+            continue
+        # Docker Hub reports "100;w=21600": the count comes first.
+        head = str(value).split(";", 1)[0].strip()
+        try:
+            return int(float(head))
+        except ValueError:
+            continue
+    return None
+
+
+def _header_window(headers: Message) -> int | None:
+    for part in str(headers.get("RateLimit-Limit", "")).split(";")[1:]:
+        key, _, value = part.strip().partition("=")
+        if key == "w" and value.isdigit():
+            return int(value)
+    return None
+
+
+def retry_after_seconds(headers: Message, now: float) -> float | None:
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class HostBudget:
+    host: str
+    limit: int | None = None
+    remaining: int | None = None
+    reset_at: float | None = None
+    requests: int = 0
+    throttled: int = 0
+    retries: int = 0
+    waited: float = 0.0
+    next_slot: float = 0.0
+    statuses: dict[int, int] = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return {
+            "host": self.host,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "waited_seconds": round(self.waited, 3),
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "reset_at": round(self.reset_at) if self.reset_at is not None else None,
+            "statuses": {str(code): count for code, count in sorted(self.statuses.items())},
+        }
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        max_wait: float = DEFAULT_MAX_WAIT,
+        *,
+        clock=time.time,
+        sleep=time.sleep,
+        jitter=random.uniform,
+    ) -> None:
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self._clock = clock
+        self._sleep = sleep
+        self._jitter = jitter
+        self._budgets: dict[str, HostBudget] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        def number(name: str, default: float) -> float:
+            try:
+                return float(os.environ.get(name, "").strip() or default)
+            except ValueError:
+                return default
+
+        return cls(
+            max_retries=int(number(MAX_RETRIES_ENV, DEFAULT_MAX_RETRIES)),
+            max_wait=number(MAX_WAIT_ENV, DEFAULT_MAX_WAIT),
+        )
+
+    def _budget(self, host: str) -> HostBudget:
+        budget = self._budgets.get(host)
+        if budget is None:
+            budget = self._budgets[host] = HostBudget(host)
+        return budget
+
+    def _wait(self, budget: HostBudget, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        self._sleep(seconds)
+        with self._lock:
+            budget.waited += seconds
+
+    def acquire(self, host: str) -> None:
+        """Block until a request to host fits the known budget."""
+        with self._lock:
+            budget = self._budget(host)
+            budget.requests += 1
+            now = self._clock()
+            delay = 0.0
+            if budget.remaining is not None and budget.reset_at is not None and budget.reset_at > now:
+                until_reset = budget.reset_at - now
+                if budget.remaining <= 0:
+                    delay = until_reset if until_reset <= self.max_wait else 0.0
+                elif budget.limit and budget.remaining < budget.limit * LOW_BUDGET_FRACTION:
+                    # Hand out the rest of the budget evenly until the reset.
+                    slot = max(now, budget.next_slot)
+                    budget.next_slot = slot + until_reset / budget.remaining
+                    delay = min(slot - now, self.max_wait)
+                budget.remaining = max(0, budget.remaining - 1)
+        self._wait(budget, delay)
+
+    def observe(self, host: str, status: int, headers: Message) -> None:
+        now = self._clock()
+        with self._lock:
+            budget = self._budget(host)
+            budget.statuses[status] = budget.statuses.get(status, 0) + 1
+            limit = _header_int(headers, "X-RateLimit-Limit", "RateLimit-Limit")
+            remaining = _header_int(headers, "X-RateLimit-Remaining", "RateLimit-Remaining")
+            reset = _header_int(headers, "X-RateLimit-Reset")
+            if limit is not None:
+                budget.limit = limit
+            if remaining is not None:
+                budget.remaining = remaining
+            if reset is not None:
+                budget.reset_at = float(reset)
+            elif remaining is not None and budget.reset_at is None:
+                window = _header_window(headers)
+                if window is not None:
+                    budget.reset_at = now + window
+
+    def is_throttled(self, status: int, headers: Message) -> bool:
+        if status in THROTTLE_CODES:
+            return True
+        if status != 403:
+            return False
+        remaining = _header_int(headers, "X-RateLimit-Remaining", "RateLimit-Remaining")
+        # GitHub answers secondary rate limits with 403 and Retry-After.
+        return remaining == 0 or headers.get("Retry-After") is not None
+
+    def backoff(self, host: str, attempt: int, status: int, headers: Message) -> float | None:
+        """Seconds to wait before retrying, or None when the request should fail now."""
+        with self._lock:
+            budget = self._budget(host)
+            budget.throttled += 1
+        if attempt >= self.max_retries:
+            return None
+        now = self._clock()
+        delay = retry_after_seconds(headers, now)
+        if delay is None and status == 403:
+            reset = _header_int(headers, "X-RateLimit-Reset")
+            if reset is not None:
+                delay = max(0.0, reset - now)
+        if delay is None:
+            ceiling = min(BACKOFF_CAP, BACKOFF_BASE * (2**attempt))
+            delay = self._jitter(ceiling / 2, ceiling)
+        if delay > self.max_wait:
+            return None
+        with self._lock:
+            budget.retries += 1
+        return delay
+
+    def wait(self, host: str, seconds: float) -> None:
+        with self._lock:
+            budget = self._budget(host)
+        self._wait(budget, seconds)
+
+    def report(self) -> list[dict]:
+        with self._lock:
+            return [self._budgets[host].as_dict() for host in sorted(self._budgets)]
+
+    def format_report(self) -> str:
+        lines = ["http budget:"]
+        for entry in self.report():
+            budget = (
+                f"{entry['remaining']}/{entry['limit']} left"
+                if entry["limit"] is not None
+                else "no published limit"
+            )
+            lines.append(
+                f"  {entry['host']}: {entry['requests']} requests, {entry['retries']} retries, "
+                f"waited {entry['waited_seconds']:.1f}s, {budget}"
+            )
+        return "\n".join(lines)
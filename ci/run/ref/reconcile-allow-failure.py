@@ -7,12 +7,10 @@ import copy
 import json
 import os
 import sys
-import urllib.parse
-import urllib.request
 from collections import defaultdict
 from pathlib import Path
 
-import yaml
+from api_client import github_api_get
 from github_actions_runs import format_resolved_via, load_latest_workflow_run, load_run_from_selector
 from lane_outcome_artifacts import load_lane_outcome_artifacts
 from lane_categories import (
@@ -24,8 +22,10 @@ from lane_categories import (
 )
 from lane_registry import build_lane_registry
 from lane_utils import DEFAULT_LANE_VARIANTS, LaneSpecError, expand_generated_lanes
+from yaml_compat import safe_dump as yaml_safe_dump
+from yaml_compat import safe_load as yaml_safe_load
 
-API_VERSION = "2022-11-28"
+API_AGENT = "allow-failure-reconcile"
 DEFAULT_WORKFLOW = "pipeline-select-run-lanes.yml"
 FAIL_CONCLUSIONS = {"failure", "timed_out", "action_required", "startup_failure"}
 GROUP_STATE_ORDER = [
@@ -213,25 +213,8 @@ def load_token(token_env: str) -> str:
     )
 
 
-def build_headers(repo: str, token: str) -> dict[str, str]:
-    return {
-        "Accept": "application/vnd.github+json",
-        "Authorization": f"Bearer {token}",
-        "X-GitHub-Api-Version": API_VERSION,
-        "User-Agent": f"{repo}/allow-failure-reconcile",
-    }
-
-
 def api_get(repo: str, token: str, path: str, params: dict[str, str] | None = None) -> dict:
-    base_url = os.environ.get("GITHUB_API_URL", "https://api.github.com").rstrip("/")
-    url = f"{base_url}{path}"
-    if params:
-        query = urllib.parse.urlencode({k: v for k, v in params.items() if v not in (None, "")})
-        if query:
-            url = f"{url}?{query}"
-    request = urllib.request.Request(url, headers=build_headers(repo, token))
-    with urllib.request.urlopen(request) as response:
-        return json.load(response)
+    return github_api_get(repo, token, path, params, agent=API_AGENT)
 
 
 def load_run(repo: str, token: str, workflow: str, run_selector: str, branch: str, event: str) -> tuple[dict, str]:
@@ -299,7 +282,7 @@ def load_lane_file_docs(repo_root: Path, lane_files: set[str]) -> dict[str, dict
     docs: dict[str, dict] = {}
     for lane_file_rel in sorted(lane_files):
         path = repo_root / lane_file_rel
-        data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+        data = yaml_safe_load(path.read_text(encoding="utf-8")) or {}
         if isinstance(data, dict) and "generated" in data:
             generated = data.get("generated")
             if not isinstance(generated, dict):
@@ -375,7 +358,7 @@ def load_lane_file_docs(repo_root: Path, lane_files: set[str]) -> dict[str, dict
 
 
 def write_lane_file(path: Path, data: object) -> None:
-    rendered = yaml.safe_dump(data, sort_keys=False)
+    rendered = yaml_safe_dump(data, sort_keys=False)
     path.write_text(rendered, encoding="utf-8")
 
 
@@ -0,0 +1,150 @@
+"""Seekable remote files for reading single members out of artifact zips.
+
+A workflow artifact is a zip whose central directory sits at its end. The ref
+run analyzers only need one small JSON member from each artifact, so rather
+than downloading the whole archive, RemoteFile exposes the signed blob URL as
+a read-only, seekable file and fetches the byte ranges zipfile actually reads
+with HTTP Range requests. The first request takes the last TAIL_BYTES, which
+normally hold the end-of-central-directory record and the whole directory. A
+member is then usually one more request, starting at its local header.
+
+A server that ignores Range answers the first request with the whole file
+(200). That body is kept and served from memory, the same as a plain
+download. A 416 answer (an empty blob) also falls back to a plain download,
+as does any ranged answer whose Content-Range does not match the request.
+"""
+
+from __future__ import annotations
+
+import io
+import re
+import urllib.error
+from typing import Callable
+
+from api_client import Response, get, github_headers, resolve_redirect_url
+
+TAIL_BYTES = 64 * 1024
+# Smallest range fetched past the tail, so a member's local header and a small
+# member body come back in one request.
+MIN_RANGE_BYTES = 64 * 1024
+
+CONTENT_RANGE_RE = re.compile(r"^\s*bytes\s+(\d+)-(\d+)/(\d+)\s*$", re.IGNORECASE)
+
+
+def parse_content_range(value: str) -> tuple[int, int, int] | None:
+    """(first byte, end exclusive, total size) of a Content-Range header."""
+    match = CONTENT_RANGE_RE.match(value or "")
+    if match is None:
+        return None
+    first, last, total = (int(group) for group in match.groups())
+    if last < first or last >= total:
+        return None
+    return first, last + 1, total
+
+
+class RemoteFile(io.RawIOBase):
+    """Read-only, seekable view of a URL; bytes are fetched as they are read."""
+
+    def __init__(
+        self,
+        url: str,
+        headers: dict[str, str] | None = None,
+        *,
+        send: Callable[..., Response] = get,
+        tail_bytes: int = TAIL_BYTES,
+        min_range_bytes: int = MIN_RANGE_BYTES,
+    ) -> None:
+        super().__init__()
+        self.url = url
+        # Ranges address the stored bytes, so the blob must not be re-encoded.
+        self._headers = {**(headers or {}), "Accept-Encoding": "identity"}
+        self._send = send
+        self._min_range_bytes = min_range_bytes
+        # Fetched (offset, bytes) spans; a whole-file fallback is one span at 0.
+        self._spans: list[tuple[int, bytes]] = []
+        self._position = 0
+        self.ranged = True
+        self.requests = 0
+        self.bytes_fetched = 0
+        self.size = 0
+        self._open(tail_bytes)
+
+    def _get(self, extra: dict[str, str]) -> Response:
+        self.requests += 1
+        response = self._send(self.url, {**self._headers, **extra})
+        self.bytes_fetched += len(response.body)
+        return response
+
+    def _take_whole(self, body: bytes) -> None:
+        self.ranged = False
+        self.size = len(body)
+        self._spans = [(0, body)]
+
+    def _open(self, tail_bytes: int) -> None:
+        try:
+            response = self._get({"Range": f"bytes=-{tail_bytes}"})
+        except urllib.error.HTTPError as exc:
+            if exc.code != 416:
+                raise
+            self._take_whole(self._get({}).body)
+            return
+        span = parse_content_range(response.headers.get("Content-Range", "")) if response.status == 206 else None
+        if span is None or span[1] != span[2] or span[1] - span[0] != len(response.body):
+            self._take_whole(self._get({}).body if response.status == 206 else response.body)
+            return
+        self.size = span[2]
+        self._spans = [(span[0], response.body)]
+
+    def _fetch(self, start: int, end: int) -> bytes:
+        response = self._get({"Range": f"bytes={start}-{end - 1}"})
+        span = parse_content_range(response.headers.get("Content-Range", "")) if response.status == 206 else None
+        if span is None or span[0] != start or span[2] != self.size or span[1] - span[0] != len(response.body):
+            # Range ignored after all: keep the whole file.
+            self._take_whole(response.body if response.status == 200 else self._get({}).body)
+            return self._spans[0][1][start:end]
+        self._spans.append((start, response.body))
+        return response.body[: end - start]
+
+    def _read_range(self, start: int, end: int) -> bytes:
+        for offset, data in self._spans:
+            if offset <= start and end <= offset + len(data):
+                return data[start - offset : end - offset]
+        return self._fetch(start, max(end, min(start + self._min_range_bytes, self.size)))[: end - start]
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"invalid whence: {whence}")
+        if position < 0:
+            raise OSError(f"negative seek position {position}")
+        self._position = position
+        return position
+
+    def readinto(self, buffer) -> int:
+        end = min(self._position + len(buffer), self.size)
+        if end <= self._position:
+            return 0
+        data = self._read_range(self._position, end)
+        buffer[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+
+def open_github_artifact(repo: str, token: str, archive_url: str, *, agent: str) -> RemoteFile:
+    """The artifact zip as a RemoteFile: the API answers with a signed URL fetched without repo auth."""
+    signed_url = resolve_redirect_url(archive_url, github_headers(token, f"{repo}/{agent}"))
+    return RemoteFile(signed_url, {"Accept": "application/octet-stream", "User-Agent": f"{repo}/{agent}"})
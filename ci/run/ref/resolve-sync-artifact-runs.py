@@ -3,16 +3,16 @@
 from __future__ import annotations
 
 import argparse
-import json
 import os
 import sys
 import urllib.error
 import urllib.parse
-import urllib.request
 
+from api_client import github_api_get
+from artifact_fetch import artifact_expired, artifact_store, load_artifacts
 from github_actions_runs import load_run_from_selector
 
-API_VERSION = "2022-11-28"
+API_AGENT = "pipeline-sync-artifacts"
 
 
 def die(message: str) -> None:
@@ -40,35 +40,26 @@ def load_token() -> str:
     die("Missing GitHub token in GH_TOKEN or GITHUB_TOKEN")
 
 
-def build_headers(repo: str, token: str) -> dict[str, str]:
-    return {
-        "Accept": "application/vnd.github+json",
-        "Authorization": f"Bearer {token}",
-        "X-GitHub-Api-Version": API_VERSION,
-        "User-Agent": f"{repo}/pipeline-sync-artifacts",
-    }
-
-
 def api_get(repo: str, token: str, path: str, params: dict[str, str] | None = None) -> dict:
-    url = f"https://api.github.com{path}"
-    if params:
-        query = urllib.parse.urlencode({key: value for key, value in params.items() if value})
-        if query:
-            url = f"{url}?{query}"
-    request = urllib.request.Request(url, headers=build_headers(repo, token))
-    with urllib.request.urlopen(request) as response:
-        return json.load(response)
+    return github_api_get(repo, token, path, params, agent=API_AGENT)
 
 
 def has_ref_artifacts(repo: str, token: str, run_id: str) -> bool:
-    payload = api_get(
-        repo,
-        token,
-        f"/repos/{repo}/actions/runs/{run_id}/artifacts",
-        params={"per_page": "100"},
-    )
-    artifacts = payload.get("artifacts", [])
-    return any(str(artifact.get("name", "")).startswith("ref__") for artifact in artifacts)
+    # A run found to have a downloadable ref__ artifact keeps it until that
+    # artifact expires, so the answer is remembered in the artifact store.
+    store = artifact_store()
+    key = store.key(repo, "run", run_id, "ref-artifact") if store is not None else None
+    if key is not None:
+        known = store.load(key)
+        if isinstance(known, dict) and not artifact_expired(known):
+            return True
+    for artifact in load_artifacts(api_get, repo, token, run_id):
+        if not str(artifact.get("name", "")).startswith("ref__") or artifact_expired(artifact):
+            continue
+        if key is not None and artifact.get("expires_at"):
+            store.store(key, {"id": artifact.get("id"), "expires_at": artifact.get("expires_at")})
+        return True
+    return False
 
 
 def resolve_selector(repo: str, token: str, workflow: str, selector: str) -> str:
@@ -0,0 +1,386 @@
+"""Lane history of past reference generation runs, and the trends it shows.
+
+analyze-ref-generation-run.py --trend-runs N ingests the last N completed runs
+of the workflow into a local SQLite file and reports on the window:
+
+- slowest lanes: median duration over the window
+- duration regressions: the recent median against the older runs' median
+- flakiness: how often a lane flips between passing and failing
+- dependency install growth: newly installed packages per run and per lane
+
+Each run is ingested once. A later analysis only fetches the runs the history
+does not hold yet. The history is compact: lane names are interned once, and
+each (run, lane) row holds only integer columns and the conclusion.
+
+Environment:
+  XYMON_CI_REF_HISTORY_DB  history file (default: $XDG_CACHE_HOME/xymon-ci/ref-history.sqlite)
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import statistics
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+from cache_store import cache_root
+from github_actions_runs import parse_github_timestamp
+
+HISTORY_DB_ENV = "XYMON_CI_REF_HISTORY_DB"
+HISTORY_FORMAT = "ref-history-v1"
+SUCCESS_CONCLUSIONS = frozenset({"success"})
+FAIL_CONCLUSIONS = frozenset({"failure", "timed_out"})
+TREND_TOP_N = 15
+# The newest runs compared against the rest of the window for regressions.
+RECENT_RUNS = 3
+REGRESSION_MIN_SAMPLES = RECENT_RUNS + 2
+REGRESSION_RATIO = 1.2
+REGRESSION_MIN_SECONDS = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    run_number INTEGER,
+    created_at TEXT NOT NULL,
+    head_sha TEXT,
+    conclusion TEXT,
+    html_url TEXT
+);
+CREATE TABLE IF NOT EXISTS lanes (lane_id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS lane_runs (
+    run_id INTEGER NOT NULL,
+    lane_id INTEGER NOT NULL,
+    conclusion TEXT NOT NULL,
+    duration_seconds INTEGER,
+    artifact_size_bytes INTEGER NOT NULL,
+    requested_newly_installed INTEGER,
+    indirect_newly_installed INTEGER,
+    all_newly_installed INTEGER,
+    PRIMARY KEY (run_id, lane_id)
+) WITHOUT ROWID;
+"""
+
+
+def default_history_path() -> Path:
+    configured = os.environ.get(HISTORY_DB_ENV, "").strip()
+    if configured:
+        return Path(configured)
+    return cache_root() / "ref-history.sqlite"
+
+
+@dataclass
+class LaneRecord:
+    lane: str
+    conclusion: str = "unknown"
+    duration_seconds: int | None = None
+    artifact_size_bytes: int = 0
+    # None when the lane left no dependency report in that run.
+    requested_newly_installed: int | None = None
+    indirect_newly_installed: int | None = None
+    all_newly_installed: int | None = None
+
+
+def job_duration_seconds(job: dict[str, Any]) -> int | None:
+    started = parse_github_timestamp(job.get("started_at"))
+    completed = parse_github_timestamp(job.get("completed_at"))
+    if started is None or completed is None or completed < started:
+        return None
+    return round((completed - started).total_seconds())
+
+
+def lane_records(
+    lane_jobs: Iterable[dict[str, Any]], dependency_reports: Iterable[dict[str, Any]]
+) -> list[LaneRecord]:
+    """One record per lane of a run: job conclusion and duration, plus its dependency reports.
+
+    lane_jobs are classify_jobs() lane entries; dependency_reports are the
+    parsed "reports" of build_dependency_report(), matched on normalized lane name.
+    """
+    records: dict[str, LaneRecord] = {}
+    for job in lane_jobs:
+        lane = str(job.get("normalized_name") or "").strip() or "<unnamed>"
+        record = records.setdefault(lane, LaneRecord(lane))
+        record.conclusion = str(job.get("normalized_conclusion") or "unknown")
+        record.duration_seconds = job_duration_seconds(job)
+    for report in dependency_reports:
+        lane = " ".join(str(report.get("lane_name") or report.get("artifact_name") or "").split())
+        record = records.setdefault(lane, LaneRecord(lane))
+        record.artifact_size_bytes += int(report.get("artifact_size_in_bytes") or 0)
+        for field in ("requested_newly_installed", "indirect_newly_installed", "all_newly_installed"):
+            value = int(report.get(f"{field}_count") or 0)
+            setattr(record, field, (getattr(record, field) or 0) + value)
+    return sorted(records.values(), key=lambda record: record.lane)
+
+
+class RunHistory:
+    """The SQLite history; use from one thread."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.executescript(SCHEMA)
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'format'").fetchone()
+        if row is None:
+            with self._db:
+                self._db.execute("INSERT INTO meta (key, value) VALUES ('format', ?)", (HISTORY_FORMAT,))
+        elif row[0] != HISTORY_FORMAT:
+            self._db.close()
+            raise ValueError(f"{path} holds {row[0]} history, expected {HISTORY_FORMAT}")
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "RunHistory":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def known_run_ids(self) -> set[int]:
+        return {run_id for (run_id,) in self._db.execute("SELECT run_id FROM runs")}
+
+    def _lane_id(self, name: str) -> int:
+        self._db.execute("INSERT OR IGNORE INTO lanes (name) VALUES (?)", (name,))
+        return self._db.execute("SELECT lane_id FROM lanes WHERE name = ?", (name,)).fetchone()[0]
+
+    def record_run(self, run: dict[str, Any], records: Iterable[LaneRecord]) -> None:
+        """Store a run and its lanes, replacing what an earlier ingestion stored."""
+        run_id = int(run["id"])
+        with self._db:
+            self._db.execute("DELETE FROM lane_runs WHERE run_id = ?", (run_id,))
+            self._db.execute(
+                "INSERT OR REPLACE INTO runs (run_id, run_number, created_at, head_sha, conclusion, html_url)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    run.get("run_number"),
+                    str(run.get("created_at") or ""),
+                    run.get("head_sha"),
+                    run.get("conclusion"),
+                    run.get("html_url"),
+                ),
+            )
+            self._db.executemany(
+                "INSERT INTO lane_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        run_id,
+                        self._lane_id(record.lane),
+                        record.conclusion,
+                        record.duration_seconds,
+                        record.artifact_size_bytes,
+                        record.requested_newly_installed,
+                        record.indirect_newly_installed,
+                        record.all_newly_installed,
+                    )
+                    for record in records
+                ],
+            )
+
+    def window(self, run_ids: Iterable[int]) -> tuple[list[dict[str, Any]], dict[str, list[tuple[int, LaneRecord]]]]:
+        """The runs among run_ids, oldest first, and each lane's (run_id, record) in that order."""
+        wanted = sorted(set(int(run_id) for run_id in run_ids))
+        if not wanted:
+            return [], {}
+        placeholders = ",".join("?" for _ in wanted)
+        runs = [
+            {
+                "run_id": run_id,
+                "run_number": run_number,
+                "created_at": created_at,
+                "head_sha": head_sha,
+                "conclusion": conclusion,
+                "html_url": html_url,
+            }
+            for run_id, run_number, created_at, head_sha, conclusion, html_url in self._db.execute(
+                "SELECT run_id, run_number, created_at, head_sha, conclusion, html_url FROM runs"
+                f" WHERE run_id IN ({placeholders}) ORDER BY created_at, run_id",
+                wanted,
+            )
+        ]
+        order = {run["run_id"]: position for position, run in enumerate(runs)}
+        lanes: dict[str, list[tuple[int, LaneRecord]]] = {}
+        for row in self._db.execute(
+            "SELECT lane_runs.run_id, lanes.name, conclusion, duration_seconds, artifact_size_bytes,"
+            " requested_newly_installed, indirect_newly_installed, all_newly_installed"
+            " FROM lane_runs JOIN lanes USING (lane_id)"
+            f" WHERE lane_runs.run_id IN ({placeholders})",
+            wanted,
+        ):
+            run_id, name = row[0], row[1]
+            lanes.setdefault(name, []).append((run_id, LaneRecord(name, *row[2:])))
+        for history in lanes.values():
+            history.sort(key=lambda item: order[item[0]])
+        return runs, dict(sorted(lanes.items()))
+
+
+def _median(values: list[int]) -> float:
+    return float(statistics.median(values)) if values else 0.0
+
+
+def build_trends(
+    runs: list[dict[str, Any]], lanes: dict[str, list[tuple[int, LaneRecord]]], top_n: int = TREND_TOP_N
+) -> dict[str, Any]:
+    slowest: list[dict[str, Any]] = []
+    regressions: list[dict[str, Any]] = []
+    flaky: list[dict[str, Any]] = []
+    growth: list[dict[str, Any]] = []
+    for lane, history in lanes.items():
+        durations = [record.duration_seconds for _, record in history if record.duration_seconds is not None]
+        if durations:
+            slowest.append(
+                {
+                    "lane": lane,
+                    "samples": len(durations),
+                    "median_seconds": _median(durations),
+                    "max_seconds": max(durations),
+                    "latest_seconds": durations[-1],
+                }
+            )
+        if len(durations) >= REGRESSION_MIN_SAMPLES:
+            baseline = _median(durations[:-RECENT_RUNS])
+            recent = _median(durations[-RECENT_RUNS:])
+            if recent >= baseline * REGRESSION_RATIO and recent - baseline >= REGRESSION_MIN_SECONDS:
+                regressions.append(
+                    {
+                        "lane": lane,
+                        "baseline_median_seconds": baseline,
+                        "recent_median_seconds": recent,
+                        "delta_seconds": recent - baseline,
+                    }
+                )
+
+        outcomes = [
+            record.conclusion in FAIL_CONCLUSIONS
+            for _, record in history
+            if record.conclusion in SUCCESS_CONCLUSIONS | FAIL_CONCLUSIONS
+        ]
+        flips = sum(previous != current for previous, current in zip(outcomes, outcomes[1:]))
+        if flips:
+            flaky.append(
+                {
+                    "lane": lane,
+                    "samples": len(outcomes),
+                    "failures": sum(outcomes),
+                    "flips": flips,
+                    "flip_rate": round(flips / (len(outcomes) - 1), 3),
+                    "failure_rate": round(sum(outcomes) / len(outcomes), 3),
+                }
+            )
+
+        installed = [record.all_newly_installed for _, record in history if record.all_newly_installed is not None]
+        if len(installed) >= 2 and installed[-1] != installed[0]:
+            growth.append(
+                {"lane": lane, "first": installed[0], "latest": installed[-1], "delta": installed[-1] - installed[0]}
+            )
+
+    per_run: dict[int, dict[str, Any]] = {
+        run["run_id"]: {
+            "run_id": run["run_id"],
+            "run_number": run["run_number"],
+            "lanes": 0,
+            "all_newly_installed": 0,
+            "artifact_size_bytes": 0,
+        }
+        for run in runs
+    }
+    for history in lanes.values():
+        for run_id, record in history:
+            totals = per_run[run_id]
+            totals["lanes"] += 1
+            totals["all_newly_installed"] += record.all_newly_installed or 0
+            totals["artifact_size_bytes"] += record.artifact_size_bytes
+
+    slowest.sort(key=lambda entry: (-entry["median_seconds"], entry["lane"]))
+    regressions.sort(key=lambda entry: (-entry["delta_seconds"], entry["lane"]))
+    flaky.sort(key=lambda entry: (-entry["flip_rate"], -entry["failure_rate"], entry["lane"]))
+    growth.sort(key=lambda entry: (-entry["delta"], entry["lane"]))
+    return {
+        "window": {
+            "run_count": len(runs),
+            "first_run_id": runs[0]["run_id"] if runs else None,
+            "last_run_id": runs[-1]["run_id"] if runs else None,
+            "lane_count": len(lanes),
+        },
+        "slowest_lanes": slowest[:top_n],
+        "duration_regressions": regressions,
+        "flaky_lanes": flaky,
+        "dependency_growth": {
+            "per_run": [per_run[run["run_id"]] for run in runs],
+            "lanes": growth[:top_n],
+        },
+    }
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    return f"{minutes}m{seconds:02d}s"
+
+
+def format_trend_markdown(repo: str, workflow: str, trends: dict[str, Any]) -> str:
+    window = trends["window"]
+    lines = [
+        "# Reference Generation Trends",
+        "",
+        f"- Repository: `{repo}`",
+        f"- Workflow: `{workflow}`",
+        f"- Runs analyzed: `{window['run_count']}` (`{window['first_run_id']}` to `{window['last_run_id']}`)",
+        f"- Lanes seen: `{window['lane_count']}`",
+    ]
+
+    lines.extend(["", f"## Slowest Lanes (median of {window['run_count']} runs)", ""])
+    if trends["slowest_lanes"]:
+        lines.extend(["| Lane | Median | Max | Latest | Runs |", "| --- | ---: | ---: | ---: | ---: |"])
+        for entry in trends["slowest_lanes"]:
+            lines.append(
+                f"| `{entry['lane']}` | {format_duration(entry['median_seconds'])} | {format_duration(entry['max_seconds'])}"
+                f" | {format_duration(entry['latest_seconds'])} | {entry['samples']} |"
+            )
+    else:
+        lines.append("- No lane durations recorded.")
+
+    lines.extend(["", f"## Duration Regressions (last {RECENT_RUNS} runs against the earlier ones)", ""])
+    if trends["duration_regressions"]:
+        lines.extend(["| Lane | Before | Recent | Change |", "| --- | ---: | ---: | ---: |"])
+        for entry in trends["duration_regressions"]:
+            lines.append(
+                f"| `{entry['lane']}` | {format_duration(entry['baseline_median_seconds'])}"
+                f" | {format_duration(entry['recent_median_seconds'])} | +{format_duration(entry['delta_seconds'])} |"
+            )
+    else:
+        lines.append("- No lane got noticeably slower.")
+
+    lines.extend(["", "## Flaky Lanes", ""])
+    if trends["flaky_lanes"]:
+        lines.extend(["| Lane | Flip rate | Failure rate | Failures | Runs |", "| --- | ---: | ---: | ---: | ---: |"])
+        for entry in trends["flaky_lanes"]:
+            lines.append(
+                f"| `{entry['lane']}` | {entry['flip_rate']:.0%} | {entry['failure_rate']:.0%}"
+                f" | {entry['failures']} | {entry['samples']} |"
+            )
+    else:
+        lines.append("- No lane alternated between passing and failing.")
+
+    growth = trends["dependency_growth"]
+    lines.extend(["", "## Dependency Install Growth", ""])
+    if growth["per_run"]:
+        lines.extend(["| Run | Lanes | Newly installed | Artifact bytes |", "| --- | ---: | ---: | ---: |"])
+        for entry in growth["per_run"]:
+            lines.append(
+                f"| `{entry['run_number'] or entry['run_id']}` | {entry['lanes']} | {entry['all_newly_installed']}"
+                f" | {entry['artifact_size_bytes']} |"
+            )
+    if growth["lanes"]:
+        lines.extend(["", "| Lane | First | Latest | Change |", "| --- | ---: | ---: | ---: |"])
+        for entry in growth["lanes"]:
+            lines.append(f"| `{entry['lane']}` | {entry['first']} | {entry['latest']} | {entry['delta']:+d} |")
+    if not growth["per_run"] and not growth["lanes"]:
+        lines.append("- No dependency reports recorded.")
+    return "\n".join(lines) + "\n"
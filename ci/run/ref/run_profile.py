@@ -0,0 +1,422 @@
+"""Where the wall time of a reference generation run goes.
+
+analyze-ref-generation-run.py --profile-output / --trace-output profiles the
+jobs of the analyzed run from their created_at, started_at and completed_at
+timestamps and their steps:
+
+- lanes and steps: how long each lane ran, and which steps took the time
+- queue wait: how long each job waited for a runner before it started
+- runner labels: busy time, peak concurrency and utilization per label set
+- groups: lanes by execution class (BSD VM, macOS host, emulated or native
+  architecture), to see which classes dominate the run
+- critical path: the chain of jobs that decided when the run finished
+
+The job listing does not carry the `needs:` graph. A job is created when the
+jobs it needs have finished, so the critical path is walked back from the job
+that finished last: each step back takes the job that completed last before
+the current one was created.
+
+The trace is Chrome trace event JSON (chrome://tracing, https://ui.perfetto.dev):
+one process per group, one thread per job, queue wait and steps as slices.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Iterable
+
+from github_actions_runs import parse_github_timestamp
+from run_history import format_duration
+
+PROFILE_TOP_N = 15
+# Jobs are created a few seconds after the jobs they need complete.
+DEPENDENCY_SLACK_SECONDS = 5
+BSD_NAME_TOKENS = ("freebsd", "netbsd", "openbsd")
+EMULATED_ARCHES = ("arm32v7", "ppc64le", "riscv64", "s390x")
+CONTROL_GROUP = "control"
+
+
+@dataclass
+class JobTiming:
+    name: str
+    group: str
+    conclusion: str
+    labels: tuple[str, ...]
+    created: datetime
+    started: datetime
+    completed: datetime
+    family: str = ""
+    url: str = ""
+    steps: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def queue_seconds(self) -> float:
+        return max((self.started - self.created).total_seconds(), 0.0)
+
+    @property
+    def run_seconds(self) -> float:
+        return (self.completed - self.started).total_seconds()
+
+
+def lane_group(name: str, labels: Iterable[str]) -> str:
+    """Execution class of a lane, from its name and the labels of its runner."""
+    words = name.lower().replace("/", " ").split()
+    if any(token in words for token in BSD_NAME_TOKENS):
+        return "bsd-vm"
+    if "macos" in words:
+        return "macos-host"
+    for arch in EMULATED_ARCHES:
+        if arch in words:
+            return f"{arch}-emulated"
+    if "arm64" in words:
+        if any("arm" in label.lower() for label in labels):
+            return "arm64-native"
+        return "arm64-emulated"
+    return "linux-amd64"
+
+
+def _step_timings(job: dict[str, Any]) -> list[dict[str, Any]]:
+    steps = []
+    for step in job.get("steps") or []:
+        started = parse_github_timestamp(step.get("started_at"))
+        completed = parse_github_timestamp(step.get("completed_at"))
+        if started is None or completed is None or completed < started:
+            continue
+        steps.append(
+            {
+                "name": " ".join(str(step.get("name") or "<unnamed>").split()),
+                "conclusion": str(step.get("conclusion") or step.get("status") or "unknown").lower(),
+                "started": started,
+                "completed": completed,
+                "seconds": (completed - started).total_seconds(),
+            }
+        )
+    return steps
+
+
+def job_timings(lane_jobs: Iterable[dict[str, Any]], control_jobs: Iterable[dict[str, Any]]) -> list[JobTiming]:
+    """Timings of the classify_jobs() entries that ran; skipped and unfinished jobs have none."""
+    timings = []
+    for jobs, is_control in ((lane_jobs, False), (control_jobs, True)):
+        for job in jobs:
+            started = parse_github_timestamp(job.get("started_at"))
+            completed = parse_github_timestamp(job.get("completed_at"))
+            if started is None or completed is None or completed < started:
+                continue
+            created = parse_github_timestamp(job.get("created_at")) or started
+            name = str(job.get("normalized_name") or job.get("name") or "<unnamed>")
+            labels = tuple(sorted(str(label) for label in job.get("labels") or []))
+            timings.append(
+                JobTiming(
+                    name=name,
+                    group=CONTROL_GROUP if is_control else lane_group(name, labels),
+                    conclusion=str(job.get("normalized_conclusion") or job.get("conclusion") or "unknown"),
+                    labels=labels,
+                    created=min(created, started),
+                    started=started,
+                    completed=completed,
+                    family=str(job.get("family") or ""),
+                    url=str(job.get("html_url") or ""),
+                    steps=_step_timings(job),
+                )
+            )
+    timings.sort(key=lambda timing: (timing.created, timing.started, timing.name))
+    return timings
+
+
+def critical_path(timings: list[JobTiming]) -> list[JobTiming]:
+    """The jobs that decided when the run finished, first to last."""
+    if not timings:
+        return []
+    current = max(timings, key=lambda timing: (timing.completed, timing.run_seconds))
+    path = [current]
+    while True:
+        ready = current.created.timestamp() + DEPENDENCY_SLACK_SECONDS
+        candidates = [
+            timing
+            for timing in timings
+            if timing not in path and timing.completed.timestamp() <= ready and timing.completed <= current.started
+        ]
+        if not candidates:
+            break
+        current = max(candidates, key=lambda timing: (timing.completed, timing.run_seconds))
+        path.append(current)
+    path.reverse()
+    return path
+
+
+def _peak_concurrency(timings: list[JobTiming]) -> int:
+    events = sorted(
+        [(timing.started, 1) for timing in timings] + [(timing.completed, -1) for timing in timings],
+        # A job finishing at the second another starts frees its runner first.
+        key=lambda event: (event[0], event[1]),
+    )
+    running = peak = 0
+    for _, delta in events:
+        running += delta
+        peak = max(peak, running)
+    return peak
+
+
+def _seconds(value: float) -> float:
+    return round(value, 1)
+
+
+def build_profile(
+    run: dict[str, Any], lane_jobs: Iterable[dict[str, Any]], control_jobs: Iterable[dict[str, Any]], top_n: int = PROFILE_TOP_N
+) -> dict[str, Any]:
+    timings = job_timings(lane_jobs, control_jobs)
+    if not timings:
+        return {"job_count": 0, "wall_seconds": 0.0}
+    start = min(timing.created for timing in timings)
+    run_start = parse_github_timestamp(run.get("run_started_at") or run.get("created_at"))
+    if run_start is not None and run_start < start:
+        start = run_start
+    end = max(timing.completed for timing in timings)
+    wall_seconds = (end - start).total_seconds()
+    lanes = [timing for timing in timings if timing.group != CONTROL_GROUP]
+    lane_seconds = sum(timing.run_seconds for timing in lanes)
+
+    groups: dict[str, list[JobTiming]] = {}
+    for timing in lanes:
+        groups.setdefault(timing.group, []).append(timing)
+    group_entries = []
+    for group, members in groups.items():
+        run_total = sum(timing.run_seconds for timing in members)
+        longest = max(members, key=lambda timing: timing.run_seconds)
+        group_entries.append(
+            {
+                "group": group,
+                "lanes": len(members),
+                "run_seconds": _seconds(run_total),
+                "queue_seconds": _seconds(sum(timing.queue_seconds for timing in members)),
+                "share_of_lane_time": round(run_total / lane_seconds, 3) if lane_seconds else 0.0,
+                "span_seconds": _seconds(
+                    (max(timing.completed for timing in members) - min(timing.started for timing in members)).total_seconds()
+                ),
+                "longest_lane": longest.name,
+                "longest_seconds": _seconds(longest.run_seconds),
+            }
+        )
+    group_entries.sort(key=lambda entry: (-entry["run_seconds"], entry["group"]))
+
+    by_labels: dict[tuple[str, ...], list[JobTiming]] = {}
+    for timing in timings:
+        by_labels.setdefault(timing.labels, []).append(timing)
+    label_entries = []
+    for labels, members in by_labels.items():
+        busy = sum(timing.run_seconds for timing in members)
+        span = (max(timing.completed for timing in members) - min(timing.started for timing in members)).total_seconds()
+        peak = _peak_concurrency(members)
+        label_entries.append(
+            {
+                "labels": list(labels),
+                "jobs": len(members),
+                "busy_seconds": _seconds(busy),
+                "queue_seconds": _seconds(sum(timing.queue_seconds for timing in members)),
+                "max_queue_seconds": _seconds(max(timing.queue_seconds for timing in members)),
+                "peak_concurrency": peak,
+                # Busy time over the runner time the peak held for the whole span.
+                "utilization": round(busy / (peak * span), 3) if peak and span else 1.0,
+            }
+        )
+    label_entries.sort(key=lambda entry: (-entry["busy_seconds"], entry["labels"]))
+
+    steps: dict[str, dict[str, Any]] = {}
+    for timing in lanes:
+        for step in timing.steps:
+            entry = steps.setdefault(
+                step["name"], {"step": step["name"], "lanes": 0, "total_seconds": 0.0, "max_seconds": 0.0, "slowest_lane": ""}
+            )
+            entry["lanes"] += 1
+            entry["total_seconds"] += step["seconds"]
+            if step["seconds"] > entry["max_seconds"]:
+                entry["max_seconds"] = step["seconds"]
+                entry["slowest_lane"] = timing.name
+    step_entries = sorted(steps.values(), key=lambda entry: (-entry["total_seconds"], entry["step"]))
+    for entry in step_entries:
+        entry["total_seconds"] = _seconds(entry["total_seconds"])
+        entry["max_seconds"] = _seconds(entry["max_seconds"])
+
+    path = critical_path(timings)
+    slowest = sorted(lanes, key=lambda timing: (-timing.run_seconds, timing.name))
+    queued = sorted(timings, key=lambda timing: (-timing.queue_seconds, timing.name))
+    return {
+        "job_count": len(timings),
+        "lane_count": len(lanes),
+        "wall_seconds": _seconds(wall_seconds),
+        "lane_run_seconds": _seconds(lane_seconds),
+        "queue_seconds": _seconds(sum(timing.queue_seconds for timing in timings)),
+        "groups": group_entries,
+        "runner_labels": label_entries,
+        "slowest_lanes": [
+            {
+                "lane": timing.name,
+                "group": timing.group,
+                "family": timing.family,
+                "conclusion": timing.conclusion,
+                "queue_seconds": _seconds(timing.queue_seconds),
+                "run_seconds": _seconds(timing.run_seconds),
+                "slowest_step": max(timing.steps, key=lambda step: step["seconds"])["name"] if timing.steps else "",
+            }
+            for timing in slowest[:top_n]
+        ],
+        "longest_queue_waits": [
+            {"job": timing.name, "labels": list(timing.labels), "queue_seconds": _seconds(timing.queue_seconds)}
+            for timing in queued[:top_n]
+            if timing.queue_seconds > 0
+        ],
+        "steps": step_entries[:top_n],
+        "critical_path": {
+            "seconds": _seconds((path[-1].completed - start).total_seconds()) if path else 0.0,
+            "jobs": [
+                {
+                    "job": timing.name,
+                    "group": timing.group,
+                    "queue_seconds": _seconds(timing.queue_seconds),
+                    "run_seconds": _seconds(timing.run_seconds),
+                }
+                for timing in path
+            ],
+        },
+    }
+
+
+def _microseconds(moment: datetime, start: datetime) -> int:
+    return round((moment - start).total_seconds() * 1_000_000)
+
+
+def build_chrome_trace(run: dict[str, Any], lane_jobs: Iterable[dict[str, Any]], control_jobs: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    """Chrome trace events of the run: a process per group, heaviest group first."""
+    timings = job_timings(lane_jobs, control_jobs)
+    on_path = {id(timing) for timing in critical_path(timings)}
+    events: list[dict[str, Any]] = []
+    if timings:
+        start = min(timing.created for timing in timings)
+        group_seconds: dict[str, float] = {}
+        for timing in timings:
+            group_seconds[timing.group] = group_seconds.get(timing.group, 0.0) + timing.run_seconds
+        order = sorted(group_seconds, key=lambda group: (group == CONTROL_GROUP, -group_seconds[group], group))
+        pids = {group: position + 1 for position, group in enumerate(order)}
+        for group, pid in pids.items():
+            events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": group}})
+            events.append({"name": "process_sort_index", "ph": "M", "pid": pid, "tid": 0, "args": {"sort_index": pid}})
+        next_tid: dict[str, int] = {}
+        for timing in timings:
+            pid = pids[timing.group]
+            tid = next_tid[timing.group] = next_tid.get(timing.group, 0) + 1
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": timing.name}})
+            if timing.queue_seconds > 0:
+                events.append(
+                    {
+                        "name": "queued",
+                        "cat": "queue",
+                        "ph": "X",
+                        "pid": pid,
+                        "tid": tid,
+                        "ts": _microseconds(timing.created, start),
+                        "dur": _microseconds(timing.started, timing.created),
+                        "args": {"labels": list(timing.labels)},
+                    }
+                )
+            events.append(
+                {
+                    "name": timing.name,
+                    "cat": "job,critical" if id(timing) in on_path else "job",
+                    "ph": "X",
+                    "pid": pid,
+                    "tid": tid,
+                    "ts": _microseconds(timing.started, start),
+                    "dur": _microseconds(timing.completed, timing.started),
+                    "args": {
+                        "conclusion": timing.conclusion,
+                        "family": timing.family,
+                        "labels": list(timing.labels),
+                        "critical_path": id(timing) in on_path,
+                        "url": timing.url,
+                    },
+                }
+            )
+            for step in timing.steps:
+                events.append(
+                    {
+                        "name": step["name"],
+                        "cat": "step",
+                        "ph": "X",
+                        "pid": pid,
+                        "tid": tid,
+                        "ts": _microseconds(step["started"], start),
+                        "dur": _microseconds(step["completed"], step["started"]),
+                        "args": {"conclusion": step["conclusion"]},
+                    }
+                )
+    return {
+        "traceEvents": events,
+        "displayTimeUnit": "ms",
+        "otherData": {"run_id": run.get("id"), "run_url": run.get("html_url") or ""},
+    }
+
+
+def format_profile_markdown(run: dict[str, Any], profile: dict[str, Any]) -> str:
+    lines = [
+        "# Reference Generation Run Profile",
+        "",
+        f"- Run: `{run.get('id')}`",
+    ]
+    if not profile.get("job_count"):
+        lines.extend(["", "- No job of this run has start and completion times."])
+        return "\n".join(lines) + "\n"
+    lines.extend(
+        [
+            f"- Wall time: `{format_duration(profile['wall_seconds'])}`",
+            f"- Critical path: `{format_duration(profile['critical_path']['seconds'])}`",
+            f"- Lane run time (summed): `{format_duration(profile['lane_run_seconds'])}` over `{profile['lane_count']}` lanes",
+            f"- Queue wait (summed): `{format_duration(profile['queue_seconds'])}`",
+        ]
+    )
+
+    lines.extend(["", "## Groups", "", "| Group | Lanes | Run time | Share | Span | Queue | Longest lane |"])
+    lines.append("| --- | ---: | ---: | ---: | ---: | ---: | --- |")
+    for entry in profile["groups"]:
+        lines.append(
+            f"| `{entry['group']}` | {entry['lanes']} | {format_duration(entry['run_seconds'])}"
+            f" | {entry['share_of_lane_time']:.0%} | {format_duration(entry['span_seconds'])}"
+            f" | {format_duration(entry['queue_seconds'])}"
+            f" | `{entry['longest_lane']}` ({format_duration(entry['longest_seconds'])}) |"
+        )
+
+    lines.extend(["", "## Critical Path", "", "| Job | Group | Queue | Run |", "| --- | --- | ---: | ---: |"])
+    for entry in profile["critical_path"]["jobs"]:
+        lines.append(
+            f"| `{entry['job']}` | `{entry['group']}` | {format_duration(entry['queue_seconds'])}"
+            f" | {format_duration(entry['run_seconds'])} |"
+        )
+
+    lines.extend(["", "## Slowest Lanes", "", "| Lane | Group | Queue | Run | Slowest step |"])
+    lines.append("| --- | --- | ---: | ---: | --- |")
+    for entry in profile["slowest_lanes"]:
+        lines.append(
+            f"| `{entry['lane']}` | `{entry['group']}` | {format_duration(entry['queue_seconds'])}"
+            f" | {format_duration(entry['run_seconds'])} | {entry['slowest_step'] or '-'} |"
+        )
+
+    if profile["steps"]:
+        lines.extend(["", "## Steps (summed over lanes)", "", "| Step | Lanes | Total | Max | Slowest lane |"])
+        lines.append("| --- | ---: | ---: | ---: | --- |")
+        for entry in profile["steps"]:
+            lines.append(
+                f"| {entry['step']} | {entry['lanes']} | {format_duration(entry['total_seconds'])}"
+                f" | {format_duration(entry['max_seconds'])} | `{entry['slowest_lane']}` |"
+            )
+
+    lines.extend(["", "## Runner Labels", "", "| Labels | Jobs | Busy | Peak | Utilization | Queue | Max queue |"])
+    lines.append("| --- | ---: | ---: | ---: | ---: | ---: | ---: |")
+    for entry in profile["runner_labels"]:
+        labels = ", ".join(entry["labels"]) or "<unknown>"
+        lines.append(
+            f"| `{labels}` | {entry['jobs']} | {format_duration(entry['busy_seconds'])} | {entry['peak_concurrency']}"
+            f" | {entry['utilization']:.0%} | {format_duration(entry['queue_seconds'])}"
+            f" | {format_duration(entry['max_queue_seconds'])} |"
+        )
+    return "\n".join(lines) + "\n"
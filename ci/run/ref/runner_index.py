@@ -0,0 +1,133 @@
+"""Runner capability index for export-platform-catalog.py's host support.
+
+Every runner of ci/deps/platform-host-runners.yaml gets one bit, its position
+in the catalog. For each capability key, such as (arch, amd64),
+(container, linux) or (platform, (ubuntu, 24.04)), the index keeps the bitmask
+of the runners that have it. A host support query is then an AND of a few masks
+instead of a scan over every runner and capability list per platform and
+architecture. Bits are read back in ascending order, so labels keep the
+catalog order the scans produced. Query results are memoized.
+
+The normalized capabilities of host-runners-discovered.yml are stored per
+runner label alongside, so each runner's discovery is normalized once rather
+than once per platform that uses it.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Iterable, Mapping
+
+CapabilityKey = tuple[str, Any]
+
+
+@dataclass(frozen=True)
+class RunnerRecord:
+    label: str
+    arch: str
+    machine_family: str
+    platform_os: str
+    platform_version: str
+    native_platforms: tuple[str, ...]
+    container_platforms: tuple[str, ...]
+    container_emulated_arches: tuple[str, ...]
+
+    def capability_keys(self) -> Iterable[CapabilityKey]:
+        yield ("arch", self.arch)
+        yield ("machine_family", self.machine_family)
+        yield ("platform", (self.platform_os, self.platform_version))
+        for platform_family in self.native_platforms:
+            yield ("native", platform_family)
+        for platform_family in self.container_platforms:
+            yield ("container", platform_family)
+        for arch in self.container_emulated_arches:
+            yield ("emulated", arch)
+
+
+def unique_preserving_order(values: Iterable[str]) -> list[str]:
+    return list(dict.fromkeys(values))
+
+
+class RunnerCapabilityIndex:
+    def __init__(
+        self,
+        runners: Iterable[RunnerRecord],
+        discovered_capabilities: Mapping[str, dict[str, Any]] | None = None,
+    ) -> None:
+        self.runners = tuple(runners)
+        self.discovered_capabilities = dict(discovered_capabilities or {})
+        self._masks: dict[CapabilityKey, int] = {}
+        for position, runner in enumerate(self.runners):
+            bit = 1 << position
+            for key in runner.capability_keys():
+                self._masks[key] = self._masks.get(key, 0) | bit
+        self._labels_memo: dict[int, tuple[str, ...]] = {}
+        self._select_memo: dict[tuple[CapabilityKey, ...], tuple[str, ...]] = {}
+
+    def mask(self, *keys: CapabilityKey) -> int:
+        """Runners having every capability in keys."""
+        result = -1
+        for key in keys:
+            result &= self._masks.get(key, 0)
+            if not result:
+                return 0
+        return result if keys else 0
+
+    def labels_for(self, mask: int) -> tuple[str, ...]:
+        labels = self._labels_memo.get(mask)
+        if labels is None:
+            selected = []
+            remaining = mask
+            while remaining:
+                lowest = remaining & -remaining
+                selected.append(self.runners[lowest.bit_length() - 1].label)
+                remaining ^= lowest
+            labels = self._labels_memo[mask] = tuple(selected)
+        return labels
+
+    def select(self, *keys: CapabilityKey) -> tuple[str, ...]:
+        """Labels of the runners having every capability in keys, in catalog order."""
+        labels = self._select_memo.get(keys)
+        if labels is None:
+            labels = self._select_memo[keys] = self.labels_for(self.mask(*keys))
+        return labels
+
+    def direct_runner_labels(self, platform_family: str, platform_os: str, platform_version: str, arch: str) -> tuple[str, ...]:
+        """Runners that are the platform itself: same family, OS, version and arch."""
+        return self.select(
+            ("arch", arch),
+            ("machine_family", platform_family),
+            ("native", platform_family),
+            ("platform", (platform_os, platform_version)),
+        )
+
+    def container_runner_labels(self, platform_family: str, arch: str) -> tuple[str, ...]:
+        """Runners that run the platform's containers natively, then those that emulate arch."""
+        return tuple(
+            unique_preserving_order(
+                self.select(("arch", arch), ("container", platform_family))
+                + self.select(
+                    ("machine_family", platform_family),
+                    ("container", platform_family),
+                    ("emulated", arch),
+                )
+            )
+        )
+
+    def host_support(
+        self,
+        arches: Iterable[str],
+        *,
+        platform_family: str,
+        platform_os: str,
+        platform_version: str,
+    ) -> dict[str, dict[str, Any]]:
+        host_support: dict[str, dict[str, Any]] = {}
+        for arch in arches:
+            direct_labels = list(self.direct_runner_labels(platform_family, platform_os, platform_version, arch))
+            container_labels = list(self.container_runner_labels(platform_family, arch))
+            record: dict[str, Any] = {"direct_runner_labels": direct_labels}
+            if container_labels != direct_labels:
+                record["container_runner_labels"] = container_labels
+            host_support[arch] = record
+        return host_support
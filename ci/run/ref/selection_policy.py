@@ -0,0 +1,229 @@
+"""Compiled platform selection policy for .github/scripts/export-platform-catalog.py.
+
+The exporter parses the `selection` blocks of ci/deps/platform-intent.yaml
+into plain dicts; `compile_selection_policy` turns them into per-(section,
+platform_os) matchers built once: each platform's plain tag patterns become a
+single regex alternation, id lists and version lists become frozensets, and
+rules that accept every version are set aside so their entries never derive a
+version token. Tag decisions are cached per (section, platform_os, tag) and
+version decisions per (section, platform_os, version token), so an entry costs
+a few set and dict lookups.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Iterable, Mapping
+
+MOVING_TARGET_TOKENS = frozenset({"latest", "rolling", "tumbleweed", "edge", "current"})
+RUNTIME_SECTIONS = {"docker": "containers", "vm": "vms", "host": "hosts"}
+MAJOR_VERSION_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+NUMBER_PATTERN = re.compile(r"\d+")
+# What re.compile() sets for a str pattern given no flags.
+DEFAULT_FLAGS = re.compile("").flags
+
+
+@lru_cache(maxsize=None)
+def infer_platform_os(platform_id: str) -> str:
+    platform_id = str(platform_id).strip()
+    if platform_id.startswith("opensuse-tumbleweed"):
+        return "opensuse_tumbleweed"
+    if platform_id.startswith("opensuse-leap-"):
+        return "opensuse_leap"
+    return platform_id.split("-", 1)[0]
+
+
+def entry_platform_os(platform_id: str, entry: Mapping[str, Any]) -> str:
+    return str(entry.get("platform_os") or infer_platform_os(platform_id)).strip()
+
+
+def derive_version_token(platform_id: str, platform_os: str, platform_version: Any) -> str:
+    if platform_os == "opensuse_tumbleweed":
+        return "latest"
+    if platform_os == "opensuse_leap" and platform_id.startswith("opensuse-leap-"):
+        return platform_id.removeprefix("opensuse-leap-").replace("_", ".")
+    _, dash, suffix = platform_id.partition("-")
+    if dash:
+        return suffix.replace("_", ".")
+    # Normalized only here: most ids carry their version.
+    return str(platform_version or "").strip()
+
+
+# Memoized for the exporter's repeated passes over the selected entries.
+version_token = lru_cache(maxsize=None)(derive_version_token)
+
+
+def selection_version_token(platform_id: str, entry: Mapping[str, Any]) -> str:
+    return version_token(
+        platform_id,
+        entry_platform_os(platform_id, entry),
+        str(entry.get("platform_version") or "").strip(),
+    )
+
+
+@lru_cache(maxsize=None)
+def selection_major_version(token: str) -> str:
+    match = MAJOR_VERSION_PATTERN.search(token)
+    if not match:
+        return ""
+    return match.group(0).split(".", 1)[0]
+
+
+@lru_cache(maxsize=None)
+def is_moving_target_token(token: str) -> bool:
+    return token.strip().lower() in MOVING_TARGET_TOKENS
+
+
+@lru_cache(maxsize=None)
+def version_sort_key(token: str) -> tuple[int, ...]:
+    """Numeric components of a version token, for newest-first ordering."""
+    return tuple(int(part) for part in NUMBER_PATTERN.findall(token))
+
+
+def major_sort_key(major: str) -> tuple[int, ...]:
+    return version_sort_key(major) or (0,)
+
+
+def selection_section_for_runtime(runtime: Any) -> str | None:
+    return RUNTIME_SECTIONS.get(str(runtime).strip().lower())
+
+
+def _joinable(pattern: re.Pattern) -> bool:
+    return pattern.groups == 0 and pattern.flags == DEFAULT_FLAGS
+
+
+class TagMatcher:
+    """Any-of match over a platform's tag patterns.
+
+    Patterns without groups or flags are joined into one compiled alternation.
+    The others are matched one by one: joining renumbers their groups, which
+    breaks numeric backreferences, and drops flags set at compile time.
+    """
+
+    __slots__ = ("patterns", "_combined", "_separate", "_memo")
+
+    def __init__(self, patterns: Iterable[re.Pattern]) -> None:
+        self.patterns = tuple(patterns)
+        joinable = [pattern for pattern in self.patterns if _joinable(pattern)]
+        # Alternatives are tried in order at position 0, like any(p.match(tag)).
+        self._combined: re.Pattern | None = (
+            re.compile("|".join(f"(?:{pattern.pattern})" for pattern in joinable)) if joinable else None
+        )
+        self._separate = tuple(pattern for pattern in self.patterns if not _joinable(pattern))
+        self._memo: dict[str, bool] = {}
+
+    def matches(self, tag: str) -> bool:
+        result = self._memo.get(tag)
+        if result is None:
+            result = (self._combined is not None and self._combined.match(tag) is not None) or any(
+                pattern.match(tag) for pattern in self._separate
+            )
+            self._memo[tag] = result
+        return result
+
+
+@dataclass(frozen=True)
+class PolicyRule:
+    keep_versions: frozenset[str] = frozenset()
+    keep_major_versions: frozenset[str] = frozenset()
+    keep_latest_n_stable: int | None = None
+    keep_latest_n_major: int | None = None
+    include_moving_targets: bool = False
+    # token -> decision; many platform ids share a version token.
+    _decisions: dict[str, bool] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    @property
+    def filters_versions(self) -> bool:
+        """Whether any version token can be rejected; the keep_latest_n limits apply later, per section."""
+        return not self.include_moving_targets or bool(self.keep_versions or self.keep_major_versions)
+
+    def allows_version(self, token: str) -> bool:
+        result = self._decisions.get(token)
+        if result is None:
+            result = self._decisions[token] = self._decide(token)
+        return result
+
+    def _decide(self, token: str) -> bool:
+        if is_moving_target_token(token) and not self.include_moving_targets:
+            return False
+        if self.keep_versions or self.keep_major_versions:
+            if token in self.keep_versions:
+                return True
+            return bool(self.keep_major_versions) and selection_major_version(token) in self.keep_major_versions
+        return True
+
+
+@dataclass
+class SectionPolicy:
+    include: frozenset[str] = frozenset()
+    exclude: frozenset[str] = frozenset()
+    tag_matchers: dict[str, TagMatcher] = field(default_factory=dict)
+    rules: dict[str, PolicyRule] = field(default_factory=dict)
+    # The rules allows() has to consult: an entry under any other rule passes without a version token.
+    version_rules: dict[str, PolicyRule] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.version_rules = {platform_os: rule for platform_os, rule in self.rules.items() if rule.filters_versions}
+
+
+class SelectionPolicy:
+    def __init__(self, sections: dict[str, SectionPolicy]) -> None:
+        self.sections = sections
+
+    def section(self, section: str) -> SectionPolicy:
+        return self.sections.get(section) or SectionPolicy()
+
+    def tag_patterns(self, section: str, platform_os: str) -> tuple[re.Pattern, ...]:
+        matcher = self.section(section).tag_matchers.get(platform_os)
+        return matcher.patterns if matcher is not None else ()
+
+    def tag_allowed(self, section: str, platform_os: str, tag: str) -> bool:
+        matcher = self.section(section).tag_matchers.get(platform_os)
+        return matcher is None or matcher.matches(tag)
+
+    def allows(self, section: str, platform_id: str, entry: Mapping[str, Any] | None = None) -> bool:
+        section_policy = self.sections.get(section)
+        if section_policy is None:
+            return True
+        if platform_id in section_policy.exclude:
+            return False
+        if section_policy.include and platform_id not in section_policy.include:
+            return False
+        if entry is None:
+            return True
+        # No per-entry memo: the exporter asks once per platform id, so the work is kept
+        # inline and only the version decision is memoized, per token, by the rule.
+        platform_os = str(entry.get("platform_os") or infer_platform_os(platform_id)).strip()
+        rule = section_policy.version_rules.get(platform_os)
+        if rule is None:
+            return True
+        return rule.allows_version(derive_version_token(platform_id, platform_os, entry.get("platform_version")))
+
+
+def compile_selection_policy(raw_policy: Mapping[str, Mapping[str, Any]]) -> SelectionPolicy:
+    """Compile the dicts built by export-platform-catalog.py's load_selection_policy."""
+    sections: dict[str, SectionPolicy] = {}
+    for section, raw in raw_policy.items():
+        sections[section] = SectionPolicy(
+            include=frozenset(raw.get("include", ())),
+            exclude=frozenset(raw.get("exclude", ())),
+            tag_matchers={
+                platform_os: TagMatcher(patterns)
+                for platform_os, patterns in raw.get("tag_patterns", {}).items()
+                if patterns
+            },
+            rules={
+                platform_os: PolicyRule(
+                    keep_versions=frozenset(rule.get("keep_versions", ())),
+                    keep_major_versions=frozenset(rule.get("keep_major_versions", ())),
+                    keep_latest_n_stable=rule.get("keep_latest_n_stable"),
+                    keep_latest_n_major=rule.get("keep_latest_n_major"),
+                    include_moving_targets=bool(rule.get("include_moving_targets", False)),
+                )
+                for platform_os, rule in raw.get("rules", {}).items()
+                if isinstance(rule, dict)
+            },
+        )
+    return SelectionPolicy(sections)
@@ -0,0 +1,93 @@
+"""Content-hash cache for parsed YAML shared by the ci/ Python entry points.
+
+Parsing the larger inventories (.github/data/platform-availability.yml and
+friends) with PyYAML dominates the start-up of many small workflow steps.
+`load_yaml_file` keys each parse by the SHA-256 of the file bytes: results are
+memoized in-process and, unless disabled, stored as a pickle sidecar under the
+cache directory so later processes skip the YAML parse entirely. A sidecar
+that fails to unpickle is ignored and rewritten from a fresh parse. Nothing
+tracks whether a sidecar's contents still exist: once the directory outgrows
+its size bound, sidecars are evicted by mtime, least recently read first.
+
+Environment:
+  XYMON_CI_YAML_CACHE_DIR  cache directory (default: $XDG_CACHE_HOME/xymon-ci/yaml)
+  XYMON_CI_YAML_CACHE=0    disable the on-disk cache (the in-process memo stays)
+  XYMON_CI_YAML_CACHE_MAX_MB  size bound before LRU eviction (default: 64)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import pickle
+from pathlib import Path
+from typing import Any
+
+import yaml
+from cache_store import LruDirectory, configured_dir, env_max_bytes
+from yaml_compat import safe_load
+
+CACHE_FORMAT = "yaml-cache-v1"
+CACHE_DIR_ENV = "XYMON_CI_YAML_CACHE_DIR"
+CACHE_ENABLE_ENV = "XYMON_CI_YAML_CACHE"
+CACHE_MAX_MB_ENV = "XYMON_CI_YAML_CACHE_MAX_MB"
+DEFAULT_MAX_MB = 64
+SIDECAR_SUFFIX = ".pickle"
+
+# digest -> pickled document; loads return fresh objects so callers may mutate.
+_MEMO: dict[str, bytes] = {}
+_SIDECARS: dict[Path, LruDirectory] = {}
+
+
+def cache_dir() -> Path | None:
+    return configured_dir("yaml", CACHE_DIR_ENV, CACHE_ENABLE_ENV)
+
+
+def content_digest(raw: bytes) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{CACHE_FORMAT}\0{yaml.__version__}\0".encode("utf-8"))
+    digest.update(raw)
+    return digest.hexdigest()
+
+
+def sidecars(directory: Path) -> LruDirectory:
+    store = _SIDECARS.get(directory)
+    if store is None:
+        store = _SIDECARS[directory] = LruDirectory(
+            directory, SIDECAR_SUFFIX, env_max_bytes(CACHE_MAX_MB_ENV, DEFAULT_MAX_MB)
+        )
+    return store
+
+
+def parse_yaml_bytes(raw: bytes) -> Any:
+    digest = content_digest(raw)
+    blob = _MEMO.get(digest)
+    if blob is not None:
+        return pickle.loads(blob)
+
+    directory = cache_dir()
+    if directory is not None:
+        blob = sidecars(directory).read(digest)
+        if blob is not None:
+            try:
+                data = pickle.loads(blob)
+            except Exception:
+                blob = None
+            else:
+                _MEMO[digest] = blob
+                return data
+
+    data = safe_load(raw)
+    blob = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+    _MEMO[digest] = blob
+    if directory is not None:
+        sidecars(directory).write(digest, blob)
+    return data
+
+
+def load_yaml_file(path: Path) -> Any:
+    """Equivalent to yaml.safe_load(path.read_text()), served from the cache when possible."""
+    return parse_yaml_bytes(Path(path).read_bytes())
+
+
+def clear_memo() -> None:
+    _MEMO.clear()
@@ -0,0 +1,41 @@
+"""PyYAML loader/dumper selection shared by the ci/ and .github/scripts helpers.
+
+Uses the libyaml-backed CSafeLoader/CSafeDumper when PyYAML was built with
+libyaml and falls back to the pure-Python SafeLoader/SafeDumper otherwise.
+Set XYMON_CI_YAML_PURE=1 to force the pure-Python classes.
+
+The two dumpers agree on the block-style documents we generate (catalogs,
+lane files), which ci/run/tests/test-yaml-compat-dump-parity.sh checks. They
+do not agree everywhere: long double-quoted scalars are folded differently,
+so keep generated files to the shapes covered by that test.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any
+
+import yaml
+
+PURE_ENV = "XYMON_CI_YAML_PURE"
+
+
+def _select_classes() -> tuple[type, type, str]:
+    if os.environ.get(PURE_ENV, "").strip().lower() not in {"", "0", "false", "no", "off"}:
+        return yaml.SafeLoader, yaml.SafeDumper, "pure"
+    loader = getattr(yaml, "CSafeLoader", None)
+    dumper = getattr(yaml, "CSafeDumper", None)
+    if loader is None or dumper is None:
+        return yaml.SafeLoader, yaml.SafeDumper, "pure"
+    return loader, dumper, "libyaml"
+
+
+SafeLoader, SafeDumper, BACKEND = _select_classes()
+
+
+def safe_load(stream) -> Any:
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def safe_dump(data: Any, stream=None, **kwargs) -> Any:
+    return yaml.dump(data, stream, Dumper=SafeDumper, **kwargs)
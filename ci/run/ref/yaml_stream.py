@@ -0,0 +1,225 @@
+"""Streaming canonical YAML emitter for the generated platform catalogs.
+
+The catalogs export-platform-catalog.py writes (platform availability, raw
+Docker availability, discovered releases) share one fixed shape: a `source`
+mapping and a `platforms` mapping keyed by platform id. `write_catalog` emits
+that shape block by block straight to an open file, platforms in sorted order,
+instead of rendering the whole document as one string through PyYAML. The
+caller still builds the `platforms` mapping; only its text is streamed, one
+entry at a time. The same input always renders to the same bytes.
+
+Keys keep their insertion order. Scalars are quoted exactly as
+yaml_compat.safe_dump quotes them (the decision is memoized for the most
+recently used values), so re-dumping a streamed file with safe_dump reproduces
+it byte for byte. Unlike PyYAML, objects shared between entries are written
+out in full instead of as &id anchors. A scalar PyYAML would fold across lines
+at its position is left to PyYAML for that one entry.
+
+`write_catalog` also compares each rendered platform entry with the previous
+file's and returns a CatalogDiff naming the entries added, removed and changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterator, Mapping, TextIO
+
+import yaml
+
+from yaml_compat import SafeDumper, safe_dump
+
+INDENT = 2
+# PyYAML's default line width; plain and quoted scalars past it may be folded.
+BEST_WIDTH = 80
+# Longer keys are written as complex "? key" entries by PyYAML.
+MAX_SIMPLE_KEY = 128
+PLATFORMS_HEADER = "platforms:"
+
+
+class _NoAliasDumper(SafeDumper):
+    def ignore_aliases(self, data: Any) -> bool:
+        return True
+
+
+class _Unstreamable(Exception):
+    """The entry contains a scalar whose rendering depends on its column."""
+
+
+# Keys and enum-like values repeat across entries; ids, digests and dates do not.
+SCALAR_MEMO_SIZE = 4096
+
+
+# typed: True and 1 are equal as keys but dump differently.
+@lru_cache(maxsize=SCALAR_MEMO_SIZE, typed=True)
+def format_scalar(value: Any) -> str:
+    """The scalar as safe_dump writes it, on a single line where possible."""
+    text = safe_dump(value)
+    if text.endswith("\n...\n"):
+        text = text[: -len("\n...\n")]
+    return text.rstrip("\n")
+
+
+def _inline(value: Any, column: int) -> str:
+    if isinstance(value, dict):
+        return "{}"
+    if isinstance(value, list):
+        return "[]"
+    text = format_scalar(value)
+    if "\n" in text:
+        raise _Unstreamable
+    if column + len(text) > BEST_WIDTH and (" " in text or text.startswith('"')):
+        raise _Unstreamable
+    return text
+
+
+def _key(value: Any) -> str:
+    text = format_scalar(value)
+    if "\n" in text or len(text) > MAX_SIMPLE_KEY:
+        raise _Unstreamable
+    return text
+
+
+def _mapping_lines(mapping: Mapping[Any, Any], indent: int, lead: str | None = None) -> Iterator[str]:
+    for key, value in mapping.items():
+        prefix = lead if lead is not None else " " * indent
+        lead = None
+        head = f"{prefix}{_key(key)}:"
+        if isinstance(value, dict) and value:
+            yield head
+            yield from _mapping_lines(value, indent + INDENT)
+        elif isinstance(value, list) and value:
+            yield head
+            # PyYAML does not indent a block sequence under a mapping key.
+            yield from _sequence_lines(value, indent)
+        else:
+            yield f"{head} {_inline(value, len(head) + 1)}"
+
+
+def _sequence_lines(sequence: list[Any], indent: int, lead: str | None = None) -> Iterator[str]:
+    for item in sequence:
+        prefix = (lead if lead is not None else " " * indent) + "- "
+        lead = None
+        if isinstance(item, dict) and item:
+            yield from _mapping_lines(item, indent + INDENT, prefix)
+        elif isinstance(item, list) and item:
+            yield from _sequence_lines(item, indent + INDENT, prefix)
+        else:
+            yield prefix + _inline(item, len(prefix))
+
+
+def render_entry(key: Any, value: Any, indent: int = INDENT) -> str:
+    """One `key: value` block at indent, as it appears inside the document."""
+    try:
+        return "".join(line + "\n" for line in _mapping_lines({key: value}, indent))
+    except _Unstreamable:
+        pass
+    # Nest the entry as deep as it sits in the document so PyYAML folds at the same columns.
+    wrapped: Any = {key: value}
+    for level in range(indent // INDENT):
+        wrapped = {f"k{level}": wrapped}
+    text = yaml.dump(wrapped, Dumper=_NoAliasDumper, sort_keys=False)
+    return "".join(line + "\n" for line in text.splitlines()[indent // INDENT :])
+
+
+@dataclass
+class CatalogDiff:
+    path: str
+    previous: bool
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "path": self.path,
+            "previous": self.previous,
+            "added": self.added,
+            "removed": self.removed,
+            "changed": self.changed,
+            "unchanged": self.unchanged,
+        }
+
+    def format(self) -> str:
+        if not self.previous:
+            return f"{self.path}: new file, {len(self.added)} platforms"
+        if not (self.added or self.removed or self.changed):
+            return f"{self.path}: unchanged ({self.unchanged} platforms)"
+        lines = [
+            f"{self.path}: {len(self.added)} added, {len(self.removed)} removed, "
+            f"{len(self.changed)} changed, {self.unchanged} unchanged"
+        ]
+        for label, names in (("+", self.added), ("-", self.removed), ("~", self.changed)):
+            lines.extend(f"  {label} {name}" for name in names)
+        return "\n".join(lines)
+
+
+def previous_entry_digests(path: Path) -> dict[str, str] | None:
+    """Digest of each platform entry's text in an existing catalog, read line by line."""
+    try:
+        handle = path.open(encoding="utf-8")
+    except OSError:
+        return None
+    digests: dict[str, str] = {}
+    current: str | None = None
+    hasher = hashlib.sha256()
+    in_platforms = False
+    with handle:
+        for line in handle:
+            if not line.startswith(" "):
+                if current is not None:
+                    digests[current] = hasher.hexdigest()
+                    current = None
+                in_platforms = line.rstrip("\n") == PLATFORMS_HEADER
+                continue
+            if not in_platforms:
+                continue
+            if line[INDENT] != " ":
+                if current is not None:
+                    digests[current] = hasher.hexdigest()
+                current = line[INDENT:].split(":", 1)[0]
+                hasher = hashlib.sha256()
+            hasher.update(line.encode("utf-8"))
+    if current is not None:
+        digests[current] = hasher.hexdigest()
+    return digests
+
+
+def write_catalog(
+    handle: TextIO,
+    source: Mapping[str, Any],
+    platforms: Mapping[str, Any],
+    *,
+    previous: Path,
+    label: str | None = None,
+) -> CatalogDiff:
+    """Stream `source` and `platforms` (sorted by id) to handle, diffing against previous."""
+    previous_digests = previous_entry_digests(previous)
+    diff = CatalogDiff(label or str(previous), previous_digests is not None)
+    handle.write(render_entry("source", dict(source), indent=0))
+    if not platforms:
+        handle.write(f"{PLATFORMS_HEADER} {{}}\n")
+    else:
+        handle.write(PLATFORMS_HEADER + "\n")
+    seen: set[str] = set()
+    for platform_id in sorted(platforms):
+        text = render_entry(platform_id, platforms[platform_id])
+        handle.write(text)
+        name = format_scalar(platform_id)
+        seen.add(name)
+        if previous_digests is None:
+            diff.added.append(name)
+            continue
+        digest = previous_digests.get(name)
+        if digest is None:
+            diff.added.append(name)
+        elif digest != hashlib.sha256(text.encode("utf-8")).hexdigest():
+            diff.changed.append(name)
+        else:
+            diff.unchanged += 1
+    if previous_digests is not None:
+        diff.removed = sorted(name for name in previous_digests if name not in seen)
+    return diff
@@ -0,0 +1,28 @@
+#!/usr/bin/env bash
+# Start and stop a stand-in HTTP server (standin_server.py) from a test script.
+# Callers define fail() and keep server_pid empty until start_standin runs.
+
+standin_lib_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
+# start_standin SCRIPT PORT_FILE LOG_FILE [ARGS...]
+# Runs SCRIPT in the background with standin_server importable, waits for it to
+# write its port, and sets server_pid and base_url.
+start_standin() {
+  local port_file="$2"
+  PYTHONPATH="${standin_lib_dir}${PYTHONPATH:+:${PYTHONPATH}}" python3 "$@" &
+  server_pid=$!
+  for _ in $(seq 1 50); do
+    [[ -s "${port_file}" ]] && break
+    sleep 0.1
+  done
+  [[ -s "${port_file}" ]] || fail "stand-in server did not start"
+  base_url="http://127.0.0.1:$(cat "${port_file}")"
+}
+
+stop_standin() {
+  if [[ -n "${server_pid:-}" ]]; then
+    kill "${server_pid}" 2>/dev/null || true
+    wait "${server_pid}" 2>/dev/null || true
+    server_pid=""
+  fi
+}
@@ -0,0 +1,99 @@
+"""Local stand-in HTTP server shared by the ci/run/tests scripts.
+
+A test writes its routes as a StandinHandler subclass with a do_GET method and
+passes it to serve(), which listens on an ephemeral 127.0.0.1 port and writes
+that port to a file for standin.sh to pick up. Every answered request is
+appended to the request log as "<client port> <status> <path> <body length>",
+so a test can count requests per connection, status and path.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+_LOG_LOCK = threading.Lock()
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    log_file: Path
+    # Whether send_json answers with an ETag and honors If-None-Match.
+    etags = False
+
+    def log_message(self, *args) -> None:
+        pass
+
+    @property
+    def url_path(self) -> str:
+        return urlsplit(self.path).path
+
+    @property
+    def parts(self) -> list[str]:
+        return self.url_path.strip("/").split("/")
+
+    def query(self, name: str, default: str = "") -> str:
+        return parse_qs(urlsplit(self.path).query).get(name, [default])[0]
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.headers['Host']}"
+
+    def log_request_line(self, status: int | str, length: int = 0) -> None:
+        with _LOG_LOCK, self.log_file.open("a") as handle:
+            handle.write(f"{self.client_address[1]} {status} {self.url_path} {length}\n")
+
+    def send_body(
+        self,
+        body: bytes,
+        content_type: str = "application/json",
+        status: int = 200,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        self.log_request_line(status, len(body))
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_empty(self, status: int, headers: dict[str, str] | None = None) -> None:
+        self.log_request_line(status)
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if status != 304:
+            self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def send_json(self, payload: Any, headers: dict[str, str] | None = None, etag: bool | None = None) -> None:
+        body = json.dumps(payload).encode()
+        headers = dict(headers or {})
+        content_type = headers.pop("Content-Type", "application/json")
+        if self.etags if etag is None else etag:
+            tag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == tag:
+                return self.send_empty(304, {"ETag": tag})
+            headers["ETag"] = tag
+        self.send_body(body, content_type, headers=headers)
+
+    def send_redirect(self, location: str) -> None:
+        self.send_empty(302, {"Location": location})
+
+    def send_error(self, code, *args, **kwargs) -> None:
+        self.log_request_line(code)
+        super().send_error(code, *args, **kwargs)
+
+
+def serve(handler: type[StandinHandler], port_file: str | Path, log_file: str | Path) -> None:
+    handler.log_file = Path(log_file)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    Path(port_file).write_text(str(server.server_address[1]))
+    server.serve_forever()
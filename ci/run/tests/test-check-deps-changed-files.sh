@@ -0,0 +1,92 @@
+#!/usr/bin/env bash
+set -euo pipefail
+IFS=$' \t\n'
+
+script_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+repo_root="$(cd "${script_dir}/../../.." && pwd)"
+
+fail() {
+  echo "FAIL: $*" >&2
+  exit 1
+}
+
+tmpdir="$(mktemp -d)"
+trap 'rm -rf "${tmpdir}"' EXIT
+
+# Incremental check-deps runs pick the checks whose inputs changed: a lane file
+# only feeds the ref-workflow checks, the deps map feeds most content checks,
+# and a change to the check definitions themselves must force the full run.
+run_changed() {
+  local name="$1"
+  shift
+  if ! python3 "${repo_root}/ci/deps/check-deps.py" "$@" >"${tmpdir}/${name}.out" 2>&1; then
+    cat "${tmpdir}/${name}.out" >&2
+    fail "check-deps.py $* exited non-zero"
+  fi
+}
+
+expect_line() {
+  local name="$1"
+  local line="$2"
+  grep -Fxq -- "${line}" "${tmpdir}/${name}.out" || {
+    cat "${tmpdir}/${name}.out" >&2
+    fail "${name}: expected line: ${line}"
+  }
+}
+
+reject_text() {
+  local name="$1"
+  local text="$2"
+  if grep -Fq -- "${text}" "${tmpdir}/${name}.out"; then
+    cat "${tmpdir}/${name}.out" >&2
+    fail "${name}: unexpected output: ${text}"
+  fi
+}
+
+incremental_line() {
+  grep -E '^-- incremental: ' "${tmpdir}/$1.out" || true
+}
+
+all_checks_ok="deps content + CMake + runtime + workflow checks OK"
+
+run_changed lane --changed-files ci/run/ref/lanes/almalinux.yml
+expect_line lane "-- incremental: 2 of 15 checks selected (ref-workflow-deps, ref-workflow-catalog)"
+expect_line lane "${all_checks_ok}"
+
+run_changed deps_map --changed-files ci/deps/data/deps-map.yaml
+selected="$(incremental_line deps_map)"
+[[ "${selected}" == "-- incremental: "*" of 15 checks selected ("* ]] || fail "deps map: no selection line: ${selected}"
+for check in package-scripts packager-keys docker-deps ref-workflow-deps; do
+  [[ "${selected}" == *"${check}"* ]] || fail "deps map: ${check} not selected: ${selected}"
+done
+[[ "${selected}" != *"ref-workflow-catalog"* ]] || fail "deps map: lane-only check selected: ${selected}"
+reject_text deps_map "running all checks"
+expect_line deps_map "${all_checks_ok}"
+
+run_changed graph --changed-files ci/deps/checkdeps/report.py
+grep -Eq '^-- incremental: check definitions changed \(.*\); running all checks$' "${tmpdir}/graph.out" || {
+  cat "${tmpdir}/graph.out" >&2
+  fail "graph: a check definition change did not force the full run"
+}
+expect_line graph "${all_checks_ok}"
+
+run_changed unrelated --changed-files README.md
+expect_line unrelated "-- incremental: 0 of 15 checks selected (none)"
+expect_line unrelated "deps structure OK; no other checks ran (none selected for the changed files)"
+reject_text unrelated "${all_checks_ok}"
+
+# --changed-since asks git, so run it against a scratch repository of the tracked files.
+scratch="${tmpdir}/repo"
+mkdir -p "${scratch}"
+git -C "${repo_root}" ls-files -z | (cd "${repo_root}" && tar --null -T - -cf -) | tar -xf - -C "${scratch}"
+git -C "${scratch}" init -q
+git -C "${scratch}" add -A
+git -C "${scratch}" -c user.name=ci -c user.email=ci@localhost commit -qm base
+echo "# touched" >>"${scratch}/ci/run/ref/lanes/almalinux.yml"
+if ! python3 "${scratch}/ci/deps/check-deps.py" --changed-since HEAD >"${tmpdir}/since.out" 2>&1; then
+  cat "${tmpdir}/since.out" >&2
+  fail "check-deps.py --changed-since HEAD exited non-zero"
+fi
+expect_line since "-- incremental: 2 of 15 checks selected (ref-workflow-deps, ref-workflow-catalog)"
+
+echo "OK: check-deps incremental selection"
@@ -0,0 +1,59 @@
+#!/usr/bin/env bash
+set -euo pipefail
+IFS=$' \t\n'
+
+script_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+repo_root="$(cd "${script_dir}/../../.." && pwd)"
+
+fail() {
+  echo "FAIL: $*" >&2
+  exit 1
+}
+
+tmpdir="$(mktemp -d)"
+trap 'rm -rf "${tmpdir}"' EXIT
+
+# Checks run on a worker pool but print in registration order, so the log and
+# the report must not depend on how many workers ran them.
+for jobs in 1 4; do
+  if ! python3 "${repo_root}/ci/deps/check-deps.py" --jobs "${jobs}" \
+    --report-json "${tmpdir}/report-${jobs}.json" \
+    --report-sarif "${tmpdir}/report-${jobs}.sarif" \
+    >"${tmpdir}/jobs-${jobs}.out" 2>&1; then
+    cat "${tmpdir}/jobs-${jobs}.out" >&2
+    fail "check-deps.py --jobs ${jobs} exited non-zero"
+  fi
+done
+
+cmp -s "${tmpdir}/jobs-1.out" "${tmpdir}/jobs-4.out" || {
+  diff -u "${tmpdir}/jobs-1.out" "${tmpdir}/jobs-4.out" >&2 || true
+  fail "--jobs 1 and --jobs 4 printed different output"
+}
+
+# Both reports also record the job count and timings; everything else must match.
+strip_timing() {
+  python3 - "$1" <<'PY'
+import json
+import sys
+
+report = json.load(open(sys.argv[1], encoding="utf-8"))
+# JSON keeps them at the top level; SARIF under each run's properties.
+for holder in [report] + [run.get("properties", {}) for run in report.get("runs", [])]:
+    holder.pop("jobs", None)
+    holder.pop("wall_seconds", None)
+    checks = holder.get("checks", [])
+    for check in checks.values() if isinstance(checks, dict) else checks:
+        check.pop("elapsed_seconds", None)
+print(json.dumps(report, indent=2, sort_keys=True))
+PY
+}
+for format in json sarif; do
+  strip_timing "${tmpdir}/report-1.${format}" >"${tmpdir}/report-1.${format}.stripped"
+  strip_timing "${tmpdir}/report-4.${format}" >"${tmpdir}/report-4.${format}.stripped"
+  cmp -s "${tmpdir}/report-1.${format}.stripped" "${tmpdir}/report-4.${format}.stripped" || {
+    diff -u "${tmpdir}/report-1.${format}.stripped" "${tmpdir}/report-4.${format}.stripped" >&2 || true
+    fail "--jobs 1 and --jobs 4 wrote different ${format} reports"
+  }
+done
+
+echo "OK: check-deps output is independent of --jobs"
@@ -0,0 +1,48 @@
+#!/usr/bin/env bash
+set -euo pipefail
+IFS=$' \t\n'
+
+script_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+repo_root="$(cd "${script_dir}/../../.." && pwd)"
+
+fail() {
+  echo "FAIL: $*" >&2
+  exit 1
+}
+
+tmpdir="$(mktemp -d)"
+trap 'rm -rf "${tmpdir}"' EXIT
+
+# The in-process deps-map resolver replaced resolve-map.awk as the default; parity
+# mode runs both over every combination the checks ask for and fails on any
+# difference, so the two must agree on the committed deps map.
+command -v awk >/dev/null 2>&1 || fail "awk is required for --map-resolver parity"
+
+if ! python3 "${repo_root}/ci/deps/check-deps.py" --map-resolver parity >"${tmpdir}/parity.out" 2>&1; then
+  cat "${tmpdir}/parity.out" >&2
+  fail "check-deps.py --map-resolver parity exited non-zero"
+fi
+
+grep -Fxq -- "-- deps-map: resolver parity" "${tmpdir}/parity.out" || {
+  cat "${tmpdir}/parity.out" >&2
+  fail "parity check did not run"
+}
+grep -Eq '^   OK: python map resolver matches resolve-map\.awk for [1-9][0-9]* combinations$' "${tmpdir}/parity.out" || {
+  cat "${tmpdir}/parity.out" >&2
+  fail "parity check did not report a match"
+}
+if grep -Fq "ERROR:" "${tmpdir}/parity.out"; then
+  cat "${tmpdir}/parity.out" >&2
+  fail "parity run reported errors"
+fi
+
+# The default run must not pay for the awk resolver.
+if ! python3 "${repo_root}/ci/deps/check-deps.py" >"${tmpdir}/default.out" 2>&1; then
+  cat "${tmpdir}/default.out" >&2
+  fail "check-deps.py exited non-zero"
+fi
+if grep -Fq "resolver parity" "${tmpdir}/default.out"; then
+  fail "parity check ran without --map-resolver parity"
+fi
+
+echo "OK: check-deps map resolver parity"
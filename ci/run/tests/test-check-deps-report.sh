@@ -0,0 +1,97 @@
+#!/usr/bin/env bash
+set -euo pipefail
+IFS=$' \t\n'
+
+script_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+repo_root="$(cd "${script_dir}/../../.." && pwd)"
+
+fail() {
+  echo "FAIL: $*" >&2
+  exit 1
+}
+
+tmpdir="$(mktemp -d)"
+trap 'rm -rf "${tmpdir}"' EXIT
+
+# Inject a catalog error into a scratch copy of the tracked files and check that
+# the JSON and SARIF reports carry it with its check, file and key path.
+scratch="${tmpdir}/repo"
+mkdir -p "${scratch}"
+git -C "${repo_root}" ls-files -z | (cd "${repo_root}" && tar --null -T - -cf -) | tar -xf - -C "${scratch}"
+
+catalog="${scratch}/ci/deps/platform-catalog.yaml"
+python3 - "${catalog}" <<'PY'
+import sys
+from pathlib import Path
+
+path = Path(sys.argv[1])
+text = path.read_text(encoding="utf-8")
+needle = "  ubuntu:\n    runtime: docker\n"
+if needle not in text:
+    raise SystemExit(f"{path}: ubuntu entry not found")
+path.write_text(text.replace(needle, "  ubuntu:\n    runtime: podman\n", 1), encoding="utf-8")
+PY
+
+status=0
+python3 "${scratch}/ci/deps/check-deps.py" \
+  --report-json "${tmpdir}/report.json" \
+  --report-sarif "${tmpdir}/report.sarif" \
+  >"${tmpdir}/check.out" 2>&1 || status=$?
+[[ "${status}" -eq 1 ]] || {
+  cat "${tmpdir}/check.out" >&2
+  fail "expected exit 1 for the injected error, got ${status}"
+}
+message="platform catalog entry 'ubuntu' has unsupported runtime 'podman'"
+grep -Fq "ERROR: ${message}" "${tmpdir}/check.out" || {
+  cat "${tmpdir}/check.out" >&2
+  fail "injected error not printed"
+}
+
+python3 - "${tmpdir}/report.json" "${tmpdir}/report.sarif" "${message}" <<'PY'
+import json
+import sys
+
+json_path, sarif_path, message = sys.argv[1:4]
+expected = {
+    "check": "deps-structure",
+    "severity": "error",
+    "message": message,
+    "file": "ci/deps/platform-catalog.yaml",
+    "key_path": "platforms.ubuntu",
+}
+
+report = json.load(open(json_path, encoding="utf-8"))
+if report.get("ok") is not False or report.get("exit_code") != 1:
+    raise SystemExit(f"JSON report: expected ok=false exit_code=1, got {report.get('ok')} {report.get('exit_code')}")
+errors = [
+    finding
+    for check in report.get("checks", [])
+    for finding in check.get("findings", [])
+    if finding.get("severity") == "error"
+]
+if errors != [expected]:
+    raise SystemExit(f"JSON report: expected only {expected}, got {errors}")
+structure = next((check for check in report["checks"] if check.get("name") == "deps-structure"), None)
+if structure is None or structure.get("status") != "failed":
+    raise SystemExit(f"JSON report: deps-structure not marked failed: {structure}")
+
+sarif = json.load(open(sarif_path, encoding="utf-8"))
+if sarif.get("version") != "2.1.0":
+    raise SystemExit(f"SARIF report: unexpected version {sarif.get('version')}")
+results = [result for run in sarif.get("runs", []) for result in run.get("results", []) if result.get("level") == "error"]
+if len(results) != 1:
+    raise SystemExit(f"SARIF report: expected one error result, got {results}")
+result = results[0]
+location = (result.get("locations") or [{}])[0]
+actual = {
+    "check": result.get("ruleId"),
+    "message": (result.get("message") or {}).get("text"),
+    "file": location.get("physicalLocation", {}).get("artifactLocation", {}).get("uri"),
+    "key_path": (location.get("logicalLocations") or [{}])[0].get("fullyQualifiedName"),
+}
+wanted = {key: expected[key] for key in actual}
+if actual != wanted:
+    raise SystemExit(f"SARIF report: expected {wanted}, got {actual}")
+PY
+
+echo "OK: check-deps reports carry the injected finding"
@@ -0,0 +1,303 @@
+#!/usr/bin/env bash
+set -euo pipefail
+IFS=$' \t\n'
+
+script_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+repo_root="$(cd "${script_dir}/../../.." && pwd)"
+
+# shellcheck source=lib/standin.sh
+source "${script_dir}/lib/standin.sh"
+
+fail() {
+  echo "FAIL: $*" >&2
+  exit 1
+}
+
+tmpdir="$(mktemp -d)"
+server_pid=""
+cleanup() {
+  stop_standin
+  rm -rf "${tmpdir}"
+}
+trap cleanup EXIT
+
+# export-platform-catalog.py against a local stand-in for the Docker registry,
+# Docker Hub and GitHub APIs: a serial run and a concurrent run must produce
+# byte-identical catalogs, the concurrent run must share one registry token, and
+# requests must reuse keep-alive connections. A third run against the same HTTP
+# cache must revalidate (304) instead of downloading again. Throttled (429)
+# listing pages must be retried, and show up in the budget report. An export
+# that dies partway must leave the outputs untouched and, with --resume, only
+# fetch what its journal does not already hold. Rerunning an export that left
+# tag watermarks behind must only read the newest page of each listing, unless
+# their last full listing is too old.
+standin="${tmpdir}/standin.py"
+cat >"${standin}" <<'PY'
+import hashlib
+import sys
+from pathlib import Path
+
+import yaml
+from standin_server import StandinHandler, serve
+
+root = Path(sys.argv[3])
+# While this file exists, release lookups fail so an export dies partway through.
+fail_releases = Path(sys.argv[4])
+
+raw = yaml.safe_load((root / ".github/data/docker-availability-raw.yml").read_text())["platforms"]
+manifests = {(entry["repository"], str(entry["tag"])): entry for entry in raw.values()}
+tags: dict[str, list[str]] = {}
+for repository, tag in manifests:
+    tags.setdefault(repository, []).append(tag)
+for repository in tags:
+    # Tags the selection policy filters out, so listings span several pages.
+    tags[repository] += [f"nightly-{n}" for n in range(5)]
+    tags[repository].sort()
+# Listings are served newest first; the filler tags are the most recent.
+last_updated = {
+    (repository, name): f"2024-01-01T00:00:{second:02d}Z"
+    for repository, names in tags.items()
+    for second, name in enumerate(sorted(names, key=lambda name: (name.startswith("nightly-"), name)))
+}
+for repository, names in tags.items():
+    names.sort(key=lambda name: last_updated[(repository, name)], reverse=True)
+sources = yaml.safe_load((root / "ci/deps/platform-bsd-sources.yaml").read_text())["sources"]
+assets: dict[str, list[dict]] = {}
+for source in sources.values():
+    name = f"{source['os']}-{source['version']}-{source['arch']}.qcow2"
+    assets.setdefault(source["repo"], []).append(
+        {
+            "name": name,
+            "browser_download_url": f"https://example.invalid/{source['repo']}/{name}",
+            "size": 1024,
+            "updated_at": "2024-01-01T00:00:00Z",
+        }
+    )
+PAGE_SIZE = 3
+throttled: set[str] = set()
+
+
+class Handler(StandinHandler):
+    etags = True
+
+    def do_GET(self):
+        parts = self.parts
+        if parts == ["token"]:
+            return self.send_json({"token": "standin-token"}, etag=False)
+        if len(parts) == 5 and parts[0] == "v2" and parts[3] == "manifests":
+            if self.headers.get("Authorization") != "Bearer standin-token":
+                return self.send_error(401)
+            repository, tag = f"{parts[1]}/{parts[2]}", parts[4]
+            entry = manifests.get((repository, tag))
+            if entry is None:
+                return self.send_error(404)
+            index = {
+                "manifests": [
+                    {"platform": {"os": "linux", "architecture": arch}}
+                    for arch in entry["discovered_arches"]
+                ]
+            }
+            return self.send_json(
+                index,
+                {"Content-Type": entry["content_type"], "docker-content-digest": entry["digest"]},
+            )
+        if len(parts) == 6 and parts[:2] == ["v2", "namespaces"] and parts[5] == "tags":
+            repository = f"{parts[2]}/{parts[4]}"
+            names = tags.get(repository, [])
+            page = int(self.query("page", "1"))
+            if page == 2 and self.url_path not in throttled:
+                # Throttle each listing's second page once; the client must retry.
+                throttled.add(self.url_path)
+                return self.send_empty(429, {"Retry-After": "0"})
+            chunk = names[(page - 1) * PAGE_SIZE : page * PAGE_SIZE]
+            more = page * PAGE_SIZE < len(names)
+            return self.send_json(
+                {
+                    "count": len(names),
+                    "next": f"{self.url_path}?page={page + 1}" if more else None,
+                    "results": [
+                        {"name": name, "last_updated": last_updated[(repository, name)]} for name in chunk
+                    ],
+                }
+            )
+        if len(parts) == 5 and parts[0] == "repos" and parts[3:] == ["releases", "latest"]:
+            if fail_releases.exists():
+                return self.send_error(500)
+            repo = f"{parts[1]}/{parts[2]}"
+            tag = "v" + hashlib.sha256(repo.encode()).hexdigest()[:6]
+            return self.send_json(
+                {"tag_name": tag, "html_url": f"https://example.invalid/{repo}/{tag}", "assets": assets.get(repo, [])},
+                {"X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": "4000", "X-RateLimit-Reset": "4102444800"},
+            )
+        return self.send_error(404)
+
+
+serve(Handler, sys.argv[1], sys.argv[2])
+PY
+
+request_log="${tmpdir}/requests.log"
+fail_releases="${tmpdir}/fail-releases"
+start_standin "${standin}" "${tmpdir}/port" "${request_log}" "${repo_root}" "${fail_releases}"
+
+outputs=(
+  .github/data/platform-releases-discovered.yml
+  .github/data/docker-availability-raw.yml
+  .github/data/platform-availability.yml
+)
+
+run_export() {
+  local name="$1"
+  local cache_name="$2"
+  shift 2
+  local copy="${tmpdir}/${name}"
+  if [[ ! -d "${copy}" ]]; then
+    mkdir -p "${copy}/.github" "${copy}/ci/deps" "${copy}/ci/run"
+    cp -R "${repo_root}/.github/scripts" "${repo_root}/.github/data" "${copy}/.github/"
+    cp "${repo_root}"/ci/deps/*.yaml "${copy}/ci/deps/"
+    cp -R "${repo_root}/ci/run/ref" "${copy}/ci/run/"
+  fi
+  env \
+    XYMON_REGISTRY_BASE="${base_url}" \
+    XYMON_REGISTRY_TOKEN_URL="${base_url}/token" \
+    XYMON_DOCKER_HUB_URL="${base_url}" \
+    GITHUB_API_URL="${base_url}" \
+    XYMON_CI_YAML_CACHE=0 \
+    XYMON_CI_HTTP_CACHE_DIR="${tmpdir}/http-cache-${cache_name}" \
+    python3 "${copy}/.github/scripts/export-platform-catalog.py" \
+      --refresh-container-manifests --journal "${tmpdir}/${name}.journal" "$@" 2>"${tmpdir}/${name}.log"
+}
+
+export_copy() {
+  local name="$1"
+  run_export "$@" || { cat "${tmpdir}/${name}.log" >&2; fail "export failed (${name})"; }
+}
+
+export_copy serial serial --jobs 1 --per-host 1 --budget-report "${tmpdir}/budget.json"
+serial_requests="$(wc -l <"${request_log}")"
+export_copy concurrent concurrent --jobs 8 --per-host 4
+concurrent_log="$(tail -n "+$((serial_requests + 1))" "${request_log}")"
+token_requests="$(grep -c ' /token ' <<<"${concurrent_log}" || true)"
+logged_requests="$(wc -l <"${request_log}")"
+export_copy revalidated concurrent --jobs 8 --per-host 4
+revalidated_log="$(tail -n "+$((logged_requests + 1))" "${request_log}")"
+concurrent_requests="$(wc -l <<<"${concurrent_log}")"
+concurrent_connections="$(cut -d' ' -f1 <<<"${concurrent_log}" | sort -u | wc -l)"
+
+for output in "${outputs[@]}"; do
+  cmp -s "${tmpdir}/serial/${output}" "${tmpdir}/concurrent/${output}" \
+    || fail "${output} differs between serial and concurrent exports"
+  cmp -s "${tmpdir}/serial/${output}" "${tmpdir}/revalidated/${output}" \
+    || fail "${output} differs when served from the HTTP cache"
+done
+(
+  cd "${tmpdir}/serial"
+  PYTHONPATH="ci/run/ref" python3 - "${outputs[@]}" <<'PY'
+import sys
+from pathlib import Path
+
+import yaml_compat
+
+for name in sys.argv[1:]:
+    text = Path(name).read_text(encoding="utf-8")
+    assert yaml_compat.safe_dump(yaml_compat.safe_load(text), sort_keys=False) == text, name
+PY
+) || fail "streamed catalogs do not round-trip byte-identically through yaml_compat.safe_dump"
+grep -q 'discovered_arches' "${tmpdir}/concurrent/.github/data/docker-availability-raw.yml" \
+  || fail "concurrent export discovered no container platforms"
+[[ "${token_requests}" == "1" ]] \
+  || fail "expected one shared registry token request, saw ${token_requests}"
+(( concurrent_connections < concurrent_requests )) \
+  || fail "no keep-alive reuse: ${concurrent_requests} requests over ${concurrent_connections} connections"
+
+python3 - "${tmpdir}/budget.json" <<'PY' || fail "budget report does not record the throttled retries"
+import json
+import sys
+
+hosts = json.load(open(sys.argv[1]))["hosts"]
+assert sum(host["retries"] for host in hosts) > 0, hosts
+assert any(host["limit"] == 5000 for host in hosts), hosts
+PY
+touch "${fail_releases}"
+if run_export resumed resumed --jobs 8 --per-host 4; then
+  fail "export succeeded although release lookups failed"
+fi
+rm -f "${fail_releases}"
+for output in "${outputs[@]}"; do
+  cmp -s "${repo_root}/${output}" "${tmpdir}/resumed/${output}" \
+    || fail "${output} was modified by the failed export"
+done
+[[ -s "${tmpdir}/resumed.journal" ]] || fail "failed export left no journal"
+ls "${tmpdir}"/resumed/.github/data/.*.tmp >/dev/null 2>&1 && fail "failed export left temporary files"
+logged_requests="$(wc -l <"${request_log}")"
+export_copy resumed resumed --jobs 8 --per-host 4 --resume
+resumed_log="$(tail -n "+$((logged_requests + 1))" "${request_log}")"
+for output in "${outputs[@]}"; do
+  cmp -s "${tmpdir}/serial/${output}" "${tmpdir}/resumed/${output}" \
+    || fail "${output} differs after resuming"
+done
+if grep -q '/tags \| /v2/[^ ]*/manifests/' <<<"${resumed_log}"; then
+  fail "resumed export fetched tags or manifests again"
+fi
+[[ ! -e "${tmpdir}/resumed.journal" ]] || fail "completed export kept its journal"
+
+logged_requests="$(wc -l <"${request_log}")"
+export_copy serial serial --jobs 1 --per-host 1 --diff-summary "${tmpdir}/diff.json"
+incremental_log="$(tail -n "+$((logged_requests + 1))" "${request_log}")"
+for output in "${outputs[@]}"; do
+  cmp -s "${tmpdir}/concurrent/${output}" "${tmpdir}/serial/${output}" \
+    || fail "${output} differs after an incremental tag scan"
+done
+repositories="$(grep -c '^  [a-z]*/[^ ]*:$' "${tmpdir}/serial/.github/data/docker-tag-watermarks.yml")"
+tag_listings="$(grep -c '/tags ' <<<"${incremental_log}" || true)"
+[[ "${repositories}" -gt 0 && "${tag_listings}" == "${repositories}" ]] \
+  || fail "incremental scan read ${tag_listings} tag pages for ${repositories} repositories"
+python3 - "${tmpdir}/diff.json" <<'PY' || fail "diff summary reports changes for an identical rerun"
+import json
+import sys
+
+files = json.load(open(sys.argv[1]))["files"]
+assert len(files) == 3, files
+for entry in files:
+    assert entry["previous"] and entry["unchanged"] > 0, entry
+    assert not (entry["added"] or entry["removed"] or entry["changed"]), entry
+PY
+# Watermarks whose last full listing is too old must be listed in full again.
+sed -i 's/^    full_scan_on: .*/    full_scan_on: 2000-01-01/' "${tmpdir}/serial/.github/data/docker-tag-watermarks.yml"
+logged_requests="$(wc -l <"${request_log}")"
+export_copy serial serial --jobs 1 --per-host 1
+stale_log="$(tail -n "+$((logged_requests + 1))" "${request_log}")"
+tag_listings="$(grep -c '/tags ' <<<"${stale_log}" || true)"
+[[ "${tag_listings}" -gt "${repositories}" ]] \
+  || fail "stale watermarks were scanned incrementally (${tag_listings} tag pages for ${repositories} repositories)"
+grep -q 'full_scan_on: 2000-01-01' "${tmpdir}/serial/.github/data/docker-tag-watermarks.yml" \
+  && fail "full listing did not refresh full_scan_on"
+for output in "${outputs[@]}"; do
+  cmp -s "${tmpdir}/concurrent/${output}" "${tmpdir}/serial/${output}" \
+    || fail "${output} differs after a full tag listing"
+done
+
+grep -q ' 304 ' <<<"${revalidated_log}" \
+  || fail "cached export sent no conditional requests"
+if grep ' 200 ' <<<"${revalidated_log}" | grep -qv ' /token '; then
+  fail "cached export re-downloaded unchanged payloads"
+fi
+
+export_copy recorded recorded --jobs 8 --per-host 4 --record "${tmpdir}/fixtures.jsonl.gz"
+gzip -t "${tmpdir}/fixtures.jsonl.gz" || fail "fixture bundle is not a complete gzip stream"
+if zgrep -q '"token": "[^r]' "${tmpdir}/fixtures.jsonl.gz"; then
+  fail "fixture bundle kept a registry token"
+fi
+# Replay with the stand-in gone: every answer has to come from the bundle.
+stop_standin
+logged_requests="$(wc -l <"${request_log}")"
+export_copy replayed replayed --jobs 8 --per-host 4 --replay "${tmpdir}/fixtures.jsonl.gz" --replay-latency 5
+for output in "${outputs[@]}"; do
+  cmp -s "${tmpdir}/recorded/${output}" "${tmpdir}/replayed/${output}" \
+    || fail "${output} differs between the recorded and the replayed export"
+done
+[[ "$(wc -l <"${request_log}")" == "${logged_requests}" ]] || fail "replayed export reached the network"
+if run_export offline recorded --jobs 8 --per-host 4 --replay "${tmpdir}/replayed/.github/data/docker-tag-watermarks.yml"; then
+  fail "export accepted a file that is not a fixture bundle"
+fi
+
+echo "OK: export-platform-catalog serial, concurrent, cached, resumed and replayed fetches agree"
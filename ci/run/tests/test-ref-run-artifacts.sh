@@ -0,0 +1,255 @@
+#!/usr/bin/env bash
+set -euo pipefail
+IFS=$' \t\n'
+
+script_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+repo_root="$(cd "${script_dir}/../../.." && pwd)"
+
+# shellcheck source=lib/standin.sh
+source "${script_dir}/lib/standin.sh"
+
+fail() {
+  echo "FAIL: $*" >&2
+  exit 1
+}
+
+tmpdir="$(mktemp -d)"
+server_pid=""
+cleanup() {
+  stop_standin
+  rm -rf "${tmpdir}"
+}
+trap cleanup EXIT
+
+# analyze-ref-generation-run.py against a local stand-in for the GitHub Actions
+# API: a run whose artifact listing spans two pages, with dependency reports
+# and lane outcomes behind redirected zip downloads, plus an expired artifact,
+# one past its expires_at that the listing has not flagged yet, a broken archive and an empty one. A serial and a concurrent artifact fetch
+# must produce the same report, and every artifact must be resolved once.
+# Archives are read with Range requests, so the large build logs next to the
+# dependency reports are not downloaded; a server that ignores Range must
+# still produce the same report from whole downloads. With the artifact store
+# enabled, a rerun must read every payload from it without touching an
+# archive, and resolve-sync-artifact-runs.py must remember that the run has
+# ref artifacts.
+standin="${tmpdir}/standin.py"
+cat >"${standin}" <<'PY'
+import io
+import json
+import random
+import sys
+import zipfile
+from pathlib import Path
+
+from standin_server import StandinHandler, serve
+
+# While this file exists, Range headers are ignored and blobs are sent whole.
+ranges_ignored = Path(sys.argv[3])
+REPO = "o/r"
+RUN_ID = 42
+
+
+def zip_bytes(members: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+jobs = []
+artifacts = []
+blobs: dict[int, bytes] = {}
+for n in range(60):
+    lane = f"lane-{n:02d}"
+    jobs.append({"id": 1000 + n, "name": lane, "status": "completed", "conclusion": "success"})
+    mode = "generate" if n % 2 else "compare"
+    report = {"mode": mode, "counts": {"packages": n}, "packages": [f"pkg{n}"]}
+    deps_id = 2 * n + 1
+    blobs[deps_id] = zip_bytes(
+        {
+            "deps-report.json": json.dumps(report).encode(),
+            # A large, incompressible sibling the report readers never need.
+            "build.log": random.Random(n).randbytes(512 * 1024),
+        }
+    )
+    artifacts.append({"id": deps_id, "name": f"deps_cmake_ubuntu-24.04_default__amd64__{mode}__{lane}"})
+    outcome_id = 2 * n + 2
+    blobs[outcome_id] = zip_bytes(
+        {"lane-outcome.json": json.dumps({"lane_name": lane, "lane_outcome": "success"}).encode()}
+    )
+    artifacts.append({"id": outcome_id, "name": f"lane_outcome__{lane}"})
+artifacts.append({"id": 500, "name": "deps_cmake_debian-12_default__amd64__generate__old", "expired": True})
+artifacts.append(
+    {"id": 504, "name": "deps_cmake_debian-12_default__amd64__generate__lapsed", "expires_at": "2000-01-01T00:00:00Z"}
+)
+artifacts.append({"id": 501, "name": "deps_cmake_debian-12_default__amd64__generate__broken"})
+blobs[501] = b"not a zip archive"
+artifacts.append({"id": 502, "name": "deps_cmake_debian-12_default__amd64__generate__empty"})
+blobs[502] = b""
+artifacts.append({"id": 503, "name": "ref__linux"})
+for artifact in artifacts:
+    artifact.setdefault("expired", False)
+    artifact["size_in_bytes"] = len(blobs.get(artifact["id"], b""))
+    artifact["updated_at"] = "2024-01-01T00:00:00Z"
+    artifact.setdefault("expires_at", "2999-01-01T00:00:00Z")
+    artifact["archive_download_url"] = f"/repos/{REPO}/actions/artifacts/{artifact['id']}/zip"
+run = {
+    "id": RUN_ID,
+    "run_number": 7,
+    "name": "ref",
+    "status": "completed",
+    "conclusion": "success",
+    "event": "workflow_dispatch",
+    "head_branch": "main",
+    "head_sha": "0" * 40,
+    "html_url": f"https://example.invalid/{REPO}/actions/runs/{RUN_ID}",
+    "created_at": "2024-01-01T00:00:00Z",
+    "updated_at": "2024-01-01T01:00:00Z",
+}
+
+
+class Handler(StandinHandler):
+    def send_blob(self, body):
+        requested = self.headers.get("Range", "")
+        if ranges_ignored.exists() or not requested.startswith("bytes="):
+            return self.send_body(body, "application/zip")
+        first, _, last = requested[len("bytes=") :].partition("-")
+        if first:
+            start, end = int(first), min(int(last) + 1 if last else len(body), len(body))
+        else:
+            start, end = max(len(body) - int(last), 0), len(body)
+        if start >= end:
+            return self.send_empty(416, {"Content-Range": f"bytes */{len(body)}"})
+        return self.send_body(
+            body[start:end],
+            "application/zip",
+            206,
+            {"Content-Range": f"bytes {start}-{end - 1}/{len(body)}"},
+        )
+
+    def do_GET(self):
+        parts = self.parts
+        page = int(self.query("page", "1"))
+        if parts[:5] == ["repos", "o", "r", "actions", "runs"]:
+            if parts[5:] == [str(RUN_ID)]:
+                return self.send_json(run)
+            if parts[5:] == [str(RUN_ID), "jobs"]:
+                return self.send_json({"jobs": jobs[(page - 1) * 100 : page * 100]})
+            if parts[5:] == [str(RUN_ID), "artifacts"]:
+                chunk = [
+                    dict(artifact, archive_download_url=self.base_url + artifact["archive_download_url"])
+                    for artifact in artifacts[(page - 1) * 100 : page * 100]
+                ]
+                return self.send_json({"artifacts": chunk})
+        if parts[:5] == ["repos", "o", "r", "actions", "artifacts"] and parts[6:] == ["zip"]:
+            return self.send_redirect(f"{self.base_url}/blob/{parts[5]}.zip")
+        if len(parts) == 2 and parts[0] == "blob":
+            body = blobs.get(int(parts[1].removesuffix(".zip")))
+            if body is None:
+                return self.send_error(404)
+            return self.send_blob(body)
+        return self.send_error(404)
+
+
+serve(Handler, sys.argv[1], sys.argv[2])
+PY
+
+request_log="${tmpdir}/requests.log"
+ranges_ignored="${tmpdir}/ranges-ignored"
+start_standin "${standin}" "${tmpdir}/port" "${request_log}" "${ranges_ignored}"
+
+run_analyzer() {
+  local name="$1"
+  shift
+  env \
+    GITHUB_API_URL="${base_url}" \
+    GH_TOKEN="standin-token" \
+    XYMON_CI_HTTP_CACHE=0 \
+    XYMON_CI_ARTIFACT_CACHE=0 \
+    XYMON_CI_ARTIFACT_CACHE_DIR="${tmpdir}/artifact-store" \
+    "$@" \
+    python3 "${repo_root}/ci/run/ref/analyze-ref-generation-run.py" \
+      --repo o/r --run-selector 42 --github-output "" \
+      --json-output "${tmpdir}/${name}.json" >/dev/null 2>"${tmpdir}/${name}.log" \
+    || { cat "${tmpdir}/${name}.log" >&2; fail "analyzer failed (${name})"; }
+}
+
+run_analyzer serial XYMON_CI_ARTIFACT_JOBS=1
+serial_requests="$(wc -l <"${request_log}")"
+run_analyzer concurrent XYMON_CI_ARTIFACT_JOBS=8
+logged_requests="$(wc -l <"${request_log}")"
+concurrent_log="$(tail -n "+$((serial_requests + 1))" "${request_log}")"
+touch "${ranges_ignored}"
+run_analyzer whole XYMON_CI_ARTIFACT_JOBS=8
+whole_log="$(tail -n "+$((logged_requests + 1))" "${request_log}")"
+rm -f "${ranges_ignored}"
+run_analyzer cold XYMON_CI_ARTIFACT_CACHE=1
+logged_requests="$(wc -l <"${request_log}")"
+run_analyzer warm XYMON_CI_ARTIFACT_CACHE=1
+warm_log="$(tail -n "+$((logged_requests + 1))" "${request_log}")"
+
+cmp -s "${tmpdir}/serial.json" "${tmpdir}/concurrent.json" \
+  || fail "serial and concurrent artifact fetches produced different reports"
+cmp -s "${tmpdir}/concurrent.json" "${tmpdir}/whole.json" \
+  || fail "ranged and whole artifact downloads produced different reports"
+for name in cold warm; do
+  cmp -s "${tmpdir}/concurrent.json" "${tmpdir}/${name}.json" \
+    || fail "the artifact store changed the report (${name})"
+done
+
+python3 - "${tmpdir}/concurrent.json" <<'PY' || fail "artifact report does not match the stand-in run"
+import json
+import sys
+
+report = json.load(open(sys.argv[1]))
+deps = report["dependency_reports"]
+coverage = deps["coverage"]
+assert deps["status"] == "available", deps["error"]
+assert coverage["artifact_count"] == 64 and coverage["parsed_report_count"] == 60, coverage
+assert coverage["unreadable_artifact_count"] == 4, coverage
+reasons = {entry["name"].rsplit("__", 1)[-1]: entry["reason"] for entry in deps["unreadable_artifacts"]}
+assert reasons["old"] == reasons["lapsed"] == "artifact expired", reasons
+assert "zip" in reasons["broken"] and "zip" in reasons["empty"], reasons
+outcomes = report["lane_outcome_artifacts"]
+assert outcomes["artifact_count"] == 60 and outcomes["record_count"] == 60, outcomes
+PY
+
+# 60 dependency reports, the broken and empty archives and 60 lane outcomes:
+# one redirect each, whatever the concurrency or Range support.
+for log in "${concurrent_log}" "${whole_log}"; do
+  count="$(grep -c " 302 /repos/o/r/actions/artifacts/" <<<"${log}" || true)"
+  [[ "${count}" == "122" ]] || fail "expected 122 artifact redirects, got ${count}"
+done
+grep -q " 206 /blob/" <<<"${whole_log}" && fail "Range answers served while ranges were ignored"
+# Only the empty archive (416) falls back to a whole download.
+count="$(grep -c " 200 /blob/" <<<"${concurrent_log}" || true)"
+[[ "${count}" == "1" ]] || fail "expected 1 whole blob download with Range support, got ${count}"
+blob_bytes() {
+  awk '$3 ~ /^\/blob\// { total += $4 } END { print total + 0 }' <<<"$1"
+}
+ranged_bytes="$(blob_bytes "${concurrent_log}")"
+whole_bytes="$(blob_bytes "${whole_log}")"
+(( ranged_bytes * 3 < whole_bytes )) \
+  || fail "Range reads downloaded ${ranged_bytes} of ${whole_bytes} archive bytes"
+# Only the broken, empty and expired archives have no stored payload; the
+# expired ones are never requested.
+count="$(grep -c " 302 /repos/o/r/actions/artifacts/" <<<"${warm_log}" || true)"
+[[ "${count}" == "2" ]] || fail "expected 2 artifact redirects with a warm store, got ${count}"
+
+resolve_sync() {
+  env \
+    GITHUB_API_URL="${base_url}" \
+    GH_TOKEN="standin-token" \
+    XYMON_CI_HTTP_CACHE=0 \
+    XYMON_CI_ARTIFACT_CACHE_DIR="${tmpdir}/artifact-store" \
+    python3 "${repo_root}/ci/run/ref/resolve-sync-artifact-runs.py" \
+      --repo o/r --workflow ref.yml --run-selector 42
+}
+logged_requests="$(wc -l <"${request_log}")"
+[[ "$(resolve_sync)" == "42" ]] || fail "resolve-sync-artifact-runs did not find the ref artifact"
+[[ "$(resolve_sync)" == "42" ]] || fail "resolve-sync-artifact-runs lost the stored ref artifact"
+count="$(tail -n "+$((logged_requests + 1))" "${request_log}" | grep -c "/actions/runs/42/artifacts " || true)"
+[[ "${count}" == "2" ]] || fail "expected one two-page artifact listing for two resolutions, got ${count} pages"
+
+echo "OK: analyze-ref-generation-run serial, concurrent, whole-archive and stored artifact fetches agree"
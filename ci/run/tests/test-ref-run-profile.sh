@@ -0,0 +1,121 @@
+#!/usr/bin/env bash
+set -euo pipefail
+IFS=$' \t\n'
+
+script_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+repo_root="$(cd "${script_dir}/../../.." && pwd)"
+
+fail() {
+  echo "FAIL: $*" >&2
+  exit 1
+}
+
+tmpdir="$(mktemp -d)"
+cleanup() {
+  rm -rf "${tmpdir}"
+}
+trap cleanup EXIT
+
+# analyze-ref-generation-run.py --profile-output/--trace-output on a fixture
+# run: build-matrix, then BSD VM lanes that dominate the wall time, an emulated
+# and a native arm64 lane (the native one queued for a runner), a skipped lane,
+# and a control job started when the slowest lane finished.
+cat >"${tmpdir}/run.json" <<'JSON'
+{"id": 7, "run_number": 3, "status": "completed", "conclusion": "success", "created_at": "2024-05-01T10:00:00Z",
+ "html_url": "https://example.invalid/o/r/actions/runs/7"}
+JSON
+python3 - "${tmpdir}/jobs.json" <<'PY'
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+
+start = datetime(2024, 5, 1, 10, 0, 0, tzinfo=timezone.utc)
+
+
+def stamp(seconds):
+    return (start + timedelta(seconds=seconds)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def job(name, labels, created, started, seconds, steps=(), conclusion="success"):
+    entry = {
+        "name": name,
+        "status": "completed",
+        "conclusion": conclusion,
+        "labels": labels,
+        "created_at": stamp(created),
+        "started_at": stamp(started),
+        "completed_at": stamp(started + seconds),
+        "steps": [],
+    }
+    offset = started
+    for step_name, step_seconds in steps:
+        entry["steps"].append(
+            {"name": step_name, "conclusion": "success", "started_at": stamp(offset), "completed_at": stamp(offset + step_seconds)}
+        )
+        offset += step_seconds
+    return entry
+
+
+x64 = ["ubuntu-22.04"]
+jobs = [
+    job("build-matrix", x64, 0, 5, 55),
+    job("FreeBSD 14.1 amd64 - Server", x64, 62, 70, 2400, [("Set up job", 10), ("Boot VM", 600), ("Build", 1790)]),
+    job("NetBSD 10.0 amd64 - Server", x64, 62, 80, 1800, [("Set up job", 10), ("Boot VM", 500), ("Build", 1290)]),
+    job("Debian 12 arm64 - Server", x64, 62, 65, 1500, [("Set up job", 10), ("Build", 1490)]),
+    job("Debian 12 arm64 - Client", ["ubuntu-24.04-arm"], 62, 662, 300, [("Set up job", 10), ("Build", 290)]),
+    job("Debian 12 amd64 - Server", x64, 62, 65, 200, [("Set up job", 10), ("Build", 190)]),
+    job("redispatch-selected-ref", x64, 2472, 2475, 30),
+]
+jobs.append(
+    {"name": "Alpine 3.20 amd64 - Server", "status": "completed", "conclusion": "skipped", "labels": [],
+     "created_at": stamp(62), "started_at": None, "completed_at": None}
+)
+json.dump({"jobs": jobs}, open(sys.argv[1], "w"))
+PY
+
+python3 "${repo_root}/ci/run/ref/analyze-ref-generation-run.py" \
+  --repo o/r --github-output "" \
+  --run-json "${tmpdir}/run.json" --jobs-json "${tmpdir}/jobs.json" \
+  --json-output "${tmpdir}/report.json" \
+  --profile-output "${tmpdir}/profile.md" --trace-output "${tmpdir}/trace.json" \
+  >/dev/null 2>"${tmpdir}/analyze.log" \
+  || { cat "${tmpdir}/analyze.log" >&2; fail "analysis with profile failed"; }
+
+python3 - "${tmpdir}/report.json" "${tmpdir}/trace.json" <<'PY' || fail "profile does not match the fixture run"
+import json
+import sys
+
+profile = json.load(open(sys.argv[1]))["profile"]
+assert profile["job_count"] == 7 and profile["lane_count"] == 5, profile
+assert profile["wall_seconds"] == 2505.0, profile["wall_seconds"]
+path = [entry["job"] for entry in profile["critical_path"]["jobs"]]
+assert path == ["build-matrix", "FreeBSD 14.1 amd64 - Server", "redispatch-selected-ref"], path
+assert profile["critical_path"]["seconds"] == 2505.0, profile["critical_path"]
+groups = {entry["group"]: entry for entry in profile["groups"]}
+assert [entry["group"] for entry in profile["groups"]] == ["bsd-vm", "arm64-emulated", "arm64-native", "linux-amd64"], groups
+assert groups["bsd-vm"]["run_seconds"] == 4200.0 and groups["bsd-vm"]["share_of_lane_time"] == 0.677, groups["bsd-vm"]
+assert groups["arm64-native"]["queue_seconds"] == 600.0, groups["arm64-native"]
+labels = {tuple(entry["labels"]): entry for entry in profile["runner_labels"]}
+assert labels[("ubuntu-22.04",)]["peak_concurrency"] == 4 and labels[("ubuntu-22.04",)]["jobs"] == 6, labels
+assert profile["longest_queue_waits"][0] == {"job": "Debian 12 arm64 - Client", "labels": ["ubuntu-24.04-arm"], "queue_seconds": 600.0}
+steps = {entry["step"]: entry for entry in profile["steps"]}
+assert steps["Boot VM"]["total_seconds"] == 1100.0 and steps["Boot VM"]["slowest_lane"] == "FreeBSD 14.1 amd64 - Server", steps
+assert profile["slowest_lanes"][0]["slowest_step"] == "Build", profile["slowest_lanes"][0]
+
+trace = json.load(open(sys.argv[2]))
+events = trace["traceEvents"]
+processes = {event["pid"]: event["args"]["name"] for event in events if event["name"] == "process_name"}
+assert processes[1] == "bsd-vm" and processes[max(processes)] == "control", processes
+slices = [event for event in events if event["ph"] == "X"]
+critical = sorted(event["name"] for event in slices if "critical" in event["cat"].split(","))
+assert critical == ["FreeBSD 14.1 amd64 - Server", "build-matrix", "redispatch-selected-ref"], critical
+queued = [event for event in slices if event["cat"] == "queue" and event["dur"] == 600_000_000]
+assert len(queued) == 1, queued
+freebsd = next(event for event in slices if event["name"] == "FreeBSD 14.1 amd64 - Server")
+assert freebsd["ts"] == 70_000_000 and freebsd["dur"] == 2_400_000_000, freebsd
+assert sum(event["cat"] == "step" for event in slices) == 12, slices
+PY
+grep -q "## Critical Path" "${tmpdir}/profile.md" || fail "markdown profile has no critical path section"
+grep -q '| `bsd-vm` | 2 |' "${tmpdir}/profile.md" || fail "markdown profile does not list the bsd-vm group"
+
+echo "OK: analyze-ref-generation-run profiles lane durations, queue waits and the critical path"
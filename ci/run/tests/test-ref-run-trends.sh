@@ -0,0 +1,197 @@
+#!/usr/bin/env bash
+set -euo pipefail
+IFS=$' \t\n'
+
+script_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+repo_root="$(cd "${script_dir}/../../.." && pwd)"
+
+# shellcheck source=lib/standin.sh
+source "${script_dir}/lib/standin.sh"
+
+fail() {
+  echo "FAIL: $*" >&2
+  exit 1
+}
+
+tmpdir="$(mktemp -d)"
+server_pid=""
+cleanup() {
+  stop_standin
+  rm -rf "${tmpdir}"
+}
+trap cleanup EXIT
+
+# analyze-ref-generation-run.py --trend-runs against a local stand-in for the
+# GitHub Actions API serving eight completed runs: a lane that got slower in
+# the last three runs, one alternating between passing and failing, and a
+# dependency report whose newly installed package count grows. The trends must
+# name them, and a second analysis must answer from the run history without
+# fetching any run again. A run whose dependency report fails to download is
+# left out of the history and fetched again by the next analysis.
+standin="${tmpdir}/standin.py"
+cat >"${standin}" <<'PY'
+import io
+import json
+import sys
+import zipfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from standin_server import StandinHandler, serve
+
+RUN_COUNT = 8
+FIRST_RUN_ID = 101
+# While this file exists, the newest run's dependency report answers 500.
+failing = Path(sys.argv[3])
+
+
+def stamp(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def lane_job(job_id: int, name: str, started: datetime, seconds: int, conclusion: str) -> dict:
+    return {
+        "id": job_id,
+        "name": name,
+        "status": "completed",
+        "conclusion": conclusion,
+        "started_at": stamp(started),
+        "completed_at": stamp(started + timedelta(seconds=seconds)),
+    }
+
+
+runs = []
+jobs: dict[int, list[dict]] = {}
+artifacts: dict[int, list[dict]] = {}
+blobs: dict[int, bytes] = {}
+for index in range(RUN_COUNT):
+    run_id = FIRST_RUN_ID + index
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(days=index)
+    runs.append(
+        {
+            "id": run_id,
+            "run_number": index + 1,
+            "status": "completed",
+            "conclusion": "success",
+            "created_at": stamp(created),
+            "head_sha": f"{index:040d}",
+            "html_url": f"https://example.invalid/o/r/actions/runs/{run_id}",
+        }
+    )
+    jobs[run_id] = [
+        lane_job(10 * run_id + 1, "fast", created, 60, "success"),
+        lane_job(10 * run_id + 2, "slow", created, 1200 if index >= RUN_COUNT - 3 else 600, "success"),
+        lane_job(10 * run_id + 3, "flaky", created, 300, "failure" if index % 2 else "success"),
+        lane_job(10 * run_id + 4, "build-matrix", created, 10, "success"),
+    ]
+    report = {"mode": "generate", "counts": {"all_newly_installed": 10 + index}}
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("deps-report.json", json.dumps(report))
+    blobs[run_id] = buffer.getvalue()
+    artifacts[run_id] = [
+        {
+            "id": run_id,
+            "name": "deps_cmake_ubuntu-24.04_default__amd64__generate__fast",
+            "expired": False,
+            "size_in_bytes": len(blobs[run_id]),
+            "updated_at": stamp(created),
+            "archive_download_url": f"/repos/o/r/actions/artifacts/{run_id}/zip",
+        }
+    ]
+# The API lists runs newest first.
+runs.reverse()
+
+
+class Handler(StandinHandler):
+    def do_GET(self):
+        parts = self.parts
+        page = int(self.query("page", "1"))
+        per_page = int(self.query("per_page", "30"))
+        if parts == ["repos", "o", "r", "actions", "workflows", "ref.yml", "runs"]:
+            return self.send_json({"workflow_runs": runs[(page - 1) * per_page : page * per_page]})
+        if parts[:5] == ["repos", "o", "r", "actions", "runs"] and len(parts) == 7:
+            run_id = int(parts[5])
+            if parts[6] == "jobs":
+                return self.send_json({"jobs": jobs.get(run_id, [])[(page - 1) * 100 : page * 100]})
+            if parts[6] == "artifacts":
+                chunk = [
+                    dict(artifact, archive_download_url=self.base_url + artifact["archive_download_url"])
+                    for artifact in artifacts.get(run_id, [])[(page - 1) * 100 : page * 100]
+                ]
+                return self.send_json({"artifacts": chunk})
+        if parts[:5] == ["repos", "o", "r", "actions", "artifacts"] and parts[6:] == ["zip"]:
+            return self.send_redirect(f"{self.base_url}/blob/{parts[5]}.zip")
+        if len(parts) == 2 and parts[0] == "blob":
+            blob_id = int(parts[1].removesuffix(".zip"))
+            if blob_id == FIRST_RUN_ID + RUN_COUNT - 1 and failing.exists():
+                return self.send_error(500)
+            body = blobs.get(blob_id)
+            if body is None:
+                return self.send_error(404)
+            return self.send_body(body, "application/zip")
+        return self.send_error(404)
+
+
+serve(Handler, sys.argv[1], sys.argv[2])
+PY
+
+request_log="${tmpdir}/requests.log"
+touch "${tmpdir}/failing"
+start_standin "${standin}" "${tmpdir}/port" "${request_log}" "${tmpdir}/failing"
+
+run_trends() {
+  local name="$1"
+  shift
+  env \
+    GITHUB_API_URL="${base_url}" \
+    GH_TOKEN="standin-token" \
+    XYMON_CI_HTTP_CACHE=0 \
+    XYMON_CI_ARTIFACT_CACHE=0 \
+    python3 "${repo_root}/ci/run/ref/analyze-ref-generation-run.py" \
+      --repo o/r --workflow ref.yml --event all --github-output "" \
+      --history-db "${tmpdir}/history.sqlite" \
+      --json-output "${tmpdir}/${name}.json" --markdown-output "${tmpdir}/${name}.md" \
+      "$@" >/dev/null 2>"${tmpdir}/${name}.log" \
+    || { cat "${tmpdir}/${name}.log" >&2; fail "trend analysis failed (${name})"; }
+}
+
+run_trends partial --trend-runs 5
+grep -q "runs fetched, 1 left out" "${tmpdir}/partial.log" \
+  || fail "the run with a failed dependency report download was not left out"
+rm "${tmpdir}/failing"
+logged_requests="$(wc -l <"${request_log}")"
+run_trends full --trend-runs 8
+full_log="$(tail -n "+$((logged_requests + 1))" "${request_log}")"
+logged_requests="$(wc -l <"${request_log}")"
+run_trends again --trend-runs 8
+again_log="$(tail -n "+$((logged_requests + 1))" "${request_log}")"
+
+count="$(grep -c "/jobs " <<<"${full_log}" || true)"
+[[ "${count}" == "4" ]] || fail "expected only the 4 runs missing from the history to be fetched, got ${count}"
+grep -q "/runs/108/jobs " <<<"${full_log}" || fail "the run left out of the history was not fetched again"
+grep -q "/jobs " <<<"${again_log}" && fail "a run held by the history was fetched again"
+cmp -s "${tmpdir}/full.json" "${tmpdir}/again.json" \
+  || fail "trends differ when served from the run history"
+
+python3 - "${tmpdir}/full.json" <<'PY' || fail "trends do not match the stand-in runs"
+import json
+import sys
+
+trends = json.load(open(sys.argv[1]))
+assert trends["window"]["run_count"] == 8, trends["window"]
+assert trends["window"]["first_run_id"] == 101 and trends["window"]["last_run_id"] == 108, trends["window"]
+assert [entry["lane"] for entry in trends["slowest_lanes"]] == ["slow", "flaky", "fast"], trends["slowest_lanes"]
+regressions = {entry["lane"]: entry for entry in trends["duration_regressions"]}
+assert list(regressions) == ["slow"], regressions
+assert regressions["slow"]["delta_seconds"] == 600, regressions
+flaky = {entry["lane"]: entry for entry in trends["flaky_lanes"]}
+assert list(flaky) == ["flaky"] and flaky["flaky"]["flip_rate"] == 1.0, flaky
+assert flaky["flaky"]["failure_rate"] == 0.5, flaky
+growth = trends["dependency_growth"]
+assert growth["lanes"] == [{"lane": "fast", "first": 10, "latest": 17, "delta": 7}], growth["lanes"]
+assert [entry["all_newly_installed"] for entry in growth["per_run"]] == list(range(10, 18)), growth["per_run"]
+PY
+grep -q "## Duration Regressions" "${tmpdir}/full.md" || fail "markdown trend report has no regression section"
+
+echo "OK: analyze-ref-generation-run trends are computed once per run and served from the history"
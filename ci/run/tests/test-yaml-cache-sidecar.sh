@@ -0,0 +1,90 @@
+#!/usr/bin/env bash
+set -euo pipefail
+IFS=$' \t\n'
+
+script_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+repo_root="$(cd "${script_dir}/../../.." && pwd)"
+
+fail() {
+  echo "FAIL: $*" >&2
+  exit 1
+}
+
+tmpdir="$(mktemp -d)"
+trap 'rm -rf "${tmpdir}"' EXIT
+
+# yaml_cache.py stores each parse as a pickle sidecar so a later process skips
+# the YAML parse. Each step below is its own process and counts the safe_load
+# calls yaml_cache makes, so only the sidecar can explain a parse-free load.
+export XYMON_CI_YAML_CACHE_DIR="${tmpdir}/cache"
+export XYMON_CI_YAML_CACHE=1
+unset XYMON_CI_YAML_CACHE_MAX_MB
+
+cat >"${tmpdir}/doc.yml" <<'YAML'
+source:
+  generated_by: test
+platforms:
+  debian-12:
+    runtime: docker
+    image: debian:12
+    tags: [bookworm, "12"]
+YAML
+
+load() {
+  local expected_parses="$1"
+  (
+    cd "${repo_root}"
+    PYTHONPATH="ci/run/ref" python3 - "${tmpdir}/doc.yml" "${expected_parses}" <<'PY'
+import sys
+from pathlib import Path
+
+import yaml_cache
+
+path, expected_parses = Path(sys.argv[1]), int(sys.argv[2])
+parses = []
+real_safe_load = yaml_cache.safe_load
+
+
+def counting_safe_load(raw):
+    parses.append(raw)
+    return real_safe_load(raw)
+
+
+yaml_cache.safe_load = counting_safe_load
+data = yaml_cache.load_yaml_file(path)
+expected = real_safe_load(path.read_bytes())
+if data != expected:
+    raise SystemExit(f"cached load differs from safe_load: {data!r} != {expected!r}")
+if len(parses) != expected_parses:
+    raise SystemExit(f"expected {expected_parses} YAML parse(s), got {len(parses)}")
+PY
+  )
+}
+
+sidecars() {
+  find "${XYMON_CI_YAML_CACHE_DIR}" -name '*.pickle' -type f | sort
+}
+
+load 1 || fail "first process did not parse the file"
+mapfile -t written < <(sidecars)
+[[ "${#written[@]}" -eq 1 ]] || fail "expected one sidecar after the first load, got ${#written[@]}"
+sidecar="${written[0]}"
+
+load 0 || fail "second process was not served from the sidecar"
+
+# A sidecar that does not unpickle falls back to safe_load and is rewritten.
+printf 'not a pickle' >"${tmpdir}/corrupt"
+cp "${tmpdir}/corrupt" "${sidecar}"
+load 1 || fail "corrupt sidecar did not fall back to safe_load"
+if cmp -s "${tmpdir}/corrupt" "${sidecar}"; then
+  fail "corrupt sidecar was not rewritten"
+fi
+load 0 || fail "rewritten sidecar was not served"
+
+# Unreadable contents are treated the same way, e.g. a truncated write.
+truncate -s 5 "${sidecar}"
+load 1 || fail "truncated sidecar did not fall back to safe_load"
+
+XYMON_CI_YAML_CACHE=0 load 1 || fail "XYMON_CI_YAML_CACHE=0 still read the sidecar"
+
+echo "OK: yaml cache sidecars"
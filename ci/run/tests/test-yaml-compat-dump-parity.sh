@@ -0,0 +1,63 @@
+#!/usr/bin/env bash
+set -euo pipefail
+IFS=$' \t\n'
+
+script_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+repo_root="$(cd "${script_dir}/../../.." && pwd)"
+
+fail() {
+  echo "FAIL: $*" >&2
+  exit 1
+}
+
+tmpdir="$(mktemp -d)"
+trap 'rm -rf "${tmpdir}"' EXIT
+
+# Generated catalogs must re-render byte-identically under both the libyaml
+# and the pure-Python dumper, and match what is committed, so switching
+# backends never churns .github/data/. Lane files are rewritten by
+# reconcile-allow-failure.py, so both dumpers must at least agree on them.
+render() {
+  local backend_env="$1"
+  local out_dir="$2"
+  mkdir -p "${out_dir}"
+  (
+    cd "${repo_root}"
+    env XYMON_CI_YAML_PURE="${backend_env}" PYTHONPATH="ci/run/ref" python3 - "${out_dir}" <<'PY'
+import sys
+from pathlib import Path
+
+import yaml_compat
+
+out_dir = Path(sys.argv[1])
+paths = sorted(Path(".github/data").glob("*.yml"))
+paths += [Path("ci/run/ref/preferred-platforms.yml")]
+paths += sorted(Path("ci/run/ref/lanes").glob("*.yml"))
+for path in paths:
+    data = yaml_compat.safe_load(path.read_text(encoding="utf-8"))
+    target = out_dir / str(path).replace("/", "__")
+    target.write_text(yaml_compat.safe_dump(data, sort_keys=False), encoding="utf-8")
+print(yaml_compat.BACKEND)
+PY
+  )
+}
+
+pure_backend="$(render 1 "${tmpdir}/pure")"
+[ "${pure_backend}" = "pure" ] || fail "XYMON_CI_YAML_PURE=1 did not select the pure-Python dumper"
+
+auto_backend="$(render 0 "${tmpdir}/auto")"
+if [ "${auto_backend}" != "libyaml" ]; then
+  echo "NOTE: PyYAML built without libyaml; only the pure-Python path was checked"
+fi
+
+for rendered in "${tmpdir}/pure"/*; do
+  name="$(basename "${rendered}")"
+  cmp -s "${rendered}" "${tmpdir}/auto/${name}" \
+    || fail "${auto_backend} and pure dumpers differ for ${name//__//}"
+done
+
+for source in "${repo_root}"/.github/data/*.yml "${repo_root}/ci/run/ref/preferred-platforms.yml"; do
+  rel="${source#"${repo_root}/"}"
+  cmp -s "${source}" "${tmpdir}/auto/${rel//\//__}" \
+    || fail "${rel} does not round-trip byte-identically through yaml_compat.safe_dump"
+done